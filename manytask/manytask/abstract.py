@@ -1,12 +1,16 @@
+import threading
+import time
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Callable
+from typing import Any, Callable, Collection, Iterator
 
 from authlib.integrations.flask_client import OAuth
 
 from .config import ManytaskConfig, ManytaskFinalGradeConfig, ManytaskGroupConfig, ManytaskTaskConfig
 from .course import Course, CourseConfig, CourseStatus
+from .models import ROLE_NAMESPACE_ADMIN
 
 
 @dataclass
@@ -37,6 +41,175 @@ class StoredUser:
         return RmsUser(id=self.rms_id, username=self.username, name=f"{self.first_name} {self.last_name}")
 
 
+@dataclass
+class AuthContext:
+    """Authorization facts about one user, resolved once per request.
+
+    :param username: manytask username the context was built for
+    :param stored_user: stored user, ``None`` if the user is not in the database
+    :param instance_admin: whether the user is an instance admin
+    :param namespace_roles: namespace id -> user's role there (owners get ``namespace_admin``)
+    :param course_roles: enrolled course name -> the course admin flag of the enrollment
+    :param course_namespaces: course name -> namespace id, for enrolled courses and
+        courses of namespaces the user administers
+    """
+
+    username: str
+    stored_user: StoredUser | None = None
+    instance_admin: bool = False
+    namespace_roles: dict[int, str] = field(default_factory=dict)
+    course_roles: dict[str, bool] = field(default_factory=dict)
+    course_namespaces: dict[str, int | None] = field(default_factory=dict)
+
+    @property
+    def namespace_admin_namespaces(self) -> list[int]:
+        return [namespace_id for namespace_id, role in self.namespace_roles.items() if role == ROLE_NAMESPACE_ADMIN]
+
+    def is_enrolled(self, course_name: str) -> bool:
+        return course_name in self.course_roles
+
+    def is_namespace_admin(self, course_name: str) -> bool:
+        namespace_id = self.course_namespaces.get(course_name)
+        return namespace_id is not None and self.namespace_roles.get(namespace_id) == ROLE_NAMESPACE_ADMIN
+
+    def is_course_admin(self, course_name: str) -> bool:
+        """Same rule as :meth:`StorageApi.check_if_course_admin`"""
+        return self.instance_admin or self.is_namespace_admin(course_name) or self.course_roles.get(course_name, False)
+
+
+@dataclass
+class StudentRepo:
+    """Provisioning state of a student's repository stored on the enrollment
+
+    :param url: url of the repository in the RMS
+    :param repo_id: id of the repository in the RMS, ``None`` if the RMS did not report it
+    :param created_at: when the repository was first recorded
+    :param verified_at: when the RMS last confirmed the repository exists
+    """
+
+    url: str
+    repo_id: str | None
+    created_at: datetime
+    verified_at: datetime
+
+
+@dataclass
+class RepoProvisioning:
+    """Bulk provisioning state of a student's repository
+
+    :param requested_at: when an admin requested the repository
+    :param repo_url: url of the provisioned repository, ``None`` until it is created
+    :param error: reason the last attempt failed
+    """
+
+    username: str
+    requested_at: datetime
+    repo_url: str | None = None
+    error: str | None = None
+
+    @property
+    def status(self) -> str:
+        if self.repo_url is not None:
+            return "done"
+        return "failed" if self.error is not None else "pending"
+
+
+@dataclass
+class ReportReceipt:
+    """Score report stored in the report queue, the receipt id is returned to the client
+
+    :param receipt_id: id of the queued report
+    :param applied_at: when the report was applied, ``None`` while it waits in the queue
+    :param final_score: task score stored after applying the report
+    :param error: reason the report could not be applied
+    """
+
+    receipt_id: int
+    course_name: str
+    username: str
+    task_name: str
+    reported_score: int
+    submit_time: datetime
+    check_deadline: bool = True
+    allow_reduction: bool = False
+    applied_at: datetime | None = None
+    final_score: int | None = None
+    error: str | None = None
+
+    @property
+    def status(self) -> str:
+        if self.applied_at is None:
+            return "queued"
+        return "failed" if self.error is not None else "applied"
+
+
+@dataclass
+class RmsJob:
+    """Persistent job running RMS side effects of a course off the request path
+
+    :param kind: what the job does, e.g. ``create_course``
+    :param params: arguments of the RMS calls
+    :param state: results of the finished steps, a resumed job skips them
+    :param status: ``queued``, ``running``, ``done`` or ``failed``
+    :param attempts: number of times a runner picked the job
+    :param error: reason the last attempt failed
+    """
+
+    job_id: int
+    kind: str
+    course_name: str
+    params: dict[str, Any]
+    state: dict[str, Any] = field(default_factory=dict)
+    status: str = "queued"
+    attempts: int = 0
+    error: str | None = None
+    created_by: str | None = None
+    created_at: datetime | None = None
+    updated_at: datetime | None = None
+
+
+SUBMISSION_SOURCE_REPORT = "report"
+SUBMISSION_SOURCE_QUEUE = "queue"
+
+# sort keys of StorageApi.get_scores_with_names_page, scores of a task are sorted by TASK_SORT_PREFIX + task name
+STUDENT_SORT_KEYS = ("username", "first_name", "last_name", "comment", "grade", "total_score")
+TASK_SORT_PREFIX = "task:"
+
+
+@dataclass
+class ReportedSubmission:
+    """Accepted score report appended to the submission log
+
+    :param reported_score: score reported by the checker
+    :param multiplier: deadline multiplier applied to the reported score
+    :param submit_time: submission time the multiplier was calculated for
+    :param source: how the report was received, one of ``SUBMISSION_SOURCE_*``
+    """
+
+    reported_score: int
+    multiplier: float
+    submit_time: datetime
+    source: str = SUBMISSION_SOURCE_REPORT
+
+
+@dataclass
+class TaskSubmissionStats:
+    """Aggregates of the submission log for one task
+
+    :param submissions: number of accepted reports
+    :param students: number of students with at least one report
+    :param solved_students: number of students with a solving report
+    :param avg_attempts_to_solve: mean number of reports up to and including the first solving one
+    :param avg_seconds_to_solve: mean time from the first report to the first solving one
+    """
+
+    submissions: int
+    students: int
+    solved_students: int
+    avg_attempts_to_solve: float | None = None
+    avg_seconds_to_solve: float | None = None
+
+
 class StorageApi(ABC):
     @abstractmethod
     def get_scores(
@@ -70,6 +243,9 @@ class StorageApi(ABC):
         auth_id: int,
     ) -> StoredUser | None: ...
 
+    @abstractmethod
+    def get_auth_context(self, username: str) -> AuthContext: ...
+
     @abstractmethod
     def check_if_instance_admin(
         self,
@@ -93,11 +269,53 @@ class StorageApi(ABC):
     @abstractmethod
     def sync_user_on_course(self, course_name: str, username: str, course_admin: bool) -> None: ...
 
+    @abstractmethod
+    def get_student_repo(self, course_name: str, username: str) -> StudentRepo | None: ...
+
+    @abstractmethod
+    def store_student_repo(self, course_name: str, username: str, url: str, repo_id: str | None = None) -> None: ...
+
+    @abstractmethod
+    def clear_student_repo(self, course_name: str, username: str) -> None: ...
+
+    @abstractmethod
+    def request_repo_provisioning(self, course_name: str, usernames: Collection[str]) -> list[str]: ...
+
+    @abstractmethod
+    def fail_repo_provisioning(self, course_name: str, username: str, error: str) -> None: ...
+
+    @abstractmethod
+    def get_repo_provisioning(self, course_name: str) -> list[RepoProvisioning]: ...
+
     @abstractmethod
     def get_all_scores_with_names(
         self, course_name: str
     ) -> dict[str, tuple[dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]]: ...
 
+    @abstractmethod
+    def iter_scores_with_names(
+        self, course_name: str, batch_size: int = 500
+    ) -> Iterator[tuple[str, dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]]: ...
+
+    @abstractmethod
+    def get_students_scores_with_names(
+        self, course_name: str, usernames: Collection[str]
+    ) -> dict[str, tuple[dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]]: ...
+
+    @abstractmethod
+    def get_scores_with_names_page(
+        self,
+        course_name: str,
+        offset: int,
+        limit: int,
+        order_by: str = "username",
+        descending: bool = False,
+        search: str | None = None,
+        search_names: bool = False,
+    ) -> tuple[
+        int, dict[str, tuple[dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]]
+    ]: ...
+
     @abstractmethod
     def update_student_comment(self, course_name: str, username: str, comment: str | None) -> None: ...
 
@@ -110,12 +328,83 @@ class StorageApi(ABC):
     @abstractmethod
     def store_score(self, course_name: str, username: str, task_name: str, update_fn: Callable[..., Any]) -> int: ...
 
+    @abstractmethod
+    def upsert_score(
+        self,
+        course_name: str,
+        username: str,
+        task_name: str,
+        score: int,
+        allow_reduction: bool = False,
+        submission: ReportedSubmission | None = None,
+    ) -> int: ...
+
+    @abstractmethod
+    def update_scores(self, course_name: str, changes: dict[str, dict[str, int]]) -> dict[str, dict[str, int]]: ...
+
+    @abstractmethod
+    def get_submission_stats(self, course_name: str) -> dict[str, TaskSubmissionStats]: ...
+
+    @abstractmethod
+    def enqueue_report(
+        self,
+        course_name: str,
+        username: str,
+        task_name: str,
+        reported_score: int,
+        submit_time: datetime,
+        check_deadline: bool = True,
+        allow_reduction: bool = False,
+    ) -> ReportReceipt: ...
+
+    @abstractmethod
+    def get_report_receipt(self, course_name: str, receipt_id: int) -> ReportReceipt | None: ...
+
+    @abstractmethod
+    def apply_queued_reports(
+        self,
+        deadline_multiplier: Callable[[ReportReceipt], float],
+        max_students: int = 100,
+    ) -> list[ReportReceipt]: ...
+
+    @abstractmethod
+    def enqueue_rms_job(
+        self, kind: str, course_name: str, params: dict[str, Any], created_by: str | None = None
+    ) -> RmsJob: ...
+
+    @abstractmethod
+    def get_rms_job(self, job_id: int) -> RmsJob | None: ...
+
+    @abstractmethod
+    def claim_rms_job(self, lease: float) -> RmsJob | None: ...
+
+    @abstractmethod
+    def save_rms_job_state(self, job_id: int, state: dict[str, Any], lease: float) -> None: ...
+
+    @abstractmethod
+    def finish_rms_job(self, job_id: int, error: str | None = None, retry_in: float | None = None) -> None: ...
+
+    @abstractmethod
+    def retry_rms_job(self, job_id: int) -> RmsJob | None: ...
+
     @abstractmethod
     def create_course(
         self,
         settings_config: CourseConfig,
     ) -> bool: ...
 
+    @abstractmethod
+    def archive_course(self, course_name: str, snapshot: bytes) -> bool: ...
+
+    @abstractmethod
+    def get_course_snapshot(self, course_name: str) -> bytes | None: ...
+
+    @abstractmethod
+    def unarchive_course(self, course_name: str, status: CourseStatus = CourseStatus.FINISHED) -> bool: ...
+
+    @abstractmethod
+    def find_course_by_students_group(self, gitlab_course_students_group: str) -> str | None: ...
+
     @abstractmethod
     def edit_course(
         self,
@@ -270,6 +559,9 @@ class StorageApi(ABC):
     @abstractmethod
     def recalculate_all_grades(self, course_name: str) -> None: ...
 
+    @abstractmethod
+    def recalculate_grades(self, course_name: str, usernames: Collection[str] | None = None) -> None: ...
+
     @abstractmethod
     def calculate_and_save_grade(
         self,
@@ -295,7 +587,79 @@ class RmsApiException(Exception):
     pass
 
 
+class RmsUserNotFoundException(RmsApiException):
+    """The RMS has no user with the username, unlike other errors this answer is cached"""
+
+
+# memoized url builders of the RMS implementations keep this many urls
+RMS_URL_CACHE_SIZE = 16384
+# usernames whose RMS users are kept by RmsUserCache
+RMS_USER_CACHE_SIZE = 4096
+
+
+class RmsUserCache:
+    """Bounded LRU of RMS users by username with a TTL
+
+    Unknown usernames are remembered for negative_ttl seconds: the RMS raised RmsUserNotFoundException
+    for them and it is raised again without a request. Other errors are not cached.
+    """
+
+    def __init__(self, ttl: float, negative_ttl: float, maxsize: int = RMS_USER_CACHE_SIZE):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        # username -> (expires at, user or None for an unknown username)
+        self._users: OrderedDict[str, tuple[float, RmsUser | None]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, username: str, load: Callable[[str], RmsUser]) -> RmsUser:
+        """Cached user or the one loaded from the RMS
+
+        :param username: RMS username
+        :param load: RMS lookup raising RmsUserNotFoundException for unknown usernames
+        :return: user with the username
+        """
+        with self._lock:
+            cached = self._users.get(username)
+            if cached is not None and time.monotonic() < cached[0]:
+                self._users.move_to_end(username)
+                if cached[1] is None:
+                    raise RmsUserNotFoundException(f"No users found for username {username}")
+                return cached[1]
+
+        try:
+            rms_user = load(username)
+        except RmsUserNotFoundException:
+            self._store(username, None, self.negative_ttl)
+            raise
+        self._store(username, rms_user, self.ttl)
+        return rms_user
+
+    def put(self, rms_user: RmsUser) -> None:
+        self._store(rms_user.username, rms_user, self.ttl)
+
+    def forget(self, username: str) -> None:
+        with self._lock:
+            self._users.pop(username, None)
+
+    def _store(self, username: str, rms_user: RmsUser | None, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._users[username] = (time.monotonic() + ttl, rms_user)
+            self._users.move_to_end(username)
+            while len(self._users) > self.maxsize:
+                self._users.popitem(last=False)
+
+
 class RmsApi(ABC):
+    """Repository management system: users, course groups and student repositories
+
+    The get_url_for_* methods are pure functions of the instance configuration, the course
+    settings and the username. They never call the RMS and their results are memoized, so pages
+    listing every student of a course can build the urls of all rows.
+    """
+
     _base_url: str
 
     @property
@@ -373,7 +737,7 @@ class RmsApi(ABC):
         rms_user: RmsUser,
         course_students_group: str,
         course_public_repo: str,
-    ) -> None: ...
+    ) -> str | None: ...
 
     @abstractmethod
     def get_url_for_task_base(self, course_public_repo: str, default_branch: str) -> str: ...
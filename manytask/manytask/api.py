@@ -5,16 +5,16 @@ import logging
 import secrets
 from datetime import datetime, timedelta
 from http import HTTPStatus
-from typing import Any, Callable, TypeVar
+from typing import Any, Callable, Iterator, TypeVar
 
 import yaml
-from flask import Blueprint, abort, current_app, jsonify, request, session
+from flask import Blueprint, Response, abort, current_app, jsonify, request, session, stream_with_context
 from flask.typing import ResponseReturnValue
 from enum import Enum
 from pydantic import ValidationError
 from sqlalchemy.exc import IntegrityError, NoResultFound
 
-from manytask.abstract import RmsApiException, StorageApi, StoredUser
+from manytask.abstract import ReportedSubmission, ReportReceipt, RmsApiException, RmsJob, StorageApi, StoredUser
 from manytask.database import TaskDisabledError
 
 from .abstract import RmsApi, RmsUser
@@ -30,6 +30,7 @@ from .config import (
     IsAdminResponse,
     ManytaskGroupConfig,
     ManytaskTaskConfig,
+    ManytaskUpdateDatabaseChanges,
     ManytaskUpdateDatabasePayload,
     NamespaceListResponse,
     NamespaceResponse,
@@ -37,13 +38,35 @@ from .config import (
     NamespaceUsersListResponse,
     NamespaceWithRoleResponse,
     PingResponse,
+    ProvisionReposRequest,
+    ProvisionReposResponse,
+    RepoProvisioningItem,
+    RepoProvisioningResponse,
+    RowData,
+    ReportReceiptResponse,
+    RmsJobResponse,
+    SubmissionStatsResponse,
+    TaskSubmissionStatsItem,
     UpdateUserRoleRequest,
     UserOnNamespaceResponse,
 )
 from pydantic import BaseModel
+from . import archive, events
 from .course import DEFAULT_TIMEZONE, Course, CourseStatus, get_current_time
 from .main import CustomFlask
-from .utils.database import get_database_table_data
+from .metrics import REPORTS_PROCESSED
+from .repo_provisioning import start_provisioning
+from .report_queue import REPORT_QUEUE_ENABLED, wake_applier
+from .rms_jobs import JOB_STEPS, enqueue_course_creation, wake_runner
+from .utils.database import (
+    get_database_table_data,
+    get_database_table_page,
+    get_database_table_rows,
+    iter_database_table_rows,
+    page_database_table,
+    to_columnar_table,
+)
+from .utils.export import iter_csv, iter_jsonl
 from .utils.generic import (
     calculate_percent,
     check_course_creation_namespace_permission,
@@ -56,9 +79,14 @@ logger = logging.getLogger(__name__)
 bp = Blueprint("api", __name__, url_prefix="/api/<course_name>")
 namespace_bp = Blueprint("namespace_api", __name__, url_prefix="/api")
 
+# students per page of /database requested with ?page=
+DATABASE_PAGE_SIZE = 100
+MAX_DATABASE_PAGE_SIZE = 1000
+DATABASE_FORMATS = ("rows", "columnar")
+
 
-def __get_course_or_not_found(storage_api: StorageApi, course_name: str) -> Course:
-    course = storage_api.get_course(course_name)
+def __get_course_or_not_found(app: CustomFlask, course_name: str) -> Course:
+    course = archive.get_course(app, course_name)
     if course is None:
         logger.warning("Course not found: %s", course_name)
         abort(HTTPStatus.NOT_FOUND, f"Course '{sanitize_log_data(course_name)}' not found")
@@ -192,7 +220,7 @@ def requires_token(f: Callable[..., Any]) -> Callable[..., Any]:
 
         logger.debug("Checking token for course=%s", course_name)
 
-        course = __get_course_or_not_found(app.storage_api, course_name)
+        course = __get_course_or_not_found(app, course_name)
         course_token = course.token
 
         form_token = request.form.get("token")
@@ -232,6 +260,23 @@ def requires_token(f: Callable[..., Any]) -> Callable[..., Any]:
     return decorated
 
 
+def requires_live_course(f: Callable[..., Any]) -> Callable[..., Any]:
+    """Reject changes of an archived course, its pages are served from a snapshot"""
+
+    @functools.wraps(f)
+    def decorated(*args: Any, **kwargs: Any) -> Any:
+        app: CustomFlask = current_app  # type: ignore
+
+        course_name = kwargs["course_name"]
+        course = archive.get_course(app, course_name)
+        if course is not None and course.status == CourseStatus.ARCHIVED:
+            logger.warning("Rejected a change of archived course=%s", course_name)
+            abort(HTTPStatus.CONFLICT, f"Course '{sanitize_log_data(course_name)}' is archived, unarchive it first")
+        return f(*args, **kwargs)
+
+    return decorated
+
+
 class AuthMethod(Enum):
     COURSE_TOKEN = "course_token"
     SESSION = "session"
@@ -288,18 +333,38 @@ def _update_score(
         return old_score
 
     if check_deadline:
-        extra_time = _parse_flags(flags)
-
-        multiplier = group.get_current_percent_multiplier(
-            now=submit_time - extra_time,
-            deadlines_type=course.deadlines_type,
-        )
-        score = int(score * multiplier)
-        logger.debug("Applied multiplier=%s, adjusted_score=%s", multiplier, score)
+        score = _apply_deadline_multiplier(course, group, score, flags, submit_time)
 
     return score if allow_reduction else max(old_score, score)
 
 
+def _deadline_multiplier(
+    course: Course,
+    group: ManytaskGroupConfig,
+    flags: str,
+    submit_time: datetime,
+) -> float:
+    extra_time = _parse_flags(flags)
+
+    return group.get_current_percent_multiplier(
+        now=submit_time - extra_time,
+        deadlines_type=course.deadlines_type,
+    )
+
+
+def _apply_deadline_multiplier(
+    course: Course,
+    group: ManytaskGroupConfig,
+    score: int,
+    flags: str,
+    submit_time: datetime,
+) -> int:
+    multiplier = _deadline_multiplier(course, group, flags, submit_time)
+    score = int(score * multiplier)
+    logger.debug("Applied multiplier=%s, adjusted_score=%s", multiplier, score)
+    return score
+
+
 @bp.get("/healthcheck")
 @requires_ready
 def healthcheck() -> ResponseReturnValue:
@@ -389,9 +454,89 @@ def _process_score(form_data: dict[str, Any], task_score: int) -> int | None:
         abort(HTTPStatus.BAD_REQUEST, f"Cannot parse `score` <{sanitize_log_data(score_str)}> to a number")
 
 
+def _recalculate_grade(storage_api: StorageApi, course_name: str, username: str) -> dict[str, Any] | None:
+    """Recalculate and save the final grade of the student, errors are logged and ignored
+
+    :return: scores, total_score and percent of the student or None if the recalculation failed
+    """
+    try:
+        # Get all student scores to recalculate grade
+        student_scores = storage_api.get_scores(course_name, username)
+        bonus_score = storage_api.get_bonus_score(course_name, username)
+        max_score = storage_api.max_score_started(course_name)
+
+        total_score = sum(student_scores.values()) + bonus_score
+        percent = calculate_percent(total_score, max_score)
+
+        # Count large tasks solved
+        large_count = 0
+        for group_config in storage_api.get_groups(course_name, enabled=True, started=True):
+            for task_config in group_config.tasks:
+                if task_config.is_large and task_config.enabled:
+                    task_score = student_scores.get(task_config.name, 0)
+                    if task_score >= task_config.min_score:
+                        large_count += 1
+
+        student_data = {
+            "username": username,
+            "scores": student_scores,
+            "total_score": total_score,
+            "percent": percent,
+            "large_count": large_count,
+        }
+
+        storage_api.calculate_and_save_grade(course_name, username, student_data)
+        logger.info("Recalculated and saved grade for user=%s after score update", username)
+        return student_data
+    except Exception as e:
+        logger.error("Failed to recalculate grade for user=%s: %s", username, str(e))
+        # Don't fail the request if grade calculation fails
+        return None
+
+
+def _publish_student_row(
+    app: CustomFlask, course_name: str, username: str, tasks: list[str], student_data: dict[str, Any] | None
+) -> None:
+    """Send the new scores and the effective grade of the student to the live database pages
+
+    :param tasks: tasks with updated scores
+    :param student_data: result of _recalculate_grade
+    """
+    if events.get_broker(app) is None or student_data is None:
+        return
+    try:
+        event = {
+            "type": "row",
+            "username": username,
+            "scores": {task: student_data["scores"].get(task, 0) for task in tasks},
+            "total_score": student_data["total_score"],
+            "percent": student_data["percent"],
+            "grade": app.storage_api.get_effective_grade(course_name, username),
+            "grade_is_override": app.storage_api.is_grade_overridden(course_name, username),
+        }
+    except Exception:
+        logger.exception("Failed to build the live update for user=%s", username)
+        return
+    events.publish(app, course_name, event)
+
+
+def _report_receipt_response(receipt: ReportReceipt) -> ReportReceiptResponse:
+    return ReportReceiptResponse(
+        receipt_id=receipt.receipt_id,
+        status=receipt.status,
+        username=receipt.username,
+        task=receipt.task_name,
+        reported_score=receipt.reported_score,
+        submit_time=receipt.submit_time.isoformat(sep=" "),
+        score=receipt.final_score,
+        error=receipt.error,
+    )
+
+
 @bp.post("/report")
 @requires_token
 @requires_ready
+@requires_live_course
 def report_score(course_name: str) -> ResponseReturnValue:
     app: CustomFlask = current_app  # type: ignore
     course: Course = app.storage_api.get_course(course_name)  # type: ignore
@@ -432,52 +577,38 @@ def report_score(course_name: str) -> ResponseReturnValue:
         f"reported_score={reported_score}, submit_time={submit_time}, check_deadline={check_deadline}"
     )
 
-    update_function = functools.partial(
-        _update_score,
-        course,
-        group,
-        task,
-        reported_score,
-        submit_time=submit_time,
-        check_deadline=check_deadline,
+    if app.config.get(REPORT_QUEUE_ENABLED, False):
+        receipt = app.storage_api.enqueue_report(
+            course.course_name,
+            manytask_username,
+            task.name,
+            reported_score,
+            submit_time,
+            check_deadline=check_deadline,
+            allow_reduction=allow_reduction,
+        )
+        wake_applier(app)
+        return jsonify(_report_receipt_response(receipt).model_dump()), HTTPStatus.ACCEPTED
+
+    multiplier = _deadline_multiplier(course, group, "", submit_time) if check_deadline else 1.0
+    score = int(reported_score * multiplier)
+    logger.debug("Applied multiplier=%s, adjusted_score=%s", multiplier, score)
+    # max/penalty rules of _update_score are applied by the database in one statement
+    final_score = app.storage_api.upsert_score(
+        course.course_name,
+        manytask_username,
+        task.name,
+        score,
         allow_reduction=allow_reduction,
+        submission=ReportedSubmission(reported_score, multiplier, submit_time),
     )
-    final_score = app.storage_api.store_score(course.course_name, manytask_username, task.name, update_function)
 
     logger.info("Stored final_score=%s for user=%s, task=%s", final_score, manytask_username, task.name)
+    REPORTS_PROCESSED.labels(course=course.course_name).inc()
 
     # Recalculate and save student's final grade after score update
-    try:
-        # Get all student scores to recalculate grade
-        student_scores = app.storage_api.get_scores(course.course_name, manytask_username)
-        bonus_score = app.storage_api.get_bonus_score(course.course_name, manytask_username)
-        max_score = app.storage_api.max_score_started(course.course_name)
-
-        total_score = sum(student_scores.values()) + bonus_score
-        percent = calculate_percent(total_score, max_score)
-
-        # Count large tasks solved
-        large_count = 0
-        for group_config in app.storage_api.get_groups(course.course_name, enabled=True, started=True):
-            for task_config in group_config.tasks:
-                if task_config.is_large and task_config.enabled:
-                    task_score = student_scores.get(task_config.name, 0)
-                    if task_score >= task_config.min_score:
-                        large_count += 1
-
-        student_data = {
-            "username": manytask_username,
-            "scores": student_scores,
-            "total_score": total_score,
-            "percent": percent,
-            "large_count": large_count,
-        }
-
-        app.storage_api.calculate_and_save_grade(course.course_name, manytask_username, student_data)
-        logger.info("Recalculated and saved grade for user=%s after score update", manytask_username)
-    except Exception as e:
-        logger.error("Failed to recalculate grade for user=%s: %s", manytask_username, str(e))
-        # Don't fail the request if grade calculation fails
+    student_data = _recalculate_grade(app.storage_api, course.course_name, manytask_username)
+    _publish_student_row(app, course.course_name, manytask_username, [task.name], student_data)
 
     return {
         "user_id": rms_user.id,
@@ -489,6 +620,18 @@ def report_score(course_name: str) -> ResponseReturnValue:
     }, HTTPStatus.OK
 
 
+@bp.get("/report/<int:receipt_id>")
+@requires_token
+def get_report_receipt(course_name: str, receipt_id: int) -> ResponseReturnValue:
+    app: CustomFlask = current_app  # type: ignore
+
+    receipt = app.storage_api.get_report_receipt(course_name, receipt_id)
+    if receipt is None:
+        return jsonify(ErrorResponse(error=f"Report {receipt_id} not found").model_dump()), HTTPStatus.NOT_FOUND
+
+    return jsonify(_report_receipt_response(receipt).model_dump()), HTTPStatus.OK
+
+
 @bp.get("/score")
 @requires_token
 @requires_ready
@@ -573,6 +716,17 @@ def get_deadlines(course_name: str) -> ResponseReturnValue:
     )
 
 
+@bp.get("/submissions/stats")
+@requires_token
+def get_submission_stats(course_name: str) -> ResponseReturnValue:
+    app: CustomFlask = current_app  # type: ignore
+    stats = app.storage_api.get_submission_stats(course_name)
+    items = [
+        TaskSubmissionStatsItem(task_name=task_name, **vars(task_stats)) for task_name, task_stats in stats.items()
+    ]
+    return jsonify(SubmissionStatsResponse(course=course_name, tasks=items).model_dump()), HTTPStatus.OK
+
+
 def _format_config_validation_error(course_name: str, exc: ValidationError) -> str:
     details = []
     for error in exc.errors():
@@ -584,6 +738,7 @@ def _format_config_validation_error(course_name: str, exc: ValidationError) -> s
 
 @bp.post("/update_config")
 @requires_token
+@requires_live_course
 def update_config(course_name: str) -> ResponseReturnValue:
     app: CustomFlask = current_app  # type: ignore
     course: Course = app.storage_api.get_course(course_name)  # type: ignore
@@ -625,6 +780,37 @@ def update_config(course_name: str) -> ResponseReturnValue:
     return "", HTTPStatus.OK
 
 
+@bp.post("/archive")
+@requires_token
+def archive_course(course_name: str) -> ResponseReturnValue:
+    """Freeze a finished course, its pages are served from a snapshot until it is unarchived"""
+    app: CustomFlask = current_app  # type: ignore
+    course = __get_course_or_not_found(app, course_name)
+
+    if not archive.archive_course(app, course):
+        abort(
+            HTTPStatus.CONFLICT,
+            f"Cannot archive course '{sanitize_log_data(course_name)}' with status {course.status.value}, "
+            "only finished courses can be archived.",
+        )
+
+    logger.info("Archived course=%s", course_name)
+    return "", HTTPStatus.OK
+
+
+@bp.post("/unarchive")
+@requires_token
+def unarchive_course(course_name: str) -> ResponseReturnValue:
+    """Serve the pages of an archived course live again, the course stays finished"""
+    app: CustomFlask = current_app  # type: ignore
+
+    if not archive.unarchive_course(app, course_name):
+        abort(HTTPStatus.CONFLICT, f"Course '{sanitize_log_data(course_name)}' is not archived.")
+
+    logger.info("Unarchived course=%s", course_name)
+    return "", HTTPStatus.OK
+
+
 @bp.get("/database")
 @requires_auth_or_token
 @requires_ready
@@ -632,7 +818,8 @@ def get_database(course_name: str, auth_method: AuthMethod) -> ResponseReturnVal
     app: CustomFlask = current_app  # type: ignore
 
     storage_api = app.storage_api
-    course = __get_course_or_not_found(storage_api, course_name)
+    course = __get_course_or_not_found(app, course_name)
+    archived = archive.get_archived_course(app, course_name)
 
     if auth_method == AuthMethod.SESSION:
         username = session["manytask"]["username"]
@@ -640,17 +827,139 @@ def get_database(course_name: str, auth_method: AuthMethod) -> ResponseReturnVal
     else:
         is_course_admin = True
 
-    logger.info("Fetching database snapshot for course=%s", course_name)
-    table_data = get_database_table_data(app, course, include_admin_data=is_course_admin)
+    table_format = request.args.get("format", "rows")
+    if table_format not in DATABASE_FORMATS:
+        return jsonify(
+            ErrorResponse(error=f"Unknown format, expected one of {', '.join(DATABASE_FORMATS)}").model_dump()
+        ), HTTPStatus.BAD_REQUEST
+
+    if "page" in request.args:
+        try:
+            page = int(request.args["page"])
+            size = int(request.args.get("size", DATABASE_PAGE_SIZE))
+            sort = (request.args.get("sort", "username"), request.args.get("dir", "asc") == "desc")
+            if page < 1 or not 1 <= size <= MAX_DATABASE_PAGE_SIZE:
+                raise ValueError(f"page must be positive and size between 1 and {MAX_DATABASE_PAGE_SIZE}")
+            if archived is not None:
+                table_data = page_database_table(
+                    archived.snapshot.table_data(include_admin_data=is_course_admin),
+                    page,
+                    size,
+                    sort=sort,
+                    search=request.args.get("search") or None,
+                    include_admin_data=is_course_admin,
+                )
+            else:
+                table_data = get_database_table_page(
+                    app,
+                    course,
+                    page,
+                    size,
+                    sort=sort,
+                    search=request.args.get("search") or None,
+                    include_admin_data=is_course_admin,
+                )
+        except ValueError as e:
+            return jsonify(ErrorResponse(error=f"Invalid page request: {e}").model_dump()), HTTPStatus.BAD_REQUEST
+    elif archived is not None:
+        table_data = archived.snapshot.table_data(include_admin_data=is_course_admin)
+    else:
+        logger.info("Fetching database snapshot for course=%s", course_name)
+        table_data = get_database_table_data(app, course, include_admin_data=is_course_admin)
+
+    if table_format == "columnar":
+        table_data = to_columnar_table(table_data)
     return jsonify(table_data)
 
 
+def _export_table_rows(
+    course_name: str, auth_method: AuthMethod
+) -> tuple[Course, bool, list[dict[str, Any]], Iterator[dict[str, Any]]]:
+    app: CustomFlask = current_app  # type: ignore
+
+    course = __get_course_or_not_found(app, course_name)
+    if auth_method == AuthMethod.SESSION:
+        username = session["manytask"]["username"]
+        is_course_admin = app.storage_api.check_if_course_admin(course.course_name, username)
+    else:
+        is_course_admin = True
+
+    archived = archive.get_archived_course(app, course_name)
+    if archived is not None:
+        table_data = archived.snapshot.table_data(include_admin_data=is_course_admin)
+        return course, is_course_admin, table_data["tasks"], iter(table_data["students"])
+
+    logger.info("Exporting scores for course=%s", course_name)
+    tasks, rows = iter_database_table_rows(app, course, include_admin_data=is_course_admin)
+    return course, is_course_admin, tasks, rows
+
+
+@bp.get("/export.csv")
+@requires_auth_or_token
+@requires_ready
+def export_csv(course_name: str, auth_method: AuthMethod) -> ResponseReturnValue:
+    course, is_course_admin, tasks, rows = _export_table_rows(course_name, auth_method)
+    return Response(
+        stream_with_context(iter_csv(tasks, rows, include_admin_data=is_course_admin)),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{course.course_name}.csv"'},
+    )
+
+
+@bp.get("/export.jsonl")
+@requires_auth_or_token
+@requires_ready
+def export_jsonl(course_name: str, auth_method: AuthMethod) -> ResponseReturnValue:
+    course, _, _, rows = _export_table_rows(course_name, auth_method)
+    return Response(
+        stream_with_context(iter_jsonl(rows)),
+        mimetype="application/jsonl",
+        headers={"Content-Disposition": f'attachment; filename="{course.course_name}.jsonl"'},
+    )
+
+
+@bp.get("/events")
+@requires_auth_or_token
+@requires_ready
+def course_events(course_name: str, auth_method: AuthMethod) -> ResponseReturnValue:
+    """Stream live row updates of the course database as Server-Sent Events"""
+    app: CustomFlask = current_app  # type: ignore
+
+    broker = events.get_broker(app)
+    if broker is None:
+        abort(HTTPStatus.NOT_FOUND, "Live updates are disabled")
+    course = __get_course_or_not_found(app, course_name)
+
+    subscription = broker.subscribe(course.course_name)
+    if subscription is None:
+        logger.warning("Rejected event stream for course=%s: too many subscribers", course_name)
+        return (
+            jsonify(ErrorResponse(error="Too many live update subscribers").model_dump()),
+            HTTPStatus.SERVICE_UNAVAILABLE,
+            {"Retry-After": str(events.RECONNECT_DELAY_MS // 1000)},
+        )
+
+    # no stream_with_context, the stream needs neither the request nor a database session
+    return Response(
+        events.iter_sse(
+            subscription, app.config[events.EVENTS_HEARTBEAT_INTERVAL], app.config[events.EVENTS_STREAM_TIMEOUT]
+        ),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @bp.post("/database/update")
 @requires_auth_or_token
 @requires_ready
+@requires_live_course
 def update_database(course_name: str, auth_method: AuthMethod) -> ResponseReturnValue:
     """
-    Update student scores in the database via API endpoint and recalculate grade.
+    Update student scores in the database via API endpoint and recalculate grades.
+
+    Accepts a change set ``{"changes": {username: {task: score}}}`` of any number of students and tasks,
+    or the single row edit ``{"row_data": {...}, "new_scores": {task: score}}``. All scores are stored
+    in one transaction and the grade of every touched student is recalculated once.
     """
     app: CustomFlask = current_app  # type: ignore
     course: Course = app.storage_api.get_course(course_name)  # type: ignore
@@ -668,32 +977,40 @@ def update_database(course_name: str, auth_method: AuthMethod) -> ResponseReturn
     if not request.is_json:
         return jsonify({"success": False, "message": "Request must be JSON"}), HTTPStatus.BAD_REQUEST
 
+    data = request.get_json()
+    row_data: RowData | None = None
     try:
-        payload = ManytaskUpdateDatabasePayload.model_validate(request.get_json())
+        if isinstance(data, dict) and "changes" in data:
+            changes = ManytaskUpdateDatabaseChanges.model_validate(data).changes
+        else:
+            payload = ManytaskUpdateDatabasePayload.model_validate(data)
+            row_data = payload.row_data
+            changes = {row_data.username: payload.new_scores}
     except ValidationError as exc:
         logger.warning("Invalid request payload: %s", exc.errors())
         return jsonify(
             {"success": False, "message": "Invalid request data", "errors": exc.errors()}
         ), HTTPStatus.BAD_REQUEST
 
-    new_scores = payload.new_scores
-    row_data = payload.row_data
-
-    student_username = row_data.username
-    total_score = row_data.total_score
-    logger.info("Updating scores for user=%s: %s", sanitize_log_data(student_username), new_scores)
+    # scores that are not numbers are skipped
+    new_scores = {
+        student: {
+            task_name: int(score)
+            for task_name, score in scores.items()
+            if isinstance(score, (int, float)) and not isinstance(score, bool)
+        }
+        for student, scores in changes.items()
+    }
+    students = sorted(new_scores)
+    logger.info(
+        "Updating %d scores of %d students in course=%s",
+        sum(len(scores) for scores in new_scores.values()),
+        len(students),
+        course_name,
+    )
 
     try:
-        for task_name, new_score in new_scores.items():
-            if isinstance(new_score, (int, float)):
-                new_score = storage_api.store_score(
-                    course.course_name,
-                    username=student_username,
-                    task_name=task_name,
-                    update_fn=lambda _flags, _old_score: int(new_score),
-                )
-                total_score += new_score - row_data.scores.get(task_name, 0)
-                row_data.scores[task_name] = new_score
+        stored_scores = storage_api.update_scores(course.course_name, new_scores)
     except Exception as e:
         logger.error("Error updating database: %s", str(e))
         return jsonify(
@@ -701,39 +1018,111 @@ def update_database(course_name: str, auth_method: AuthMethod) -> ResponseReturn
         ), HTTPStatus.INTERNAL_SERVER_ERROR
 
     try:
-        row_data.total_score = total_score
-        max_score = app.storage_api.max_score_started(course.course_name)
-        row_data.percent = calculate_percent(total_score, max_score)
+        # Recalculate and save grades (applies DORESHKA logic if needed), overrides are not touched
+        storage_api.recalculate_grades(course.course_name, students)
+        rows = get_database_table_rows(app, course, students, include_admin_data=True)
+    except Exception as e:
+        logger.error("Error calculating grade: %s", str(e))
+        return jsonify(
+            {"success": False, "message": "Internal error when calculating new grade. Try refresh page."}
+        ), HTTPStatus.INTERNAL_SERVER_ERROR
 
-        # Calculate and save grade (applies DORESHKA logic if needed)
-        # This updates final_grade but does NOT touch final_grade_override
-        storage_api.calculate_and_save_grade(course.course_name, student_username, row_data.model_dump())
+    for row in rows:
+        events.publish(
+            app,
+            course.course_name,
+            {
+                "type": "row",
+                "username": row["username"],
+                "scores": stored_scores.get(row["username"], {}),
+                "total_score": row["total_score"],
+                "percent": row["percent"],
+                "grade": row["grade"],
+                "grade_is_override": row["grade_is_override"],
+            },
+        )
 
-        # Get effective grade (override if exists, otherwise final_grade)
-        effective_grade = storage_api.get_effective_grade(course.course_name, student_username)
-        row_data.grade = effective_grade
+    logger.info("Successfully updated scores of %d students", len(rows))
+    if row_data is None:
+        return jsonify({"success": True, "rows": rows}), HTTPStatus.OK
 
-        # Add override indicator for frontend
-        row_data.grade_is_override = storage_api.is_grade_overridden(course.course_name, student_username)
+    # the single row edit answers with the refreshed row in its own format
+    refreshed = next((row for row in rows if row["username"] == row_data.username), None)
+    if refreshed is not None:
+        row_data = RowData.model_validate(refreshed)
+    return jsonify({"success": True, "row_data": row_data.model_dump_json()}), HTTPStatus.OK
 
-        logger.info("Successfully updated scores for user=%s", sanitize_log_data(student_username))
+
+@bp.post("/repos/provision")
+@requires_auth_or_token
+@requires_ready
+@requires_live_course
+def provision_repos(course_name: str, auth_method: AuthMethod) -> ResponseReturnValue:
+    """Enroll the students and create their repositories in the background
+
+    Answers 202 right away, the progress is served by ``GET /repos/provision``.
+    """
+    app: CustomFlask = current_app  # type: ignore
+    course: Course = app.storage_api.get_course(course_name)  # type: ignore
+
+    if auth_method == AuthMethod.SESSION and not app.storage_api.check_if_course_admin(
+        course_name, session["manytask"]["username"]
+    ):
+        return jsonify(ErrorResponse(error="Only course admins can provision repos").model_dump()), HTTPStatus.FORBIDDEN
+
+    try:
+        usernames = ProvisionReposRequest.model_validate(request.get_json(silent=True)).usernames
+    except ValidationError as exc:
         return jsonify(
-            {
-                "success": True,
-                "row_data": row_data.model_dump_json(),
-            }
-        ), HTTPStatus.OK
+            ErrorResponse(error=f"Invalid request data: {exc.errors()}").model_dump()
+        ), HTTPStatus.BAD_REQUEST
 
-    except Exception as e:
-        logger.error("Error calculating grade: %s", str(e))
+    job = start_provisioning(app, course, usernames)
+    if job is None:
         return jsonify(
-            {"success": False, "message": "Internal error when calculating new grade. Try refresh page."}
-        ), HTTPStatus.INTERNAL_SERVER_ERROR
+            ErrorResponse(error=f"Repos of course {course_name} are already being provisioned").model_dump()
+        ), HTTPStatus.CONFLICT
+
+    response = ProvisionReposResponse(requested=job.usernames, skipped=sorted(set(usernames) - set(job.usernames)))
+    return jsonify(response.model_dump()), HTTPStatus.ACCEPTED
+
+
+@bp.get("/repos/provision")
+@requires_auth_or_token
+@requires_ready
+def get_repo_provisioning(course_name: str, auth_method: AuthMethod) -> ResponseReturnValue:
+    app: CustomFlask = current_app  # type: ignore
+
+    if auth_method == AuthMethod.SESSION and not app.storage_api.check_if_course_admin(
+        course_name, session["manytask"]["username"]
+    ):
+        return jsonify(
+            ErrorResponse(error="Only course admins can see provisioning").model_dump()
+        ), HTTPStatus.FORBIDDEN
+
+    students = [
+        RepoProvisioningItem(
+            username=state.username,
+            status=state.status,
+            requested_at=state.requested_at.isoformat(sep=" "),
+            repo_url=state.repo_url,
+            error=state.error,
+        )
+        for state in app.storage_api.get_repo_provisioning(course_name)
+    ]
+    response = RepoProvisioningResponse(
+        pending=sum(student.status == "pending" for student in students),
+        done=sum(student.status == "done" for student in students),
+        failed=sum(student.status == "failed" for student in students),
+        students=students,
+    )
+    return jsonify(response.model_dump()), HTTPStatus.OK
 
 
 @bp.post("/comment/update")
 @requires_auth
 @requires_ready
+@requires_live_course
 def update_comment(course_name: str) -> ResponseReturnValue:
     app: CustomFlask = current_app  # type: ignore
     course: Course = app.storage_api.get_course(course_name)  # type: ignore
@@ -1335,8 +1724,8 @@ def create_course_api(validated_data: CreateCourseRequest) -> ResponseReturnValu
     """Create a new course in a namespace with owners.
 
     Only Instance Admin or Namespace Admin can create courses.
-    Creates GitLab course group, public repo, and students group.
-    Assigns owners as course admins.
+    Stores the course, assigns owners as course admins and queues a job creating
+    the GitLab course group, public repo and students group.
 
     Request JSON:
     {
@@ -1349,16 +1738,15 @@ def create_course_api(validated_data: CreateCourseRequest) -> ResponseReturnValu
     For courses without namespace, pass namespace_id = 0.
 
     Returns:
-        201: Course created successfully
+        201: Course created, the GitLab resources are created by the job `job_id`
         400: Bad request (invalid data)
         403: Forbidden (no access to namespace or owners not valid)
         404: Not found (namespace doesn't exist)
-        409: Conflict (course with this slug already exists)
+        409: Conflict (course with this name or slug already exists)
         500: Internal server error
     """
     app: CustomFlask = current_app  # type: ignore
     storage_api = app.storage_api
-    rms_api = app.rms_api
 
     username = session["manytask"]["username"]
     namespace_id = validated_data.namespace_id
@@ -1375,10 +1763,6 @@ def create_course_api(validated_data: CreateCourseRequest) -> ResponseReturnValu
         owner_rms_ids,
     )
 
-    course_group_id = None
-    public_project_id = None
-    students_group_id = None
-
     try:
         is_instance_admin = storage_api.check_if_instance_admin(username)
 
@@ -1424,98 +1808,43 @@ def create_course_api(validated_data: CreateCourseRequest) -> ResponseReturnValu
         gitlab_course_students_group = f"{gitlab_course_group}/students-{year}-{semester}"
         gitlab_default_branch = "main"
 
-        try:
-            logger.info(
-                "Creating GitLab course group under namespace group_id=%s",
-                namespace.gitlab_group_id if namespace else None,
-            )
-            course_group_id = rms_api.create_course_group(
-                parent_group_id=namespace.gitlab_group_id if namespace else None,
-                course_name=course_name,
-                course_slug=course_slug,
-            )
-            logger.info("Created course group with id=%s", course_group_id)
-        except RuntimeError as e:
-            logger.error("Failed to create course group: %s", str(e))
-            if "already exists" in str(e).lower():
-                return jsonify(
-                    ErrorResponse(error=f"Course with slug '{course_slug}' already exists").model_dump()
-                ), HTTPStatus.CONFLICT
-            return jsonify(
-                ErrorResponse(error=f"Failed to create course group: {str(e)}").model_dump()
-            ), HTTPStatus.INTERNAL_SERVER_ERROR
-
-        try:
-            logger.info("Creating public repo %s", gitlab_course_public_repo)
-            rms_api.create_public_repo(gitlab_course_group, gitlab_course_public_repo)
-            public_project_id = 1  # Placeholder
-            logger.info("Created public repo")
-        except Exception as e:
-            logger.error("Failed to create public repo: %s", str(e))
-            if course_group_id:
-                rms_api.delete_group(course_group_id)
-            return jsonify(
-                ErrorResponse(error=f"Failed to create public repo: {str(e)}").model_dump()
-            ), HTTPStatus.INTERNAL_SERVER_ERROR
-
-        try:
-            logger.info("Creating students group %s", gitlab_course_students_group)
-            rms_api.create_students_group(gitlab_course_students_group)
-            students_group_id = 1  # Placeholder
-            logger.info("Created students group")
-        except Exception as e:
-            logger.error("Failed to create students group: %s", str(e))
-            if public_project_id:
-                rms_api.delete_project(public_project_id)
-            if course_group_id:
-                rms_api.delete_group(course_group_id)
+        # the RMS groups are created later, a course using the same groups is the only conflict known now
+        if storage_api.find_course_by_students_group(gitlab_course_students_group) is not None:
+            logger.error("Students group %s is used by another course", gitlab_course_students_group)
             return jsonify(
-                ErrorResponse(error=f"Failed to create students group: {str(e)}").model_dump()
-            ), HTTPStatus.INTERNAL_SERVER_ERROR
+                ErrorResponse(error=f"Course with slug '{course_slug}' already exists").model_dump()
+            ), HTTPStatus.CONFLICT
 
-        try:
-            from .course import CourseConfig
-            from .utils.generic import generate_token_hex
-
-            course_config = CourseConfig(
-                course_name=course_name,
-                namespace_id=None if namespace_id == 0 else namespace_id,
-                gitlab_course_group=gitlab_course_group,
-                gitlab_course_public_repo=gitlab_course_public_repo,
-                gitlab_course_students_group=gitlab_course_students_group,
-                gitlab_default_branch=gitlab_default_branch,
-                registration_secret=generate_token_hex(16),
-                token=generate_token_hex(24),
-                show_allscores=True,
-            )
+        from .course import CourseConfig
+        from .utils.generic import generate_token_hex
 
-            success = storage_api.create_course(course_config)
+        course_config = CourseConfig(
+            course_name=course_name,
+            namespace_id=None if namespace_id == 0 else namespace_id,
+            gitlab_course_group=gitlab_course_group,
+            gitlab_course_public_repo=gitlab_course_public_repo,
+            gitlab_course_students_group=gitlab_course_students_group,
+            gitlab_default_branch=gitlab_default_branch,
+            registration_secret=generate_token_hex(16),
+            token=generate_token_hex(24),
+            show_allscores=True,
+        )
 
-            if not success:
-                logger.error("Course with name=%s already exists in database", course_name)
-                if students_group_id:
-                    rms_api.delete_group(students_group_id)
-                if public_project_id:
-                    rms_api.delete_project(public_project_id)
-                if course_group_id:
-                    rms_api.delete_group(course_group_id)
-                return jsonify(
-                    ErrorResponse(error=f"Course with name '{course_name}' already exists").model_dump()
-                ), HTTPStatus.CONFLICT
+        if not storage_api.create_course(course_config):
+            logger.error("Course with name=%s already exists in database", course_name)
+            return jsonify(
+                ErrorResponse(error=f"Course with name '{course_name}' already exists").model_dump()
+            ), HTTPStatus.CONFLICT
 
-            logger.info("Created course in database: %s", course_name)
+        logger.info("Created course in database: %s", course_name)
 
-        except Exception as e:
-            logger.error("Failed to create course in database: %s", str(e), exc_info=True)
-            if students_group_id:
-                rms_api.delete_group(students_group_id)
-            if public_project_id:
-                rms_api.delete_project(public_project_id)
-            if course_group_id:
-                rms_api.delete_group(course_group_id)
-            return jsonify(
-                ErrorResponse(error=f"Failed to create course in database: {str(e)}").model_dump()
-            ), HTTPStatus.INTERNAL_SERVER_ERROR
+        job = enqueue_course_creation(
+            app,
+            course_config,
+            course_slug,
+            namespace.gitlab_group_id if namespace else None,
+            created_by=username,
+        )
 
         added_owners = []
         if owner_rms_ids:
@@ -1543,11 +1872,12 @@ def create_course_api(validated_data: CreateCourseRequest) -> ResponseReturnValu
                 ), HTTPStatus.INTERNAL_SERVER_ERROR
 
         logger.info(
-            "Successfully created course %s (slug=%s) in namespace %s with %d owners",
+            "Successfully created course %s (slug=%s) in namespace %s with %d owners, RMS job id=%s",
             course_name,
             course_slug,
             namespace.name if namespace else "(no namespace)",
             len(added_owners),
+            job.job_id,
         )
 
         response_course_id = storage_api.get_course_id_by_name(course_name)
@@ -1564,6 +1894,7 @@ def create_course_api(validated_data: CreateCourseRequest) -> ResponseReturnValu
             gitlab_course_students_group=gitlab_course_students_group,
             status=CourseStatus.CREATED.value,
             owners=added_owners,
+            job_id=job.job_id,
         )
 
         return jsonify(response.model_dump()), HTTPStatus.CREATED
@@ -1575,22 +1906,83 @@ def create_course_api(validated_data: CreateCourseRequest) -> ResponseReturnValu
             str(e),
             exc_info=True,
         )
-        try:
-            if students_group_id:
-                rms_api.delete_group(students_group_id)
-            if public_project_id:
-                rms_api.delete_project(public_project_id)
-            if course_group_id:
-                rms_api.delete_group(course_group_id)
-        except Exception as rollback_error:
-            logger.error("Error during rollback: %s", str(rollback_error))
-
         return jsonify(ErrorResponse(error="Internal server error").model_dump()), HTTPStatus.INTERNAL_SERVER_ERROR
 
 
+def _rms_job_response(job: RmsJob) -> RmsJobResponse:
+    return RmsJobResponse(
+        job_id=job.job_id,
+        kind=job.kind,
+        course_name=job.course_name,
+        status=job.status,
+        attempts=job.attempts,
+        error=job.error,
+        finished_steps=[name for name, _ in JOB_STEPS.get(job.kind, []) if name in job.state],
+        created_at=job.created_at.isoformat(sep=" ") if job.created_at else "",
+        updated_at=job.updated_at.isoformat(sep=" ") if job.updated_at else "",
+    )
+
+
+def _get_own_rms_job(storage_api: StorageApi, job_id: int) -> tuple[RmsJob | None, ResponseReturnValue | None]:
+    """Job visible to the current user: instance admins see every job, others the jobs they started"""
+    username = session["manytask"]["username"]
+    job = storage_api.get_rms_job(job_id)
+    if job is None:
+        return None, (jsonify(ErrorResponse(error="Job not found").model_dump()), HTTPStatus.NOT_FOUND)
+    if job.created_by != username and not storage_api.check_if_instance_admin(username):
+        logger.warning("User %s has no access to RMS job id=%s", username, job_id)
+        return None, (jsonify(ErrorResponse(error="Access denied").model_dump()), HTTPStatus.FORBIDDEN)
+    return job, None
+
+
+@namespace_bp.get("/admin/jobs/<int:job_id>")
+@requires_auth
+def get_rms_job(job_id: int) -> ResponseReturnValue:
+    """Progress of a background RMS job, e.g. the one creating the GitLab groups of a new course
+
+    Returns:
+        200: Job status, finished steps and the last error
+        403: Forbidden (not an instance admin and not the user who started the job)
+        404: Not found
+    """
+    app: CustomFlask = current_app  # type: ignore
+    job, error_response = _get_own_rms_job(app.storage_api, job_id)
+    if job is None:
+        return error_response  # type: ignore[return-value]
+    return jsonify(_rms_job_response(job).model_dump()), HTTPStatus.OK
+
+
+@namespace_bp.post("/admin/jobs/<int:job_id>/retry")
+@requires_auth
+def retry_rms_job(job_id: int) -> ResponseReturnValue:
+    """Queue a failed RMS job again, it resumes after its finished steps
+
+    Returns:
+        202: Job queued
+        403: Forbidden (not an instance admin and not the user who started the job)
+        404: Not found
+        409: Conflict (the job did not fail)
+    """
+    app: CustomFlask = current_app  # type: ignore
+    job, error_response = _get_own_rms_job(app.storage_api, job_id)
+    if job is None:
+        return error_response  # type: ignore[return-value]
+
+    queued = app.storage_api.retry_rms_job(job_id)
+    if queued is None:
+        return jsonify(
+            ErrorResponse(error=f"Job {job_id} is {job.status}, only failed jobs are retried").model_dump()
+        ), HTTPStatus.CONFLICT
+
+    wake_runner(app)
+    logger.info("User %s retried RMS job id=%s", session["manytask"]["username"], job_id)
+    return jsonify(_rms_job_response(queued).model_dump()), HTTPStatus.ACCEPTED
+
+
 @bp.post("/grade/override")
 @requires_auth
 @requires_ready
+@requires_live_course
 def override_grade(course_name: str) -> ResponseReturnValue:
     """Set manual grade override for a student."""
     app: CustomFlask = current_app  # type: ignore
@@ -1634,6 +2026,11 @@ def override_grade(course_name: str) -> ResponseReturnValue:
             ), HTTPStatus.NOT_FOUND
 
         storage_api.override_grade(course.course_name, username, new_grade)
+        events.publish(
+            app,
+            course.course_name,
+            {"type": "row", "username": username, "grade": new_grade, "grade_is_override": True},
+        )
 
         logger.info("Successfully set grade override for user=%s to %d", sanitize_log_data(username), new_grade)
         return jsonify({"success": True}), HTTPStatus.OK
@@ -1648,6 +2045,7 @@ def override_grade(course_name: str) -> ResponseReturnValue:
 @bp.post("/grade/clear_override")
 @requires_auth
 @requires_ready
+@requires_live_course
 def clear_grade_override(course_name: str) -> ResponseReturnValue:
     """Clear manual grade override for a student."""
     app: CustomFlask = current_app  # type: ignore
@@ -1684,6 +2082,17 @@ def clear_grade_override(course_name: str) -> ResponseReturnValue:
             ), HTTPStatus.NOT_FOUND
 
         storage_api.clear_grade_override(course.course_name, username)
+        if events.get_broker(app) is not None:
+            events.publish(
+                app,
+                course.course_name,
+                {
+                    "type": "row",
+                    "username": username,
+                    "grade": storage_api.get_effective_grade(course.course_name, username),
+                    "grade_is_override": False,
+                },
+            )
 
         logger.info("Successfully cleared grade override for user=%s", sanitize_log_data(username))
         return jsonify({"success": True}), HTTPStatus.OK
@@ -0,0 +1,228 @@
+"""Archived courses, served from a snapshot of their pages.
+
+A finished course never changes, yet every view of its pages ran the score queries and the RMS
+calls of a live course. Archiving a finished course stores a snapshot of its deadlines,
+scoreboard, task stats and grades in the ``course_snapshots`` table and sets the course status to
+``archived``. The course page, the database page, ``GET /api/<course>/database`` and the exports
+of an archived course are then built from the snapshot, which every app process keeps in memory:
+no score tables and no RMS are touched per request, only the session of the user is checked.
+Score reports and edits of an archived course are rejected. Unarchiving deletes the snapshot and
+makes the course finished and live again.
+
+A process trusts its copy of an archived course for ``ARCHIVE_CACHE_TTL`` seconds, so the other
+processes keep serving an unarchived course from the snapshot for at most that long.
+"""
+
+import json
+import logging
+import os
+import time
+import zlib
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+
+from .config import ManytaskGroupConfig
+from .course import Course, CourseStatus
+from .main import CustomFlask
+from .utils.database import get_database_table_data
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_CACHE_TTL = "ARCHIVE_CACHE_TTL"
+DEFAULT_ARCHIVE_CACHE_TTL = 300.0
+
+SNAPSHOT_VERSION = 1
+
+_CACHE_EXTENSION = "manytask.archived_courses"
+
+# fields of the database table rows only course admins see, program managers see the names too
+_ADMIN_FIELDS = frozenset({"first_name", "last_name", "repo_url", "comment"})
+_NAME_FIELDS = frozenset({"first_name", "last_name"})
+
+
+@dataclass
+class CourseSnapshot:
+    """Data of the course pages at the moment the course was archived
+
+    :param created_at: when the snapshot was taken
+    :param groups: enabled started task groups with their deadlines, as shown on the course page
+    :param stats: task name -> share of the students who solved it
+    :param table: get_database_table_data of the course with the admin data
+    """
+
+    created_at: datetime
+    groups: list[ManytaskGroupConfig]
+    stats: dict[str, float]
+    table: dict[str, Any]
+    _rows: dict[str, dict[str, Any]] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._rows = {row["username"]: row for row in self.table["students"]}
+
+    @property
+    def max_score_started(self) -> int:
+        return sum(task.score for group in self.groups for task in group.tasks if not task.is_bonus)
+
+    def student_scores(self, username: str) -> tuple[dict[str, int], int]:
+        """Scores of the student shown on the course page
+
+        :param username: student username
+        :return: scores of the started tasks and the bonus score among them
+        """
+        tasks = {task.name: task for group in self.groups for task in group.tasks}
+        row = self._rows.get(username)
+        if row is None:
+            return {}, 0
+
+        scores = {task_name: score for task_name, score in row["scores"].items() if task_name in tasks}
+        bonus_score = sum(score for task_name, score in scores.items() if tasks[task_name].is_bonus)
+        return scores, bonus_score
+
+    def table_data(self, include_admin_data: bool = False, is_program_manager: bool = False) -> dict[str, Any]:
+        """Database table of the course, same as get_database_table_data returned when it was archived"""
+        hidden_fields: frozenset[str] = frozenset()
+        if not include_admin_data:
+            hidden_fields = _ADMIN_FIELDS - _NAME_FIELDS if is_program_manager else _ADMIN_FIELDS
+        students = [
+            {key: value for key, value in row.items() if key not in hidden_fields} for row in self.table["students"]
+        ]
+        return {**self.table, "students": students}
+
+    def dumps(self) -> bytes:
+        data = {
+            "version": SNAPSHOT_VERSION,
+            "created_at": self.created_at.isoformat(),
+            "groups": [group.model_dump(mode="json") for group in self.groups],
+            "stats": self.stats,
+            "table": self.table,
+        }
+        return zlib.compress(json.dumps(data).encode())
+
+    @classmethod
+    def loads(cls, data: bytes) -> "CourseSnapshot":
+        raw = json.loads(zlib.decompress(data))
+        if raw["version"] != SNAPSHOT_VERSION:
+            raise ValueError(f"Unknown course snapshot version {raw['version']}")
+        return cls(
+            created_at=datetime.fromisoformat(raw["created_at"]),
+            groups=[ManytaskGroupConfig.model_validate(group) for group in raw["groups"]],
+            stats=raw["stats"],
+            table=raw["table"],
+        )
+
+
+@dataclass
+class ArchivedCourse:
+    """Archived course kept in the memory of the process
+
+    :param course: the course, with the archived status
+    :param snapshot: data of its pages
+    :param loaded_at: time.monotonic() when it was loaded from the storage
+    """
+
+    course: Course
+    snapshot: CourseSnapshot
+    loaded_at: float
+
+
+def _archived_courses(app: CustomFlask) -> dict[str, ArchivedCourse]:
+    archived_courses: dict[str, ArchivedCourse] = app.extensions.setdefault(_CACHE_EXTENSION, {})
+    return archived_courses
+
+
+def build_snapshot(app: CustomFlask, course: Course) -> CourseSnapshot:
+    """Read the data of the course pages from the storage
+
+    :param app: app with storage_api and rms_api
+    :param course: course to take the snapshot of
+    :return: snapshot of the course
+    """
+    storage_api = app.storage_api
+    snapshot = CourseSnapshot(
+        created_at=datetime.now(timezone.utc),
+        groups=storage_api.get_groups(course.course_name, enabled=True, started=True),
+        stats=storage_api.get_stats(course.course_name),
+        table=get_database_table_data(app, course, include_admin_data=True),
+    )
+    # get_database_table_data leaves it out when there are no students
+    snapshot.table["max_score"] = snapshot.max_score_started
+    return snapshot
+
+
+def archive_course(app: CustomFlask, course: Course) -> bool:
+    """Freeze a finished course, its pages are served from a snapshot from now on
+
+    :param app: app with storage_api and rms_api
+    :param course: course to archive
+    :return: True if the course was archived, False if it is not finished
+    """
+    if course.status != CourseStatus.FINISHED:
+        return False
+
+    snapshot = build_snapshot(app, course)
+    if not app.storage_api.archive_course(course.course_name, snapshot.dumps()):
+        return False
+    _archived_courses(app).pop(course.course_name, None)
+    return True
+
+
+def unarchive_course(app: CustomFlask, course_name: str, status: CourseStatus = CourseStatus.FINISHED) -> bool:
+    """Serve the pages of an archived course live again
+
+    :param app: app with storage_api
+    :param course_name: course name
+    :param status: new status of the course
+    :return: True if the course was unarchived, False if it is not archived
+    """
+    unarchived = app.storage_api.unarchive_course(course_name, status)
+    _archived_courses(app).pop(course_name, None)
+    return unarchived
+
+
+def get_archived_course(app: CustomFlask, course_name: str) -> ArchivedCourse | None:
+    """Archived course from the memory of the process, without storage calls
+
+    Courses get there when :func:`get_course` finds them archived.
+
+    :param app: the app
+    :param course_name: course name
+    :return: the archived course, None if the course is live or was not loaded for ARCHIVE_CACHE_TTL seconds
+    """
+    archived = _archived_courses(app).get(course_name)
+    if archived is None or time.monotonic() - archived.loaded_at > app.config.get(
+        ARCHIVE_CACHE_TTL, DEFAULT_ARCHIVE_CACHE_TTL
+    ):
+        return None
+    return archived
+
+
+def get_course(app: CustomFlask, course_name: str) -> Course | None:
+    """storage_api.get_course, archived courses come from the memory of the process
+
+    An archived course not in memory yet is loaded there together with its snapshot.
+
+    :param app: app with storage_api
+    :param course_name: course name
+    :return: the course, None if there is no such course
+    """
+    archived = get_archived_course(app, course_name)
+    if archived is not None:
+        return archived.course
+
+    course = app.storage_api.get_course(course_name)
+    if course is None or course.status != CourseStatus.ARCHIVED:
+        return course
+
+    data = app.storage_api.get_course_snapshot(course_name)
+    if data is None:
+        logger.warning("Archived course %s has no snapshot, serving it live", course_name)
+        return course
+    _archived_courses(app)[course_name] = ArchivedCourse(course, CourseSnapshot.loads(data), time.monotonic())
+    logger.info("Loaded the snapshot of archived course %s", course_name)
+    return course
+
+
+def init_app(app: CustomFlask) -> None:
+    """Read the archive settings from env"""
+    app.config.setdefault(ARCHIVE_CACHE_TTL, float(os.environ.get(ARCHIVE_CACHE_TTL, "300")))
@@ -1,4 +1,5 @@
 import logging
+from datetime import datetime, timedelta, timezone
 from functools import wraps
 from http import HTTPStatus
 from typing import Any, Callable
@@ -9,9 +10,10 @@ from flask.sessions import SessionMixin
 from sqlalchemy.exc import NoResultFound
 from werkzeug import Response
 
+from manytask import archive
 from manytask.abstract import AuthenticatedUser, ClientProfile, StoredUser
 from manytask.course import Course, CourseStatus
-from manytask.main import CustomFlask
+from manytask.main import DEFAULT_REPO_VERIFY_INTERVAL, REPO_VERIFY_INTERVAL, CustomFlask
 
 logger = logging.getLogger(__name__)
 
@@ -93,9 +95,10 @@ def set_manytask_session(user_id: int, username: str, version: float = 1.0) -> d
 
 def handle_course_membership(app: CustomFlask, course: Course, username: str) -> bool | str | Response:
     """Checking user on course"""
+    from .utils.flask import get_auth_context
 
     try:
-        if app.storage_api.check_user_on_course(course.course_name, username):
+        if get_auth_context(app, username).is_enrolled(course.course_name):
             logger.info("User %s is on course %s", username, course.course_name)
             return True
         else:
@@ -202,7 +205,7 @@ def requires_ready(f: Callable[..., Any]) -> Callable[..., Any]:
         app: CustomFlask = current_app  # type: ignore
 
         course_name = kwargs["course_name"]
-        course = app.storage_api.get_course(course_name)
+        course = archive.get_course(app, course_name)
 
         if course is None:
             flash("course not found!", "course_not_found")
@@ -216,6 +219,39 @@ def requires_ready(f: Callable[..., Any]) -> Callable[..., Any]:
     return decorated
 
 
+def check_student_repo(app: CustomFlask, course: Course, username: str, project_name: str) -> bool:
+    """Check that the student's repository exists, trusting the stored provisioning state
+
+    The RMS is asked only if the state is missing, points to another repository or was verified more than
+    ``REPO_VERIFY_INTERVAL`` seconds ago. The answer is written back, a missing repository clears the state.
+
+    :param app: app with the storage and the RMS
+    :param course: course of the repository
+    :param username: manytask username of the student
+    :param project_name: name of the repository in the students group
+    :return: whether the repository exists
+    """
+    url = app.rms_api.get_url_for_repo(project_name, course.gitlab_course_students_group)
+    stored_repo = app.storage_api.get_student_repo(course.course_name, username)
+    verify_interval = timedelta(seconds=app.config.get(REPO_VERIFY_INTERVAL, DEFAULT_REPO_VERIFY_INTERVAL))
+    if (
+        stored_repo is not None
+        and stored_repo.url == url
+        and datetime.now(timezone.utc) - stored_repo.verified_at < verify_interval
+    ):
+        return True
+
+    if not app.rms_api.check_project_exists(
+        project_name=project_name, project_group=course.gitlab_course_students_group
+    ):
+        if stored_repo is not None:
+            app.storage_api.clear_student_repo(course.course_name, username)
+        return False
+
+    app.storage_api.store_student_repo(course.course_name, username, url)
+    return True
+
+
 def requires_course_access(f: Callable[..., Any]) -> Callable[..., Any]:
     """Check course readiness, user authentication and access"""
 
@@ -223,16 +259,28 @@ def requires_course_access(f: Callable[..., Any]) -> Callable[..., Any]:
     @requires_auth
     @wraps(f)
     def decorated(*args: Any, **kwargs: Any) -> Any:
-        from .utils.flask import can_access_course
+        from .utils.flask import can_access_course, get_auth_context, reset_auth_context
 
         app: CustomFlask = current_app  # type: ignore
 
         if app.debug:
             return f(*args, **kwargs)
 
+        course_name = kwargs["course_name"]
+        if archive.get_archived_course(app, course_name) is not None:
+            # the snapshot needs no RMS checks and takes no new students
+            username = session["manytask"]["username"]
+            auth_context = get_auth_context(app, username)
+            if not auth_context.is_enrolled(course_name) and not auth_context.is_course_admin(course_name):
+                logger.warning(
+                    "User %s attempted to access archived course %s without enrollment", username, course_name
+                )
+                abort(HTTPStatus.FORBIDDEN)
+            return f(*args, **kwargs)
+
         oauth = app.oauth
 
-        course: Course = app.storage_api.get_course(kwargs["course_name"])  # type: ignore
+        course: Course = app.storage_api.get_course(course_name)  # type: ignore
         auth_user: AuthenticatedUser = get_authenticated_user(oauth, app)
         stored_user: StoredUser | None = app.storage_api.get_stored_user_by_auth_id(auth_user.id)
         if stored_user is None:
@@ -249,22 +297,26 @@ def requires_course_access(f: Callable[..., Any]) -> Callable[..., Any]:
             )
             abort(HTTPStatus.FORBIDDEN)
 
+        auth_context = get_auth_context(app, username)
+
         hidden_for_user = [CourseStatus.CREATED, CourseStatus.HIDDEN]
-        if course.status in hidden_for_user and not app.storage_api.check_if_course_admin(course.course_name, username):
+        if course.status in hidden_for_user and not auth_context.is_course_admin(course.course_name):
             flash("course is hidden!", "course_hidden")
             abort(redirect(url_for("root.index")))
 
-        if not handle_course_membership(app, course, username) or not app.rms_api.check_project_exists(
-            project_name=auth_user.username, project_group=course.gitlab_course_students_group
+        if not handle_course_membership(app, course, username) or not check_student_repo(
+            app, course, username, auth_user.username
         ):
             logger.info("User %s missing membership or project", username)
             abort(redirect(url_for("course.create_project", course_name=course.course_name)))
 
-        # sync user's data from gitlab to database  TODO: optimize it
-        app.storage_api.sync_user_on_course(
-            course.course_name, username, app.storage_api.check_if_instance_admin(username)
-        )
-        logger.info("Synced user %s on course %s", username, course.course_name)
+        # sync user's data from gitlab to database only if the membership or the admin flag is outdated
+        if not auth_context.is_enrolled(course.course_name) or (
+            auth_context.instance_admin and not auth_context.course_roles[course.course_name]
+        ):
+            app.storage_api.sync_user_on_course(course.course_name, username, auth_context.instance_admin)
+            reset_auth_context()
+            logger.info("Synced user %s on course %s", username, course.course_name)
 
         return f(*args, **kwargs)
 
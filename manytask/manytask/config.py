@@ -28,6 +28,11 @@ class ManytaskUpdateDatabasePayload(BaseModel):
     row_data: RowData
 
 
+class ManytaskUpdateDatabaseChanges(BaseModel):
+    # new scores by username and task name
+    changes: dict[str, dict[str, Any]] = Field(..., min_length=1)
+
+
 class CreateNamespaceRequest(BaseModel):
     name: str
     slug: str
@@ -129,6 +134,19 @@ class CourseResponse(BaseModel):
     gitlab_course_students_group: str
     status: str
     owners: list[str]  # gitlab user_ids
+    job_id: int | None = None  # job creating the RMS groups of the course
+
+
+class RmsJobResponse(BaseModel):
+    job_id: int
+    kind: str
+    course_name: str
+    status: str  # queued, running, done or failed
+    attempts: int
+    error: str | None
+    finished_steps: list[str]
+    created_at: str
+    updated_at: str
 
 
 class PingResponse(BaseModel):
@@ -136,6 +154,41 @@ class PingResponse(BaseModel):
     ok: bool
 
 
+class ReportReceiptResponse(BaseModel):
+    receipt_id: int
+    status: str  # queued, applied or failed
+    username: str
+    task: str
+    reported_score: int
+    submit_time: str
+    score: int | None = None
+    error: str | None = None
+
+
+class ProvisionReposRequest(BaseModel):
+    usernames: list[str] = Field(..., min_length=1)
+
+
+class ProvisionReposResponse(BaseModel):
+    requested: list[str]  # students whose repositories are being created
+    skipped: list[str]  # unknown users and students who already have a repository
+
+
+class RepoProvisioningItem(BaseModel):
+    username: str
+    status: str  # pending, done or failed
+    requested_at: str
+    repo_url: str | None = None
+    error: str | None = None
+
+
+class RepoProvisioningResponse(BaseModel):
+    pending: int
+    done: int
+    failed: int
+    students: list[RepoProvisioningItem]
+
+
 class IsAdminResponse(BaseModel):
     rms_username: str
     is_admin: bool
@@ -155,6 +208,20 @@ class DeadlinesResponse(BaseModel):
     tasks: list[DeadlineItem]
 
 
+class TaskSubmissionStatsItem(BaseModel):
+    task_name: str
+    submissions: int
+    students: int
+    solved_students: int
+    avg_attempts_to_solve: float | None = None
+    avg_seconds_to_solve: float | None = None
+
+
+class SubmissionStatsResponse(BaseModel):
+    course: str
+    tasks: list[TaskSubmissionStatsItem]
+
+
 class ManytaskUiConfig(BaseModel):
     task_url_template: str  # $GROUP_NAME $TASK_NAME $USER_NAME vars are available
     links: dict[str, str] = Field(default_factory=dict)
@@ -18,6 +18,8 @@ class CourseStatus(Enum):
     ALL_TASKS_ISSUED = "all_tasks_issued"
     DORESHKA = "doreshka"
     FINISHED = "finished"
+    # frozen, the pages are served from a snapshot, see manytask.archive
+    ARCHIVED = "archived"
 
 
 def parse_time(time: str, tz: ZoneInfo = DEFAULT_TIMEZONE) -> datetime:
@@ -1,23 +1,65 @@
+import functools
 import logging
+import time
+from contextvars import ContextVar
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Callable, Iterable, Optional, Type, TypeVar, cast
+from typing import Any, Callable, Collection, Iterable, Iterator, Optional, Type, TypeVar, cast
 from zoneinfo import ZoneInfo
 
 from alembic import command
 from alembic.config import Config
 from alembic.runtime.migration import MigrationContext
 from alembic.script import ScriptDirectory
+from flask import g, has_request_context
 from psycopg2.errors import DuplicateColumn, DuplicateTable, UniqueViolation
 from pydantic import AnyUrl
-from sqlalchemy import Row, Select, and_, create_engine, or_, select
-from sqlalchemy.exc import IntegrityError, NoResultFound, ProgrammingError
+from sqlalchemy import (
+    Boolean,
+    ColumnElement,
+    Connection,
+    Engine,
+    Row,
+    Select,
+    String,
+    and_,
+    case,
+    create_engine,
+    delete,
+    event,
+    literal,
+    make_url,
+    null,
+    or_,
+    select,
+    text,
+    true,
+    union,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, NoResultFound, OperationalError, ProgrammingError
 from sqlalchemy.orm import Session, joinedload, selectinload, sessionmaker
+from sqlalchemy.pool import NullPool, QueuePool
 from sqlalchemy.sql.functions import coalesce, func
 
-from . import models
-from .abstract import StorageApi, StoredUser
+from . import metrics, models
+from .abstract import (
+    STUDENT_SORT_KEYS,
+    SUBMISSION_SOURCE_QUEUE,
+    TASK_SORT_PREFIX,
+    AuthContext,
+    RepoProvisioning,
+    ReportedSubmission,
+    ReportReceipt,
+    RmsJob,
+    StorageApi,
+    StoredUser,
+    StudentRepo,
+    TaskSubmissionStats,
+)
 from .config import (
     ManytaskConfig,
     ManytaskDeadlinesConfig,
@@ -39,17 +81,81 @@ from .models import (
     User,
     UserOnCourse,
 )
-from .utils.generic import calculate_percent
+from .utils import db_stats
+from .utils.generic import calculate_percent, normalize_for_search
 
 ModelType = TypeVar("ModelType", bound=models.Base)
+MethodType = TypeVar("MethodType", bound=Callable[..., Any])
 
 logger = logging.getLogger(__name__)
 
+_read_from_replica: ContextVar[bool] = ContextVar("manytask_read_from_replica", default=False)
+
 
 class TaskDisabledError(Exception):
     pass
 
 
+def _set_local_timeouts(timeouts: dict[str, int], conn: Connection) -> None:
+    # the transaction is not registered on the connection yet, so go through the DBAPI cursor;
+    # the driver opens the transaction implicitly and SET LOCAL stays within it
+    cursor = conn.connection.cursor()
+    try:
+        for name, value in timeouts.items():
+            cursor.execute(f"SET LOCAL {name} = {int(value)}")
+    finally:
+        cursor.close()
+
+
+def _log_pool_saturation(engine: Engine, capacity: int, *_args: Any) -> None:
+    checked_out = cast(QueuePool, engine.pool).checkedout()
+    if checked_out >= capacity:
+        logger.warning(
+            "Database connection pool is saturated: %d/%d connections checked out, "
+            "further requests wait for a free connection",
+            checked_out,
+            capacity,
+        )
+
+
+def _mark_primary_write(
+    _conn: Connection, _cursor: Any, _statement: str, _parameters: Any, context: Any, _executemany: bool
+) -> None:
+    # reads of the rest of the request go to the primary, the replica may lag behind this write
+    if context is not None and (context.isinsert or context.isupdate or context.isdelete) and has_request_context():
+        g.db_wrote_to_primary = True
+
+
+def _read_only(method: MethodType) -> MethodType:
+    """Run a read-only DataBaseApi method on the read replica if there is one
+
+    The method opens its sessions with ``_read_session_create``. If the replica fails with an
+    OperationalError, the replica is skipped for ``replica_retry_interval`` seconds and the method
+    is run again on the primary.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: "DataBaseApi", *args: Any, **kwargs: Any) -> Any:
+        if not self._replica_readable():
+            return method(self, *args, **kwargs)
+
+        token = _read_from_replica.set(True)
+        try:
+            return method(self, *args, **kwargs)
+        except OperationalError as e:
+            self._mark_replica_unavailable(e)
+        finally:
+            _read_from_replica.reset(token)
+        return method(self, *args, **kwargs)
+
+    return cast(MethodType, wrapper)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """SQLite drops the offset of timezone-aware columns, the stored values are in UTC"""
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
 def calculate_effective_grade(
     course_status: CourseStatus,
     grades_config: ManytaskFinalGradeConfig,
@@ -59,13 +165,13 @@ def calculate_effective_grade(
     """Calculate effective grade for a student. Pure function, no DB access.
 
     Logic:
-    1. If course is FINISHED, return saved grade (frozen).
+    1. If course is FINISHED or ARCHIVED, return saved grade (frozen).
     2. Calculate grade from scores using grades_config.evaluate().
     3. In DORESHKA: cap at 3, then take max(saved, capped) to prevent downgrade.
     4. In ALL_TASKS_ISSUED: take max(saved, calculated) to prevent downgrade.
     5. Otherwise (IN_PROGRESS): return calculated grade as-is (downgrade allowed).
     """
-    if course_status == CourseStatus.FINISHED:
+    if course_status in (CourseStatus.FINISHED, CourseStatus.ARCHIVED):
         return saved_grade if saved_grade is not None else 0
 
     try:
@@ -97,6 +203,25 @@ class DatabaseConfig:
     instance_admin_username: str
     apply_migrations: bool = False
     session_factory: Optional[Callable[[], Session]] = None
+    slow_query_threshold_ms: float | None = None
+
+    # connection pool, ignored with an external pooler
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_pre_ping: bool = False
+    pool_recycle: int = -1  # seconds, -1 never recycles
+    pool_timeout: float = 30.0  # seconds to wait for a free connection
+
+    # PostgreSQL timeouts, None keeps the server defaults
+    statement_timeout_ms: int | None = None
+    lock_timeout_ms: int | None = None
+
+    # pgbouncer-like pooler in transaction mode: no pool in the app, timeouts are set per transaction
+    external_pooler: bool = False
+
+    # read replica for the heavy read-only methods, None reads everything from the primary
+    replica_url: str | None = None
+    replica_retry_interval: float = 30.0  # seconds to read from the primary after a replica failure
 
 
 class DataBaseApi(StorageApi):
@@ -115,12 +240,27 @@ class DataBaseApi(StorageApi):
         self.database_url = config.database_url
         self.apply_migrations = config.apply_migrations
 
-        self.engine = create_engine(self.database_url, echo=False)
+        self.engine = self._create_engine(config)
+        db_stats.instrument_engine(self.engine, config.slow_query_threshold_ms)
+        metrics.instrument_engine(self.engine)
 
         if config.session_factory is None:
             self._session_create: Callable[[], Session] = sessionmaker(bind=self.engine)
         else:
             self._session_create = config.session_factory
+        self._session_create = db_stats.count_sessions(self._session_create)
+
+        self.replica_engine: Engine | None = None
+        self._replica_session_create: Callable[[], Session] | None = None
+        self.replica_retry_interval = config.replica_retry_interval
+        self._replica_unavailable_until = 0.0
+        if config.replica_url is not None:
+            logger.info("Using read replica %s", make_url(config.replica_url).render_as_string(hide_password=True))
+            self.replica_engine = self._create_engine(config, config.replica_url)
+            db_stats.instrument_engine(self.replica_engine, config.slow_query_threshold_ms)
+            metrics.instrument_engine(self.replica_engine)
+            self._replica_session_create = db_stats.count_sessions(sessionmaker(bind=self.replica_engine))
+            event.listen(self.engine, "after_cursor_execute", _mark_primary_write)
 
         if self._check_pending_migrations(self.database_url):
             if self.apply_migrations:
@@ -139,6 +279,83 @@ class DataBaseApi(StorageApi):
             )
             session.commit()
 
+    def _read_session_create(self) -> Session:
+        """Session for a method decorated with _read_only, bound to the replica when it is readable"""
+        if _read_from_replica.get() and self._replica_session_create is not None:
+            return self._replica_session_create()
+        return self._session_create()
+
+    def _replica_readable(self) -> bool:
+        if self.replica_engine is None:
+            return False
+        if has_request_context() and g.get("db_wrote_to_primary", False):
+            return False
+        return time.monotonic() >= self._replica_unavailable_until
+
+    def _mark_replica_unavailable(self, error: Exception) -> None:
+        logger.warning(
+            "Read replica is unavailable, reading from the primary for %ss: %s", self.replica_retry_interval, error
+        )
+        self._replica_unavailable_until = time.monotonic() + self.replica_retry_interval
+
+    @staticmethod
+    def _create_engine(config: DatabaseConfig, database_url: str | None = None) -> Engine:
+        """Create the engine with the pool and the timeouts from the config
+
+        Timeouts are passed as startup options of every pooled connection. Transaction-level
+        poolers reject startup options and share server sessions between clients, so with an
+        external pooler the app keeps no pool and sets the timeouts with SET LOCAL in each
+        transaction instead.
+
+        :param config: DatabaseConfig instance
+        :param database_url: url of the engine, the primary database_url by default
+        :return: SQLAlchemy engine
+        """
+        database_url = database_url or config.database_url
+        timeouts: dict[str, int] = {}
+        if make_url(database_url).get_backend_name() == "postgresql":
+            if config.statement_timeout_ms is not None:
+                timeouts["statement_timeout"] = config.statement_timeout_ms
+            if config.lock_timeout_ms is not None:
+                timeouts["lock_timeout"] = config.lock_timeout_ms
+
+        if config.external_pooler:
+            logger.info("Using external connection pooler, timeouts=%s", timeouts)
+            engine = create_engine(database_url, echo=False, poolclass=NullPool, pool_pre_ping=config.pool_pre_ping)
+            if timeouts:
+                event.listen(engine, "begin", functools.partial(_set_local_timeouts, timeouts))
+            return engine
+
+        logger.info(
+            "Using connection pool: size=%d, max_overflow=%d, pre_ping=%s, recycle=%d, timeout=%s, timeouts=%s",
+            config.pool_size,
+            config.max_overflow,
+            config.pool_pre_ping,
+            config.pool_recycle,
+            config.pool_timeout,
+            timeouts,
+        )
+        connect_args = (
+            {"options": " ".join(f"-c {name}={value}" for name, value in timeouts.items())} if timeouts else {}
+        )
+        engine = create_engine(
+            database_url,
+            echo=False,
+            poolclass=metrics.InstrumentedQueuePool,
+            pool_size=config.pool_size,
+            max_overflow=config.max_overflow,
+            pool_pre_ping=config.pool_pre_ping,
+            pool_recycle=config.pool_recycle,
+            pool_timeout=config.pool_timeout,
+            connect_args=connect_args,
+        )
+        event.listen(
+            engine,
+            "checkout",
+            functools.partial(_log_pool_saturation, engine, config.pool_size + config.max_overflow),
+        )
+        return engine
+
     def get_scores(
         self,
         course_name: str,
@@ -283,6 +500,94 @@ class DataBaseApi(StorageApi):
             except NoResultFound:
                 return None
 
+    def get_auth_context(self, username: str) -> AuthContext:
+        """Method for resolving all authorization facts about the user with a single statement
+
+        Loads the stored user together with the namespaces the user has a role in
+        (owned namespaces count as namespace_admin) and the courses that matter for
+        access checks: the ones the user is enrolled in and the ones of the
+        namespaces they administer. The roles and courses are a union joined to the
+        user row, so the user comes repeated once per role or course.
+
+        :param username: user name
+
+        :return: AuthContext, empty if there is no such user
+        """
+        logger.debug("Building auth context for user '%s'", username)
+
+        user_id = select(models.User.id).where(models.User.username == username).scalar_subquery()
+        admin_namespace_ids = union(
+            select(models.Namespace.id).where(models.Namespace.created_by_id == user_id),
+            select(models.UserOnNamespace.namespace_id).where(
+                models.UserOnNamespace.user_id == user_id,
+                models.UserOnNamespace.role == models.UserOnNamespaceRole.NAMESPACE_ADMIN,
+            ),
+        )
+        role_type = models.UserOnNamespace.role.type
+        no_course_name = null().cast(String)
+        no_course_admin = null().cast(Boolean)
+        grants = union_all(
+            select(
+                models.Namespace.id.label("namespace_id"),
+                literal(models.UserOnNamespaceRole.NAMESPACE_ADMIN, role_type).label("role"),
+                no_course_name.label("course_name"),
+                no_course_admin.label("is_course_admin"),
+            ).where(models.Namespace.created_by_id == user_id),
+            select(
+                models.UserOnNamespace.namespace_id,
+                models.UserOnNamespace.role,
+                no_course_name,
+                no_course_admin,
+            ).where(models.UserOnNamespace.user_id == user_id),
+            select(
+                models.Course.namespace_id,
+                null().cast(role_type),
+                models.Course.name,
+                models.UserOnCourse.is_course_admin,
+            )
+            .outerjoin(
+                models.UserOnCourse,
+                and_(models.UserOnCourse.course_id == models.Course.id, models.UserOnCourse.user_id == user_id),
+            )
+            .where(or_(models.UserOnCourse.id.is_not(None), models.Course.namespace_id.in_(admin_namespace_ids))),
+        ).subquery()
+
+        with self._session_create() as session:
+            rows = session.execute(
+                select(
+                    models.User, grants.c.namespace_id, grants.c.role, grants.c.course_name, grants.c.is_course_admin
+                )
+                .outerjoin(grants, true())
+                .where(models.User.username == username)
+            ).all()
+            if not rows:
+                logger.info("No user found with username '%s' when building auth context", username)
+                return AuthContext(username=username)
+
+            user = rows[0][0]
+            namespace_roles: dict[int, str] = {}
+            course_roles: dict[str, bool] = {}
+            course_namespaces: dict[str, int | None] = {}
+            for _, namespace_id, role, course_name, is_course_admin in rows:
+                if course_name is not None:
+                    course_namespaces[course_name] = namespace_id
+                    if is_course_admin is not None:
+                        course_roles[course_name] = is_course_admin
+                elif namespace_id is not None and (
+                    namespace_id not in namespace_roles or role == models.UserOnNamespaceRole.NAMESPACE_ADMIN
+                ):
+                    # the owner is namespace_admin whatever role they were assigned
+                    namespace_roles[namespace_id] = role.value
+
+            return AuthContext(
+                username=username,
+                stored_user=self._to_stored_user(user),
+                instance_admin=user.is_instance_admin,
+                namespace_roles=namespace_roles,
+                course_roles=course_roles,
+                course_namespaces=course_namespaces,
+            )
+
     def check_if_instance_admin(
         self,
         username: str,
@@ -418,19 +723,183 @@ class DataBaseApi(StorageApi):
     def sync_user_on_course(self, course_name: str, username: str, course_admin: bool) -> None:
         """Method for sync user's gitlab and stored data
 
+        Writes only if the user is not enrolled yet or the course admin flag has to be raised.
+
         :param course_name: course name
         :param username: user name
-
-        :return: created or updated StoredUser object
+        :param course_admin: whether the user has to be a course admin
         """
 
         with self._session_create() as session:
             course = self._get(session, models.Course, name=course_name)
-            user_on_course = self._get_or_create_user_on_course(session, username, course)
+            user = self._get(session, models.User, username=username)
+            user_on_course = (
+                session.query(models.UserOnCourse).filter_by(user_id=user.id, course_id=course.id).one_or_none()
+            )
+            if user_on_course is not None and (user_on_course.is_course_admin or not course_admin):
+                return
+
+            user_on_course = self._get_or_create(session, models.UserOnCourse, user_id=user.id, course_id=course.id)
             user_on_course.is_course_admin = user_on_course.is_course_admin or course_admin
+            logger.info("Synced user '%s' on course '%s', course_admin=%s", username, course_name, course_admin)
+
+            session.commit()
+
+    def get_student_repo(self, course_name: str, username: str) -> StudentRepo | None:
+        """Get the stored provisioning state of the student's repository
+
+        Read from the primary, the state is written right before the student is sent to the course page.
+
+        :param course_name: course name
+        :param username: user name
+        :return: stored state or None if the user is not enrolled or the repository was never recorded
+        """
+
+        with self._session_create() as session:
+            user_on_course = self._find_user_on_course(session, course_name, username)
+            if (
+                user_on_course is None
+                or user_on_course.repo_url is None
+                or user_on_course.repo_created_at is None
+                or user_on_course.repo_verified_at is None
+            ):
+                return None
+            return StudentRepo(
+                url=user_on_course.repo_url,
+                repo_id=user_on_course.repo_id,
+                created_at=_as_utc(user_on_course.repo_created_at),
+                verified_at=_as_utc(user_on_course.repo_verified_at),
+            )
+
+    def store_student_repo(self, course_name: str, username: str, url: str, repo_id: str | None = None) -> None:
+        """Record that the RMS confirmed the student's repository exists
+
+        The creation time is kept while the url stays the same, the id is kept if the RMS did not report it.
+        Does nothing if the user is not enrolled on the course.
+
+        :param course_name: course name
+        :param username: user name
+        :param url: url of the repository
+        :param repo_id: id of the repository in the RMS
+        """
+
+        with self._session_create() as session:
+            user_on_course = self._find_user_on_course(session, course_name, username)
+            if user_on_course is None:
+                logger.info("User '%s' is not enrolled in course '%s', repo is not recorded", username, course_name)
+                return
+
+            now = datetime.now(timezone.utc)
+            if user_on_course.repo_url != url:
+                user_on_course.repo_url = url
+                user_on_course.repo_id = None
+                user_on_course.repo_created_at = now
+            if repo_id is not None:
+                user_on_course.repo_id = repo_id
+            user_on_course.repo_verified_at = now
+            user_on_course.repo_provision_error = None
+            session.commit()
+
+    def clear_student_repo(self, course_name: str, username: str) -> None:
+        """Forget the student's repository after the RMS reported it missing
+
+        :param course_name: course name
+        :param username: user name
+        """
+
+        with self._session_create() as session:
+            user_on_course = self._find_user_on_course(session, course_name, username)
+            if user_on_course is None or user_on_course.repo_url is None:
+                return
+
+            logger.info(
+                "Clearing repo '%s' of user '%s' in course '%s'", user_on_course.repo_url, username, course_name
+            )
+            user_on_course.repo_url = None
+            user_on_course.repo_id = None
+            user_on_course.repo_created_at = None
+            user_on_course.repo_verified_at = None
+            session.commit()
+
+    def request_repo_provisioning(self, course_name: str, usernames: Collection[str]) -> list[str]:
+        """Enroll the students and mark their repositories to be provisioned
+
+        Students with a recorded repository are skipped, failed requests are reset.
+
+        :param course_name: course name
+        :param usernames: students to provision
+        :return: usernames to provision, unknown users are left out
+        """
+
+        with self._session_create() as session:
+            course = self._get(session, models.Course, name=course_name)
+            users = session.query(models.User).filter(models.User.username.in_(set(usernames))).all()
+            now = datetime.now(timezone.utc)
+            requested = []
+            for user in sorted(users, key=lambda user: user.username):
+                user_on_course = self._get_or_create(session, models.UserOnCourse, user_id=user.id, course_id=course.id)
+                if user_on_course.repo_url is not None:
+                    continue
+                user_on_course.repo_provision_requested_at = now
+                user_on_course.repo_provision_error = None
+                requested.append(user.username)
+            session.commit()
 
+        logger.info("Requested repos of %d students in course '%s'", len(requested), course_name)
+        return requested
+
+    def fail_repo_provisioning(self, course_name: str, username: str, error: str) -> None:
+        """Record why the repository of the student could not be provisioned
+
+        :param course_name: course name
+        :param username: user name
+        :param error: reason of the failure
+        """
+
+        with self._session_create() as session:
+            user_on_course = self._find_user_on_course(session, course_name, username)
+            if user_on_course is None:
+                return
+            user_on_course.repo_provision_error = error
             session.commit()
 
+    @_read_only
+    def get_repo_provisioning(self, course_name: str) -> list[RepoProvisioning]:
+        """Get the provisioning state of every student whose repository was requested
+
+        :param course_name: course name
+        :return: states ordered by username
+        """
+
+        with self._read_session_create() as session:
+            rows = session.execute(
+                select(
+                    models.User.username,
+                    models.UserOnCourse.repo_provision_requested_at,
+                    models.UserOnCourse.repo_url,
+                    models.UserOnCourse.repo_provision_error,
+                )
+                .join(models.UserOnCourse, models.UserOnCourse.user_id == models.User.id)
+                .join(models.Course, models.Course.id == models.UserOnCourse.course_id)
+                .where(models.Course.name == course_name, models.UserOnCourse.repo_provision_requested_at.is_not(None))
+                .order_by(models.User.username)
+            ).all()
+            return [
+                RepoProvisioning(username=username, requested_at=_as_utc(requested_at), repo_url=url, error=error)
+                for username, requested_at, url, error in rows
+            ]
+
+    @staticmethod
+    def _find_user_on_course(session: Session, course_name: str, username: str) -> models.UserOnCourse | None:
+        return (
+            session.query(models.UserOnCourse)
+            .join(models.Course, models.Course.id == models.UserOnCourse.course_id)
+            .join(models.User, models.User.id == models.UserOnCourse.user_id)
+            .filter(models.Course.name == course_name, models.User.username == username)
+            .one_or_none()
+        )
+
+    @_read_only
     def get_all_scores_with_names(
         self, course_name: str
     ) -> dict[str, tuple[dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]]:
@@ -443,43 +912,9 @@ class DataBaseApi(StorageApi):
         Excludes users with PROGRAM_MANAGER role in the course's namespace.
         """
 
-        with self._session_create() as session:
+        with self._read_session_create() as session:
             course = self._get(session, models.Course, name=course_name)
-            namespace_id = course.namespace_id
-
-            program_managers_subquery = None
-            if namespace_id is not None:
-                program_managers_subquery = select(models.UserOnNamespace.user_id).where(
-                    models.UserOnNamespace.namespace_id == namespace_id,
-                    models.UserOnNamespace.role == models.UserOnNamespaceRole.PROGRAM_MANAGER,
-                )
-
-            statement = (
-                select(
-                    User.username,
-                    User.first_name,
-                    User.last_name,
-                    Task.name.label("task_name"),
-                    coalesce(Grade.score, 0).label("score"),
-                    coalesce(Grade.is_solved, False).label("is_solved"),
-                    UserOnCourse.final_grade,
-                    UserOnCourse.final_grade_override,
-                    UserOnCourse.comment,
-                )
-                .join(UserOnCourse, UserOnCourse.user_id == User.id)
-                .join(Course, Course.id == UserOnCourse.course_id)
-                .outerjoin(Grade, (Grade.user_on_course_id == UserOnCourse.id))
-                .outerjoin(Grade.task)
-                .outerjoin(Task.group)
-                .where(
-                    Course.name == course_name,
-                )
-            )
-
-            if program_managers_subquery is not None:
-                statement = statement.where(~User.id.in_(program_managers_subquery))
-
-            rows = session.execute(statement).all()
+            rows = session.execute(self._scores_with_names_statement(course)).all()
 
             scores_and_names: dict[
                 str, tuple[dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]
@@ -508,6 +943,213 @@ class DataBaseApi(StorageApi):
 
             return scores_and_names
 
+    @_read_only
+    def iter_scores_with_names(
+        self, course_name: str, batch_size: int = 500
+    ) -> Iterator[tuple[str, dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]]:
+        """Stream the data of get_all_scores_with_names one student at a time, ordered by username
+
+        Rows are fetched from a server-side cursor in batches of batch_size, so memory does not
+        grow with the course size. The session stays open until the iterator is exhausted or closed.
+
+        :param course_name: course name
+        :param batch_size: number of rows fetched from the cursor at once
+
+        :return: iterator of (username, scores_dict, (first_name, last_name), final_grade,
+            final_grade_override, comment)
+        """
+        session = self._read_session_create()
+        try:
+            course = self._get(session, models.Course, name=course_name)
+            statement = self._scores_with_names_statement(course).order_by(User.username)
+            # executed here, so a failing replica is detected by _read_only before streaming starts
+            result = session.execute(statement.execution_options(yield_per=batch_size))
+        except Exception:
+            session.close()
+            raise
+        return self._group_scores_by_student(session, result)
+
+    @staticmethod
+    def _group_scores_by_student(
+        session: Session, result: Iterable[Row[Any]]
+    ) -> Iterator[tuple[str, dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]]:
+        with session:
+            student: (
+                tuple[str, dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None] | None
+            ) = None
+            for row in result:
+                if student is None or student[0] != row.username:
+                    if student is not None:
+                        yield student
+                    student = (
+                        row.username,
+                        {},
+                        (row.first_name, row.last_name),
+                        row.final_grade,
+                        row.final_grade_override,
+                        row.comment,
+                    )
+                if row.task_name is not None:
+                    student[1][row.task_name] = (row.score, row.is_solved)
+            if student is not None:
+                yield student
+
+    @_read_only
+    def get_scores_with_names_page(
+        self,
+        course_name: str,
+        offset: int,
+        limit: int,
+        order_by: str = "username",
+        descending: bool = False,
+        search: str | None = None,
+        search_names: bool = False,
+    ) -> tuple[int, dict[str, tuple[dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]]]:
+        """One page of get_all_scores_with_names, sorted and filtered by the database
+
+        Only the students of the page are loaded with their scores.
+
+        :param course_name: course name
+        :param offset: number of students to skip
+        :param limit: maximum number of students on the page
+        :param order_by: one of STUDENT_SORT_KEYS or TASK_SORT_PREFIX followed by a task name,
+            students with equal keys are ordered by username
+        :param descending: sort in descending order
+        :param search: keep students with the username containing this text, transliteration-aware
+        :param search_names: also match the search text against "first last first" names
+
+        :return: number of students matching the search and the page in the format of get_all_scores_with_names
+        """
+        with self._read_session_create() as session:
+            course = self._get(session, models.Course, name=course_name)
+            students = (
+                select(User.username)
+                .join(UserOnCourse, UserOnCourse.user_id == User.id)
+                .where(UserOnCourse.course_id == course.id)
+                .where(self._not_program_manager(course))
+            )
+
+            if search:
+                term = normalize_for_search(search)
+                candidates = session.execute(
+                    students.with_only_columns(User.username, User.first_name, User.last_name)
+                ).all()
+                matched = [
+                    username
+                    for username, first_name, last_name in candidates
+                    if term in normalize_for_search(username)
+                    or (search_names and term in normalize_for_search(f"{first_name} {last_name} {first_name}"))
+                ]
+                students = students.where(User.username.in_(matched))
+
+            total = session.scalar(select(func.count()).select_from(students.subquery())) or 0
+
+            sort_key = self._student_sort_key(course, order_by)
+            page_usernames = session.scalars(
+                students.order_by(sort_key.desc() if descending else sort_key.asc(), User.username)
+                .offset(offset)
+                .limit(limit)
+            ).all()
+            scores = self._scores_with_names_of(session, course, page_usernames)
+            return total, {username: scores[username] for username in page_usernames}
+
+    @_read_only
+    def get_students_scores_with_names(
+        self, course_name: str, usernames: Collection[str]
+    ) -> dict[str, tuple[dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]]:
+        """get_all_scores_with_names restricted to the given students
+
+        :param course_name: course name
+        :param usernames: students to load, the ones not enrolled on the course are skipped
+
+        :return: dict in the format of get_all_scores_with_names
+        """
+        with self._read_session_create() as session:
+            course = self._get(session, models.Course, name=course_name)
+            return self._scores_with_names_of(session, course, usernames)
+
+    def _scores_with_names_of(
+        self, session: Session, course: models.Course, usernames: Collection[str]
+    ) -> dict[str, tuple[dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]]:
+        if not usernames:
+            return {}
+        statement = (
+            self._scores_with_names_statement(course).where(User.username.in_(usernames)).order_by(User.username)
+        )
+        return {
+            student[0]: student[1:] for student in self._group_scores_by_student(session, session.execute(statement))
+        }
+
+    @staticmethod
+    def _student_sort_key(course: models.Course, order_by: str) -> ColumnElement[Any]:
+        if order_by not in STUDENT_SORT_KEYS and not order_by.startswith(TASK_SORT_PREFIX):
+            raise ValueError(f"Unknown sort key {order_by}")
+        if order_by.startswith(TASK_SORT_PREFIX):
+            task_score = (
+                select(Grade.score)
+                .join(Task, Task.id == Grade.task_id)
+                .join(TaskGroup, TaskGroup.id == Task.group_id)
+                .where(
+                    Grade.course_id == course.id,
+                    Grade.user_on_course_id == UserOnCourse.id,
+                    TaskGroup.course_id == course.id,
+                    Task.name == order_by.removeprefix(TASK_SORT_PREFIX),
+                )
+                .scalar_subquery()
+            )
+            return coalesce(task_score, 0)
+
+        sort_keys: dict[str, ColumnElement[Any]] = {
+            "username": User.username.expression,
+            # NULLs go first on sqlite and last on postgres
+            "first_name": coalesce(User.first_name, ""),
+            "last_name": coalesce(User.last_name, ""),
+            "comment": coalesce(UserOnCourse.comment, ""),
+            "grade": coalesce(UserOnCourse.final_grade_override, UserOnCourse.final_grade, 0),
+            "total_score": coalesce(
+                select(func.sum(Grade.score))
+                .where(Grade.course_id == course.id, Grade.user_on_course_id == UserOnCourse.id)
+                .scalar_subquery(),
+                0,
+            ),
+        }
+        return sort_keys[order_by]
+
+    @staticmethod
+    def _not_program_manager(course: models.Course) -> ColumnElement[bool]:
+        """Excludes the program managers of the course namespace from a query over User"""
+        if course.namespace_id is None:
+            return true()
+        program_managers_subquery = select(models.UserOnNamespace.user_id).where(
+            models.UserOnNamespace.namespace_id == course.namespace_id,
+            models.UserOnNamespace.role == models.UserOnNamespaceRole.PROGRAM_MANAGER,
+        )
+        return ~User.id.in_(program_managers_subquery)
+
+    @staticmethod
+    def _scores_with_names_statement(course: models.Course) -> Select[Any]:
+        """Scores of all students of the course joined with their names, program managers excluded"""
+        statement = (
+            select(
+                User.username,
+                User.first_name,
+                User.last_name,
+                Task.name.label("task_name"),
+                coalesce(Grade.score, 0).label("score"),
+                coalesce(Grade.is_solved, False).label("is_solved"),
+                UserOnCourse.final_grade,
+                UserOnCourse.final_grade_override,
+                UserOnCourse.comment,
+            )
+            .join(UserOnCourse, UserOnCourse.user_id == User.id)
+            .outerjoin(Grade, and_(Grade.course_id == course.id, Grade.user_on_course_id == UserOnCourse.id))
+            .outerjoin(Grade.task)
+            .outerjoin(Task.group)
+            .where(UserOnCourse.course_id == course.id)
+            .where(DataBaseApi._not_program_manager(course))
+        )
+        return statement
+
     @staticmethod
     def _build_grades_config(course: models.Course) -> ManytaskFinalGradeConfig:
         grades: dict[int, list[dict[Path, int | float]]] = {}
@@ -522,6 +1164,7 @@ class DataBaseApi(StorageApi):
         grades_order = sorted(list(grades.keys()), reverse=True)
         return ManytaskFinalGradeConfig(grades=grades, grades_order=grades_order)
 
+    @_read_only
     def get_grades(self, course_name: str) -> ManytaskFinalGradeConfig:
         """Method for getting config with grades for the course
 
@@ -530,10 +1173,11 @@ class DataBaseApi(StorageApi):
         :return: dict with list of possible criterions for each grade
         """
 
-        with self._session_create() as session:
+        with self._read_session_create() as session:
             course = DataBaseApi._get(session, models.Course, name=course_name)
             return DataBaseApi._build_grades_config(course)
 
+    @_read_only
     def get_stats(self, course_name: str) -> dict[str, float]:
         """Method for getting stats of all tasks
 
@@ -544,7 +1188,7 @@ class DataBaseApi(StorageApi):
         :return: dict with the names of tasks and their stats
         """
 
-        with self._session_create() as session:
+        with self._read_session_create() as session:
             course = self._get(session, models.Course, name=course_name)
             namespace_id = course.namespace_id
 
@@ -576,6 +1220,74 @@ class DataBaseApi(StorageApi):
             }
             # fmt: on
 
+    @_read_only
+    def get_submission_stats(self, course_name: str) -> dict[str, TaskSubmissionStats]:
+        """Attempt counts and time-to-solve of every task with submissions
+
+        Aggregates the append-only submission log only, the grades table is not read. A report
+        solves the task under the same rule as Grade.is_solved.
+
+        :param course_name: course name
+
+        :return: dict with the names of tasks and their submission stats
+        """
+        with self._read_session_create() as session:
+            course = self._get(session, models.Course, name=course_name)
+            submission = models.Submission
+
+            attempts = (
+                select(
+                    submission.task_id,
+                    submission.user_id,
+                    submission.submit_time,
+                    and_(submission.score > 0, submission.score >= models.Task.min_score).label("solved"),
+                    func.row_number()
+                    .over(
+                        partition_by=(submission.task_id, submission.user_id),
+                        order_by=(submission.submit_time, submission.id),
+                    )
+                    .label("attempt"),
+                )
+                .join(models.Task, models.Task.id == submission.task_id)
+                .where(submission.course_id == course.id)
+                .subquery()
+            )
+            per_student = (
+                select(
+                    attempts.c.task_id,
+                    func.count().label("submissions"),
+                    func.min(attempts.c.submit_time).label("first_submit_time"),
+                    func.min(case((attempts.c.solved, attempts.c.attempt))).label("attempts_to_solve"),
+                    func.min(case((attempts.c.solved, attempts.c.submit_time))).label("solve_time"),
+                )
+                .group_by(attempts.c.task_id, attempts.c.user_id)
+                .subquery()
+            )
+            seconds_to_solve = self._seconds_between(session, per_student.c.first_submit_time, per_student.c.solve_time)
+            rows = session.execute(
+                select(
+                    models.Task.name,
+                    func.sum(per_student.c.submissions),
+                    func.count(),
+                    func.count(per_student.c.solve_time),
+                    func.avg(per_student.c.attempts_to_solve),
+                    func.avg(seconds_to_solve),
+                )
+                .join(per_student, per_student.c.task_id == models.Task.id)
+                .group_by(models.Task.id, models.Task.name)
+            ).all()
+
+        return {
+            task_name: TaskSubmissionStats(
+                submissions=int(submissions),
+                students=students,
+                solved_students=solved_students,
+                avg_attempts_to_solve=None if avg_attempts is None else float(avg_attempts),
+                avg_seconds_to_solve=None if avg_seconds is None else float(avg_seconds),
+            )
+            for task_name, submissions, students, solved_students, avg_attempts, avg_seconds in rows
+        }
+
     def store_score(self, course_name: str, username: str, task_name: str, update_fn: Callable[..., Any]) -> int:
         """Method for storing user's task score
 
@@ -602,7 +1314,7 @@ class DataBaseApi(StorageApi):
                     logger.warning("Task '%s' not found in course '%s'", task_name, course_name)
                     return 0
 
-                grade = self._get_or_create_sfu_grade(session, user_on_course.id, task.id)
+                grade = self._get_or_create_sfu_grade(session, course.id, user_on_course.id, task.id)
                 new_score = update_fn("", grade.score)
                 grade.score = new_score
                 grade.last_submit_date = datetime.now(timezone.utc)
@@ -622,6 +1334,501 @@ class DataBaseApi(StorageApi):
                 logger.error("Failed to update score for '%s' on '%s': %s", username, task_name, str(e))
                 raise
 
+    def upsert_score(
+        self,
+        course_name: str,
+        username: str,
+        task_name: str,
+        score: int,
+        allow_reduction: bool = False,
+        submission: ReportedSubmission | None = None,
+    ) -> int:
+        """Store the reported task score with a single INSERT ... ON CONFLICT DO UPDATE
+
+        The database keeps the max of the stored and the reported score, keeps a negative stored
+        score (a penalty) unless allow_reduction is set, updates is_solved and last_submit_date.
+        Concurrent reports never overwrite each other and no row lock is held between statements.
+
+        :param course_name: course name
+        :param username: user name
+        :param task_name: task name
+        :param score: reported score with the deadline multiplier applied
+        :param allow_reduction: store the reported score even if it is lower than the stored one
+        :param submission: accepted report to append to the submission log in the same transaction
+
+        :return: saved score, 0 if there is no such task
+        """
+        with self._session_create() as session:
+            try:
+                course = self._get(session, models.Course, name=course_name)
+                user = self._get(session, models.User, username=username)
+                user_on_course_id = self._ensure_user_on_course(session, user.id, course.id)
+
+                try:
+                    task = self._get_task_by_name_and_course_id(session, task_name, course.id)
+                except NoResultFound:
+                    session.commit()
+                    logger.warning("Task '%s' not found in course '%s'", task_name, course_name)
+                    return 0
+
+                new_score = self._upsert_grade(session, course.id, user_on_course_id, task, score, allow_reduction)
+                if submission is not None:
+                    self._log_submission(session, course.id, user.id, task.id, score, submission)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error("Failed to upsert score for '%s' on '%s': %s", username, task_name, str(e))
+                raise
+
+        logger.info("Setting score to %d for username=%s on task=%s", new_score, username, task_name)
+        return new_score
+
+    def update_scores(self, course_name: str, changes: dict[str, dict[str, int]]) -> dict[str, dict[str, int]]:
+        """Set the scores of many students in one transaction, as an admin edit of the grid
+
+        Scores are stored as given, lower scores and penalties included. Students are enrolled
+        and all grades are written with one statement each, whatever the number of cells.
+        Grades are not recalculated, see recalculate_grades.
+
+        :param course_name: course name
+        :param changes: new scores by username and task name
+        :return: stored scores by username and task name, unknown tasks are skipped
+        :raises NoResultFound: one of the users does not exist
+        """
+        if not changes:
+            return {}
+
+        stored: dict[str, dict[str, int]] = {}
+        values: list[dict[str, Any]] = []
+        with self._session_create() as session:
+            try:
+                course = self._get(session, models.Course, name=course_name)
+                tasks = {
+                    task.name: task
+                    for task in session.scalars(
+                        select(Task)
+                        .join(TaskGroup, TaskGroup.id == Task.group_id)
+                        .where(TaskGroup.course_id == course.id)
+                    )
+                }
+                user_ids = dict(
+                    session.execute(select(User.username, User.id).where(User.username.in_(changes))).tuples().all()
+                )
+                missing = set(changes) - set(user_ids)
+                if missing:
+                    raise NoResultFound(f"Users {sorted(missing)} not found")
+
+                session.execute(
+                    self._insert_for_dialect(session, models.UserOnCourse)
+                    .values([{"user_id": user_id, "course_id": course.id} for user_id in user_ids.values()])
+                    .on_conflict_do_nothing(index_elements=[models.UserOnCourse.user_id, models.UserOnCourse.course_id])
+                )
+                user_on_course_ids = dict(
+                    session.execute(
+                        select(UserOnCourse.user_id, UserOnCourse.id).where(
+                            UserOnCourse.course_id == course.id, UserOnCourse.user_id.in_(user_ids.values())
+                        )
+                    )
+                    .tuples()
+                    .all()
+                )
+
+                now = datetime.now(timezone.utc)
+                for username, scores in changes.items():
+                    for task_name, score in scores.items():
+                        task = tasks.get(task_name)
+                        if task is None:
+                            logger.warning("Task '%s' not found in course '%s'", task_name, course_name)
+                            continue
+                        values.append(
+                            {
+                                "course_id": course.id,
+                                "user_on_course_id": user_on_course_ids[user_ids[username]],
+                                "task_id": task.id,
+                                "score": score,
+                                "is_solved": 0 < score and task.min_score <= score,
+                                "last_submit_date": now,
+                            }
+                        )
+                        stored.setdefault(username, {})[task_name] = score
+
+                if values:
+                    insert = self._insert_for_dialect(session, models.Grade).values(values)
+                    session.execute(
+                        insert.on_conflict_do_update(
+                            index_elements=[
+                                models.Grade.course_id,
+                                models.Grade.user_on_course_id,
+                                models.Grade.task_id,
+                            ],
+                            set_={
+                                "score": insert.excluded.score,
+                                "is_solved": insert.excluded.is_solved,
+                                "last_submit_date": insert.excluded.last_submit_date,
+                            },
+                        )
+                    )
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                logger.error("Failed to update %d scores in '%s': %s", len(values), course_name, str(e))
+                raise
+
+        logger.info("Updated %d scores of %d students in course=%s", len(values), len(stored), course_name)
+        return stored
+
+    def enqueue_report(
+        self,
+        course_name: str,
+        username: str,
+        task_name: str,
+        reported_score: int,
+        submit_time: datetime,
+        check_deadline: bool = True,
+        allow_reduction: bool = False,
+    ) -> ReportReceipt:
+        """Append a score report to the report queue, it is applied later by apply_queued_reports
+
+        :param course_name: course name
+        :param username: user name
+        :param task_name: task name
+        :param reported_score: score reported by the checker
+        :param submit_time: submission time used for the deadline multiplier
+        :param check_deadline: apply the deadline multiplier
+        :param allow_reduction: allow lowering the stored score
+
+        :return: receipt of the queued report
+        """
+        with self._session_create() as session:
+            course = self._get(session, models.Course, name=course_name)
+            report = models.QueuedReport(
+                course_id=course.id,
+                username=username,
+                task_name=task_name,
+                reported_score=reported_score,
+                submit_time=submit_time,
+                check_deadline=check_deadline,
+                allow_reduction=allow_reduction,
+            )
+            session.add(report)
+            session.flush()
+            receipt = self._to_report_receipt(report, course_name)
+            session.commit()
+
+        logger.info(
+            "Queued report id=%s for user '%s' in course '%s' task '%s'",
+            receipt.receipt_id,
+            username,
+            course_name,
+            task_name,
+        )
+        return receipt
+
+    def get_report_receipt(self, course_name: str, receipt_id: int) -> ReportReceipt | None:
+        """Get the current state of a queued report
+
+        :param course_name: course name
+        :param receipt_id: id returned by enqueue_report
+
+        :return: receipt or None if there is no such report in the course
+        """
+        with self._session_create() as session:
+            report = session.scalars(
+                select(models.QueuedReport)
+                .join(models.Course, models.Course.id == models.QueuedReport.course_id)
+                .where(models.QueuedReport.id == receipt_id, models.Course.name == course_name)
+            ).one_or_none()
+            return None if report is None else self._to_report_receipt(report, course_name)
+
+    def apply_queued_reports(
+        self,
+        deadline_multiplier: Callable[[ReportReceipt], float],
+        max_students: int = 100,
+    ) -> list[ReportReceipt]:
+        """Apply pending reports from the report queue, one student per transaction
+
+        Reports are locked with FOR UPDATE SKIP LOCKED, so several appliers drain the queue
+        concurrently without waiting for each other. All pending reports of a student are
+        applied in one transaction in the order they were queued.
+
+        :param deadline_multiplier: multiplier for the reported score of a report
+        :param max_students: maximum number of students to process
+
+        :return: receipts of the processed reports
+        """
+        processed: list[ReportReceipt] = []
+        for _ in range(max_students):
+            receipts = self._apply_next_student_reports(deadline_multiplier)
+            if not receipts:
+                break
+            processed.extend(receipts)
+        return processed
+
+    def _apply_next_student_reports(self, deadline_multiplier: Callable[[ReportReceipt], float]) -> list[ReportReceipt]:
+        with self._session_create() as session:
+            oldest = self._lock_next_queued_student(session)
+            if oldest is None:
+                return []
+            course_id, username = oldest
+
+            # no other applier takes the student while the lock is held, so all its reports are ours
+            rows = session.execute(
+                select(models.QueuedReport, models.Course)
+                .join(models.Course, models.Course.id == models.QueuedReport.course_id)
+                .where(
+                    models.QueuedReport.course_id == course_id,
+                    models.QueuedReport.username == username,
+                    models.QueuedReport.applied_at.is_(None),
+                )
+                .order_by(models.QueuedReport.id)
+                .with_for_update(of=models.QueuedReport)
+            ).all()
+            if not rows:
+                # applied by another applier between picking the student and locking it
+                session.commit()
+                return []
+            course = rows[0][1]
+            receipts = [self._to_report_receipt(report, course.name) for report, _ in rows]
+            now = datetime.now(timezone.utc)
+
+            # failures are rolled back to a savepoint, the row locks stay held until they are marked failed
+            try:
+                with session.begin_nested():
+                    user = self._get(session, models.User, username=username)
+                    user_on_course_id = self._ensure_user_on_course(session, user.id, course.id)
+            except Exception as e:
+                logger.exception("Failed to apply %d queued reports of user '%s'", len(rows), username)
+                for (report, _), receipt in zip(rows, receipts):
+                    report.error = receipt.error = str(e) or type(e).__name__
+                    report.applied_at = receipt.applied_at = now
+                session.commit()
+                return receipts
+
+            for (report, _), receipt in zip(rows, receipts):
+                try:
+                    with session.begin_nested():
+                        self._apply_queued_report(
+                            session, course, user, user_on_course_id, report, receipt, deadline_multiplier
+                        )
+                except Exception as e:
+                    logger.exception("Failed to apply queued report id=%s of user '%s'", report.id, username)
+                    report.final_score = receipt.final_score = None
+                    report.error = receipt.error = str(e) or type(e).__name__
+                report.applied_at = receipt.applied_at = now
+
+            session.commit()
+
+        logger.info("Applied %d queued reports of user '%s' in course '%s'", len(receipts), username, course.name)
+        return receipts
+
+    @staticmethod
+    def _lock_next_queued_student(session: Session) -> Row[tuple[int, str]] | None:
+        """Pick the student of the oldest pending report whose reports no other applier is processing
+
+        On postgres the student is held by a transaction-level advisory lock keyed by the course id
+        and the username, so the reports of one student are always applied by a single applier in
+        the order they were queued. Other databases have a single writer and need no lock.
+
+        :return: (course id, username) or None if no report is pending
+        """
+        query = (
+            select(models.QueuedReport.course_id, models.QueuedReport.username)
+            .where(models.QueuedReport.applied_at.is_(None))
+            .order_by(models.QueuedReport.id)
+            .limit(1)
+        )
+        if session.get_bind().dialect.name == "postgresql":
+            query = query.where(
+                func.pg_try_advisory_xact_lock(
+                    models.QueuedReport.course_id, func.hashtext(models.QueuedReport.username)
+                )
+            )
+        return session.execute(query).first()
+
+    def _apply_queued_report(  # noqa: PLR0913
+        self,
+        session: Session,
+        course: models.Course,
+        user: models.User,
+        user_on_course_id: int,
+        report: models.QueuedReport,
+        receipt: ReportReceipt,
+        deadline_multiplier: Callable[[ReportReceipt], float],
+    ) -> None:
+        try:
+            task = self._get_task_by_name_and_course_id(session, report.task_name, course.id)
+        except NoResultFound:
+            logger.warning("Task '%s' not found in course '%s'", report.task_name, course.name)
+            report.error = receipt.error = f"Task {report.task_name} not found"
+            return
+
+        multiplier = deadline_multiplier(receipt)
+        score = int(report.reported_score * multiplier)
+        report.final_score = receipt.final_score = self._upsert_grade(
+            session, course.id, user_on_course_id, task, score, report.allow_reduction
+        )
+        self._log_submission(
+            session,
+            course.id,
+            user.id,
+            task.id,
+            score,
+            ReportedSubmission(report.reported_score, multiplier, report.submit_time, SUBMISSION_SOURCE_QUEUE),
+        )
+
+    @staticmethod
+    def _to_report_receipt(report: models.QueuedReport, course_name: str) -> ReportReceipt:
+        return ReportReceipt(
+            receipt_id=report.id,
+            course_name=course_name,
+            username=report.username,
+            task_name=report.task_name,
+            reported_score=report.reported_score,
+            submit_time=report.submit_time,
+            check_deadline=report.check_deadline,
+            allow_reduction=report.allow_reduction,
+            applied_at=report.applied_at,
+            final_score=report.final_score,
+            error=report.error,
+        )
+
+    def enqueue_rms_job(
+        self, kind: str, course_name: str, params: dict[str, Any], created_by: str | None = None
+    ) -> RmsJob:
+        """Store a job for the RMS job runners
+
+        :param kind: job kind
+        :param course_name: course the job belongs to
+        :param params: arguments of the RMS calls
+        :param created_by: username of the user who started the job
+
+        :return: queued job
+        """
+        now = datetime.now(timezone.utc)
+        with self._session_create() as session:
+            job = models.QueuedRmsJob(
+                kind=kind,
+                course_name=course_name,
+                created_by=created_by,
+                params=params,
+                state={},
+                run_after=now,
+                created_at=now,
+                updated_at=now,
+            )
+            session.add(job)
+            session.flush()
+            rms_job = self._to_rms_job(job)
+            session.commit()
+
+        logger.info("Queued %s job id=%s for course '%s'", kind, rms_job.job_id, course_name)
+        return rms_job
+
+    def get_rms_job(self, job_id: int) -> RmsJob | None:
+        with self._session_create() as session:
+            job = session.get(models.QueuedRmsJob, job_id)
+            return None if job is None else self._to_rms_job(job)
+
+    def claim_rms_job(self, lease: float) -> RmsJob | None:
+        """Take the oldest job due to run and mark it running
+
+        A queued job is due after its retry delay, a running one when the lease of its runner
+        expired without a heartbeat, i.e. the runner process died. Jobs are locked with
+        FOR UPDATE SKIP LOCKED, so runners of different processes never take the same job.
+
+        :param lease: seconds the job is owned by the caller, renewed by save_rms_job_state
+
+        :return: claimed job or None if no job is due
+        """
+        now = datetime.now(timezone.utc)
+        with self._session_create() as session:
+            job = session.scalars(
+                select(models.QueuedRmsJob)
+                .where(
+                    models.QueuedRmsJob.status.in_(["queued", "running"]),
+                    models.QueuedRmsJob.run_after <= now,
+                )
+                .order_by(models.QueuedRmsJob.run_after, models.QueuedRmsJob.id)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            ).one_or_none()
+            if job is None:
+                return None
+            if job.status == "running":
+                logger.warning("Resuming %s job id=%s after an expired lease", job.kind, job.id)
+            job.status = "running"
+            job.attempts += 1
+            job.run_after = now + timedelta(seconds=lease)
+            job.updated_at = now
+            rms_job = self._to_rms_job(job)
+            session.commit()
+            return rms_job
+
+    def save_rms_job_state(self, job_id: int, state: dict[str, Any], lease: float) -> None:
+        """Store the results of the finished steps and renew the lease of a running job"""
+        now = datetime.now(timezone.utc)
+        with self._session_create() as session:
+            job = self._get(session, models.QueuedRmsJob, id=job_id)
+            job.state = dict(state)
+            job.run_after = now + timedelta(seconds=lease)
+            job.updated_at = now
+            session.commit()
+
+    def finish_rms_job(self, job_id: int, error: str | None = None, retry_in: float | None = None) -> None:
+        """Mark a running job done, failed or queued for another attempt
+
+        :param job_id: id of the job
+        :param error: reason the attempt failed, None if the job is done
+        :param retry_in: seconds before the failed job is retried, None to give up
+        """
+        now = datetime.now(timezone.utc)
+        with self._session_create() as session:
+            job = self._get(session, models.QueuedRmsJob, id=job_id)
+            job.error = error
+            job.updated_at = now
+            if error is None:
+                job.status = "done"
+            elif retry_in is not None:
+                job.status = "queued"
+                job.run_after = now + timedelta(seconds=retry_in)
+            else:
+                job.status = "failed"
+            session.commit()
+
+    def retry_rms_job(self, job_id: int) -> RmsJob | None:
+        """Queue a failed job again, it resumes after its finished steps
+
+        :return: queued job or None if there is no such failed job
+        """
+        now = datetime.now(timezone.utc)
+        with self._session_create() as session:
+            job = session.get(models.QueuedRmsJob, job_id)
+            if job is None or job.status != "failed":
+                return None
+            job.status = "queued"
+            job.attempts = 0
+            job.run_after = now
+            job.updated_at = now
+            rms_job = self._to_rms_job(job)
+            session.commit()
+            return rms_job
+
+    @staticmethod
+    def _to_rms_job(job: models.QueuedRmsJob) -> RmsJob:
+        return RmsJob(
+            job_id=job.id,
+            kind=job.kind,
+            course_name=job.course_name,
+            params=dict(job.params),
+            state=dict(job.state),
+            status=job.status,
+            attempts=job.attempts,
+            error=job.error,
+            created_by=job.created_by,
+            created_at=_as_utc(job.created_at),
+            updated_at=_as_utc(job.updated_at),
+        )
+
     def get_course(
         self,
         course_name: str,
@@ -638,6 +1845,61 @@ class DataBaseApi(StorageApi):
         except NoResultFound:
             return None
 
+    def archive_course(self, course_name: str, snapshot: bytes) -> bool:
+        """Store the snapshot of a finished course and set its status to archived in one transaction
+
+        :param course_name: course name
+        :param snapshot: serialized pages of the course, see manytask.archive
+
+        :return: True if the course was archived, False if it is not finished
+        """
+        with self._session_create() as session:
+            course = cast(
+                models.Course,
+                self._query_with_for_update(session, models.Course, allow_none=False, name=course_name),
+            )
+            if course.status != CourseStatus.FINISHED:
+                return False
+            session.merge(
+                models.CourseSnapshot(course_id=course.id, data=snapshot, created_at=datetime.now(timezone.utc))
+            )
+            course.status = CourseStatus.ARCHIVED
+            session.commit()
+
+        logger.info("Archived course '%s' with a snapshot of %d bytes", course_name, len(snapshot))
+        return True
+
+    def get_course_snapshot(self, course_name: str) -> bytes | None:
+        """Get the snapshot stored by archive_course, None if the course has none"""
+        with self._session_create() as session:
+            return session.scalar(
+                select(models.CourseSnapshot.data)
+                .join(models.Course, models.Course.id == models.CourseSnapshot.course_id)
+                .where(models.Course.name == course_name)
+            )
+
+    def unarchive_course(self, course_name: str, status: CourseStatus = CourseStatus.FINISHED) -> bool:
+        """Give an archived course a live status back and delete its snapshot
+
+        :param course_name: course name
+        :param status: new status of the course
+
+        :return: True if the course was unarchived, False if it is not archived
+        """
+        with self._session_create() as session:
+            course = cast(
+                models.Course,
+                self._query_with_for_update(session, models.Course, allow_none=False, name=course_name),
+            )
+            if course.status != CourseStatus.ARCHIVED:
+                return False
+            session.execute(delete(models.CourseSnapshot).where(models.CourseSnapshot.course_id == course.id))
+            course.status = status
+            session.commit()
+
+        logger.info("Unarchived course '%s' with status %s", course_name, status.value)
+        return True
+
     def create_course(
         self,
         settings_config: AppCourseConfig,
@@ -657,7 +1919,7 @@ class DataBaseApi(StorageApi):
                 return False
             except NoResultFound:
                 logger.debug("Creating new course '%s'", settings_config.course_name)
-                self._create(
+                course = self._create(
                     session,
                     models.Course,
                     name=settings_config.course_name,
@@ -674,9 +1936,47 @@ class DataBaseApi(StorageApi):
                     links=settings_config.links,
                     deadlines_type=settings_config.deadlines_type,
                 )
+                self._create_grades_partition(session, course.id)
                 logger.info("Successfully created course '%s'", settings_config.course_name)
                 return True
 
+    @staticmethod
+    def _create_grades_partition(session: Session, course_id: int) -> None:
+        """Give a new course its own partition if grades are partitioned by course
+
+        Without it the grades of the course are stored in the default partition.
+        """
+        if session.get_bind().dialect.name != "postgresql":
+            return
+        try:
+            partitioned = session.scalar(
+                text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'grades'::regclass)")
+            )
+            if partitioned:
+                partition = f"grades_course_{course_id}"
+                session.execute(
+                    text(f"CREATE TABLE IF NOT EXISTS {partition} PARTITION OF grades FOR VALUES IN ({course_id})")
+                )
+                session.commit()
+                logger.info("Created grades partition of course id=%s", course_id)
+        except Exception:
+            session.rollback()
+            logger.exception("Failed to create grades partition of course id=%s", course_id)
+
+    def find_course_by_students_group(self, gitlab_course_students_group: str) -> str | None:
+        """Name of the course whose student repositories live in the group
+
+        :param gitlab_course_students_group: full path of the students group
+
+        :return: course name or None if no course uses the group
+        """
+        with self._session_create() as session:
+            return session.scalars(
+                select(models.Course.name)
+                .where(models.Course.gitlab_course_students_group == gitlab_course_students_group)
+                .limit(1)
+            ).first()
+
     def edit_course(
         self,
         settings_config: AppCourseConfig,
@@ -809,6 +2109,7 @@ class DataBaseApi(StorageApi):
 
         return course.to_app_course(), group_config, task_config
 
+    @_read_only
     def get_groups(
         self,
         course_name: str,
@@ -829,7 +2130,7 @@ class DataBaseApi(StorageApi):
         if now is None:
             now = self.get_now_with_timezone(course_name)
 
-        with self._session_create() as session:
+        with self._read_session_create() as session:
             logger.debug(
                 "Fetching groups for course '%s', enabled=%s, started=%s, now=%s", course_name, enabled, started, now
             )
@@ -1037,6 +2338,7 @@ class DataBaseApi(StorageApi):
             logger.info("User '%s' is namespace admin in %d namespaces", username, len(result))
             return result
 
+    @_read_only
     def get_courses_by_namespace_ids(self, namespace_ids: list[int]) -> list[tuple[str, CourseStatus]]:
         """Get courses from specified namespaces
 
@@ -1046,7 +2348,7 @@ class DataBaseApi(StorageApi):
         if not namespace_ids:
             return []
 
-        with self._session_create() as session:
+        with self._read_session_create() as session:
             logger.debug("Fetching courses from %d namespaces", len(namespace_ids))
             courses = session.query(models.Course).filter(models.Course.namespace_id.in_(namespace_ids)).all()
 
@@ -1697,25 +2999,28 @@ class DataBaseApi(StorageApi):
     @staticmethod
     def _get_or_create_sfu_grade(
         session: Session,
+        course_id: int,
         user_on_course_id: int,
         task_id: int,
     ) -> models.Grade:
         """Get or create a Grade with SELECT FOR UPDATE to prevent concurrent modifications.
 
         :param session: SQLAlchemy session
+        :param course_id: ID of the Course of the UserOnCourse
         :param user_on_course_id: ID of the UserOnCourse
         :param task_id: ID of the Task
         :return: The existing or newly created Grade
         """
         try:
             grade = DataBaseApi._query_with_for_update(
-                session, models.Grade, user_on_course_id=user_on_course_id, task_id=task_id
+                session, models.Grade, course_id=course_id, user_on_course_id=user_on_course_id, task_id=task_id
             )
             return DataBaseApi._create_or_update_instance(
                 session,
                 models.Grade,
                 grade,
                 create_defaults={"score": 0},
+                course_id=course_id,
                 user_on_course_id=user_on_course_id,
                 task_id=task_id,
             )
@@ -1726,6 +3031,95 @@ class DataBaseApi(StorageApi):
             )
             raise
 
+    @staticmethod
+    def _insert_for_dialect(session: Session, model: Type[ModelType]) -> postgresql.Insert | sqlite.Insert:
+        """INSERT supporting ON CONFLICT for the dialect of the session, sqlite is used in tests"""
+        if session.get_bind().dialect.name == "sqlite":
+            return sqlite.insert(model)
+        return postgresql.insert(model)
+
+    @staticmethod
+    def _ensure_user_on_course(session: Session, user_id: int, course_id: int) -> int:
+        """Enroll the user without locking the enrollment row, return the UserOnCourse id"""
+        session.execute(
+            DataBaseApi._insert_for_dialect(session, models.UserOnCourse)
+            .values(user_id=user_id, course_id=course_id)
+            .on_conflict_do_nothing(index_elements=[models.UserOnCourse.user_id, models.UserOnCourse.course_id])
+        )
+        return session.scalars(
+            select(models.UserOnCourse.id).where(
+                models.UserOnCourse.user_id == user_id, models.UserOnCourse.course_id == course_id
+            )
+        ).one()
+
+    @staticmethod
+    def _upsert_grade(
+        session: Session,
+        course_id: int,
+        user_on_course_id: int,
+        task: models.Task,
+        score: int,
+        allow_reduction: bool,
+    ) -> int:
+        """Merge the reported score into the grade in one statement, see upsert_score
+
+        :return: the stored score
+        """
+        insert_score = score if allow_reduction else max(score, 0)
+        insert = DataBaseApi._insert_for_dialect(session, models.Grade).values(
+            course_id=course_id,
+            user_on_course_id=user_on_course_id,
+            task_id=task.id,
+            score=insert_score,
+            is_solved=0 < insert_score and task.min_score <= insert_score,
+            last_submit_date=datetime.now(timezone.utc),
+        )
+        stored, reported = models.Grade.score, insert.excluded.score
+
+        new_score: ColumnElement[int]
+        if allow_reduction:
+            new_score = reported
+        else:
+            new_score = case((stored < 0, stored), (stored >= reported, stored), else_=reported)
+
+        statement = insert.on_conflict_do_update(
+            index_elements=[models.Grade.course_id, models.Grade.user_on_course_id, models.Grade.task_id],
+            set_={
+                "score": new_score,
+                "is_solved": and_(new_score > 0, new_score >= task.min_score),
+                "last_submit_date": insert.excluded.last_submit_date,
+            },
+        ).returning(models.Grade.score)
+        return session.execute(statement).scalar_one()
+
+    @staticmethod
+    def _log_submission(
+        session: Session,
+        course_id: int,
+        user_id: int,
+        task_id: int,
+        score: int,
+        submission: ReportedSubmission,
+    ) -> None:
+        session.add(
+            models.Submission(
+                course_id=course_id,
+                user_id=user_id,
+                task_id=task_id,
+                reported_score=submission.reported_score,
+                multiplier=submission.multiplier,
+                score=score,
+                submit_time=submission.submit_time,
+                source=submission.source,
+            )
+        )
+
+    @staticmethod
+    def _seconds_between(session: Session, start: Any, end: Any) -> ColumnElement[Any]:
+        if session.get_bind().dialect.name == "sqlite":
+            return (func.julianday(end) - func.julianday(start)) * 86400
+        return func.extract("epoch", end - start)
+
     @staticmethod
     def _get_task_by_name_and_course_id(session: Session, name: str, course_id: int) -> models.Task:
         logger.debug("Fetching task '%s' for course_id=%s", name, course_id)
@@ -1842,13 +3236,15 @@ class DataBaseApi(StorageApi):
         :param program_managers_subquery: Subquery to select user IDs to exclude (program managers)
         :return: List of (task_id, task_name, submits_count) tuples
         """
-        join_conditions = [Grade.task_id == Task.id]
+        course = self._get(session, models.Course, name=course_name)
+        # a literal course id, a join on Course.id is not enough for postgres to skip the other partitions
+        join_conditions = [Grade.course_id == course.id, Grade.task_id == Task.id]
         if program_managers_subquery is not None:
             join_conditions.append(
                 Grade.user_on_course_id.in_(
                     select(UserOnCourse.id).where(
                         and_(
-                            UserOnCourse.course_id == Course.id,
+                            UserOnCourse.course_id == course.id,
                             ~UserOnCourse.user_id.in_(program_managers_subquery),
                         )
                     )
@@ -1862,14 +3258,13 @@ class DataBaseApi(StorageApi):
                 func.count(Grade.id),
             )
             .join(TaskGroup, Task.group_id == TaskGroup.id)
-            .join(Course, Course.id == TaskGroup.course_id)
             .join(Deadline, TaskGroup.deadline_id == Deadline.id)
             .outerjoin(Grade, and_(*join_conditions))
         )
 
         return (
             query.filter(
-                Course.name == course_name,
+                TaskGroup.course_id == course.id,
                 Task.enabled.is_(True),
                 TaskGroup.enabled.is_(True),
                 self.get_now_with_timezone(course_name) >= models.Deadline.start,
@@ -1949,25 +3344,27 @@ class DataBaseApi(StorageApi):
                 logger.error("Failed to create namespace slug=%s: %s", slug, str(e))
                 raise
 
+    @_read_only
     def get_all_namespaces(self) -> list[models.Namespace]:
         """Get all namespaces (for Instance Admin).
 
         :return: List of all Namespace objects
         """
-        with self._session_create() as session:
+        with self._read_session_create() as session:
             logger.debug("Fetching all namespaces")
             namespaces = session.query(models.Namespace).all()
             logger.info("Fetched %d namespaces", len(namespaces))
             session.expunge_all()
             return namespaces
 
+    @_read_only
     def get_user_namespaces(self, username: str) -> list[tuple[models.Namespace, str]]:
         """Get namespaces where user has a role.
 
         :param username: manytask username
         :return: List of tuples (Namespace, role_name)
         """
-        with self._session_create() as session:
+        with self._read_session_create() as session:
             logger.debug("Fetching namespaces for user=%s", username)
 
             try:
@@ -2135,13 +3532,14 @@ class DataBaseApi(StorageApi):
                 )
                 raise
 
+    @_read_only
     def get_namespace_users(self, namespace_id: int) -> list[tuple[int, str]]:
         """Get list of users with their roles in a namespace.
 
         :param namespace_id: ID of the namespace
         :return: List of tuples (user_id, role_string) where user_id is the database User.id
         """
-        with self._session_create() as session:
+        with self._read_session_create() as session:
             logger.debug("Fetching users for namespace_id=%s", namespace_id)
 
             results = (
@@ -2272,6 +3670,7 @@ class DataBaseApi(StorageApi):
                 logger.warning("User id=%s not found in namespace_id=%s", user_id, namespace_id)
                 raise NoResultFound(f"User {user_id} is not in namespace {namespace_id}")
 
+    @_read_only
     def get_namespace_courses(self, namespace_id: int) -> list[dict[str, Any]]:
         """Get list of courses in a namespace with information about owners.
 
@@ -2283,7 +3682,7 @@ class DataBaseApi(StorageApi):
             - gitlab_course_group: GitLab group path
             - owners: List of owner usernames
         """
-        with self._session_create() as session:
+        with self._read_session_create() as session:
             logger.info("Fetching courses for namespace_id=%s", namespace_id)
 
             courses = session.query(models.Course).filter_by(namespace_id=namespace_id).all()
@@ -2488,7 +3887,20 @@ class DataBaseApi(StorageApi):
         Call after changing grade configuration to keep saved grades in sync.
         Skips students with final_grade_override.
         """
-        scores_and_names = self.get_all_scores_with_names(course_name)
+        self.recalculate_grades(course_name)
+
+    def recalculate_grades(self, course_name: str, usernames: Collection[str] | None = None) -> None:
+        """Recalculate and save grades of the given students, or of all students on the course.
+
+        Skips students with final_grade_override.
+
+        :param course_name: course name
+        :param usernames: students to recalculate, all students of the course if None
+        """
+        if usernames is None:
+            scores_and_names = self.get_all_scores_with_names(course_name)
+        else:
+            scores_and_names = self.get_students_scores_with_names(course_name, usernames)
         grades_config = self.get_grades(course_name)
         course = self.get_course(course_name)
         if course is None:
@@ -2534,7 +3946,7 @@ class DataBaseApi(StorageApi):
             )
 
         self._batch_update_grades(course_name, grades_to_save)
-        logger.info(f"Recalculated all grades for {course_name} ({len(grades_to_save)} students)")
+        logger.info(f"Recalculated grades for {course_name} ({len(grades_to_save)} students)")
 
     def _batch_update_grades(self, course_name: str, grades: dict[str, int]) -> None:
         """Batch update final_grade for multiple students in a single transaction.
@@ -0,0 +1,264 @@
+"""Live updates of the course database page.
+
+With ``EVENTS_ENABLED`` the api publishes a compact row-change event every time a score or a grade of
+a student is committed, and ``GET /api/<course>/events`` streams the events of the course as
+Server-Sent Events. The Tabulator grid applies them to the rows in place.
+
+On PostgreSQL the events go through ``NOTIFY``: every app process runs one :class:`PostgresEventBroker`
+listener thread holding a dedicated ``LISTEN`` connection and fans the notifications out to its own
+subscribers, so a score stored by any gunicorn worker reaches every open page. Otherwise (SQLite, debug
+runs) a single process is assumed and :class:`EventBroker` delivers the events in memory.
+
+Streams never hold a database connection. An idle subscriber is just a queue waiting for an event or a
+heartbeat, but the sync gunicorn worker classes still serve every open stream from a thread, so streams
+are capped per process and closed after ``EVENTS_STREAM_TIMEOUT`` seconds, the browser reconnects.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import queue
+import select
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Iterator
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from .main import CustomFlask
+
+logger = logging.getLogger(__name__)
+
+EVENTS_ENABLED = "EVENTS_ENABLED"
+EVENTS_MAX_SUBSCRIBERS = "EVENTS_MAX_SUBSCRIBERS"
+EVENTS_HEARTBEAT_INTERVAL = "EVENTS_HEARTBEAT_INTERVAL"
+EVENTS_STREAM_TIMEOUT = "EVENTS_STREAM_TIMEOUT"
+
+NOTIFY_CHANNEL = "manytask_events"
+# browsers wait this long before reconnecting a closed stream
+RECONNECT_DELAY_MS = 5000
+
+_BROKER_EXTENSION = "manytask.event_broker"
+
+
+class Subscription:
+    """Events of one course waiting to be streamed to one client"""
+
+    def __init__(self, broker: EventBroker, course_name: str, max_pending: int):
+        self.broker = broker
+        self.course_name = course_name
+        self.lagging = False
+        self._events: queue.Queue[dict[str, Any]] = queue.Queue(max_pending)
+
+    def put(self, event: dict[str, Any]) -> None:
+        try:
+            self._events.put_nowait(event)
+        except queue.Full:
+            # the client is too slow to follow single rows, it reloads the whole table instead
+            self.lagging = True
+
+    def get(self, timeout: float) -> dict[str, Any] | None:
+        """Wait for the next event
+
+        :param timeout: seconds to wait
+        :return: event or None if the client missed events and has to reload
+        :raises queue.Empty: no event in time
+        """
+        if self.lagging:
+            return None
+        return self._events.get(timeout=timeout)
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """In-process fan-out of course events to the subscribers of the process"""
+
+    def __init__(self, max_subscribers: int = 100, max_pending: int = 100):
+        self.max_subscribers = max_subscribers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscriptions: defaultdict[str, set[Subscription]] = defaultdict(set)
+        self._count = 0
+
+    def subscribe(self, course_name: str) -> Subscription | None:
+        """Start receiving the events of the course
+
+        :return: subscription or None if the process already serves max_subscribers streams
+        """
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                return None
+            subscription = Subscription(self, course_name, self.max_pending)
+            self._subscriptions[course_name].add(subscription)
+            self._count += 1
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.course_name)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.remove(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.course_name]
+            self._count -= 1
+
+    @property
+    def subscriber_count(self) -> int:
+        return self._count
+
+    def publish(self, course_name: str, event: dict[str, Any]) -> None:
+        """Send the event to every subscriber of the course"""
+        self._dispatch(course_name, event)
+
+    def _dispatch(self, course_name: str, event: dict[str, Any]) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(course_name, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+
+class PostgresEventBroker(EventBroker):
+    """Broker delivering the events of all app processes with PostgreSQL LISTEN/NOTIFY"""
+
+    def __init__(
+        self,
+        engine: Engine,
+        max_subscribers: int = 100,
+        max_pending: int = 100,
+        reconnect_interval: float = 5.0,
+    ):
+        super().__init__(max_subscribers, max_pending)
+        self.engine = engine
+        self.reconnect_interval = reconnect_interval
+        self._stopped = threading.Event()
+        self._listener: threading.Thread | None = None
+
+    def publish(self, course_name: str, event: dict[str, Any]) -> None:
+        """Notify every app process, the event is delivered back to this process by the listener"""
+        payload = json.dumps({"course": course_name, "event": event}, separators=(",", ":"))
+        with self.engine.begin() as connection:
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"), {"channel": NOTIFY_CHANNEL, "payload": payload}
+            )
+
+    def start(self) -> None:
+        self._listener = threading.Thread(target=self._listen_forever, name="event-listener", daemon=True)
+        self._listener.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _listen_forever(self) -> None:
+        logger.info("Event listener started on channel=%s", NOTIFY_CHANNEL)
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Event listener failed, reconnecting in %ss", self.reconnect_interval)
+                self._stopped.wait(self.reconnect_interval)
+
+    def _listen(self) -> None:
+        # a connection of its own, LISTEN needs autocommit and must never return to the pool
+        connection = self.engine.raw_connection()
+        connection.detach()
+        dbapi_connection: Any = connection.dbapi_connection
+        try:
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            while not self._stopped.is_set():
+                if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    self.deliver(dbapi_connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+    def deliver(self, payload: str) -> None:
+        """Fan out a notification received from the database"""
+        try:
+            message = json.loads(payload)
+            self._dispatch(message["course"], message["event"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed event notification: %s", payload[:200])
+
+
+def get_broker(app: CustomFlask) -> EventBroker | None:
+    return app.extensions.get(_BROKER_EXTENSION)
+
+
+def publish(app: CustomFlask, course_name: str, event: dict[str, Any]) -> None:
+    """Publish the event if live updates are enabled, failures are logged and ignored
+
+    :param app: app with the broker
+    :param course_name: course of the event
+    :param event: JSON-serializable event, should fit in 8000 bytes of a NOTIFY payload
+    """
+    broker = get_broker(app)
+    if broker is None:
+        return
+    try:
+        broker.publish(course_name, event)
+    except Exception:
+        logger.exception("Failed to publish event for course=%s", course_name)
+
+
+def iter_sse(subscription: Subscription, heartbeat_interval: float, timeout: float) -> Iterator[str]:
+    """Render the events of the subscription in the text/event-stream format
+
+    Comments are sent every heartbeat_interval seconds of silence, so proxies keep the stream open and
+    a disconnected client is noticed. The subscription is closed when the stream ends.
+
+    :param subscription: subscription to stream
+    :param heartbeat_interval: seconds between heartbeat comments
+    :param timeout: seconds before the stream ends and the client reconnects
+    """
+    deadline = time.monotonic() + timeout
+    try:
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+        while (remaining := deadline - time.monotonic()) > 0:
+            try:
+                event = subscription.get(min(heartbeat_interval, remaining))
+            except queue.Empty:
+                yield ": heartbeat\n\n"
+                continue
+            if event is None:
+                yield "event: reload\ndata: {}\n\n"
+                return
+            yield f"data: {json.dumps(event, separators=(',', ':'))}\n\n"
+    finally:
+        subscription.close()
+
+
+def init_app(app: CustomFlask) -> None:
+    """Read the live update settings from env and create the broker if they are enabled"""
+    app.config.setdefault(EVENTS_ENABLED, os.environ.get(EVENTS_ENABLED, "false").lower() in ("true", "1", "yes"))
+    app.config.setdefault(EVENTS_MAX_SUBSCRIBERS, int(os.environ.get(EVENTS_MAX_SUBSCRIBERS, "100")))
+    app.config.setdefault(EVENTS_HEARTBEAT_INTERVAL, float(os.environ.get(EVENTS_HEARTBEAT_INTERVAL, "15")))
+    app.config.setdefault(EVENTS_STREAM_TIMEOUT, float(os.environ.get(EVENTS_STREAM_TIMEOUT, "300")))
+    if not app.config[EVENTS_ENABLED]:
+        return
+
+    engine: Engine | None = getattr(app.storage_api, "engine", None)
+    broker: EventBroker
+    if engine is not None and engine.dialect.name == "postgresql":
+        broker = PostgresEventBroker(engine, app.config[EVENTS_MAX_SUBSCRIBERS])
+    else:
+        broker = EventBroker(app.config[EVENTS_MAX_SUBSCRIBERS])
+    app.extensions[_BROKER_EXTENSION] = broker
+    if not app.testing:
+        broker.start()
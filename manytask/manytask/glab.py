@@ -1,7 +1,10 @@
 from __future__ import annotations
 
+import functools
 import logging
-from dataclasses import dataclass
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from typing import Any, Optional
 
 import gitlab
@@ -11,8 +14,19 @@ import requests
 from authlib.integrations.flask_client import OAuth
 from gitlab.exceptions import GitlabAuthenticationError, GitlabCreateError, GitlabGetError
 
-from .abstract import AuthApi, AuthenticatedUser, RmsApi, RmsApiException, RmsUser
+from .abstract import (
+    RMS_URL_CACHE_SIZE,
+    AuthApi,
+    AuthenticatedUser,
+    RmsApi,
+    RmsApiException,
+    RmsUser,
+    RmsUserCache,
+    RmsUserNotFoundException,
+)
+from .metrics import track_rms_api
 from .utils.generic import check_oauth_authenticated
+from .utils.http import HttpConfig, make_session
 
 logger = logging.getLogger(__name__)
 
@@ -52,6 +66,43 @@ def _make_students_group_params(short_name: str) -> dict[str, Any]:
     }
 
 
+@functools.lru_cache(maxsize=RMS_URL_CACHE_SIZE)
+def _repo_url(base_url: str, course_students_group: str, username: str) -> str:
+    return f"{base_url}/{course_students_group}/{username}"
+
+
+class _IdCache:
+    """Bounded LRU of GitLab group and project ids by full path
+
+    GitLab resolves full paths case-insensitively, so the paths are lowercased.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._ids: OrderedDict[tuple[str, str], int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, kind: str, path: str) -> int | None:
+        key = (kind, path.lower())
+        with self._lock:
+            object_id = self._ids.get(key)
+            if object_id is not None:
+                self._ids.move_to_end(key)
+            return object_id
+
+    def put(self, kind: str, path: str, object_id: int) -> None:
+        with self._lock:
+            self._ids[(kind, path.lower())] = object_id
+            self._ids.move_to_end((kind, path.lower()))
+            while len(self._ids) > self.maxsize:
+                self._ids.popitem(last=False)
+
+    def forget(self, kind: str, object_id: int) -> None:
+        with self._lock:
+            for key in [key for key, cached_id in self._ids.items() if key[0] == kind and cached_id == object_id]:
+                del self._ids[key]
+
+
 @dataclass
 class GitLabConfig:
     """Configuration for GitLab API connection and course settings."""
@@ -60,8 +111,17 @@ class GitLabConfig:
     admin_token: str
     verify_ssl: bool = True
     dry_run: bool = False
+    # groups and projects whose ids are kept by full path
+    id_cache_size: int = 10000
+    # seconds users found by username are kept, is_admin looks up the same teachers all the time
+    user_cache_ttl: float = 300.0
+    # seconds an unknown username is answered without asking GitLab
+    user_negative_cache_ttl: float = 60.0
+    # connection pool, timeouts and retries of python-gitlab and the OAuth checks
+    http: HttpConfig = field(default_factory=HttpConfig)
 
 
+@track_rms_api("gitlab")
 class GitLabApi(RmsApi, AuthApi):
     def __init__(
         self,
@@ -74,7 +134,13 @@ class GitLabApi(RmsApi, AuthApi):
         self.dry_run = config.dry_run
         self._base_url = config.base_url
         self._verify_ssl = config.verify_ssl
-        self._gitlab = gitlab.Gitlab(self.base_url, private_token=config.admin_token, ssl_verify=config.verify_ssl)
+        # python-gitlab and the token checks of every user share the connections to GitLab
+        self._session = make_session(config.http)
+        self._gitlab = gitlab.Gitlab(
+            self.base_url, private_token=config.admin_token, ssl_verify=config.verify_ssl, session=self._session
+        )
+        self._ids = _IdCache(config.id_cache_size)
+        self._users = RmsUserCache(config.user_cache_ttl, config.user_negative_cache_ttl)
 
     def register_new_user(
         self,
@@ -98,40 +164,61 @@ class GitLabApi(RmsApi, AuthApi):
                 }
             )
             logger.info("GitLab user created successfully id=%s username=%s", new_user.id, username)
-            return RmsUser(id=str(new_user.id), username=username, name=name)
         except Exception:
             logger.error("Failed to create GitLab user username=%s email=%s", username, email, exc_info=True)
+            # the username may have been remembered as unknown before the signup
+            self._users.forget(username)
             raise
+        rms_user = RmsUser(id=str(new_user.id), username=username, name=name)
+        self._users.put(rms_user)
+        return rms_user
 
-    def _get_group_by_name(self, group_name: str) -> gitlab.v4.objects.Group:
+    def _find_group(self, full_path: str) -> gitlab.v4.objects.Group | None:
+        """Get a group with a single GET of its encoded full path
+
+        :param full_path: full path of the group, e.g. "namespace/course/students"
+        :return: group or None if there is no such group
+        """
         try:
-            return self._gitlab.groups.get(group_name)
-        except (GitlabGetError, AttributeError):
-            logger.debug("Direct group access failed, trying search method")
+            group = self._gitlab.groups.get(full_path)
+        except GitlabGetError:
+            logger.debug("Group not found path=%s", full_path)
+            return None
+        self._ids.put("group", full_path, group.id)
+        return group
 
-        short_group_name = group_name.split("/")[-1]
-        group_name_with_spaces = " / ".join(group_name.split("/"))
+    def _find_project(self, full_path: str) -> gitlab.v4.objects.Project | None:
+        """Get a project with a single GET of its encoded full path
 
+        :param full_path: path with namespace of the project
+        :return: project or None if there is no such project
+        """
         try:
-            return next(
-                group
-                for group in self._gitlab.groups.list(get_all=True, search=group_name)
-                if group.name == short_group_name and group.full_name == group_name_with_spaces
-            )
-        except StopIteration:
+            project = self._gitlab.projects.get(full_path)
+        except GitlabGetError:
+            logger.debug("Project not found path=%s", full_path)
+            return None
+        self._ids.put("project", full_path, project.id)
+        return project
+
+    def _get_group_by_name(self, group_name: str) -> gitlab.v4.objects.Group:
+        group = self._find_group(group_name)
+        if group is None:
             raise RuntimeError(f"Unable to find group {group_name}")
+        return group
 
     def _get_project_by_name(self, project_name: str) -> gitlab.v4.objects.Project:
-        short_project_name = project_name.split("/")[-1]
-        logger.debug("Searching for project project_name=%s", project_name)
-        try:
-            return next(
-                project
-                for project in self._gitlab.projects.list(get_all=True, search=short_project_name)
-                if project.path_with_namespace == project_name
-            )
-        except StopIteration:
+        project = self._find_project(project_name)
+        if project is None:
             raise RuntimeError(f"Unable to find project {project_name}")
+        return project
+
+    def _get_group_id(self, group_name: str) -> int:
+        """Id of the group, only the first lookup of a path goes to GitLab"""
+        group_id = self._ids.get("group", group_name)
+        if group_id is None:
+            group_id = self._get_group_by_name(group_name).id
+        return group_id
 
     def get_group_path_by_id(self, group_id: int) -> Optional[str]:
         """Get the full path of a GitLab group by its ID.
@@ -151,16 +238,16 @@ class GitLabApi(RmsApi, AuthApi):
 
     def create_public_repo(self, course_group: str, course_public_repo: str) -> None:
         logger.info("Creating public repo course_group=%s repo=%s", course_group, course_public_repo)
-        group = self._get_group_by_name(course_group)
+        group_id = self._get_group_id(course_group)
 
-        for project in self._gitlab.projects.list(get_all=True, search=course_public_repo):
-            if project.path_with_namespace == course_public_repo:
-                logger.info("Project %s already exists", course_public_repo)
-                return
+        if self._find_project(course_public_repo) is not None:
+            logger.info("Project %s already exists", course_public_repo)
+            return
 
         project_name = course_public_repo.split("/")[-1]
 
-        self._gitlab.projects.create(_make_public_repo_params(project_name, group.id))
+        project = self._gitlab.projects.create(_make_public_repo_params(project_name, group_id))
+        self._ids.put("project", course_public_repo, project.id)
         logger.info("Public repo %s created successfully", course_public_repo)
 
     def create_students_group(
@@ -173,10 +260,9 @@ class GitLabApi(RmsApi, AuthApi):
         If None, creates top-level group.
         :return: The created group object, or None if group already exists
         """
-        try:
-            return self._get_group_by_name(course_students_group)
-        except RuntimeError:
-            pass
+        group = self._find_group(course_students_group)
+        if group is not None:
+            return group
 
         short_name = course_students_group.split("/")[-1]
 
@@ -187,6 +273,7 @@ class GitLabApi(RmsApi, AuthApi):
 
         try:
             created_group = self._gitlab.groups.create(group_data)
+            self._ids.put("group", course_students_group, created_group.id)
             return self._gitlab.groups.get(created_group.id)
         except GitlabCreateError as e:
             if "already been taken" in str(e) or "already exists" in str(e).lower():
@@ -194,34 +281,14 @@ class GitLabApi(RmsApi, AuthApi):
                     "Group %s already exists (detected during creation). Trying to find it...", course_students_group
                 )
 
-                if parent_group_id:
-                    try:
-                        parent_group = self._gitlab.groups.get(parent_group_id)
-                        subgroups = parent_group.subgroups.list(get_all=True)
-                        short_name = course_students_group.split("/")[-1]
-
-                        for subgroup in subgroups:
-                            if short_name in {subgroup.name, subgroup.path}:
-                                logger.info(
-                                    "Found existing students group %s through parent subgroups with id=%s",
-                                    course_students_group,
-                                    subgroup.id,
-                                )
-                                return self._gitlab.groups.get(subgroup.id)
-                    except Exception as subgroup_error:
-                        logger.debug("Failed to find group through parent subgroups: %s", str(subgroup_error))
-
-                try:
-                    return self._get_group_by_name(course_students_group)
-                except RuntimeError:
-                    logger.error(
-                        "Group %s should exist but cannot be found. This may indicate a GitLab indexing delay.",
-                        course_students_group,
-                    )
+                group = self._find_group(course_students_group)
+                if group is None:
+                    logger.error("Group %s should exist but cannot be found", course_students_group)
                     raise RuntimeError(
                         f"Group {course_students_group} creation failed: "
                         f"group already exists but cannot be retrieved. Please try again in a moment."
                     )
+                return group
             raise
 
     def create_namespace_group(self, name: str, path: str, description: str | None = None) -> int:
@@ -235,10 +302,10 @@ class GitLabApi(RmsApi, AuthApi):
         """
         logger.info("Creating namespace group name=%s path=%s", name, path)
 
-        for group in self._gitlab.groups.list(get_all=True, search=path):
-            if group.path == path:
-                logger.warning("Group with path %s already exists", path)
-                return group.id
+        group = self._find_group(path)
+        if group is not None:
+            logger.warning("Group with path %s already exists", path)
+            return group.id
 
         group_data = {
             "name": name,
@@ -252,6 +319,7 @@ class GitLabApi(RmsApi, AuthApi):
             group_data["description"] = description
 
         created_group = self._gitlab.groups.create(group_data)
+        self._ids.put("group", path, created_group.id)
         logger.info("Namespace group %s created successfully with id=%s", path, created_group.id)
 
         return created_group.id
@@ -338,16 +406,14 @@ class GitLabApi(RmsApi, AuthApi):
 
         try:
             if parent_group_id:
-                parent_group = self._gitlab.groups.get(parent_group_id)
-                subgroups = parent_group.subgroups.list(get_all=True, search=course_slug)
-                groups = [self._gitlab.groups.get(sg.id) for sg in subgroups]
+                full_path = f"{self._gitlab.groups.get(parent_group_id).full_path}/{course_slug}"
             else:
-                groups = self._gitlab.groups.list(get_all=True, search=course_slug)
+                full_path = course_slug
 
-            for group in groups:
-                if course_slug in {group.name, group.path}:
-                    logger.warning("The course group already exists for %s", course_slug)
-                    return group.id
+            group = self._find_group(full_path)
+            if group is not None:
+                logger.warning("The course group already exists for %s", course_slug)
+                return group.id
 
             group_data = {
                 "name": course_slug,
@@ -361,6 +427,7 @@ class GitLabApi(RmsApi, AuthApi):
                 group_data["parent_id"] = parent_group_id
 
             created_group = self._gitlab.groups.create(group_data)
+            self._ids.put("group", full_path, created_group.id)
             logger.info(
                 "Course group %s created successfully with id=%s under parent_id=%s",
                 course_slug,
@@ -386,6 +453,7 @@ class GitLabApi(RmsApi, AuthApi):
         """
         logger.info("Deleting GitLab group id=%s", group_id)
 
+        self._ids.forget("group", group_id)
         try:
             group = self._gitlab.groups.get(group_id)
             group.delete()
@@ -402,6 +470,7 @@ class GitLabApi(RmsApi, AuthApi):
         """
         logger.info("Deleting GitLab project id=%s", project_id)
 
+        self._ids.forget("project", project_id)
         try:
             project = self._gitlab.projects.get(project_id)
             project.delete()
@@ -434,6 +503,7 @@ class GitLabApi(RmsApi, AuthApi):
         logger.debug("Found project candidate path=%s", project_path)
         if project_path == gitlab_project_path:
             logger.info("Project exists project_name=%s group=%s", project_name, project_group)
+            self._ids.put("project", gitlab_project_path, project.id)
             return True
 
         logger.info(
@@ -449,32 +519,32 @@ class GitLabApi(RmsApi, AuthApi):
         project_name: str,
         project_group: str,
     ) -> bool:
-        project = self._gitlab.projects.get(f"{project_group}/{project_name}")
+        # members are read straight from the encoded path, the project itself is not fetched
+        project = self._gitlab.projects.get(f"{project_group}/{project_name}", lazy=True)
         try:
             project.members.get(rms_user_id)
             return True
         except GitlabGetError:
             return False
 
-    def create_project(self, rms_user: RmsUser, course_students_group: str, course_public_repo: str) -> None:
+    def create_project(self, rms_user: RmsUser, course_students_group: str, course_public_repo: str) -> str:
         logger.info("Creating project for user=%s in group=%s", rms_user.username, course_students_group)
 
         course_group_path = "/".join(course_students_group.split("/")[:-1])
 
         try:
-            course_group = self._get_group_by_name(course_group_path)
+            course_group_id = self._get_group_id(course_group_path)
         except RuntimeError:
             logger.error("Course group %s not found. Cannot create student project.", course_group_path)
             raise RuntimeError(
                 f"Course group {course_group_path} not found. Please ensure the course is properly set up."
             )
 
-        students_group = None
         try:
-            students_group = self._get_group_by_name(course_students_group)
+            students_group_id = self._get_group_id(course_students_group)
         except RuntimeError:
             logger.warning("Students group %s not found. Creating it now...", course_students_group)
-            students_group = self.create_students_group(course_students_group, parent_group_id=course_group.id)
+            students_group = self.create_students_group(course_students_group, parent_group_id=course_group_id)
             if students_group is None:
                 try:
                     students_group = self._get_group_by_name(course_students_group)
@@ -483,37 +553,36 @@ class GitLabApi(RmsApi, AuthApi):
                     raise RuntimeError(
                         f"Failed to create or retrieve students group {course_students_group}. Please try again."
                     )
+            students_group_id = students_group.id
 
         gitlab_project_path = f"{course_students_group}/{rms_user.username}"
         logger.info("Gitlab project path: %s", gitlab_project_path)
 
-        for project in self._gitlab.projects.list(get_all=True, search=rms_user.username):
-            # Because of implicit conversion
-            # TODO: make global problem solve
-            if project.path_with_namespace == gitlab_project_path:
-                logger.info("Project already exists for user=%s group=%s", rms_user.username, course_students_group)
-                project = self._gitlab.projects.get(project.id)
-                try:
-                    # ensure user is a member of the project
-                    member = project.members.create(
-                        {
-                            "user_id": _validate_and_convert_user_id(rms_user.id),
-                            "access_level": gitlab.const.AccessLevel.DEVELOPER,
-                        }
-                    )
-                    logger.info("Access granted to existing project user=%s", member)
-                except gitlab.GitlabCreateError:
-                    logger.warning("Access already granted or conflict user=%s", rms_user.username)
+        project = self._find_project(gitlab_project_path)
+        if project is not None:
+            logger.info("Project already exists for user=%s group=%s", rms_user.username, course_students_group)
+            try:
+                # ensure user is a member of the project
+                member = project.members.create(
+                    {
+                        "user_id": _validate_and_convert_user_id(rms_user.id),
+                        "access_level": gitlab.const.AccessLevel.DEVELOPER,
+                    }
+                )
+                logger.info("Access granted to existing project user=%s", member)
+            except gitlab.GitlabCreateError:
+                logger.warning("Access already granted or conflict user=%s", rms_user.username)
 
-                return
+            return str(project.id)
 
-        course_public_project = self._get_project_by_name(course_public_repo)
-        logger.debug("Forking repo %s for user=%s", course_public_project.path_with_namespace, rms_user.username)
+        # the fork is requested straight at the encoded path of the public repo
+        course_public_project = self._gitlab.projects.get(course_public_repo, lazy=True)
+        logger.debug("Forking repo %s for user=%s", course_public_repo, rms_user.username)
         fork = course_public_project.forks.create(
             {
                 "name": rms_user.username,
                 "path": rms_user.username,
-                "namespace_id": students_group.id,
+                "namespace_id": students_group_id,
                 "forking_access_level": "disabled",
                 # MR target self main
                 "mr_default_target_self": True,
@@ -521,7 +590,7 @@ class GitLabApi(RmsApi, AuthApi):
                 # TODO: Relay on groups runners
                 # "shared_runners_enabled": students_group.shared_runners_setting == "enabled",
                 # Set external gitlab-ci config from public repo
-                "ci_config_path": f".gitlab-ci.yml@{course_public_project.path_with_namespace}",
+                "ci_config_path": f".gitlab-ci.yml@{course_public_repo}",
                 # Merge method to squash
                 "merge_method": "squash",
                 # Disable AutoDevOps
@@ -529,6 +598,7 @@ class GitLabApi(RmsApi, AuthApi):
             }
         )
         project = self._gitlab.projects.get(fork.id)
+        self._ids.put("project", gitlab_project_path, project.id)
         # TODO: think .evn config value
         # Unprotect all branches
         for protected_branch in project.protectedbranches.list(get_all=True):
@@ -547,6 +617,8 @@ class GitLabApi(RmsApi, AuthApi):
         except gitlab.GitlabCreateError:
             logger.warning("Access already granted or conflict on forked project user=%s", rms_user.username)
 
+        return str(project.id)
+
     def _construct_rms_user(
         self,
         user: dict[str, Any],
@@ -578,13 +650,19 @@ class GitLabApi(RmsApi, AuthApi):
     def get_rms_user_by_username(
         self,
         username: str,
+    ) -> RmsUser:
+        return self._users.get_or_load(username, self._find_rms_user_by_username)
+
+    def _find_rms_user_by_username(
+        self,
+        username: str,
     ) -> RmsUser:
         logger.info("Searching for user by username=%s", username)
         potential_rms_users = self._get_rms_users_by_username(username)
         potential_rms_users = [rms_user for rms_user in potential_rms_users if rms_user.username == username]
         if len(potential_rms_users) == 0:
             logger.error("No users found username=%s", username)
-            raise RmsApiException(f"No users found for username {username}")
+            raise RmsUserNotFoundException(f"No users found for username {username}")
 
         rms_user = potential_rms_users[0]
         logger.info("User found username=%s", rms_user.username)
@@ -598,7 +676,7 @@ class GitLabApi(RmsApi, AuthApi):
         username: str,
         course_students_group: str,
     ) -> str:
-        return f"{self.base_url}/{course_students_group}/{username}"
+        return _repo_url(self.base_url, course_students_group, username)
 
     def get_url_for_piplines(
         self,
@@ -609,7 +687,7 @@ class GitLabApi(RmsApi, AuthApi):
 
     def _make_auth_request(self, token: str) -> requests.Response:
         headers = {"Authorization": f"Bearer {token}"}
-        return requests.get(f"{self.base_url}/api/v4/user", headers=headers, verify=self._verify_ssl)
+        return self._session.get(f"{self.base_url}/api/v4/user", headers=headers, verify=self._verify_ssl)
 
     def check_user_is_authenticated(
         self,
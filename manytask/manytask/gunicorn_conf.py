@@ -0,0 +1,24 @@
+"""Gunicorn settings and hooks for prometheus_client multiprocess mode, see ``metrics.py``"""
+
+import os
+import shutil
+from typing import Any
+
+from prometheus_client import multiprocess
+
+# the RMS connection pools are sized from GUNICORN_THREADS, see ``utils/http.py``
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+threads = int(os.environ.get("GUNICORN_THREADS", "4"))
+
+
+def on_starting(_server: Any) -> None:
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        # metric files of a previous run would be summed into the new one
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def child_exit(_server: Any, worker: Any) -> None:
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
@@ -17,9 +17,15 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from manytask.mock_auth import MockAuthApi
 from manytask.mock_rms import MockRmsApi
 
-from . import abstract, config, course, database, glab, local_config, sourcecraft, yandex_id
+from . import abstract, config, course, database, glab, local_config, metrics, sourcecraft, yandex_id
+from .utils import db_stats
+from .utils.http import HttpConfig
+from .utils.json_provider import FastJSONProvider
 
 MAX_AGE_IN_SECONDS = 86400
+# seconds a stored student repository is trusted before the RMS is asked again
+REPO_VERIFY_INTERVAL = "REPO_VERIFY_INTERVAL"
+DEFAULT_REPO_VERIFY_INTERVAL = 3600.0
 
 load_dotenv("../.env")  # take environment variables from .env.
 
@@ -58,6 +64,8 @@ _CREATE_COURSE_LABELS: dict[str, dict[str, str]] = {
 
 
 class CustomFlask(Flask):
+    json_provider_class = FastJSONProvider
+
     csrf: CSRFProtect
     oauth: OAuth
     app_config: local_config.LocalConfig  # TODO: check if we need it
@@ -117,6 +125,7 @@ def create_app(*, debug: bool | None = None, test: bool = False) -> CustomFlask:
 
     # api objects
     app.storage_api = _database_storage_setup()
+    _init_extensions(app)
 
     rms = app.app_config.rms
 
@@ -133,6 +142,7 @@ def create_app(*, debug: bool | None = None, test: bool = False) -> CustomFlask:
                 base_url=app.app_config.gitlab_url,
                 admin_token=app.app_config.gitlab_admin_token,
                 verify_ssl=app.app_config.gitlab_verify_ssl,
+                http=HttpConfig.from_env(),
             )
         )
         app.auth_api = gitlab_api
@@ -145,18 +155,10 @@ def create_app(*, debug: bool | None = None, test: bool = False) -> CustomFlask:
             app.app_config.yandex_id_client_secret,
             app.app_config.yandex_id_oauth_base,
         )
-        app.auth_api = yandex_id.YandexIDApi(yandex_id.YandexIDConfig(oauth_base=app.app_config.yandex_id_oauth_base))
-        app.rms_api = sourcecraft.SourceCraftApi(
-            sourcecraft.SourceCraftConfig(
-                base_url=app.app_config.sourcecraft_url,
-                api_url=app.app_config.sourcecraft_api_url,
-                service_account_key=json.loads(app.app_config.sourcecraft_sa_key_json)
-                if app.app_config.sourcecraft_sa_key_json
-                else None,
-                oauth_token=app.app_config.sourcecraft_oauth_token or None,
-                org_slug=app.app_config.sourcecraft_org_slug,
-            ),
+        app.auth_api = yandex_id.YandexIDApi(
+            yandex_id.YandexIDConfig(oauth_base=app.app_config.yandex_id_oauth_base, http=HttpConfig.from_env())
         )
+        app.rms_api = _sourcecraft_api_setup(app)
 
     elif rms == "mock":
         app.oauth = _authenticate(
@@ -171,6 +173,9 @@ def create_app(*, debug: bool | None = None, test: bool = False) -> CustomFlask:
 
     app.csrf = CSRFProtect(app)
 
+    # the job runner calls rms_api
+    _init_rms_jobs(app)
+
     # read VERSION file to get a version
     app.manytask_version = ""
     try:
@@ -219,6 +224,23 @@ def create_app(*, debug: bool | None = None, test: bool = False) -> CustomFlask:
     return app
 
 
+def _init_extensions(app: CustomFlask) -> None:
+    from . import archive, events, repo_provisioning, report_queue  # import CustomFlask from this module
+
+    archive.init_app(app)
+    db_stats.init_app(app)
+    metrics.init_app(app)
+    report_queue.init_app(app)
+    events.init_app(app)
+    repo_provisioning.init_app(app)
+
+
+def _init_rms_jobs(app: CustomFlask) -> None:
+    from . import rms_jobs  # import CustomFlask from this module
+
+    rms_jobs.init_app(app)
+
+
 def _create_debug_course(app: CustomFlask) -> None:
     course_config = course.CourseConfig(
         course_name="python2025",
@@ -234,6 +256,25 @@ def _create_debug_course(app: CustomFlask) -> None:
     app.storage_api.create_course(course_config)
 
 
+def _sourcecraft_api_setup(app: CustomFlask) -> sourcecraft.SourceCraftApi:
+    sourcecraft_api = sourcecraft.SourceCraftApi(
+        sourcecraft.SourceCraftConfig(
+            base_url=app.app_config.sourcecraft_url,
+            api_url=app.app_config.sourcecraft_api_url,
+            service_account_key=json.loads(app.app_config.sourcecraft_sa_key_json)
+            if app.app_config.sourcecraft_sa_key_json
+            else None,
+            oauth_token=app.app_config.sourcecraft_oauth_token or None,
+            org_slug=app.app_config.sourcecraft_org_slug,
+            http=HttpConfig.from_env(),
+        ),
+    )
+    # no request waits for an IAM token
+    if not app.testing:
+        sourcecraft_api.start_iam_token_refresher()
+    return sourcecraft_api
+
+
 def _database_storage_setup() -> abstract.StorageApi:
     database_url = os.environ.get("DATABASE_URL", None)
     apply_migrations = os.environ.get("APPLY_MIGRATIONS", "false").lower() in (
@@ -249,11 +290,26 @@ def _database_storage_setup() -> abstract.StorageApi:
     if instance_admin_username is None:
         raise EnvironmentError("Unable to find INITIAL_INSTANCE_ADMIN env")
 
+    slow_query_threshold_ms = os.environ.get("SLOW_QUERY_THRESHOLD_MS", None)
+    statement_timeout_ms = os.environ.get("DATABASE_STATEMENT_TIMEOUT_MS", None)
+    lock_timeout_ms = os.environ.get("DATABASE_LOCK_TIMEOUT_MS", None)
+
     storage_api = database.DataBaseApi(
         database.DatabaseConfig(
             database_url=database_url,
             instance_admin_username=instance_admin_username,
             apply_migrations=apply_migrations,
+            slow_query_threshold_ms=float(slow_query_threshold_ms) if slow_query_threshold_ms else None,
+            pool_size=int(os.environ.get("DATABASE_POOL_SIZE", "5")),
+            max_overflow=int(os.environ.get("DATABASE_MAX_OVERFLOW", "10")),
+            pool_pre_ping=os.environ.get("DATABASE_POOL_PRE_PING", "false").lower() in ("true", "1", "yes"),
+            pool_recycle=int(os.environ.get("DATABASE_POOL_RECYCLE", "-1")),
+            pool_timeout=float(os.environ.get("DATABASE_POOL_TIMEOUT", "30")),
+            statement_timeout_ms=int(statement_timeout_ms) if statement_timeout_ms else None,
+            lock_timeout_ms=int(lock_timeout_ms) if lock_timeout_ms else None,
+            external_pooler=os.environ.get("DATABASE_EXTERNAL_POOLER", "false").lower() in ("true", "1", "yes"),
+            replica_url=os.environ.get("DATABASE_REPLICA_URL") or None,
+            replica_retry_interval=float(os.environ.get("DATABASE_REPLICA_RETRY_INTERVAL", "30")),
         )
     )
     return storage_api
@@ -335,6 +391,9 @@ def _create_app_config(app: CustomFlask, debug: bool | None, test: bool) -> None
     if "FLASK_SECRET_KEY" not in os.environ and not debug:
         raise EnvironmentError("Unable to find FLASK_SECRET_KEY env in production mode")
     app.secret_key = os.environ.get("FLASK_SECRET_KEY", secrets.token_hex())
+    app.config.setdefault(
+        REPO_VERIFY_INTERVAL, float(os.environ.get(REPO_VERIFY_INTERVAL, str(DEFAULT_REPO_VERIFY_INTERVAL)))
+    )
 
 
 def _authenticate(oauth: OAuth, internal_url: str, external_url: str, client_id: str, client_secret: str) -> OAuth:
@@ -0,0 +1,167 @@
+"""Prometheus metrics of the web app.
+
+Works in ``prometheus_client`` multiprocess mode when ``PROMETHEUS_MULTIPROC_DIR`` is set
+(gunicorn with several workers, see ``gunicorn_conf.py``), otherwise uses the default
+in-process registry.
+"""
+
+import functools
+import logging
+import os
+import time
+from typing import Any, Callable, TypeVar
+
+from flask import Flask, Response, g, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import PoolProxiedConnection, QueuePool
+
+from .abstract import AuthApi, RmsApi
+
+logger = logging.getLogger(__name__)
+
+ClassType = TypeVar("ClassType", bound=type)
+
+REQUEST_LATENCY = Histogram(
+    "manytask_request_duration_seconds",
+    "Request latency by endpoint",
+    ["method", "endpoint", "status"],
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "manytask_requests_in_progress",
+    "Requests currently being handled",
+    ["method", "endpoint"],
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "manytask_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "manytask_db_pool_checked_out_connections",
+    "Connections currently checked out from the SQLAlchemy pool",
+    multiprocess_mode="livesum",
+)
+RMS_REQUEST_LATENCY = Histogram(
+    "manytask_rms_request_duration_seconds",
+    "Latency of RMS API calls",
+    ["rms", "method"],
+)
+RMS_REQUEST_ERRORS = Counter(
+    "manytask_rms_request_errors",
+    "RMS API calls finished with an exception",
+    ["rms", "method"],
+)
+REPORTS_PROCESSED = Counter(
+    "manytask_reports_processed",
+    "Score reports stored",
+    ["course"],
+)
+
+# pure helpers building urls, never reach the RMS
+_NOT_TRACKED_RMS_METHODS = {"get_url_for_task_base", "get_url_for_repo", "get_url_for_piplines"}
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool reporting checkout wait time"""
+
+    def connect(self) -> PoolProxiedConnection:
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Track the number of connections checked out from the engine pool"""
+
+    @event.listens_for(engine, "checkout")
+    def on_checkout(*_args: Any) -> None:
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def on_checkin(*_args: Any) -> None:
+        DB_POOL_CHECKED_OUT.dec()
+
+
+def _track_rms_call(rms: str, name: str, method: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(method)
+    def tracked(*args: Any, **kwargs: Any) -> Any:
+        start = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        except Exception:
+            RMS_REQUEST_ERRORS.labels(rms=rms, method=name).inc()
+            raise
+        finally:
+            RMS_REQUEST_LATENCY.labels(rms=rms, method=name).observe(time.perf_counter() - start)
+
+    return tracked
+
+
+def track_rms_api(rms: str) -> Callable[[ClassType], ClassType]:
+    """Class decorator measuring latency and errors of the RmsApi/AuthApi methods the class defines
+
+    :param rms: value of the ``rms`` label
+    """
+
+    def decorator(cls: ClassType) -> ClassType:
+        for name in sorted((RmsApi.__abstractmethods__ | AuthApi.__abstractmethods__) - _NOT_TRACKED_RMS_METHODS):
+            method = cls.__dict__.get(name)
+            if callable(method):
+                setattr(cls, name, _track_rms_call(rms, name, method))
+        return cls
+
+    return decorator
+
+
+def _endpoint_label() -> str:
+    return request.endpoint or "unknown"
+
+
+def init_app(app: Flask) -> None:
+    """Measure latency and in-flight count of every request"""
+
+    @app.before_request
+    def start_request_metrics() -> None:
+        g.metrics_start_time = time.perf_counter()
+        REQUESTS_IN_PROGRESS.labels(method=request.method, endpoint=_endpoint_label()).inc()
+
+    @app.after_request
+    def observe_request_latency(response: Response) -> Response:
+        start_time: float | None = g.get("metrics_start_time")
+        if start_time is not None:
+            REQUEST_LATENCY.labels(
+                method=request.method, endpoint=_endpoint_label(), status=str(response.status_code)
+            ).observe(time.perf_counter() - start_time)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(_exc: BaseException | None) -> None:
+        if g.pop("metrics_start_time", None) is not None:
+            REQUESTS_IN_PROGRESS.labels(method=request.method, endpoint=_endpoint_label()).dec()
+
+
+def generate_metrics() -> tuple[bytes, str]:
+    """Render all metrics, merging the files of all gunicorn workers in multiprocess mode
+
+    :return: exposition payload and its content type
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
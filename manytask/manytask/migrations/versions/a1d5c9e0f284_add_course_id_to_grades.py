@@ -0,0 +1,41 @@
+"""Add course id to grades
+
+Revision ID: a1d5c9e0f284
+Revises: f3b9d2a61c47
+Create Date: 2026-10-19 03:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a1d5c9e0f284"
+down_revision: Union[str, None] = "f3b9d2a61c47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("grades", sa.Column("course_id", sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE grades SET course_id = users_on_courses.course_id "
+        "FROM users_on_courses WHERE users_on_courses.id = grades.user_on_course_id"
+    )
+    op.alter_column("grades", "course_id", nullable=False)
+    op.create_foreign_key(op.f("fk_grades_course_id_courses"), "grades", "courses", ["course_id"], ["id"])
+    # the course id leads the constraint, so that it can be the partition key
+    op.drop_constraint("_user_on_course_task_uc", "grades", type_="unique")
+    op.create_unique_constraint(
+        "_user_on_course_task_uc", "grades", ["course_id", "user_on_course_id", "task_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint("_user_on_course_task_uc", "grades", type_="unique")
+    op.create_unique_constraint("_user_on_course_task_uc", "grades", ["user_on_course_id", "task_id"])
+    op.drop_constraint(op.f("fk_grades_course_id_courses"), "grades", type_="foreignkey")
+    op.drop_column("grades", "course_id")
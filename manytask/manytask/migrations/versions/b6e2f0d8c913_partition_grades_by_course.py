@@ -0,0 +1,77 @@
+"""Partition grades by course
+
+Optional, only applied on PostgreSQL with GRADES_PARTITIONING=true. The grades are copied into a
+table partitioned by course id, with one partition per existing course and a default partition.
+New courses get their own partition when they are created. The copy runs in the migration
+transaction and locks grades until it is done.
+
+Revision ID: b6e2f0d8c913
+Revises: a1d5c9e0f284
+Create Date: 2026-10-19 03:20:00.000000
+
+"""
+
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b6e2f0d8c913"
+down_revision: Union[str, None] = "a1d5c9e0f284"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = "id, course_id, user_on_course_id, task_id, score, is_solved, last_submit_date"
+
+
+def _is_partitioned() -> bool:
+    return bool(
+        op.get_bind().scalar(
+            sa.text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'grades'::regclass)")
+        )
+    )
+
+
+def _copy_grades(source: str, partition_by: str) -> None:
+    """Move the grades of source into a new grades table and drop source"""
+    sequence = op.get_bind().scalar(sa.text(f"SELECT pg_get_serial_sequence('{source}', 'id')"))
+    # LIKE copies the columns with their types, NOT NULL and defaults, the id keeps its sequence
+    op.execute(f"CREATE TABLE grades (LIKE {source} INCLUDING DEFAULTS) {partition_by}")
+    if partition_by:
+        op.execute("CREATE TABLE grades_default PARTITION OF grades DEFAULT")
+        for course_id in op.get_bind().scalars(sa.text("SELECT id FROM courses ORDER BY id")):
+            op.execute(f"CREATE TABLE grades_course_{course_id} PARTITION OF grades FOR VALUES IN ({course_id})")
+    op.execute(f"INSERT INTO grades ({COLUMNS}) SELECT {COLUMNS} FROM {source}")
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY grades.id")
+    op.drop_table(source)
+
+
+def _create_constraints(primary_key: list[str]) -> None:
+    op.create_primary_key("grades_pkey", "grades", primary_key)
+    op.create_unique_constraint("_user_on_course_task_uc", "grades", ["course_id", "user_on_course_id", "task_id"])
+    op.create_foreign_key(op.f("fk_grades_course_id_courses"), "grades", "courses", ["course_id"], ["id"])
+    op.create_foreign_key("grades_user_on_course_id_fkey", "grades", "users_on_courses", ["user_on_course_id"], ["id"])
+    op.create_foreign_key("grades_task_id_fkey", "grades", "tasks", ["task_id"], ["id"])
+
+
+def upgrade() -> None:
+    enabled = os.environ.get("GRADES_PARTITIONING", "false").lower() in ("true", "1", "yes")
+    if not enabled or op.get_bind().dialect.name != "postgresql" or _is_partitioned():
+        return
+
+    op.rename_table("grades", "grades_unpartitioned")
+    _copy_grades("grades_unpartitioned", "PARTITION BY LIST (course_id)")
+    # the primary key of a partitioned table includes the partition key
+    _create_constraints(["course_id", "id"])
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql" or not _is_partitioned():
+        return
+
+    op.rename_table("grades", "grades_partitioned")
+    _copy_grades("grades_partitioned", "")
+    _create_constraints(["id"])
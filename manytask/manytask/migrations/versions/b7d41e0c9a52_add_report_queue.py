@@ -0,0 +1,56 @@
+"""Add report queue
+
+Revision ID: b7d41e0c9a52
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-18 21:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b7d41e0c9a52"
+down_revision: Union[str, None] = "a1b2c3d4e5f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "report_queue",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("course_id", sa.Integer(), nullable=False),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("task_name", sa.String(), nullable=False),
+        sa.Column("reported_score", sa.Integer(), nullable=False),
+        sa.Column("submit_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("check_deadline", sa.Boolean(), nullable=False),
+        sa.Column("allow_reduction", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("applied_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("final_score", sa.Integer(), nullable=True),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["course_id"],
+            ["courses.id"],
+            name=op.f("fk_report_queue_course_id_courses"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_report_queue")),
+    )
+    op.create_index(
+        "ix_report_queue_pending",
+        "report_queue",
+        ["id"],
+        unique=False,
+        postgresql_where=sa.text("applied_at IS NULL"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_report_queue_pending", table_name="report_queue", postgresql_where=sa.text("applied_at IS NULL"))
+    op.drop_table("report_queue")
@@ -0,0 +1,38 @@
+"""Add course snapshots
+
+Revision ID: c4a7e1f93b25
+Revises: b6e2f0d8c913
+Create Date: 2026-10-19 04:10:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c4a7e1f93b25"
+down_revision: Union[str, None] = "b6e2f0d8c913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "course_snapshots",
+        sa.Column("course_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("data", sa.LargeBinary(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["course_id"], ["courses.id"], name=op.f("fk_course_snapshots_course_id_courses")
+        ),
+        sa.PrimaryKeyConstraint("course_id", name=op.f("pk_course_snapshots")),
+    )
+
+
+def downgrade() -> None:
+    # archived courses get their live pages back
+    op.execute("UPDATE courses SET status = 'FINISHED' WHERE status = 'ARCHIVED'")
+    op.drop_table("course_snapshots")
@@ -0,0 +1,68 @@
+"""Add append-only submissions log
+
+Revision ID: c5e8f1a3d207
+Revises: b7d41e0c9a52
+Create Date: 2026-10-18 22:40:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5e8f1a3d207"
+down_revision: Union[str, None] = "b7d41e0c9a52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "submissions",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("course_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("task_id", sa.Integer(), nullable=False),
+        sa.Column("reported_score", sa.Integer(), nullable=False),
+        sa.Column("multiplier", sa.Float(), nullable=False),
+        sa.Column("score", sa.Integer(), nullable=False),
+        sa.Column("submit_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("source", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["course_id"],
+            ["courses.id"],
+            name=op.f("fk_submissions_course_id_courses"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["task_id"],
+            ["tasks.id"],
+            name=op.f("fk_submissions_task_id_tasks"),
+            ondelete="CASCADE",
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_submissions_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_submissions")),
+    )
+    op.create_index(
+        "ix_submissions_created_at",
+        "submissions",
+        ["created_at"],
+        unique=False,
+        postgresql_using="brin",
+    )
+    op.create_index("ix_submissions_course_id_task_id", "submissions", ["course_id", "task_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_submissions_course_id_task_id", table_name="submissions")
+    op.drop_index("ix_submissions_created_at", table_name="submissions", postgresql_using="brin")
+    op.drop_table("submissions")
@@ -0,0 +1,42 @@
+"""Add indexes of the hot query paths
+
+The foreign keys the score and access queries filter and join on had no index of their own:
+the students, task groups and tasks of a course, the grades of a task and the roles in a
+namespace. On a partitioned grades table the index is created on every partition.
+
+Revision ID: d2f6a8b4e107
+Revises: c4a7e1f93b25
+Create Date: 2026-10-19 05:00:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d2f6a8b4e107"
+down_revision: Union[str, None] = "c4a7e1f93b25"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# index name, table, columns
+INDEXES = [
+    ("ix_users_on_courses_course_id_user_id", "users_on_courses", ["course_id", "user_id"]),
+    ("ix_task_groups_course_id_position", "task_groups", ["course_id", "position"]),
+    ("ix_tasks_group_id_position", "tasks", ["group_id", "position"]),
+    ("ix_grades_course_id_task_id", "grades", ["course_id", "task_id"]),
+    ("ix_users_on_namespaces_namespace_id_role", "users_on_namespaces", ["namespace_id", "role"]),
+    ("ix_courses_namespace_id", "courses", ["namespace_id"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,33 @@
+"""Add student repository provisioning state to user on course
+
+Revision ID: d41a7c2e9b68
+Revises: c5e8f1a3d207
+Create Date: 2026-10-18 23:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d41a7c2e9b68"
+down_revision: Union[str, None] = "c5e8f1a3d207"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users_on_courses", sa.Column("repo_url", sa.String(), nullable=True))
+    op.add_column("users_on_courses", sa.Column("repo_id", sa.String(), nullable=True))
+    op.add_column("users_on_courses", sa.Column("repo_created_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("users_on_courses", sa.Column("repo_verified_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("users_on_courses", "repo_verified_at")
+    op.drop_column("users_on_courses", "repo_created_at")
+    op.drop_column("users_on_courses", "repo_id")
+    op.drop_column("users_on_courses", "repo_url")
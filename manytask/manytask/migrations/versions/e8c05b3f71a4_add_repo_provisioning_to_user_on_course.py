@@ -0,0 +1,31 @@
+"""Add bulk repository provisioning state to user on course
+
+Revision ID: e8c05b3f71a4
+Revises: d41a7c2e9b68
+Create Date: 2026-10-19 00:40:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8c05b3f71a4"
+down_revision: Union[str, None] = "d41a7c2e9b68"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "users_on_courses", sa.Column("repo_provision_requested_at", sa.DateTime(timezone=True), nullable=True)
+    )
+    op.add_column("users_on_courses", sa.Column("repo_provision_error", sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("users_on_courses", "repo_provision_error")
+    op.drop_column("users_on_courses", "repo_provision_requested_at")
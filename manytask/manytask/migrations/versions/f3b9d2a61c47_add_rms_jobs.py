@@ -0,0 +1,52 @@
+"""Add rms jobs
+
+Revision ID: f3b9d2a61c47
+Revises: e8c05b3f71a4
+Create Date: 2026-10-19 02:30:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3b9d2a61c47"
+down_revision: Union[str, None] = "e8c05b3f71a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rms_jobs",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("course_name", sa.String(), nullable=False),
+        sa.Column("created_by", sa.String(), nullable=True),
+        sa.Column("params", sa.JSON(), nullable=False),
+        sa.Column("state", sa.JSON(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("error", sa.String(), nullable=True),
+        sa.Column("run_after", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_rms_jobs")),
+    )
+    op.create_index(
+        "ix_rms_jobs_pending",
+        "rms_jobs",
+        ["run_after"],
+        unique=False,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_rms_jobs_pending", table_name="rms_jobs", postgresql_where=sa.text("status IN ('queued', 'running')")
+    )
+    op.drop_table("rms_jobs")
@@ -3,7 +3,7 @@ from typing import Any, Dict, List
 
 from authlib.integrations.flask_client import OAuth
 
-from .abstract import RmsApi, RmsApiException, RmsUser
+from .abstract import RmsApi, RmsApiException, RmsUser, RmsUserNotFoundException
 
 
 @dataclass
@@ -200,7 +200,7 @@ class MockRmsApi(RmsApi):
         username: str,
     ) -> RmsUser:
         if username not in self.users_by_username:
-            raise RmsApiException(f"User with username {username} not found")
+            raise RmsUserNotFoundException(f"User with username {username} not found")
         return self.users_by_username[username]
 
     def check_user_authenticated_in_rms(
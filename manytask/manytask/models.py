@@ -2,9 +2,21 @@ import enum
 import logging
 import re
 from datetime import datetime
-from typing import List, Optional
-
-from sqlalchemy import JSON, BigInteger, DateTime, Enum, ForeignKey, MetaData, UniqueConstraint, func
+from typing import Any, List, Optional
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.engine import Dialect
 from sqlalchemy.orm import DeclarativeBase, DynamicMapped, Mapped, mapped_column, relationship, validates
 from sqlalchemy.types import TypeDecorator
@@ -201,7 +213,11 @@ class UserOnNamespace(Base):
     )
     assigned_by_id: Mapped[int] = mapped_column(ForeignKey(User.id))
 
-    __table_args__ = (UniqueConstraint("user_id", "namespace_id", name="_user_namespace_uc"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "namespace_id", name="_user_namespace_uc"),
+        # program managers and admins of a namespace
+        Index("ix_users_on_namespaces_namespace_id_role", "namespace_id", "role"),
+    )
 
     # relationships
     user: Mapped["User"] = relationship(back_populates="users_on_namespaces", foreign_keys=[user_id])
@@ -249,6 +265,7 @@ class Course(Base):
     __table_args__ = (
         UniqueConstraint("name", name="uq_courses_name"),
         UniqueConstraint("token", name="uq_courses_token"),
+        Index("ix_courses_namespace_id", "namespace_id"),
     )
 
     # relationships
@@ -294,13 +311,31 @@ class UserOnCourse(Base):
     comment: Mapped[Optional[str]] = mapped_column(default=None)
     final_grade: Mapped[Optional[int]] = mapped_column(default=None)
     final_grade_override: Mapped[Optional[int]] = mapped_column(default=None)
+    # student's repository, written when the RMS confirms it exists
+    repo_url: Mapped[Optional[str]] = mapped_column(default=None)
+    repo_id: Mapped[Optional[str]] = mapped_column(default=None)
+    repo_created_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), default=None)
+    repo_verified_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), default=None)
+    # bulk provisioning of the repository requested by an admin and its last failure
+    repo_provision_requested_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), default=None)
+    repo_provision_error: Mapped[Optional[str]] = mapped_column(default=None)
 
-    __table_args__ = (UniqueConstraint("user_id", "course_id", name="_user_course_uc"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", name="_user_course_uc"),
+        # students of a course, the unique constraint only serves the courses of a user
+        Index("ix_users_on_courses_course_id_user_id", "course_id", "user_id"),
+    )
 
     # relationships
     user: Mapped["User"] = relationship(back_populates="users_on_courses")
     course: Mapped["Course"] = relationship(back_populates="users_on_courses")
-    grades: DynamicMapped["Grade"] = relationship(back_populates="user_on_course", cascade="all, delete-orphan")
+    # the course id lets postgres read only the grades partition of the course
+    grades: DynamicMapped["Grade"] = relationship(
+        primaryjoin="and_(UserOnCourse.id == foreign(Grade.user_on_course_id), "
+        "UserOnCourse.course_id == foreign(Grade.course_id))",
+        back_populates="user_on_course",
+        cascade="all, delete-orphan",
+    )
 
 
 class Deadline(Base):
@@ -325,6 +360,8 @@ class TaskGroup(Base):
     enabled: Mapped[bool] = mapped_column(server_default="true", default=True)
     position: Mapped[int] = mapped_column(server_default="0", default=0)  # order number
 
+    __table_args__ = (Index("ix_task_groups_course_id_position", "course_id", "position"),)
+
     # relationships
     course: Mapped["Course"] = relationship(back_populates="task_groups")
     deadline: Mapped["Deadline"] = relationship(
@@ -350,6 +387,8 @@ class Task(Base):
     url: Mapped[Optional[str]]
     position: Mapped[int] = mapped_column(server_default="0", default=0)  # order number
 
+    __table_args__ = (Index("ix_tasks_group_id_position", "group_id", "position"),)
+
     # relationships
     group: Mapped["TaskGroup"] = relationship(back_populates="tasks")
     grades: Mapped[List["Grade"]] = relationship(back_populates="task", cascade="all, delete-orphan")
@@ -359,19 +398,118 @@ class Grade(Base):
     __tablename__ = "grades"
 
     id: Mapped[int] = mapped_column(primary_key=True)
+    # course of user_on_course, the partition key when grades are partitioned by course
+    course_id: Mapped[int] = mapped_column(ForeignKey(Course.id))
     user_on_course_id: Mapped[int] = mapped_column(ForeignKey(UserOnCourse.id))
     task_id: Mapped[int] = mapped_column(ForeignKey(Task.id))
     score: Mapped[int] = mapped_column(default=0)
     is_solved: Mapped[bool] = mapped_column(default=False, server_default="false")
     last_submit_date: Mapped[datetime] = mapped_column(server_default=func.now())
 
-    __table_args__ = (UniqueConstraint("user_on_course_id", "task_id", name="_user_on_course_task_uc"),)
+    # a unique constraint of a partitioned table includes the partition key
+    __table_args__ = (
+        UniqueConstraint("course_id", "user_on_course_id", "task_id", name="_user_on_course_task_uc"),
+        # task stats and the grades of a deleted task
+        Index("ix_grades_course_id_task_id", "course_id", "task_id"),
+    )
+    # updates of a loaded grade filter by the course too
+    __mapper_args__ = {"primary_key": [id, course_id]}
 
     # relationships
-    user_on_course: Mapped["UserOnCourse"] = relationship(back_populates="grades")
+    user_on_course: Mapped["UserOnCourse"] = relationship(
+        primaryjoin="and_(UserOnCourse.id == foreign(Grade.user_on_course_id), "
+        "UserOnCourse.course_id == foreign(Grade.course_id))",
+        back_populates="grades",
+    )
     task: Mapped["Task"] = relationship(back_populates="grades")
 
 
+class QueuedReport(Base):
+    """Score report accepted by the api and waiting to be applied to the grades"""
+
+    __tablename__ = "report_queue"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    course_id: Mapped[int] = mapped_column(ForeignKey(Course.id, ondelete="CASCADE"))
+    username: Mapped[str]
+    task_name: Mapped[str]
+    reported_score: Mapped[int]
+    submit_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    check_deadline: Mapped[bool] = mapped_column(default=True)
+    allow_reduction: Mapped[bool] = mapped_column(default=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    applied_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True), default=None)
+    final_score: Mapped[Optional[int]] = mapped_column(default=None)
+    error: Mapped[Optional[str]] = mapped_column(default=None)
+
+    __table_args__ = (
+        # the applier only scans pending reports
+        Index("ix_report_queue_pending", "id", postgresql_where=applied_at.is_(None)),
+    )
+
+
+class Submission(Base):
+    """Accepted score report, the table is append-only and only read by analytics queries"""
+
+    __tablename__ = "submissions"
+
+    # sqlite autoincrements INTEGER primary keys only
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    course_id: Mapped[int] = mapped_column(ForeignKey(Course.id, ondelete="CASCADE"))
+    user_id: Mapped[int] = mapped_column(ForeignKey(User.id, ondelete="CASCADE"))
+    task_id: Mapped[int] = mapped_column(ForeignKey(Task.id, ondelete="CASCADE"))
+    reported_score: Mapped[int]
+    multiplier: Mapped[float] = mapped_column(default=1.0)
+    score: Mapped[int]  # reported_score with the multiplier applied
+    submit_time: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    source: Mapped[str]
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # rows are appended in created_at order, so a BRIN index is a few pages and keeps inserts cheap
+        Index("ix_submissions_created_at", "created_at", postgresql_using="brin"),
+        Index("ix_submissions_course_id_task_id", "course_id", "task_id"),
+    )
+
+
+class QueuedRmsJob(Base):
+    """RMS side effects of a course (creating its groups and public repo) run off the request path"""
+
+    __tablename__ = "rms_jobs"
+
+    # sqlite autoincrements INTEGER primary keys only
+    id: Mapped[int] = mapped_column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    kind: Mapped[str]
+    course_name: Mapped[str]
+    created_by: Mapped[Optional[str]] = mapped_column(default=None)
+    params: Mapped[dict[str, Any]] = mapped_column(JSON)
+    # results of the finished steps, a resumed job skips them
+    state: Mapped[dict[str, Any]] = mapped_column(JSON, default=dict)
+    status: Mapped[str] = mapped_column(default="queued")  # queued, running, done or failed
+    attempts: Mapped[int] = mapped_column(default=0)
+    error: Mapped[Optional[str]] = mapped_column(default=None)
+    # a queued job waits for its retry until then, a running one holds its lease until then
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # runners only scan unfinished jobs
+        Index("ix_rms_jobs_pending", "run_after", postgresql_where=status.in_(["queued", "running"])),
+    )
+
+
+class CourseSnapshot(Base):
+    """Frozen pages of an archived course, served instead of the live tables"""
+
+    __tablename__ = "course_snapshots"
+
+    course_id: Mapped[int] = mapped_column(ForeignKey(Course.id), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # compressed json written by manytask.archive
+    data: Mapped[bytes] = mapped_column(LargeBinary)
+
+
 class ComplexFormula(Base):
     __tablename__ = "complex_formulas"
 
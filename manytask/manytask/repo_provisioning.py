@@ -0,0 +1,126 @@
+"""Bulk provisioning of student repositories.
+
+At the start of a semester hundreds of students open ``create_project`` within minutes and every
+request forks a repository in GitLab inline. An admin can instead request the repositories of a
+list of students up front: ``POST /api/<course>/repos/provision`` enrolls the students, marks them
+pending in ``users_on_courses`` and starts a :class:`ProvisioningJob` thread in the serving process.
+
+The job creates the repositories with a pool of ``REPO_PROVISIONING_WORKERS`` threads, starting at
+most ``REPO_PROVISIONING_RATE`` students per second so the RMS rate limit is not exhausted. Every
+created repository is recorded like one created from the page, a failure is stored per student.
+The state survives restarts: requesting the same students again resumes the pending and failed ones.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Collection
+
+from .course import Course
+from .main import CustomFlask
+
+logger = logging.getLogger(__name__)
+
+REPO_PROVISIONING_WORKERS = "REPO_PROVISIONING_WORKERS"
+REPO_PROVISIONING_RATE = "REPO_PROVISIONING_RATE"
+
+_JOBS_EXTENSION = "manytask.provisioning_jobs"
+_jobs_lock = threading.Lock()
+
+
+class RateLimiter:
+    """Spaces acquisitions evenly, at most rate per second across all threads"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class ProvisioningJob(threading.Thread):
+    """Background thread creating the repositories of the students of one course"""
+
+    def __init__(self, app: CustomFlask, course: Course, usernames: Collection[str], workers: int, rate: float):
+        super().__init__(name=f"repo-provisioning-{course.course_name}", daemon=True)
+        self.app = app
+        self.course = course
+        self.usernames = list(usernames)
+        self.workers = workers
+        self.rate_limiter = RateLimiter(rate)
+        self.failed: dict[str, str] = {}
+
+    def run(self) -> None:
+        logger.info(
+            "Provisioning %d repos in course=%s with %d workers",
+            len(self.usernames),
+            self.course.course_name,
+            self.workers,
+        )
+        with ThreadPoolExecutor(self.workers, thread_name_prefix=self.name) as executor:
+            for username in self.usernames:
+                executor.submit(self._provision, username)
+        logger.info(
+            "Provisioned %d repos in course=%s, %d failed",
+            len(self.usernames) - len(self.failed),
+            self.course.course_name,
+            len(self.failed),
+        )
+
+    def _provision(self, username: str) -> None:
+        storage_api, rms_api = self.app.storage_api, self.app.rms_api
+        self.rate_limiter.acquire()
+        try:
+            # the stored rms id is enough, the RMS is not asked for the user
+            rms_user = storage_api.get_stored_user_by_username(username).rms_identity
+            repo_id = rms_api.create_project(
+                rms_user, self.course.gitlab_course_students_group, self.course.gitlab_course_public_repo
+            )
+            url = rms_api.get_url_for_repo(rms_user.username, self.course.gitlab_course_students_group)
+            storage_api.store_student_repo(self.course.course_name, username, url, repo_id)
+        except Exception as e:
+            logger.warning("Failed to provision repo of user=%s in course=%s", username, self.course.course_name)
+            logger.debug("Provisioning error:", exc_info=True)
+            self.failed[username] = str(e) or type(e).__name__
+            try:
+                storage_api.fail_repo_provisioning(self.course.course_name, username, self.failed[username])
+            except Exception:
+                logger.exception("Failed to store provisioning error of user=%s", username)
+
+
+def start_provisioning(app: CustomFlask, course: Course, usernames: Collection[str]) -> ProvisioningJob | None:
+    """Request the repositories of the students and provision them in the background
+
+    :param app: app with storage_api and rms_api
+    :param course: course of the repositories
+    :param usernames: students to provision
+    :return: started job or None if a job of the course is still running in this process
+    """
+    with _jobs_lock:
+        jobs: dict[str, ProvisioningJob] = app.extensions.setdefault(_JOBS_EXTENSION, {})
+        running = jobs.get(course.course_name)
+        if running is not None and running.is_alive():
+            return None
+
+        requested = app.storage_api.request_repo_provisioning(course.course_name, usernames)
+        job = ProvisioningJob(
+            app, course, requested, app.config[REPO_PROVISIONING_WORKERS], app.config[REPO_PROVISIONING_RATE]
+        )
+        jobs[course.course_name] = job
+        job.start()
+        return job
+
+
+def init_app(app: CustomFlask) -> None:
+    """Read the provisioning settings from env"""
+    app.config.setdefault(REPO_PROVISIONING_WORKERS, int(os.environ.get(REPO_PROVISIONING_WORKERS, "8")))
+    app.config.setdefault(REPO_PROVISIONING_RATE, float(os.environ.get(REPO_PROVISIONING_RATE, "2")))
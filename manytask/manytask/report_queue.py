@@ -0,0 +1,118 @@
+"""Asynchronous ingestion of score reports.
+
+With ``REPORT_QUEUE_ENABLED`` the ``/report`` api stores reports in the ``report_queue`` table
+and answers 202 with a receipt id instead of updating the grades in the request. Every app
+process runs a :class:`ReportApplier` thread draining the queue. Pending reports are locked with
+``FOR UPDATE SKIP LOCKED``, so appliers of different gunicorn workers never wait for each other,
+and all queued reports of a student are applied together with a single grade recalculation.
+"""
+
+import logging
+import os
+import threading
+
+from .abstract import ReportReceipt
+from .config import ManytaskGroupConfig, ManytaskTaskConfig
+from .course import Course
+from .main import CustomFlask
+from .metrics import REPORTS_PROCESSED
+
+logger = logging.getLogger(__name__)
+
+REPORT_QUEUE_ENABLED = "REPORT_QUEUE_ENABLED"
+REPORT_QUEUE_POLL_INTERVAL = "REPORT_QUEUE_POLL_INTERVAL"
+
+_APPLIER_EXTENSION = "manytask.report_applier"
+
+
+def apply_queued_reports(app: CustomFlask, max_students: int = 100) -> list[ReportReceipt]:
+    """Apply pending reports and recalculate the final grade of every affected student once
+
+    :param app: app with storage_api
+    :param max_students: maximum number of students to process
+    :return: receipts of the processed reports
+    """
+    # api imports this module
+    from .api import _deadline_multiplier, _publish_student_row, _recalculate_grade
+
+    tasks: dict[tuple[str, str], tuple[Course, ManytaskGroupConfig, ManytaskTaskConfig]] = {}
+
+    def deadline_multiplier(receipt: ReportReceipt) -> float:
+        if not receipt.check_deadline:
+            return 1.0
+        key = (receipt.course_name, receipt.task_name)
+        if key not in tasks:
+            tasks[key] = app.storage_api.find_task(receipt.course_name, receipt.task_name)
+        course, group, _ = tasks[key]
+        return _deadline_multiplier(course, group, "", receipt.submit_time)
+
+    receipts = app.storage_api.apply_queued_reports(deadline_multiplier, max_students)
+
+    students: dict[tuple[str, str], list[str]] = {}
+    for receipt in receipts:
+        if receipt.status == "applied":
+            REPORTS_PROCESSED.labels(course=receipt.course_name).inc()
+            students.setdefault((receipt.course_name, receipt.username), []).append(receipt.task_name)
+        else:
+            logger.warning("Queued report id=%s was not applied: %s", receipt.receipt_id, receipt.error)
+
+    for (course_name, username), task_names in sorted(students.items()):
+        student_data = _recalculate_grade(app.storage_api, course_name, username)
+        _publish_student_row(app, course_name, username, sorted(set(task_names)), student_data)
+
+    if receipts:
+        logger.info("Applied %d queued reports of %d students", len(receipts), len(students))
+    return receipts
+
+
+class ReportApplier(threading.Thread):
+    """Background thread applying queued reports until stopped"""
+
+    def __init__(self, app: CustomFlask, poll_interval: float = 1.0):
+        super().__init__(name="report-applier", daemon=True)
+        self.app = app
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def wake(self) -> None:
+        """Apply new reports without waiting for the poll interval"""
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+
+    def run(self) -> None:
+        logger.info("Report applier started, poll_interval=%ss", self.poll_interval)
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            try:
+                receipts = apply_queued_reports(self.app)
+            except Exception:
+                logger.exception("Failed to apply queued reports")
+                receipts = []
+            # keep draining while there is a backlog
+            if not receipts:
+                self._wakeup.wait(self.poll_interval)
+
+
+def wake_applier(app: CustomFlask) -> None:
+    applier: ReportApplier | None = app.extensions.get(_APPLIER_EXTENSION)
+    if applier is not None:
+        applier.wake()
+
+
+def init_app(app: CustomFlask) -> None:
+    """Read the report queue settings from env and start the applier if the queue is enabled"""
+    app.config.setdefault(
+        REPORT_QUEUE_ENABLED, os.environ.get(REPORT_QUEUE_ENABLED, "false").lower() in ("true", "1", "yes")
+    )
+    app.config.setdefault(REPORT_QUEUE_POLL_INTERVAL, float(os.environ.get(REPORT_QUEUE_POLL_INTERVAL, "1")))
+    if not app.config[REPORT_QUEUE_ENABLED]:
+        return
+
+    applier = ReportApplier(app, app.config[REPORT_QUEUE_POLL_INTERVAL])
+    app.extensions[_APPLIER_EXTENSION] = applier
+    if not app.testing:
+        applier.start()
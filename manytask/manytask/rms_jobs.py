@@ -0,0 +1,200 @@
+"""Background RMS jobs of courses.
+
+Creating a course makes a course group, a public repo and a students group in the RMS. These calls
+are slow for large GitLab instances and used to run inside the request, a worker killed by the
+gunicorn timeout left half-created groups behind. The course is now stored first and the RMS calls
+are queued in the ``rms_jobs`` table: the request answers right away with the job id and
+``GET /api/admin/jobs/<job_id>`` reports the progress.
+
+Every app process runs an :class:`RmsJobRunner` thread. A job is a list of steps and the result of
+each step is saved as soon as it finishes, so a job interrupted by an RMS error or a dead process
+resumes after its last finished step. The RMS calls find existing groups and repos instead of
+failing, so repeating a step whose result was not saved is harmless. A failed attempt is retried
+``RMS_JOBS_MAX_ATTEMPTS`` times with a doubling delay, then the job stays ``failed`` until an admin
+retries it.
+"""
+
+import logging
+import os
+import threading
+from typing import Any, Callable
+
+from .abstract import RmsApi, RmsJob
+from .course import CourseConfig
+from .main import CustomFlask
+
+logger = logging.getLogger(__name__)
+
+RMS_JOBS_POLL_INTERVAL = "RMS_JOBS_POLL_INTERVAL"
+RMS_JOBS_MAX_ATTEMPTS = "RMS_JOBS_MAX_ATTEMPTS"
+RMS_JOBS_RETRY_DELAY = "RMS_JOBS_RETRY_DELAY"
+RMS_JOBS_LEASE = "RMS_JOBS_LEASE"
+
+CREATE_COURSE = "create_course"
+
+_RUNNER_EXTENSION = "manytask.rms_job_runner"
+
+# a step gets the rms api, the job params and the results of the previous steps
+Step = Callable[[RmsApi, dict[str, Any], dict[str, Any]], Any]
+
+
+def _create_course_group(rms_api: RmsApi, params: dict[str, Any], state: dict[str, Any]) -> int:
+    return rms_api.create_course_group(params["parent_group_id"], params["course_name"], params["course_slug"])
+
+
+def _create_public_repo(rms_api: RmsApi, params: dict[str, Any], state: dict[str, Any]) -> bool:
+    rms_api.create_public_repo(params["course_group"], params["public_repo"])
+    return True
+
+
+def _create_students_group(rms_api: RmsApi, params: dict[str, Any], state: dict[str, Any]) -> bool:
+    rms_api.create_students_group(params["students_group"], parent_group_id=state["course_group_id"])
+    return True
+
+
+# steps of every job kind in order, the step name is the key of its result in the job state
+JOB_STEPS: dict[str, list[tuple[str, Step]]] = {
+    CREATE_COURSE: [
+        ("course_group_id", _create_course_group),
+        ("public_repo", _create_public_repo),
+        ("students_group", _create_students_group),
+    ],
+}
+
+
+def enqueue_course_creation(
+    app: CustomFlask,
+    course_config: CourseConfig,
+    course_slug: str,
+    parent_group_id: int | None,
+    created_by: str | None = None,
+) -> RmsJob:
+    """Queue the creation of the RMS groups and the public repo of a stored course
+
+    :param app: app with storage_api
+    :param course_config: settings of the course with the full paths of its groups and public repo
+    :param course_slug: path of the course group in its parent group
+    :param parent_group_id: RMS id of the namespace group, None for a top-level course group
+    :param created_by: username of the admin creating the course
+    :return: queued job
+    """
+    job = app.storage_api.enqueue_rms_job(
+        CREATE_COURSE,
+        course_config.course_name,
+        {
+            "parent_group_id": parent_group_id,
+            "course_name": course_config.course_name,
+            "course_slug": course_slug,
+            "course_group": course_config.gitlab_course_group,
+            "public_repo": course_config.gitlab_course_public_repo,
+            "students_group": course_config.gitlab_course_students_group,
+        },
+        created_by=created_by,
+    )
+    wake_runner(app)
+    return job
+
+
+def run_rms_job(app: CustomFlask, job: RmsJob) -> bool:
+    """Run the unfinished steps of a claimed job and record the outcome
+
+    :param app: app with storage_api and rms_api
+    :param job: job returned by claim_rms_job
+    :return: True if the job is done
+    """
+    lease = app.config[RMS_JOBS_LEASE]
+    state = dict(job.state)
+    try:
+        for name, step in JOB_STEPS[job.kind]:
+            if name in state:
+                continue
+            state[name] = step(app.rms_api, job.params, state)
+            app.storage_api.save_rms_job_state(job.job_id, state, lease)
+    except Exception as e:
+        error = str(e) or type(e).__name__
+        retry_in = None
+        if job.attempts < app.config[RMS_JOBS_MAX_ATTEMPTS]:
+            retry_in = app.config[RMS_JOBS_RETRY_DELAY] * 2 ** (job.attempts - 1)
+        logger.warning(
+            "RMS job id=%s %s of course=%s failed, attempt %d, retry in %ss: %s",
+            job.job_id,
+            job.kind,
+            job.course_name,
+            job.attempts,
+            retry_in,
+            error,
+        )
+        logger.debug("RMS job error:", exc_info=True)
+        app.storage_api.finish_rms_job(job.job_id, error, retry_in)
+        return False
+
+    app.storage_api.finish_rms_job(job.job_id)
+    logger.info("RMS job id=%s %s of course=%s done", job.job_id, job.kind, job.course_name)
+    return True
+
+
+def run_rms_jobs(app: CustomFlask, max_jobs: int = 10) -> list[RmsJob]:
+    """Claim and run the jobs that are due
+
+    :param app: app with storage_api and rms_api
+    :param max_jobs: maximum number of jobs to run
+    :return: jobs that were run
+    """
+    jobs = []
+    for _ in range(max_jobs):
+        job = app.storage_api.claim_rms_job(app.config[RMS_JOBS_LEASE])
+        if job is None:
+            break
+        run_rms_job(app, job)
+        jobs.append(job)
+    return jobs
+
+
+class RmsJobRunner(threading.Thread):
+    """Background thread running queued RMS jobs until stopped"""
+
+    def __init__(self, app: CustomFlask, poll_interval: float = 5.0):
+        super().__init__(name="rms-job-runner", daemon=True)
+        self.app = app
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def wake(self) -> None:
+        """Run new jobs without waiting for the poll interval"""
+        self._wakeup.set()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+
+    def run(self) -> None:
+        logger.info("RMS job runner started, poll_interval=%ss", self.poll_interval)
+        while not self._stopped.is_set():
+            self._wakeup.clear()
+            try:
+                jobs = run_rms_jobs(self.app)
+            except Exception:
+                logger.exception("Failed to run RMS jobs")
+                jobs = []
+            if not jobs:
+                self._wakeup.wait(self.poll_interval)
+
+
+def wake_runner(app: CustomFlask) -> None:
+    runner: RmsJobRunner | None = app.extensions.get(_RUNNER_EXTENSION)
+    if runner is not None:
+        runner.wake()
+
+
+def init_app(app: CustomFlask) -> None:
+    """Read the RMS job settings from env and start the runner"""
+    app.config.setdefault(RMS_JOBS_POLL_INTERVAL, float(os.environ.get(RMS_JOBS_POLL_INTERVAL, "5")))
+    app.config.setdefault(RMS_JOBS_MAX_ATTEMPTS, int(os.environ.get(RMS_JOBS_MAX_ATTEMPTS, "5")))
+    app.config.setdefault(RMS_JOBS_RETRY_DELAY, float(os.environ.get(RMS_JOBS_RETRY_DELAY, "10")))
+    app.config.setdefault(RMS_JOBS_LEASE, float(os.environ.get(RMS_JOBS_LEASE, "600")))
+
+    runner = RmsJobRunner(app, app.config[RMS_JOBS_POLL_INTERVAL])
+    app.extensions[_RUNNER_EXTENSION] = runner
+    if not app.testing:
+        runner.start()
@@ -1,9 +1,10 @@
 from __future__ import annotations
 
+import functools
 import logging
+import threading
 import time
-from dataclasses import dataclass
-from datetime import datetime, timedelta
+from dataclasses import dataclass, field
 from http import HTTPStatus
 from typing import Any
 
@@ -14,11 +15,22 @@ from yandex.cloud.iam.v1.yandex_passport_user_account_service_pb2 import GetUser
 from yandex.cloud.iam.v1.yandex_passport_user_account_service_pb2_grpc import YandexPassportUserAccountServiceStub
 from yandexcloud._sdk import SDK
 
-from .abstract import RmsApi, RmsApiException, RmsUser
+from .abstract import RMS_URL_CACHE_SIZE, RmsApi, RmsApiException, RmsUser, RmsUserCache, RmsUserNotFoundException
+from .metrics import track_rms_api
+from .utils.http import HttpConfig, make_httpx_client
 from .utils.sourcecraft import normalize_string
 
 logger = logging.getLogger(__name__)
 
+# expired repo access answers are dropped once the cache holds this many
+REPO_ACCESS_CACHE_SIZE = 10000
+
+
+@functools.lru_cache(maxsize=RMS_URL_CACHE_SIZE)
+def _repo_url(base_url: str, org_slug: str, course_students_group: str, username: str) -> str:
+    # the slug normalization is the expensive part of a url, done once per student
+    return f"{base_url}/{org_slug}/{course_students_group}-{normalize_string(username)}"
+
 
 @dataclass
 class SourceCraftConfig:
@@ -30,6 +42,16 @@ class SourceCraftConfig:
     service_account_key: dict[str, Any] | None = None
     oauth_token: str | None = None
     dry_run: bool = False
+    # seconds a repo access check is trusted, the course page checks it on every load
+    repo_access_cache_ttl: float = 60.0
+    # seconds users found by yandex login are kept, is_admin looks up the same teachers all the time
+    user_cache_ttl: float = 300.0
+    # seconds an unknown login is answered without asking Yandex Cloud
+    user_negative_cache_ttl: float = 60.0
+    # IAM tokens live 12 hours, a fresh one is minted well before
+    iam_token_refresh_interval: float = 3600.0
+    # connection pool, timeouts and retries of the REST API
+    http: HttpConfig = field(default_factory=HttpConfig)
 
     def __post_init__(self) -> None:
         if self.service_account_key and self.oauth_token:
@@ -38,6 +60,33 @@ class SourceCraftConfig:
             raise ValueError("SourceCraftConfig: either service_account_key or oauth_token must be provided")
 
 
+class IamTokenRefresher(threading.Thread):
+    """Background thread minting a new IAM token every refresh interval until stopped"""
+
+    def __init__(self, api: SourceCraftApi, refresh_interval: float, retry_interval: float = 30.0):
+        super().__init__(name="sourcecraft-iam-token", daemon=True)
+        self.api = api
+        self.refresh_interval = refresh_interval
+        self.retry_interval = retry_interval
+        self._stopped = threading.Event()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def run(self) -> None:
+        logger.info("IAM token refresher started, refresh_interval=%ss", self.refresh_interval)
+        while not self._stopped.is_set():
+            try:
+                self.api.refresh_iam_token()
+                delay = self.refresh_interval
+            except Exception:
+                # requests keep the previous token, it is valid for hours
+                logger.exception("Failed to refresh IAM token, retrying in %ss", self.retry_interval)
+                delay = self.retry_interval
+            self._stopped.wait(delay)
+
+
+@track_rms_api("sourcecraft")
 class SourceCraftApi(RmsApi):
     def __init__(
         self,
@@ -51,17 +100,24 @@ class SourceCraftApi(RmsApi):
         self._base_url = config.base_url
         self._org_slug = config.org_slug
 
-        self._client = httpx.Client(
-            base_url=config.api_url,
-            timeout=30.0,
-        )
+        self._client = make_httpx_client(config.http, base_url=config.api_url)
         if config.service_account_key:
             self._sdk = SDK(service_account_key=config.service_account_key)
         else:
             self._sdk = SDK(token=config.oauth_token)
 
         self._iam_token: str | None = None
-        self._iam_token_last_issued: datetime | None = None
+        self._iam_token_issued_at: float | None = None
+        self._iam_token_lock = threading.Lock()
+        self._iam_token_refresh_interval = config.iam_token_refresh_interval
+        self._iam_token_refresher: IamTokenRefresher | None = None
+
+        # (rms user id, repo slug) -> (checked at, has access)
+        self._repo_access: dict[tuple[str, str], tuple[float, bool]] = {}
+        self._repo_access_lock = threading.Lock()
+        self._repo_access_cache_ttl = config.repo_access_cache_ttl
+
+        self._users = RmsUserCache(config.user_cache_ttl, config.user_negative_cache_ttl)
 
         logger.info(f"Initializing SourcecraftApi with base_url: {self.base_url}")
 
@@ -71,15 +127,45 @@ class SourceCraftApi(RmsApi):
 
     @property
     def iam_token(self) -> str:
-        if (
-            self._iam_token is None
-            or self._iam_token_last_issued is None
-            or self._iam_token_last_issued < datetime.now() - timedelta(hours=1)
-        ):
-            self._iam_token = self._get_iam_token()
-            self._iam_token_last_issued = datetime.now()
+        """Current IAM token
+
+        With the refresher running requests only use the token it minted. Without it (tests, scripts)
+        or before its first token the token is minted inline when missing or older than the interval.
+        """
+        token, issued_at = self._iam_token, self._iam_token_issued_at
+        if token is not None and issued_at is not None:
+            if self._iam_token_refresher is not None and self._iam_token_refresher.is_alive():
+                return token
+            if time.monotonic() - issued_at < self._iam_token_refresh_interval:
+                return token
+        with self._iam_token_lock:
+            # another thread may have minted it while this one waited
+            if self._iam_token is not None and self._iam_token is not token:
+                return self._iam_token
+            return self._mint_iam_token()
+
+    def refresh_iam_token(self) -> None:
+        """Mint a new IAM token, requests keep using the previous one until it is ready"""
+        with self._iam_token_lock:
+            self._mint_iam_token()
+
+    def _mint_iam_token(self) -> str:
+        self._iam_token = self._get_iam_token()
+        self._iam_token_issued_at = time.monotonic()
         return self._iam_token
 
+    def start_iam_token_refresher(self) -> IamTokenRefresher:
+        """Mint IAM tokens in a background thread so that no request waits for one"""
+        if self._iam_token_refresher is None or not self._iam_token_refresher.is_alive():
+            self._iam_token_refresher = IamTokenRefresher(self, self._iam_token_refresh_interval)
+            self._iam_token_refresher.start()
+        return self._iam_token_refresher
+
+    def stop_iam_token_refresher(self) -> None:
+        if self._iam_token_refresher is not None:
+            self._iam_token_refresher.stop()
+            self._iam_token_refresher = None
+
     def _get_iam_token(self) -> str:
         token_requester = self._sdk._channels._token_requester
         client = self._sdk.client(IamTokenServiceStub)
@@ -142,6 +228,7 @@ class SourceCraftApi(RmsApi):
         role: str,
         user_id: str,
     ) -> None:
+        self._forget_repo_access(user_id, repo_slug)
         payload: dict[str, Any] = {
             "subject_roles": [
                 {
@@ -254,16 +341,39 @@ class SourceCraftApi(RmsApi):
         project_name: str,
         project_group: str,
     ) -> bool:
-        """Return True if the user is an active member (accepted invitation) of their repo."""
+        """Return True if the user is an active member (accepted invitation) of their repo.
+
+        Answers are cached for repo_access_cache_ttl seconds, creating the repo or changing its
+        roles drops the cached answer. API errors are not cached.
+        """
         repo_slug = f"{project_group}-{normalize_string(project_name)}"
+        key = (rms_user_id, repo_slug)
+        now = time.monotonic()
+        with self._repo_access_lock:
+            cached = self._repo_access.get(key)
+        if cached is not None and now - cached[0] < self._repo_access_cache_ttl:
+            return cached[1]
+
         response = self._request("GET", f"repos/{self._org_slug}/{repo_slug}/roles")
         if response.status_code != HTTPStatus.OK:
             return False  # don't block on API errors
-        for entry in response.json().get("subject_roles", []):
-            subject = entry.get("subject", {})
-            if subject.get("id") == rms_user_id and subject.get("type") == "user":
-                return True
-        return False
+        has_access = any(
+            entry.get("subject", {}).get("id") == rms_user_id and entry.get("subject", {}).get("type") == "user"
+            for entry in response.json().get("subject_roles", [])
+        )
+        with self._repo_access_lock:
+            if len(self._repo_access) >= REPO_ACCESS_CACHE_SIZE:
+                self._repo_access = {
+                    cached_key: value
+                    for cached_key, value in self._repo_access.items()
+                    if now - value[0] < self._repo_access_cache_ttl
+                }
+            self._repo_access[key] = (now, has_access)
+        return has_access
+
+    def _forget_repo_access(self, rms_user_id: str, repo_slug: str) -> None:
+        with self._repo_access_lock:
+            self._repo_access.pop((rms_user_id, repo_slug), None)
 
     def create_project(
         self,
@@ -280,6 +390,7 @@ class SourceCraftApi(RmsApi):
         logger.info(f"Creating repo for user {rms_user.username}")
 
         student_repo_slug = f"{course_students_group}-{normalize_string(rms_user.username)}"
+        self._forget_repo_access(rms_user.id, student_repo_slug)
 
         response = self._get_repo(course_public_repo)
         if response.status_code == HTTPStatus.NOT_FOUND:
@@ -315,7 +426,7 @@ class SourceCraftApi(RmsApi):
         :param course_students_group: repo slug prefix
         :return: URL to the student's repository
         """
-        return f"{self._base_url}/{self._org_slug}/{course_students_group}-{normalize_string(username)}"
+        return _repo_url(self._base_url, self._org_slug, course_students_group, username)
 
     def get_url_for_piplines(
         self,
@@ -345,7 +456,7 @@ class SourceCraftApi(RmsApi):
         username: str,
     ) -> RmsUser:
         # NOTE: yandex login is expected as username for now
-        return self._get_user_by_yandex_login(username)
+        return self._users.get_or_load(username, self._get_user_by_yandex_login)
 
     def _get_user_by_yandex_login(self, auth_username: str) -> RmsUser:
         cloud_id = self._get_cloud_id_by_yandex_login(auth_username)
@@ -356,11 +467,15 @@ class SourceCraftApi(RmsApi):
         try:
             response = client.GetByLogin(GetUserAccountByLoginRequest(login=yandex_login))
         except grpc.RpcError as e:
+            if isinstance(e, grpc.Call) and e.code() == grpc.StatusCode.NOT_FOUND:
+                raise RmsUserNotFoundException(f"No users found for username {yandex_login}") from e
             raise RmsApiException(f"Failed to get cloud id by yandex login: {e}") from e
         return response.id
 
     def _get_user_profile(self, identity: str) -> RmsUser:
         response = self._request("GET", f"users/{identity}")
+        if response.status_code == HTTPStatus.NOT_FOUND:
+            raise RmsUserNotFoundException(f"No users found for {identity}")
         if response.status_code != HTTPStatus.OK:
             raise RmsApiException(f"Failed to get cloud id by yandex login: {response.json()}")
         return self._unmarshal_user_profile(response.json())
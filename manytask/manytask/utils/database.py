@@ -1,32 +1,33 @@
-from typing import Any
+import math
+from typing import Any, Callable, Iterator
 
+from manytask.abstract import STUDENT_SORT_KEYS, TASK_SORT_PREFIX
 from manytask.course import Course
 from manytask.database import calculate_effective_grade
 from manytask.main import CustomFlask
-from manytask.utils.generic import calculate_percent
+from manytask.utils.generic import calculate_percent, normalize_for_search
 
+# (scores_dict, (first_name, last_name), final_grade, final_grade_override, comment)
+StudentData = tuple[dict[str, tuple[int, bool]], tuple[str, str], int | None, int | None, str | None]
 
-def get_database_table_data(
+
+def _student_row_builder(
     app: CustomFlask,
     course: Course,
-    include_admin_data: bool = False,
-    is_program_manager: bool = False,
-) -> dict[str, Any]:
-    """Get the database table data structure used by both web and API endpoints.
+    include_admin_data: bool,
+    is_program_manager: bool,
+) -> tuple[list[dict[str, Any]], int, Callable[[str, StudentData], dict[str, Any]]]:
+    """Load the tasks and the grades config of the course once
 
-    Set include_admin_data=True to include per-student repo URLs, comments, and full names (for admins-only views).
-    Set is_program_manager=True to include student full names (for program managers).
+    :return: tasks of the table, max score and a function building the row of one student
     """
-
-    course_name = course.course_name
     storage_api = app.storage_api
-    scores_and_names = storage_api.get_all_scores_with_names(course_name)
-    grades_config = storage_api.get_grades(course_name)
+    grades_config = storage_api.get_grades(course.course_name)
 
     all_tasks = []
     large_tasks = []
     max_score: int = 0
-    for group in storage_api.get_groups(course_name, enabled=True, started=True):
+    for group in storage_api.get_groups(course.course_name, enabled=True, started=True):
         for task in group.tasks:
             if task.enabled:
                 all_tasks.append({"name": task.name, "score": 0, "group": group.name})
@@ -35,15 +36,8 @@ def get_database_table_data(
                 if task.is_large:
                     large_tasks.append((task.name, task.min_score))
 
-    table_data: dict[str, Any] = {"tasks": all_tasks, "students": []}
-
-    for username, (
-        student_scores_with_solved,
-        name,
-        final_grade,
-        final_grade_override,
-        comment,
-    ) in scores_and_names.items():
+    def build_row(username: str, student_data: StudentData) -> dict[str, Any]:
+        student_scores_with_solved, name, final_grade, final_grade_override, comment = student_data
         # student_scores_with_solved = {task_name: (score, is_solved)}
         student_scores = {task_name: score for task_name, (score, _) in student_scores_with_solved.items()}
         total_score = sum(student_scores.values())
@@ -88,8 +82,192 @@ def get_database_table_data(
 
         row["grade"] = effective_grade
         row["grade_is_override"] = grade_is_override
+        return row
+
+    return all_tasks, max_score, build_row
+
 
-        table_data["students"].append(row)
+def get_database_table_data(
+    app: CustomFlask,
+    course: Course,
+    include_admin_data: bool = False,
+    is_program_manager: bool = False,
+) -> dict[str, Any]:
+    """Get the database table data structure used by both web and API endpoints.
+
+    Set include_admin_data=True to include per-student repo URLs, comments, and full names (for admins-only views).
+    Set is_program_manager=True to include student full names (for program managers).
+    """
+
+    scores_and_names = app.storage_api.get_all_scores_with_names(course.course_name)
+    all_tasks, max_score, build_row = _student_row_builder(app, course, include_admin_data, is_program_manager)
+
+    table_data: dict[str, Any] = {"tasks": all_tasks, "students": []}
+
+    for username, student_data in scores_and_names.items():
+        table_data["students"].append(build_row(username, student_data))
         table_data["max_score"] = max_score
 
     return table_data
+
+
+def get_database_table_rows(
+    app: CustomFlask,
+    course: Course,
+    usernames: list[str],
+    include_admin_data: bool = False,
+) -> list[dict[str, Any]]:
+    """Rows of the database table for the given students only, e.g. to refresh them after an edit
+
+    :return: rows of the students enrolled on the course, ordered by username
+    """
+    scores_and_names = app.storage_api.get_students_scores_with_names(course.course_name, usernames)
+    _, _, build_row = _student_row_builder(app, course, include_admin_data, False)
+    return [build_row(username, student_data) for username, student_data in scores_and_names.items()]
+
+
+def _table_sort_key(field: str, hidden_fields: set[str]) -> str:
+    """Map a column field of the database table to the sort key of get_scores_with_names_page
+
+    :raises ValueError: the column cannot be sorted by the database or is hidden from the user
+    """
+    if field.startswith("scores."):
+        return TASK_SORT_PREFIX + field.removeprefix("scores.")
+    if field == "percent":
+        return "total_score"
+    if field not in STUDENT_SORT_KEYS or field in hidden_fields:
+        raise ValueError(f"Cannot sort by {field}")
+    return field
+
+
+def get_database_table_page(
+    app: CustomFlask,
+    course: Course,
+    page: int,
+    size: int,
+    sort: tuple[str, bool] = ("username", False),
+    search: str | None = None,
+    include_admin_data: bool = False,
+) -> dict[str, Any]:
+    """One page of the database table, sorted and filtered by the database
+
+    :param page: 1-based page number
+    :param size: students per page
+    :param sort: column field to sort by and whether the order is descending
+    :param search: text to look for in usernames, and in names when the user can see them
+    :return: get_database_table_data structure with only the students of the page,
+        ``last_page`` and ``last_row`` (number of matching students)
+    :raises ValueError: the column cannot be sorted by
+    """
+    field, descending = sort
+    hidden_fields = set() if include_admin_data else {"first_name", "last_name", "comment"}
+    order_by = _table_sort_key(field, hidden_fields)
+
+    total, scores_and_names = app.storage_api.get_scores_with_names_page(
+        course.course_name,
+        offset=(page - 1) * size,
+        limit=size,
+        order_by=order_by,
+        descending=descending,
+        search=search,
+        search_names=include_admin_data,
+    )
+    all_tasks, max_score, build_row = _student_row_builder(app, course, include_admin_data, False)
+
+    return {
+        "tasks": all_tasks,
+        "students": [build_row(username, student_data) for username, student_data in scores_and_names.items()],
+        "max_score": max_score,
+        "last_page": max(1, math.ceil(total / size)),
+        "last_row": total,
+    }
+
+
+def page_database_table(
+    table_data: dict[str, Any],
+    page: int,
+    size: int,
+    sort: tuple[str, bool] = ("username", False),
+    search: str | None = None,
+    include_admin_data: bool = False,
+) -> dict[str, Any]:
+    """get_database_table_page of a table already in memory, e.g. the snapshot of an archived course
+
+    Students are sorted and filtered like get_scores_with_names_page does it in the database.
+
+    :param table_data: get_database_table_data structure with the rows of all students
+    :return: get_database_table_page structure
+    :raises ValueError: the column cannot be sorted by
+    """
+    field, descending = sort
+    hidden_fields = set() if include_admin_data else {"first_name", "last_name", "comment"}
+    order_by = _table_sort_key(field, hidden_fields)
+
+    def sort_key(row: dict[str, Any]) -> Any:
+        if order_by.startswith(TASK_SORT_PREFIX):
+            return row["scores"].get(order_by.removeprefix(TASK_SORT_PREFIX), 0)
+        if order_by in ("first_name", "last_name", "comment"):
+            return row.get(order_by) or ""
+        return row[order_by]
+
+    rows = table_data["students"]
+    if search:
+        term = normalize_for_search(search)
+        rows = [
+            row
+            for row in rows
+            if term in normalize_for_search(row["username"])
+            or (
+                include_admin_data
+                and term
+                in normalize_for_search(f"{row.get('first_name')} {row.get('last_name')} {row.get('first_name')}")
+            )
+        ]
+    # equal keys stay ordered by username, the sort is stable in both directions
+    rows = sorted(sorted(rows, key=lambda row: row["username"]), key=sort_key, reverse=descending)
+    offset = (page - 1) * size
+
+    return {
+        "tasks": table_data["tasks"],
+        "students": rows[offset : offset + size],
+        "max_score": table_data["max_score"],
+        "last_page": max(1, math.ceil(len(rows) / size)),
+        "last_row": len(rows),
+    }
+
+
+def iter_database_table_rows(
+    app: CustomFlask,
+    course: Course,
+    include_admin_data: bool = False,
+    is_program_manager: bool = False,
+) -> tuple[list[dict[str, Any]], Iterator[dict[str, Any]]]:
+    """Same student rows as get_database_table_data, built one at a time while the scores are streamed
+
+    :return: tasks of the table and a lazy iterator of student rows ordered by username
+    """
+    all_tasks, _, build_row = _student_row_builder(app, course, include_admin_data, is_program_manager)
+    students = app.storage_api.iter_scores_with_names(course.course_name)
+    return all_tasks, (build_row(student[0], student[1:]) for student in students)
+
+
+def to_columnar_table(table_data: dict[str, Any]) -> dict[str, Any]:
+    """Convert the database table to the columnar wire format
+
+    Rows repeat every task name as a key of ``scores``, the columnar format names each field once:
+    ``students`` maps every row field except ``scores`` to a list of values, one per student, and
+    ``scores`` is a list with one list per student, aligned with ``tasks`` (``None`` for no score).
+    Scores of tasks outside of ``tasks`` are dropped, they are already counted in ``total_score``.
+
+    :param table_data: get_database_table_data or get_database_table_page structure
+    :return: the same structure with ``format`` set to ``columnar``
+    """
+    rows = table_data["students"]
+    task_names = [task["name"] for task in table_data["tasks"]]
+    fields = [field for field in rows[0] if field != "scores"] if rows else []
+
+    columnar = {key: value for key, value in table_data.items() if key != "students"}
+    columnar["format"] = "columnar"
+    columnar["students"] = {field: [row[field] for row in rows] for field in fields}
+    columnar["scores"] = [list(map(row["scores"].get, task_names)) for row in rows]
+    return columnar
@@ -0,0 +1,142 @@
+"""Per-request SQL statistics collected from SQLAlchemy engine events.
+
+Statistics are accumulated into every active :class:`QueryStats` collector of the
+current context: the Flask request opens one in ``before_request`` and tests may
+open more with :func:`collect_query_stats` to assert query budgets.
+"""
+
+import json
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+from flask import Flask, Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+DB_TIME_HEADER = "X-DB-Time-Ms"
+SESSIONS_OPENED_HEADER = "X-DB-Sessions-Opened"
+
+_QUERY_START_KEY = "manytask_query_start"
+
+
+@dataclass
+class QueryStats:
+    query_count: int = 0
+    db_time: float = 0.0  # seconds
+    sessions_opened: int = 0
+
+    @property
+    def db_time_ms(self) -> float:
+        return round(self.db_time * 1000, 3)
+
+
+_active_stats: ContextVar[tuple[QueryStats, ...]] = ContextVar("manytask_query_stats", default=())
+
+
+def _start_collecting() -> QueryStats:
+    stats = QueryStats()
+    _active_stats.set((*_active_stats.get(), stats))
+    return stats
+
+
+def _stop_collecting(stats: QueryStats) -> None:
+    _active_stats.set(tuple(active for active in _active_stats.get() if active is not stats))
+
+
+@contextmanager
+def collect_query_stats() -> Iterator[QueryStats]:
+    """Collect statistics of all queries issued inside the block, nested requests included"""
+    stats = _start_collecting()
+    try:
+        yield stats
+    finally:
+        _stop_collecting(stats)
+
+
+def instrument_engine(engine: Engine, slow_query_threshold_ms: float | None = None) -> None:
+    """Attach statistics and slow query listeners to the engine
+
+    :param engine: SQLAlchemy engine
+    :param slow_query_threshold_ms: log queries running at least this long, ``None`` disables the log
+    """
+
+    @event.listens_for(engine, "before_cursor_execute", named=True)
+    def before_cursor_execute(**kw: Any) -> None:
+        kw["conn"].info.setdefault(_QUERY_START_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute", named=True)
+    def after_cursor_execute(**kw: Any) -> None:
+        elapsed = time.perf_counter() - kw["conn"].info[_QUERY_START_KEY].pop()
+        for stats in _active_stats.get():
+            stats.query_count += 1
+            stats.db_time += elapsed
+
+        if slow_query_threshold_ms is not None and elapsed * 1000 >= slow_query_threshold_ms:
+            logger.warning(
+                "Slow query: %s",
+                json.dumps(
+                    {
+                        "duration_ms": round(elapsed * 1000, 3),
+                        "threshold_ms": slow_query_threshold_ms,
+                        "statement": " ".join(kw["statement"].split()),
+                        "executemany": kw["executemany"],
+                        "endpoint": request.endpoint if has_request_context() else None,
+                    }
+                ),
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context: Any) -> None:
+        connection = exception_context.connection
+        if connection is not None and connection.info.get(_QUERY_START_KEY):
+            connection.info[_QUERY_START_KEY].pop()
+
+
+def count_sessions(session_factory: Callable[[], Session]) -> Callable[[], Session]:
+    """Wrap a session factory so opened sessions are counted in the active statistics"""
+
+    def create_session() -> Session:
+        for stats in _active_stats.get():
+            stats.sessions_opened += 1
+        return session_factory()
+
+    return create_session
+
+
+def init_app(app: Flask) -> None:
+    """Collect statistics for every request; in debug mode expose them as response headers"""
+
+    @app.before_request
+    def start_query_stats() -> None:
+        g.query_stats = _start_collecting()
+
+    @app.after_request
+    def add_query_stats_headers(response: Response) -> Response:
+        stats: QueryStats | None = g.get("query_stats")
+        if stats is not None:
+            logger.debug(
+                "Endpoint %s: queries=%d, db_time_ms=%s, sessions=%d",
+                request.endpoint,
+                stats.query_count,
+                stats.db_time_ms,
+                stats.sessions_opened,
+            )
+            if app.debug:
+                response.headers[QUERY_COUNT_HEADER] = str(stats.query_count)
+                response.headers[DB_TIME_HEADER] = str(stats.db_time_ms)
+                response.headers[SESSIONS_OPENED_HEADER] = str(stats.sessions_opened)
+        return response
+
+    @app.teardown_request
+    def stop_query_stats(_exc: BaseException | None) -> None:
+        stats: QueryStats | None = g.pop("query_stats", None)
+        if stats is not None:
+            _stop_collecting(stats)
@@ -0,0 +1,53 @@
+"""CSV and JSON Lines rendering of the course score table, one student row at a time"""
+
+import csv
+import io
+import json
+from typing import Any, Iterable, Iterator
+
+_SUMMARY_COLUMNS = ["total_score", "percent", "large_count", "grade", "grade_is_override"]
+
+
+def iter_csv(
+    tasks: list[dict[str, Any]],
+    rows: Iterable[dict[str, Any]],
+    include_names: bool = False,
+    include_admin_data: bool = False,
+) -> Iterator[str]:
+    """Render the header and then every student row as a CSV line
+
+    :param tasks: tasks of the table, one score column per task
+    :param rows: student rows as built by get_database_table_data
+    :param include_names: add first_name and last_name columns
+    :param include_admin_data: add comment and repo_url columns
+    """
+    task_names = [task["name"] for task in tasks]
+    name_columns = ["first_name", "last_name"] if include_names or include_admin_data else []
+    admin_columns = ["comment", "repo_url"] if include_admin_data else []
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def render(values: list[Any]) -> str:
+        buffer.seek(0)
+        buffer.truncate(0)
+        writer.writerow(values)
+        return buffer.getvalue()
+
+    yield render(["username", *name_columns, *task_names, *_SUMMARY_COLUMNS, *admin_columns])
+    for row in rows:
+        yield render(
+            [
+                row["username"],
+                *(row[column] for column in name_columns),
+                *(row["scores"].get(task_name, 0) for task_name in task_names),
+                *(row[column] for column in _SUMMARY_COLUMNS),
+                *(row[column] for column in admin_columns),
+            ]
+        )
+
+
+def iter_jsonl(rows: Iterable[dict[str, Any]]) -> Iterator[str]:
+    """Render every student row as a JSON object on its own line"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False) + "\n"
@@ -1,12 +1,39 @@
-from flask import session, url_for
+from flask import request, session, url_for
 
+from manytask.abstract import AuthContext
 from manytask.course import CourseStatus
 from manytask.main import CustomFlask
 
+AUTH_CONTEXT_ENVIRON_KEY = "manytask.auth_context"
+
+
+def get_auth_context(app: CustomFlask, username: str) -> AuthContext:
+    """Get the authorization context of the user for the current request.
+
+    The context is loaded with a single storage call on first use and kept in the
+    WSGI environ of the request, so all decorators and template helpers of the
+    request share it and it never outlives the request.
+
+    :param app: Flask application instance
+    :param username: manytask username
+    :return: AuthContext of the user
+    """
+    auth_context: AuthContext | None = request.environ.get(AUTH_CONTEXT_ENVIRON_KEY)
+    if auth_context is None or auth_context.username != username:
+        auth_context = app.storage_api.get_auth_context(username)
+        request.environ[AUTH_CONTEXT_ENVIRON_KEY] = auth_context
+    return auth_context
+
+
+def reset_auth_context() -> None:
+    """Drop the cached authorization context after the request changed memberships or roles"""
+    request.environ.pop(AUTH_CONTEXT_ENVIRON_KEY, None)
+
 
 def get_courses(app: CustomFlask) -> list[dict[str, str | bool]]:
     username = "guest" if app.debug else session["manytask"]["username"]
-    if app.debug or app.storage_api.check_if_instance_admin(username):
+    is_instance_admin = app.debug or get_auth_context(app, username).instance_admin
+    if is_instance_admin:
         courses_names = app.storage_api.get_all_courses_names_with_statuses()
         """
         Keeping the logic below for now, but this should be changed since namespace admin should see:
@@ -14,7 +41,7 @@ def get_courses(app: CustomFlask) -> list[dict[str, str | bool]]:
         - Courses they are registered to (not necessarily from their owned namespaces)
         """
     elif check_if_user_has_namespaces_to_admin(app):
-        namespace_admin_namespaces = app.storage_api.get_namespace_admin_namespaces(username)
+        namespace_admin_namespaces = get_auth_context(app, username).namespace_admin_namespaces
         namespace_courses = app.storage_api.get_courses_by_namespace_ids(namespace_admin_namespaces)
         course_admin_courses = app.storage_api.get_courses_where_course_admin(username)
 
@@ -27,8 +54,6 @@ def get_courses(app: CustomFlask) -> list[dict[str, str | bool]]:
     else:
         courses_names = app.storage_api.get_user_courses_names_with_statuses(username)
 
-    is_instance_admin = app.debug or app.storage_api.check_if_instance_admin(username)
-
     courses_list = []
     for course_name, status in courses_names:
         course_obj = app.storage_api.get_course(course_name)
@@ -106,7 +131,7 @@ def check_if_current_user_is_instance_admin(app: CustomFlask) -> bool:
         return True
     else:
         username = session["manytask"]["username"]
-        return app.storage_api.check_if_instance_admin(username)
+        return get_auth_context(app, username).instance_admin
 
 
 def check_if_current_user_is_namespace_admin(app: CustomFlask, course_name: str) -> bool:
@@ -121,12 +146,7 @@ def check_if_current_user_is_namespace_admin(app: CustomFlask, course_name: str)
         return True
     else:
         username = session["manytask"]["username"]
-        course = app.storage_api.get_course(course_name)
-        if course and course.namespace_id:
-            namespace_admin_namespaces = app.storage_api.get_namespace_admin_namespaces(username)
-            if course.namespace_id in namespace_admin_namespaces:
-                return True
-        return False
+        return get_auth_context(app, username).is_namespace_admin(course_name)
 
 
 def check_if_user_has_namespaces_to_admin(app: CustomFlask) -> bool:
@@ -141,8 +161,8 @@ def check_if_user_has_namespaces_to_admin(app: CustomFlask) -> bool:
         return True
     else:
         username = session["manytask"]["username"]
-        namespace_admin_namespaces = app.storage_api.get_namespace_admin_namespaces(username)
-        return len(namespace_admin_namespaces) > 0 or app.storage_api.check_if_instance_admin(username)
+        auth_context = get_auth_context(app, username)
+        return len(auth_context.namespace_admin_namespaces) > 0 or auth_context.instance_admin
 
 
 def get_user_roles(app: CustomFlask, username: str, course_name: str | None = None) -> list[str]:
@@ -160,18 +180,19 @@ def get_user_roles(app: CustomFlask, username: str, course_name: str | None = No
     :return: List of role strings
     """
     roles = []
+    auth_context = get_auth_context(app, username)
 
-    if app.storage_api.check_if_instance_admin(username):
+    if auth_context.instance_admin:
         roles.append("instance_admin")
 
     if course_name:
-        if check_if_current_user_is_namespace_admin(app, course_name=course_name):
+        if (
+            app.debug
+            or auth_context.is_namespace_admin(course_name)
+            or auth_context.course_roles.get(course_name, False)
+        ):
             roles.append("namespace_admin")
 
-        if app.storage_api.check_if_course_admin(course_name, username):
-            if "namespace_admin" not in roles:
-                roles.append("namespace_admin")
-
         roles.append("student")
 
     return roles
@@ -205,20 +226,12 @@ def can_access_course(app: CustomFlask, username: str, course_name: str) -> bool
     :param course_name: Course name to check access for
     :return: True if user can access the course
     """
-    if app.storage_api.check_if_instance_admin(username):
-        return True
+    auth_context = get_auth_context(app, username)
 
-    if app.storage_api.check_if_course_admin(course_name, username):
+    if auth_context.is_course_admin(course_name):
         return True
 
-    if check_if_current_user_is_namespace_admin(app, course_name=course_name):
-        course = app.storage_api.get_course(course_name)
-        if course and course.namespace_id:
-            namespace_admin_namespaces = app.storage_api.get_namespace_admin_namespaces(username)
-            if course.namespace_id in namespace_admin_namespaces:
-                return True
-
-    if app.storage_api.check_user_on_course(course_name, username):
+    if auth_context.is_enrolled(course_name):
         return True
 
     return True
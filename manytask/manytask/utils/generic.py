@@ -21,6 +21,23 @@ def calculate_percent(total_score: float, max_score: float) -> float:
     return round(total_score * 100.0 / max_score, 1)
 
 
+# keep in sync with static/js/search-normalize.js
+_CYRILLIC_TO_LATIN = str.maketrans(
+    {
+        **dict(zip("абвгдеёзийклмнопрстуфхцыэ", "abvgdeeziiklmnoprstufhcye")),
+        **{"ж": "zh", "ч": "ch", "ш": "sh", "щ": "sch", "ъ": "", "ь": "", "ю": "yu", "я": "ya"},
+        **{"ї": "i", "і": "i", "є": "e", "ґ": "g", "ў": "u"},
+    }
+)
+
+
+def normalize_for_search(text: str | None) -> str:
+    """Lower-case and transliterate to Latin, so that "Ivan" and "Иван" match each other."""
+    if not text:
+        return ""
+    return text.lower().translate(_CYRILLIC_TO_LATIN)
+
+
 def sanitize_log_data(data: str | None) -> str | None:
     """Sanitize form data."""
     if data is None:
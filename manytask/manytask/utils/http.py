@@ -0,0 +1,158 @@
+"""Outbound HTTP clients of the RMS and auth backends
+
+GitLab, SourceCraft and Yandex ID are called from every request thread and the background jobs.
+Each backend keeps one client per app process: connections to the host are reused instead of a
+TCP and TLS handshake per call, and at most ``pool_size`` requests to a host run at once, the rest
+wait for a free connection. Every request has connect and read timeouts, idempotent requests and
+requests that never reached the server are retried a few times with a jittered exponential delay.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+# answers of an overloaded or restarting server, worth another attempt
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+
+
+@dataclass
+class HttpConfig:
+    """Settings of the outbound HTTP clients
+
+    :param pool_size: kept-alive connections per host, also the limit of concurrent requests to it
+    :param connect_timeout: seconds to establish a connection
+    :param read_timeout: seconds to wait for the server between bytes of the answer
+    :param retries: additional attempts of a failed request
+    :param retry_backoff: seconds before the first retry, doubled on every attempt, plus as much jitter
+    :param retry_backoff_max: upper bound of the delay between attempts
+    """
+
+    pool_size: int = 12
+    connect_timeout: float = 5.0
+    read_timeout: float = 30.0
+    retries: int = 3
+    retry_backoff: float = 0.5
+    retry_backoff_max: float = 10.0
+
+    @classmethod
+    def from_env(cls) -> HttpConfig:
+        # every gunicorn thread and provisioning worker may call the RMS at the same time
+        default_pool_size = int(os.environ.get("GUNICORN_THREADS", "4")) + int(
+            os.environ.get("REPO_PROVISIONING_WORKERS", "8")
+        )
+        return cls(
+            pool_size=int(os.environ.get("HTTP_POOL_SIZE", default_pool_size)),
+            connect_timeout=float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.environ.get("HTTP_READ_TIMEOUT", "30")),
+            retries=int(os.environ.get("HTTP_RETRIES", "3")),
+            retry_backoff=float(os.environ.get("HTTP_RETRY_BACKOFF", "0.5")),
+        )
+
+    def retry_delay(self, attempt: int) -> float:
+        """Seconds to wait before the retry number attempt (from 0)"""
+        delay = self.retry_backoff * 2**attempt + random.uniform(0, self.retry_backoff)
+        return min(delay, self.retry_backoff_max)
+
+
+class _Session(requests.Session):
+    """requests.Session with default timeouts, requests.get and python-gitlab pass none"""
+
+    def __init__(self, timeout: tuple[float, float]):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args: Any, **kwargs: Any) -> requests.Response:
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().request(*args, **kwargs)
+
+
+def make_session(config: HttpConfig) -> requests.Session:
+    """Keep-alive requests session for the backends built on requests
+
+    :param config: pool, timeout and retry settings
+    :return: session to share between the threads of the process
+    """
+    session = _Session((config.connect_timeout, config.read_timeout))
+    retry = Retry(
+        total=config.retries,
+        # only idempotent requests are repeated once the server may have received them
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        status_forcelist=RETRY_STATUSES,
+        backoff_factor=config.retry_backoff,
+        backoff_jitter=config.retry_backoff,
+        backoff_max=config.retry_backoff_max,
+        # the last answer is returned to the caller, python-gitlab turns it into its own error
+        raise_on_status=False,
+    )
+    # a blocking pool makes pool_size the limit of concurrent requests to a host
+    adapter = HTTPAdapter(pool_maxsize=config.pool_size, pool_block=True, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class RetryTransport(httpx.BaseTransport):
+    """httpx transport retrying like the requests sessions do, httpx itself only retries connecting"""
+
+    def __init__(self, transport: httpx.BaseTransport, config: HttpConfig):
+        self._transport = transport
+        self._config = config
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        idempotent = request.method in Retry.DEFAULT_ALLOWED_METHODS
+        attempt = 0
+        while True:
+            last_attempt = attempt == self._config.retries
+            try:
+                response = self._transport.handle_request(request)
+            except httpx.PoolTimeout:
+                # all connections to the host are busy, another attempt would only wait longer
+                raise
+            except (httpx.ConnectError, httpx.ConnectTimeout):
+                # the request was not sent
+                if last_attempt:
+                    raise
+            except httpx.TransportError:
+                if last_attempt or not idempotent:
+                    raise
+            else:
+                if last_attempt or not idempotent or response.status_code not in RETRY_STATUSES:
+                    return response
+                # a read answer returns its connection to the pool
+                response.read()
+                response.close()
+            delay = self._config.retry_delay(attempt)
+            logger.info("Retrying %s %s in %.2fs, attempt %d", request.method, request.url, delay, attempt + 1)
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+def make_httpx_client(config: HttpConfig, base_url: str = "", verify: bool | str = True) -> httpx.Client:
+    """Keep-alive httpx client for the backends built on httpx
+
+    :param config: pool, timeout and retry settings
+    :param base_url: url the request paths are relative to
+    :param verify: check the server certificate, or a CA bundle path
+    :return: client to share between the threads of the process
+    """
+    limits = httpx.Limits(max_connections=config.pool_size, max_keepalive_connections=config.pool_size)
+    transport = RetryTransport(httpx.HTTPTransport(verify=verify, limits=limits), config)
+    # a request waits for a free connection as long as for the server
+    timeout = httpx.Timeout(config.read_timeout, connect=config.connect_timeout)
+    return httpx.Client(base_url=base_url, timeout=timeout, transport=transport)
@@ -0,0 +1,49 @@
+"""Flask JSON provider encoding with the Rust serializer of pydantic-core
+
+The score tables are the largest responses of the app: encoding a table of thousands of students with
+the standard json module takes most of the request time. pydantic-core is already installed with
+pydantic and encodes plain dicts and lists several times faster.
+"""
+
+from typing import Any
+
+import pydantic_core
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.sansio.response import Response
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """DefaultJSONProvider with pydantic-core encoding and decoding
+
+    Keys are kept in insertion order and non-ASCII characters are written as UTF-8.
+    Dates are rendered in ISO 8601. Types pydantic-core does not know go through
+    DefaultJSONProvider.default. Calls with json.dumps/json.loads arguments use the
+    json module.
+    """
+
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if kwargs or self.sort_keys:
+            return super().dumps(obj, **kwargs)
+        return self._encode(obj).decode()
+
+    def loads(self, s: str | bytes, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return pydantic_core.from_json(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        if self.sort_keys:
+            return super().response(obj)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        # the app is typed as the sansio app, its response class takes the body like flask.Response does
+        return self._app.response_class(self._encode(obj, indent) + b"\n", mimetype=self.mimetype)  # type: ignore[arg-type]
+
+    def _encode(self, obj: Any, indent: int | None = None) -> bytes:
+        try:
+            return pydantic_core.to_json(obj, indent=indent, fallback=self.default)
+        except pydantic_core.PydanticSerializationError as e:
+            # the json module raises TypeError for objects it cannot serialize
+            raise TypeError(str(e)) from e
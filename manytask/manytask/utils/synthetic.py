@@ -0,0 +1,284 @@
+"""Synthetic courses for benchmarks and local load testing
+
+Generates namespaces, courses with their deadlines and grades config, students and a dense or
+sparse grade matrix in the database of a DataBaseApi. Courses are created and configured through
+the DataBaseApi like ``POST /api/admin/courses`` and ``/update_config`` do, the students and the
+grades are bulk inserted. The same config and seed generate the same scores.
+
+Fill a local database, the migrations are applied first::
+
+    python -m manytask.utils.synthetic --database-url postgresql://... --courses 2 --students 1000 \\
+        --groups 12 --tasks 8 --density 0.6
+"""
+
+import argparse
+import logging
+import random
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from manytask.config import ManytaskConfig
+from manytask.course import CourseConfig
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.models import Course, Grade, Namespace, Task, TaskGroup, User, UserOnCourse
+
+logger = logging.getLogger(__name__)
+
+TASK_SCORE = 10
+# share of the graded tasks solved with the full score, the others get a partial one
+SOLVED_SHARE = 0.7
+INSERT_BATCH_SIZE = 5000
+
+
+@dataclass
+class SyntheticConfig:
+    """Shape of the generated data
+
+    :param namespaces: namespaces the courses are spread over, 0 for courses without a namespace
+    :param courses: number of courses
+    :param groups: task groups of every course, a week apart, all of them started
+    :param tasks: tasks of every group
+    :param students: students of every course
+    :param density: share of the student and task pairs with a grade, 1 for a dense matrix
+    :param seed: seed of the scores
+    :param prefix: prefix of the names of the namespaces, courses and users
+    """
+
+    namespaces: int = 1
+    courses: int = 1
+    groups: int = 10
+    tasks: int = 10
+    students: int = 100
+    density: float = 1.0
+    seed: int = 0
+    prefix: str = "synthetic"
+
+
+@dataclass
+class SyntheticCourse:
+    """A generated course
+
+    :param name: course name
+    :param token: course token for the API
+    :param config: config the course was updated with, update_course accepts it again
+    :param tasks: names of the generated tasks in the order of the config
+    :param students: usernames of the students
+    """
+
+    name: str
+    token: str
+    config: ManytaskConfig
+    tasks: list[str] = field(default_factory=list)
+    students: list[str] = field(default_factory=list)
+
+
+def course_config(config: SyntheticConfig, now: datetime) -> ManytaskConfig:
+    """Config of a course with config.groups groups of config.tasks tasks, the last group starts now"""
+    schedule = []
+    for group_index in range(config.groups):
+        start = now - timedelta(weeks=config.groups - 1 - group_index)
+        schedule.append(
+            {
+                "group": f"group_{group_index}",
+                "start": start,
+                "end": start + timedelta(weeks=2),
+                "tasks": [
+                    {"task": f"task_{group_index}_{task_index}", "score": TASK_SCORE, "is_large": task_index == 0}
+                    for task_index in range(config.tasks)
+                ],
+            }
+        )
+
+    return ManytaskConfig.model_validate(
+        {
+            "version": 1,
+            "status": "in_progress",
+            "ui": {"task_url_template": "https://gitlab.example.com/$USER_NAME/$TASK_NAME", "links": {}},
+            "deadlines": {"timezone": "UTC", "deadlines": "hard", "schedule": schedule},
+            "grades": {
+                "grades": {
+                    5: [{"percent": 90}],
+                    4: [{"percent": 75}],
+                    3: [{"percent": 60}],
+                    2: [{"": 0}],
+                }
+            },
+        }
+    )
+
+
+def _insert_batches(session: Session, model: type[Any], rows: list[dict[str, Any]]) -> list[int]:
+    """Bulk insert rows and return their ids in the order of rows"""
+    ids: list[int] = []
+    for offset in range(0, len(rows), INSERT_BATCH_SIZE):
+        statement = insert(model).returning(model.id, sort_by_parameter_order=True)
+        ids.extend(session.scalars(statement, rows[offset : offset + INSERT_BATCH_SIZE]))
+    return ids
+
+
+def _create_namespaces(db_api: DataBaseApi, config: SyntheticConfig) -> list[int | None]:
+    if config.namespaces == 0:
+        return [None]
+
+    with Session(db_api.engine) as session:
+        created_by_id = session.scalar(select(func.min(User.id)))
+        last_group_id = session.scalar(select(func.max(Namespace.gitlab_group_id))) or 0
+        rows = [
+            {
+                "name": f"{config.prefix} namespace {index}",
+                "slug": f"{config.prefix}-namespace-{index}",
+                "gitlab_group_id": last_group_id + 1 + index,
+                "created_by_id": created_by_id,
+            }
+            for index in range(config.namespaces)
+        ]
+        namespace_ids: list[int | None] = list(_insert_batches(session, Namespace, rows))
+        session.commit()
+    return namespace_ids
+
+
+def _create_course(
+    db_api: DataBaseApi, config: SyntheticConfig, name: str, namespace_id: int | None, now: datetime
+) -> SyntheticCourse:
+    manytask_config = course_config(config, now)
+    db_api.create_course(
+        CourseConfig(
+            course_name=name,
+            namespace_id=namespace_id,
+            gitlab_course_group=name,
+            gitlab_course_public_repo=f"{name}/public",
+            gitlab_course_students_group=f"{name}/students",
+            gitlab_default_branch="main",
+            registration_secret=f"{name}-secret",
+            token=f"{name}-token",
+            show_allscores=True,
+        )
+    )
+    db_api.update_course(name, manytask_config)
+    # the config adds a disabled bonus group of its own
+    tasks = [task.name for group in manytask_config.deadlines.groups if group.enabled for task in group.tasks]
+    return SyntheticCourse(name=name, token=f"{name}-token", config=manytask_config, tasks=tasks)
+
+
+def _fill_course(db_api: DataBaseApi, config: SyntheticConfig, course: SyntheticCourse, rng: random.Random) -> None:
+    """Enroll config.students new students and grade them"""
+    with Session(db_api.engine) as session:
+        course_id = session.scalar(select(Course.id).where(Course.name == course.name))
+        first_auth_id = (session.scalar(select(func.max(User.auth_id))) or 0) + 1
+        course.students = [f"{course.name}_student_{index}" for index in range(config.students)]
+        user_ids = _insert_batches(
+            session,
+            User,
+            [
+                {
+                    "username": username,
+                    "first_name": f"First{index}",
+                    "last_name": f"Last{index}",
+                    "rms_id": f"{config.prefix}-{first_auth_id + index}",
+                    "auth_id": first_auth_id + index,
+                }
+                for index, username in enumerate(course.students)
+            ],
+        )
+        user_on_course_ids = _insert_batches(
+            session,
+            UserOnCourse,
+            [{"user_id": user_id, "course_id": course_id, "is_course_admin": False} for user_id in user_ids],
+        )
+        task_ids: dict[str, int] = {
+            name: task_id
+            for name, task_id in session.execute(
+                select(Task.name, Task.id).join(TaskGroup).where(TaskGroup.course_id == course_id)
+            )
+        }
+
+        grades = []
+        for user_on_course_id in user_on_course_ids:
+            for task_name in course.tasks:
+                if rng.random() >= config.density:
+                    continue
+                solved = rng.random() < SOLVED_SHARE
+                grades.append(
+                    {
+                        "course_id": course_id,
+                        "user_on_course_id": user_on_course_id,
+                        "task_id": task_ids[task_name],
+                        "score": TASK_SCORE if solved else rng.randint(0, TASK_SCORE - 1),
+                        "is_solved": solved,
+                    }
+                )
+        for offset in range(0, len(grades), INSERT_BATCH_SIZE):
+            session.execute(insert(Grade), grades[offset : offset + INSERT_BATCH_SIZE])
+        session.commit()
+
+    db_api.recalculate_all_grades(course.name)
+    logger.info("Generated %d students and %d grades in course %s", len(course.students), len(grades), course.name)
+
+
+def generate(db_api: DataBaseApi, config: SyntheticConfig) -> list[SyntheticCourse]:
+    """Generate the namespaces, the courses, their students and grades
+
+    :param db_api: database to fill, the courses must not exist yet
+    :param config: shape of the data
+    :return: the generated courses
+    """
+    rng = random.Random(config.seed)
+    # the deadlines of a config are local times of the course timezone
+    now = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    namespace_ids = _create_namespaces(db_api, config)
+
+    courses = []
+    for index in range(config.courses):
+        course = _create_course(
+            db_api, config, f"{config.prefix}_course_{index}", namespace_ids[index % len(namespace_ids)], now
+        )
+        _fill_course(db_api, config, course, rng)
+        courses.append(course)
+    return courses
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Fill a database with synthetic courses, students and grades")
+    parser.add_argument("--database-url", required=True, help="SQLAlchemy URL of the database")
+    parser.add_argument("--no-migrations", action="store_true", help="do not apply the migrations first")
+    defaults = SyntheticConfig()
+    parser.add_argument("--namespaces", type=int, default=defaults.namespaces)
+    parser.add_argument("--courses", type=int, default=defaults.courses)
+    parser.add_argument("--groups", type=int, default=defaults.groups, help="task groups of every course")
+    parser.add_argument("--tasks", type=int, default=defaults.tasks, help="tasks of every group")
+    parser.add_argument("--students", type=int, default=defaults.students, help="students of every course")
+    parser.add_argument(
+        "--density", type=float, default=defaults.density, help="share of the student and task pairs with a grade"
+    )
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--prefix", default=defaults.prefix, help="prefix of the generated names")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    db_api = DataBaseApi(
+        DatabaseConfig(
+            database_url=args.database_url,
+            instance_admin_username="admin",
+            apply_migrations=not args.no_migrations,
+        )
+    )
+    config = SyntheticConfig(
+        namespaces=args.namespaces,
+        courses=args.courses,
+        groups=args.groups,
+        tasks=args.tasks,
+        students=args.students,
+        density=args.density,
+        seed=args.seed,
+        prefix=args.prefix,
+    )
+    for course in generate(db_api, config):
+        print(f"{course.name}: {len(course.students)} students, {len(course.tasks)} tasks, token {course.token}")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ from wtforms import ValidationError
 
 from manytask.abstract import RmsApiException, RmsUser, StoredUser
 
+from . import archive
 from .abstract import ClientProfile
 from .auth import (
     handle_oauth_callback,
@@ -29,7 +30,10 @@ from .auth import (
     valid_rms_session,
 )
 from .course import Course, CourseConfig, CourseStatus, get_current_time
+from .events import get_broker
 from .main import CustomFlask
+from .metrics import generate_metrics
+from .rms_jobs import enqueue_course_creation
 from .utils.flask import can_edit_course, check_if_current_user_is_instance_admin, get_courses, has_role
 from .utils.generic import (
     check_course_creation_namespace_permission,
@@ -53,6 +57,12 @@ def healthcheck() -> ResponseReturnValue:
     return "OK", HTTPStatus.OK
 
 
+@root_bp.get("/metrics")
+def prometheus_metrics() -> ResponseReturnValue:
+    payload, content_type = generate_metrics()
+    return payload, HTTPStatus.OK, {"Content-Type": content_type}
+
+
 @root_bp.route("/", methods=["GET"])
 @requires_auth
 def index() -> ResponseReturnValue:
@@ -111,7 +121,8 @@ def logout() -> ResponseReturnValue:
 @requires_course_access
 def course_page(course_name: str) -> ResponseReturnValue:
     app: CustomFlask = current_app  # type: ignore
-    course: Course = app.storage_api.get_course(course_name)  # type: ignore
+    course: Course = archive.get_course(app, course_name)  # type: ignore
+    archived = archive.get_archived_course(app, course_name)
 
     courses = get_courses(app)
 
@@ -134,12 +145,21 @@ def course_page(course_name: str) -> ResponseReturnValue:
         username=student_username, course_students_group=course.gitlab_course_students_group
     )
 
-    tasks_scores = storage_api.get_scores(course.course_name, student_username)
-    tasks_stats = storage_api.get_stats(course.course_name)
+    if archived is not None:
+        tasks_scores, bonus_score = archived.snapshot.student_scores(student_username)
+        tasks_stats = archived.snapshot.stats
+        groups = archived.snapshot.groups
+        max_score_started = archived.snapshot.max_score_started
+    else:
+        tasks_scores = storage_api.get_scores(course.course_name, student_username)
+        bonus_score = storage_api.get_bonus_score(course.course_name, student_username)
+        tasks_stats = storage_api.get_stats(course.course_name)
+        groups = storage_api.get_groups(course.course_name, enabled=True, started=True)
+        max_score_started = storage_api.max_score_started(course.course_name)
     allscores_url = url_for("course.show_database", course_name=course_name)
 
     sourcecraft_accept_invite_required = False
-    if app.app_config.rms == "sourcecraft" and not app.debug:
+    if app.app_config.rms == "sourcecraft" and not app.debug and archived is None:
         sourcecraft_accept_invite_required = not app.rms_api.check_user_has_repo_access(
             rms_user_id=session["rms"]["rms_id"],
             project_name=student_username,
@@ -164,7 +184,9 @@ def course_page(course_name: str) -> ResponseReturnValue:
         else student_username,
         links=course.links,
         scores=tasks_scores,
-        bonus_score=storage_api.get_bonus_score(course.course_name, student_username),
+        bonus_score=bonus_score,
+        groups=groups,
+        max_score_started=max_score_started,
         now=get_current_time(),
         task_stats=tasks_stats,
         course_favicon=app.favicon,
@@ -343,6 +365,10 @@ def create_project(course_name: str) -> ResponseReturnValue:
     app: CustomFlask = current_app  # type: ignore
     course: Course = app.storage_api.get_course(course_name)  # type: ignore
 
+    if course.status == CourseStatus.ARCHIVED:
+        # an archived course takes no new students and repositories
+        return redirect(url_for("course.course_page", course_name=course_name))
+
     if request.method == "GET":
         return render_template(
             "create_project.html",
@@ -370,15 +396,27 @@ def create_project(course_name: str) -> ResponseReturnValue:
             base_url=app.rms_api.base_url,
         )
 
-    app.storage_api.sync_user_on_course(course.course_name, session["manytask"]["username"], is_course_admin)
+    username = session["manytask"]["username"]
+    app.storage_api.sync_user_on_course(course.course_name, username, is_course_admin)
 
-    # Create use if needed
-    try:
-        app.rms_api.create_project(rms_user, course.gitlab_course_students_group, course.gitlab_course_public_repo)
-        logger.info("Successfully created project for user %s in course %s", rms_user.username, course.course_name)
-    except gitlab.GitlabError as ex:
-        logger.error("Project creation failed: %s", ex.error_message)
-        return render_template(app.signup_template, error_message=ex.error_message, course_name=course.course_name)
+    repo_url = app.rms_api.get_url_for_repo(rms_user.username, course.gitlab_course_students_group)
+    stored_repo = app.storage_api.get_student_repo(course.course_name, username)
+    if stored_repo is not None and stored_repo.url == repo_url:
+        # provisioned in bulk before the student came
+        logger.info("Project of user %s in course %s already exists", rms_user.username, course.course_name)
+    else:
+        # Create use if needed
+        try:
+            repo_id = app.rms_api.create_project(
+                rms_user, course.gitlab_course_students_group, course.gitlab_course_public_repo
+            )
+            logger.info("Successfully created project for user %s in course %s", rms_user.username, course.course_name)
+        except gitlab.GitlabError as ex:
+            logger.error("Project creation failed: %s", ex.error_message)
+            return render_template(app.signup_template, error_message=ex.error_message, course_name=course.course_name)
+
+        # the course pages trust the stored repo instead of asking the RMS on every view
+        app.storage_api.store_student_repo(course.course_name, username, repo_url, repo_id)
 
     return redirect(url_for("course.course_page", course_name=course_name))
 
@@ -412,7 +450,8 @@ def not_ready(course_name: str) -> ResponseReturnValue:
 @requires_course_access
 def show_database(course_name: str) -> ResponseReturnValue:
     app: CustomFlask = current_app  # type: ignore
-    course: Course = app.storage_api.get_course(course_name)  # type: ignore
+    course: Course = archive.get_course(app, course_name)  # type: ignore
+    archived = archive.get_archived_course(app, course_name)
 
     courses = get_courses(app)
 
@@ -435,8 +474,13 @@ def show_database(course_name: str) -> ResponseReturnValue:
         username=student_username, course_students_group=course.gitlab_course_students_group
     )
 
-    scores = storage_api.get_scores(course.course_name, student_username)
-    bonus_score = storage_api.get_bonus_score(course.course_name, student_username)
+    if archived is not None:
+        scores, bonus_score = archived.snapshot.student_scores(student_username)
+        max_score_started = archived.snapshot.max_score_started
+    else:
+        scores = storage_api.get_scores(course.course_name, student_username)
+        bonus_score = storage_api.get_bonus_score(course.course_name, student_username)
+        max_score_started = storage_api.max_score_started(course.course_name)
 
     return render_template(
         "database.html",
@@ -444,6 +488,7 @@ def show_database(course_name: str) -> ResponseReturnValue:
         course_status=course.status,
         scores=scores,
         bonus_score=bonus_score,
+        max_score_started=max_score_started,
         username=student_username,
         is_course_admin=student_course_admin,
         app=app,
@@ -456,6 +501,7 @@ def show_database(course_name: str) -> ResponseReturnValue:
         manytask_version=app.manytask_version,
         courses=courses,
         has_role=has_role,
+        live_updates=get_broker(app) is not None and archived is None,
     )
 
 
@@ -522,35 +568,6 @@ def create_course() -> ResponseReturnValue:  # noqa: PLR0911
         # e.g., "hse4-namespace/hse4-this-is-hell-3/public-2025-fall" -> "hse4-namespace/hse4-this-is-hell-3"
         gitlab_course_group_full_path = "/".join(gitlab_course_public_repo.split("/")[:-1])
 
-        try:
-            logger.info(
-                "Creating GitLab course group: %s (full path: %s)", gitlab_course_group, gitlab_course_group_full_path
-            )
-            course_group_id = app.rms_api.create_course_group(
-                parent_group_id=namespace.gitlab_group_id if namespace else None,
-                course_name=course_name,
-                course_slug=gitlab_course_group.split("/")[-1] if "/" in gitlab_course_group else gitlab_course_group,
-            )
-            logger.info("Created course group with id=%s", course_group_id)
-
-            logger.info("Creating public repo: %s", gitlab_course_public_repo)
-            app.rms_api.create_public_repo(gitlab_course_group_full_path, gitlab_course_public_repo)
-            logger.info("Created public repo")
-
-            logger.info("Creating students group: %s", gitlab_course_students_group)
-            app.rms_api.create_students_group(gitlab_course_students_group, parent_group_id=course_group_id)
-            logger.info("Created students group")
-
-        except Exception as e:
-            logger.error("Failed to create GitLab resources: %s", str(e), exc_info=True)
-            return render_template(
-                app.create_course_template,
-                generated_token=generate_token_hex(24),
-                error_message=f"Failed to create GitLab resources: {str(e)}",
-                rms=app.app_config.rms,
-                labels=app.create_course_labels,
-            )
-
         settings = CourseConfig(
             course_name=course_name,
             namespace_id=None if namespace_id == 0 else namespace_id,
@@ -565,6 +582,14 @@ def create_course() -> ResponseReturnValue:  # noqa: PLR0911
 
         if app.storage_api.create_course(settings):
             logger.info("Successfully created new course: %s", settings.course_name)
+            # the GitLab groups and the public repo are created in the background
+            enqueue_course_creation(
+                app,
+                settings,
+                gitlab_course_group.split("/")[-1],
+                namespace.gitlab_group_id if namespace else None,
+                created_by=username,
+            )
             return redirect(url_for("course.course_page", course_name=settings.course_name))
 
         return render_template(
@@ -612,6 +637,19 @@ def _handle_course_admin_action(app: CustomFlask, course_name: str, grant_course
     )
 
 
+def _change_archived_status(app: CustomFlask, course: Course, status: CourseStatus) -> bool:
+    """Archive or unarchive the course if the status chosen on the edit page asks for it
+
+    :return: False if the course is to be archived but is not finished
+    """
+    if course.status == CourseStatus.ARCHIVED and status != CourseStatus.ARCHIVED:
+        archive.unarchive_course(app, course.course_name, status)
+    elif status == CourseStatus.ARCHIVED and course.status != CourseStatus.ARCHIVED:
+        edited_course: Course = app.storage_api.get_course(course.course_name)  # type: ignore
+        return archive.archive_course(app, edited_course)
+    return True
+
+
 @instance_admin_bp.route("/courses/<course_name>/edit", methods=["GET", "POST"])
 @requires_course_admin
 def edit_course(course_name: str) -> ResponseReturnValue:
@@ -634,6 +672,7 @@ def edit_course(course_name: str) -> ResponseReturnValue:
             _handle_course_admin_action(app, course_name, action == "grant_course_admin")
             return redirect(url_for("instance_admin.edit_course", course_name=course_name))
 
+        status = CourseStatus(request.form["course_status"])
         updated_settings = CourseConfig(
             course_name=course_name,
             namespace_id=course.namespace_id,
@@ -644,7 +683,8 @@ def edit_course(course_name: str) -> ResponseReturnValue:
             registration_secret=request.form["registration_secret"],
             token=course.token,
             show_allscores=request.form.get("show_allscores", "off") == "on",
-            status=CourseStatus(request.form["course_status"]),
+            # archiving and unarchiving change the status together with the snapshot
+            status=course.status if CourseStatus.ARCHIVED in (status, course.status) else status,
             task_url_template=course.task_url_template,
             links=course.links,
             deadlines_type=course.deadlines_type,
@@ -652,12 +692,16 @@ def edit_course(course_name: str) -> ResponseReturnValue:
 
         if app.storage_api.edit_course(updated_settings):
             logger.info("Successfully updated course settings for: %s", sanitize_log_data(course_name))
-            return redirect(url_for("course.course_page", course_name=course_name))
+            if _change_archived_status(app, course, status):
+                return redirect(url_for("course.course_page", course_name=course_name))
+            error_message = "Only finished courses can be archived"
+        else:
+            error_message = "Error while updating course"
 
         return render_template(
             "edit_course.html",
             course=updated_settings,
-            error_message="Error while updating course",
+            error_message=error_message,
             rms=app.app_config.rms,
         )
 
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import logging
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any
 
 import requests
@@ -11,6 +11,7 @@ from requests.exceptions import HTTPError
 
 from .abstract import AuthApi, AuthenticatedUser
 from .utils.generic import check_oauth_authenticated
+from .utils.http import HttpConfig, make_session
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +24,7 @@ class YandexIDApiException(Exception):
 class YandexIDConfig:
     dry_run: bool = False
     oauth_base: str = "https://oauth.yandex.com"
+    http: HttpConfig = field(default_factory=HttpConfig)
 
 
 class YandexIDApi(AuthApi):
@@ -32,11 +34,13 @@ class YandexIDApi(AuthApi):
         # Yandex OAuth API endpoints
         self.user_info_url = "https://login.yandex.ru/info"
         self.token_info_url = f"{config.oauth_base}/token"
+        # every page load checks the token of the user
+        self._session = make_session(config.http)
 
     def _make_auth_request(self, token: str) -> requests.Response:
         headers = {"Authorization": f"OAuth {token}"}
         params = {"format": "json"}
-        return requests.get(self.user_info_url, headers=headers, params=params)
+        return self._session.get(self.user_info_url, headers=headers, params=params)
 
     def _refresh_token(self, oauth: OAuth, refresh_token: str) -> dict[str, Any] | None:
         try:
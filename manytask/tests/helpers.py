@@ -1,3 +1,4 @@
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from http import HTTPStatus
@@ -6,12 +7,13 @@ from zoneinfo import ZoneInfo
 
 from flask import Flask, json
 
-from manytask.abstract import RmsUser, StoredUser
+from manytask.abstract import AuthContext, RmsUser, StoredUser, StudentRepo
 from manytask.api import namespace_bp
 from manytask.course import CourseStatus, ManytaskDeadlinesType
 from manytask.database import DataBaseApi, DatabaseConfig, TaskDisabledError
 from manytask.mock_rms import MockRmsApi
 from manytask.models import Namespace, User, UserOnNamespace
+from manytask.utils.db_stats import collect_query_stats
 from manytask.web import root_bp
 from tests.constants import (
     GITLAB_BASE_URL,
@@ -100,6 +102,14 @@ def post_json_as(client, session_data, url, payload, *, clear=False):
     return post_json(client, url, payload)
 
 
+@contextmanager
+def assert_max_queries(budget):
+    """Fail if the block (e.g. a test client request) issues more than ``budget`` SQL queries"""
+    with collect_query_stats() as stats:
+        yield stats
+    assert stats.query_count <= budget, f"Expected at most {budget} queries, got {stats.query_count}"
+
+
 def assert_error_response(response, status):
     assert response.status_code == status
     data = json.loads(response.data)
@@ -259,6 +269,7 @@ class MockStorageApiBase:
         self.stored_user = make_test_stored_user()
         self.course_name = TEST_COURSE_NAME
         self.course_admin = False
+        self.student_repos = {}
 
     @staticmethod
     def get_namespace_admin_namespaces(_username):
@@ -288,9 +299,41 @@ class MockStorageApiBase:
     def get_grades(*_args, **_kwargs):
         return MockFinalGradeConfig()
 
+    def check_if_instance_admin(self, _username):
+        return self.stored_user.instance_admin
+
+    def check_if_course_admin(self, _course_name, _username):
+        return self.course_admin
+
+    def get_auth_context(self, username):
+        """Assemble the context from the primitives, so tests can keep patching them"""
+        auth_context = AuthContext(
+            username=username,
+            stored_user=self.stored_user,
+            instance_admin=self.check_if_instance_admin(username),
+            namespace_roles={
+                namespace_id: "namespace_admin" for namespace_id in self.get_namespace_admin_namespaces(username)
+            },
+        )
+        if self.check_user_on_course(self.course_name, username):
+            auth_context.course_roles[self.course_name] = self.check_if_course_admin(self.course_name, username)
+        return auth_context
+
     def get_stored_user_by_username(self, username):
         return self.stored_user
 
+    def get_student_repo(self, course_name, username):
+        return self.student_repos.get((course_name, username))
+
+    def store_student_repo(self, course_name, username, url, repo_id=None):
+        now = datetime.now(tz=ZoneInfo("UTC"))
+        self.student_repos[(course_name, username)] = StudentRepo(
+            url=url, repo_id=repo_id, created_at=now, verified_at=now
+        )
+
+    def clear_student_repo(self, course_name, username):
+        self.student_repos.pop((course_name, username), None)
+
     def get_stored_user_by_rms_id(self, rms_id):
         return self.stored_user
 
@@ -1,6 +1,8 @@
+import csv
 import os
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from http import HTTPStatus
+from types import SimpleNamespace
 from typing import Callable
 from unittest.mock import MagicMock, patch
 from zoneinfo import ZoneInfo
@@ -11,13 +13,16 @@ from flask import json, url_for
 from pytest import approx
 from werkzeug.exceptions import HTTPException
 
-from manytask.abstract import RmsUser
+from manytask.abstract import RepoProvisioning, ReportReceipt, RmsUser, TaskSubmissionStats
 from manytask.api import _parse_flags, _process_score, _update_score, _validate_and_extract_params
 from manytask.api import bp as api_bp
 from manytask.config import ManytaskConfig, ManytaskDeadlinesType, ManytaskGroupConfig, ManytaskTaskConfig
 from manytask.database import DataBaseApi
+from manytask.events import EVENTS_ENABLED, EVENTS_HEARTBEAT_INTERVAL, EVENTS_STREAM_TIMEOUT, get_broker
+from manytask.events import init_app as init_events
 from manytask.mock_auth import MockAuthApi
 from manytask.mock_rms import MockRmsApi
+from manytask.report_queue import REPORT_QUEUE_ENABLED
 from manytask.web import course_bp, root_bp
 from tests.constants import (
     GITLAB_BASE_URL,
@@ -72,6 +77,10 @@ def mock_task():
         def __init__(self):
             self.name = TEST_TASK_NAME
             self.score = 100
+            self.min_score = 0
+            self.enabled = True
+            self.is_bonus = False
+            self.is_large = False
 
     return MockTask()
 
@@ -99,7 +108,10 @@ def mock_storage_api(mock_course, mock_task, mock_group):  # noqa: C901
         def __init__(self):
             super().__init__()
             self.scores = {}
+            self.receipts = {}
+            self.submissions = []
             self.non_admin_users: set[str] = set()
+            self.recalculated: list[list[str]] = []
 
         def store_score(self, _course_name, username, task_name, update_fn):
             old_score = self.scores.get(f"{username}_{task_name}", 0)
@@ -107,10 +119,64 @@ def mock_storage_api(mock_course, mock_task, mock_group):  # noqa: C901
             self.scores[f"{username}_{task_name}"] = new_score
             return new_score
 
+        def upsert_score(self, _course_name, username, task_name, score, allow_reduction=False, submission=None):
+            if submission is not None:
+                self.submissions.append(submission)
+            old_score = self.scores.get(f"{username}_{task_name}", 0)
+            if allow_reduction:
+                new_score = score
+            else:
+                new_score = old_score if old_score < 0 else max(old_score, score)
+            self.scores[f"{username}_{task_name}"] = new_score
+            return new_score
+
+        def update_scores(self, _course_name, changes):
+            for username, scores in changes.items():
+                for task_name, score in scores.items():
+                    self.scores[f"{username}_{task_name}"] = score
+            return changes
+
+        def recalculate_grades(self, _course_name, usernames=None):
+            self.recalculated.append(list(usernames))
+
+        def get_students_scores_with_names(self, _course_name, usernames):
+            return {
+                username: (
+                    {
+                        key.removeprefix(f"{username}_"): (score, score > 0)
+                        for key, score in self.scores.items()
+                        if key.startswith(f"{username}_")
+                    },
+                    (TEST_FIRST_NAME, TEST_LAST_NAME),
+                    None,
+                    None,
+                    None,
+                )
+                for username in usernames
+            }
+
+        def enqueue_report(self, course_name, username, task_name, reported_score, submit_time, **kwargs):
+            receipt = ReportReceipt(
+                len(self.receipts) + 1, course_name, username, task_name, reported_score, submit_time, **kwargs
+            )
+            self.receipts[receipt.receipt_id] = receipt
+            return receipt
+
+        def get_report_receipt(self, _course_name, receipt_id):
+            return self.receipts.get(receipt_id)
+
+        @staticmethod
+        def get_submission_stats(_course_name):
+            return {TEST_TASK_NAME: TaskSubmissionStats(submissions=3, students=2, solved_students=1)}
+
         @staticmethod
         def get_scores(_course_name, _username):
             return {"task1": 100, "task2": 90, "test_task": 80}
 
+        @staticmethod
+        def get_bonus_score(_course_name, _username):
+            return 0
+
         @staticmethod
         def get_course(_name):
             return mock_course
@@ -438,6 +504,117 @@ def test_report_score_success(app):
         data = json.loads(response.data)
         assert data["username"] == expected_data["username"]
         assert data["score"] == expected_data["score"]
+        (submission,) = app.storage_api.submissions
+        assert (submission.reported_score, submission.multiplier, submission.source) == (90, 1.0, "report")
+
+
+def test_get_submission_stats(app):
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    response = app.test_client().get(f"/api/{TEST_COURSE_NAME}/submissions/stats", headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert json.loads(response.data) == {
+        "course": TEST_COURSE_NAME,
+        "tasks": [
+            {
+                "task_name": TEST_TASK_NAME,
+                "submissions": 3,
+                "students": 2,
+                "solved_students": 1,
+                "avg_attempts_to_solve": None,
+                "avg_seconds_to_solve": None,
+            }
+        ],
+    }
+
+
+@pytest.fixture
+def events_app(app):
+    app.config.update({EVENTS_ENABLED: True, EVENTS_HEARTBEAT_INTERVAL: 0.01, EVENTS_STREAM_TIMEOUT: 0.2})
+    init_events(app)
+    return app
+
+
+def test_events_disabled(app):
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    response = app.test_client().get(f"/api/{TEST_COURSE_NAME}/events", headers=headers)
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_events_stream_reported_scores(events_app):
+    rms_user = events_app.rms_api.register_new_user(
+        TEST_USERNAME, TEST_FIRST_NAME, TEST_LAST_NAME, TEST_EMAIL, TEST_PASSWORD
+    )
+    events_app.storage_api.stored_user.rms_id = rms_user.id
+    events_app.storage_api.groups_override = []
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+    client = events_app.test_client()
+
+    stream = client.get(f"/api/{TEST_COURSE_NAME}/events", headers=headers)
+    report = client.post(
+        f"/api/{TEST_COURSE_NAME}/report",
+        data={"task": TEST_TASK_NAME, "user_id": rms_user.id, "score": "90", "check_deadline": "False"},
+        headers=headers,
+    )
+
+    assert report.status_code == HTTPStatus.OK
+    assert stream.status_code == HTTPStatus.OK
+    assert stream.mimetype == "text/event-stream"
+    assert stream.headers["Cache-Control"] == "no-cache"
+    body = stream.get_data(as_text=True)
+    assert body.startswith("retry: ")
+    assert ": heartbeat" in body
+    (event,) = [json.loads(line.removeprefix("data: ")) for line in body.splitlines() if line.startswith("data: ")]
+    assert event == {
+        "type": "row",
+        "username": TEST_USERNAME,
+        "scores": {TEST_TASK_NAME: 80},
+        "total_score": 270,
+        "percent": 0,
+        "grade": 0,
+        "grade_is_override": False,
+    }
+
+
+def test_events_too_many_subscribers(events_app):
+    events_app.config[EVENTS_STREAM_TIMEOUT] = 0
+    broker = get_broker(events_app)
+    broker.max_subscribers = 0
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    response = events_app.test_client().get(f"/api/{TEST_COURSE_NAME}/events", headers=headers)
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert "Retry-After" in response.headers
+
+
+def test_report_score_queued(app):
+    rms_user = app.rms_api.register_new_user(TEST_USERNAME, TEST_FIRST_NAME, TEST_LAST_NAME, TEST_EMAIL, TEST_PASSWORD)
+    app.storage_api.stored_user.rms_id = rms_user.id
+    app.config[REPORT_QUEUE_ENABLED] = True
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+    data = {"task": TEST_TASK_NAME, "user_id": rms_user.id, "score": "90"}
+
+    response = app.test_client().post(f"/api/{TEST_COURSE_NAME}/report", data=data, headers=headers)
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    receipt = json.loads(response.data)
+    assert receipt["status"] == "queued"
+    assert receipt["username"] == TEST_USERNAME
+    assert receipt["reported_score"] == 90  # noqa: PLR2004
+    assert receipt["score"] is None
+    # the score is stored by the report applier, not by the request
+    assert app.storage_api.scores == {}
+
+    response = app.test_client().get(f"/api/{TEST_COURSE_NAME}/report/{receipt['receipt_id']}", headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    assert json.loads(response.data) == receipt
+
+    response = app.test_client().get(f"/api/{TEST_COURSE_NAME}/report/100500", headers=headers)
+    assert response.status_code == HTTPStatus.NOT_FOUND
 
 
 def test_report_negative_integer_score(app):
@@ -524,6 +701,40 @@ def test_update_database_success(app, authenticated_client):
     assert data["success"]
 
 
+def test_update_database_batch(app, authenticated_client):
+    second_username = "second_user"
+    changes = {
+        TEST_USERNAME: {TEST_TASK_NAME: 90, "task2": 85},
+        second_username: {TEST_TASK_NAME: 40, "task2": "not a number"},
+    }
+
+    response = authenticated_client.post(f"/api/{TEST_COURSE_NAME}/database/update", json={"changes": changes})
+
+    assert response.status_code == HTTPStatus.OK
+    data = json.loads(response.data)
+    assert data["success"]
+    # every touched student is recalculated once, with one call for the whole change set
+    assert app.storage_api.recalculated == [[second_username, TEST_USERNAME]]
+    assert app.storage_api.scores == {
+        f"{TEST_USERNAME}_{TEST_TASK_NAME}": 90,
+        f"{TEST_USERNAME}_task2": 85,
+        f"{second_username}_{TEST_TASK_NAME}": 40,
+    }
+    rows = {row["username"]: row for row in data["rows"]}
+    assert rows.keys() == {TEST_USERNAME, second_username}
+    assert rows[second_username]["scores"] == {TEST_TASK_NAME: 40}
+    assert rows[second_username]["total_score"] == 40  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("payload", [{"changes": {}}, {"changes": {TEST_USERNAME: 90}}])
+def test_update_database_batch_invalid(app, authenticated_client, payload):
+    response = authenticated_client.post(f"/api/{TEST_COURSE_NAME}/database/update", json=payload)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "Invalid request data" in json.loads(response.data)["message"]
+    assert app.storage_api.recalculated == []
+
+
 def test_update_database_invalid_score_type(app, authenticated_client):
     test_data = {
         "row_data": {
@@ -677,6 +888,112 @@ def test_update_config_reports_non_mapping(app, raw_body):
     assert "mapping" in body.lower() or "object" in body.lower()
 
 
+@pytest.fixture
+def export_storage(app):
+    task = SimpleNamespace(name=TEST_TASK_NAME, score=100, min_score=0, enabled=True, is_bonus=False, is_large=False)
+    app.storage_api.groups_override = [SimpleNamespace(name=TEST_TASK_GROUP_NAME, tasks=[task])]
+    app.storage_api.iter_scores_with_names = lambda _course_name: iter(
+        [(TEST_USERNAME, {TEST_TASK_NAME: (90, True)}, (TEST_FIRST_NAME, TEST_LAST_NAME), None, None, "comment")]
+    )
+    return app.storage_api
+
+
+def test_export_csv(app, export_storage):
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    response = app.test_client().get(f"/api/{TEST_COURSE_NAME}/export.csv", headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.is_streamed
+    assert response.mimetype == "text/csv"
+    assert response.headers["Content-Disposition"] == f'attachment; filename="{TEST_COURSE_NAME}.csv"'
+    (row,) = csv.DictReader(response.get_data(as_text=True).splitlines())
+    assert row["username"] == TEST_USERNAME
+    assert (row["first_name"], row["last_name"], row["comment"]) == (TEST_FIRST_NAME, TEST_LAST_NAME, "comment")
+    assert row[TEST_TASK_NAME] == row["total_score"] == "90"
+    assert row["grade"] == "5"
+    assert row["grade_is_override"] == "False"
+
+
+def test_export_jsonl(app, export_storage):
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    response = app.test_client().get(f"/api/{TEST_COURSE_NAME}/export.jsonl", headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.is_streamed
+    assert response.mimetype == "application/jsonl"
+    (line,) = response.get_data(as_text=True).splitlines()
+    row = json.loads(line)
+    assert row["username"] == TEST_USERNAME
+    assert row["scores"] == {TEST_TASK_NAME: 90}
+    assert row["grade"] == 5  # noqa: PLR2004
+
+
+def test_get_database_page(app, export_storage):
+    requests = []
+
+    def get_scores_with_names_page(_course_name, offset, limit, **kwargs):
+        requests.append({"offset": offset, "limit": limit, **kwargs})
+        return 3, {TEST_USERNAME: ({TEST_TASK_NAME: (90, True)}, (TEST_FIRST_NAME, TEST_LAST_NAME), None, None, None)}
+
+    export_storage.get_scores_with_names_page = get_scores_with_names_page
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    response = app.test_client().get(
+        f"/api/{TEST_COURSE_NAME}/database?page=2&size=2&sort=total_score&dir=desc&search=user", headers=headers
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    data = json.loads(response.data)
+    assert [row["username"] for row in data["students"]] == [TEST_USERNAME]
+    assert (data["last_page"], data["last_row"]) == (2, 3)
+    assert requests == [
+        {"offset": 2, "limit": 2, "order_by": "total_score", "descending": True, "search": "user", "search_names": True}
+    ]
+
+
+@pytest.mark.parametrize("query", ["format=columnar", "page=1&format=columnar"])
+def test_get_database_columnar(app, export_storage, query):
+    export_storage.get_all_scores_with_names = lambda _course_name: {
+        TEST_USERNAME: ({TEST_TASK_NAME: (90, True)}, (TEST_FIRST_NAME, TEST_LAST_NAME), None, None, None)
+    }
+    export_storage.get_scores_with_names_page = lambda _course_name, offset, limit, **kwargs: (
+        1,
+        export_storage.get_all_scores_with_names(_course_name),
+    )
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    response = app.test_client().get(f"/api/{TEST_COURSE_NAME}/database?{query}", headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    data = json.loads(response.data)
+    assert data["format"] == "columnar"
+    assert [task["name"] for task in data["tasks"]] == [TEST_TASK_NAME]
+    assert data["students"]["username"] == [TEST_USERNAME]
+    assert data["students"]["total_score"] == [90]
+    assert data["scores"] == [[90]]
+
+
+def test_get_database_unknown_format(app, export_storage):
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    response = app.test_client().get(f"/api/{TEST_COURSE_NAME}/database?format=xml", headers=headers)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "Unknown format" in json.loads(response.data)["error"]
+
+
+@pytest.mark.parametrize("query", ["page=0", "page=1&size=100000", "page=x", "page=1&sort=large_count"])
+def test_get_database_page_invalid(app, export_storage, query):
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    response = app.test_client().get(f"/api/{TEST_COURSE_NAME}/database?{query}", headers=headers)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert "Invalid page request" in json.loads(response.data)["error"]
+
+
 def test_get_database_unauthorized(app, mock_gitlab_oauth):
     app.debug = False  # Disable debug mode to test auth
     app.oauth = mock_gitlab_oauth
@@ -1485,3 +1802,66 @@ def test_deadlines_invalid_token(app):
     response = client.get(f"/api/{TEST_COURSE_NAME}/deadlines", headers=headers)
 
     assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+def test_provision_repos_accepted(app):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+    job = MagicMock(usernames=[TEST_USERNAME])
+
+    with patch("manytask.api.start_provisioning", return_value=job) as mock_start:
+        response = client.post(
+            f"/api/{TEST_COURSE_NAME}/repos/provision", json={"usernames": [TEST_USERNAME, "other"]}, headers=headers
+        )
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    assert json.loads(response.data) == {"requested": [TEST_USERNAME], "skipped": ["other"]}
+    assert mock_start.call_args.args[2] == [TEST_USERNAME, "other"]
+
+
+def test_provision_repos_already_running(app):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    with patch("manytask.api.start_provisioning", return_value=None):
+        response = client.post(
+            f"/api/{TEST_COURSE_NAME}/repos/provision", json={"usernames": [TEST_USERNAME]}, headers=headers
+        )
+
+    assert response.status_code == HTTPStatus.CONFLICT
+
+
+@pytest.mark.parametrize("payload", [None, {}, {"usernames": []}])
+def test_provision_repos_invalid(app, payload):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+
+    with patch("manytask.api.start_provisioning") as mock_start:
+        response = client.post(f"/api/{TEST_COURSE_NAME}/repos/provision", json=payload, headers=headers)
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    mock_start.assert_not_called()
+
+
+def test_repo_provisioning_status(app):
+    client = app.test_client()
+    headers = {"Authorization": f"Bearer {os.environ['MANYTASK_COURSE_TOKEN']}"}
+    requested_at = datetime(2026, 9, 1, tzinfo=timezone.utc)
+    states = [
+        RepoProvisioning(username="alice", requested_at=requested_at, repo_url=f"{GITLAB_BASE_URL}/alice"),
+        RepoProvisioning(username="bob", requested_at=requested_at, error="Forking failed"),
+        RepoProvisioning(username="carol", requested_at=requested_at),
+    ]
+
+    with patch.object(app.storage_api, "get_repo_provisioning", return_value=states, create=True):
+        response = client.get(f"/api/{TEST_COURSE_NAME}/repos/provision", headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    data = json.loads(response.data)
+    assert (data["pending"], data["done"], data["failed"]) == (1, 1, 1)
+    assert [(student["username"], student["status"]) for student in data["students"]] == [
+        ("alice", "done"),
+        ("bob", "failed"),
+        ("carol", "pending"),
+    ]
+    assert data["students"][1]["error"] == "Forking failed"
@@ -0,0 +1,190 @@
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+from unittest.mock import MagicMock
+
+import pytest
+from flask import json
+from sqlalchemy import create_engine, event, update
+from sqlalchemy.orm import Session
+
+from manytask import archive
+from manytask.api import bp
+from manytask.course import CourseStatus
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.mock_auth import MockAuthApi
+from manytask.mock_rms import MockRmsApi
+from manytask.models import Base, Course, Deadline, Grade, Task, TaskGroup, User, UserOnCourse
+from tests.constants import GITLAB_BASE_URL, TEST_COURSE_NAME
+from tests.helpers import make_flask_app
+
+TOKEN = "token"
+HEADERS = {"Authorization": f"Bearer {TOKEN}"}
+TASK_A = "task_a"
+TASK_B = "task_b"
+BONUS = "bonus"
+# username: (first name, {task: score})
+STUDENTS = {
+    "alice": ("Alice", {TASK_A: 10, TASK_B: 30, BONUS: 5}),
+    "bob": ("Bob", {TASK_A: 20}),
+    "carol": ("Carol", {}),
+}
+SCORE_TABLES = re.compile(r"\b(grades|tasks|task_groups)\b")
+
+
+@pytest.fixture
+def app(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'archive.db'}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        course = Course(
+            name=TEST_COURSE_NAME,
+            registration_secret="secret",
+            token=TOKEN,
+            gitlab_course_group="course",
+            gitlab_course_public_repo="course/public",
+            gitlab_course_students_group="course/students",
+            gitlab_default_branch="main",
+            task_url_template="",
+            status=CourseStatus.FINISHED,
+        )
+        started = datetime.now(timezone.utc) - timedelta(days=30)
+        group = TaskGroup(name="group", course=course, deadline=Deadline(start=started, end=started))
+        tasks = {name: Task(name=name, group=group, score=50) for name in (TASK_A, TASK_B)}
+        tasks[BONUS] = Task(name=BONUS, group=group, score=10, is_bonus=True)
+        session.add_all([course, group, *tasks.values()])
+        for auth_id, (username, (first_name, scores)) in enumerate(STUDENTS.items()):
+            user = User(username=username, first_name=first_name, last_name="", rms_id=username, auth_id=auth_id)
+            user_on_course = UserOnCourse(user=user, course=course, comment=f"{username} comment")
+            session.add_all([user, user_on_course])
+            for task_name, score in scores.items():
+                session.add(Grade(user_on_course=user_on_course, task=tasks[task_name], score=score))
+        session.commit()
+    engine.dispose()
+
+    app = make_flask_app(bp)
+    app.storage_api = DataBaseApi(DatabaseConfig(database_url=database_url, instance_admin_username="admin"))
+    app.rms_api = MockRmsApi(GITLAB_BASE_URL)
+    app.auth_api = MockAuthApi()
+    app.oauth = MagicMock()
+    archive.init_app(app)
+    return app
+
+
+@pytest.fixture
+def score_queries(app):
+    """Statements touching the score tables, recorded once the test clears the list"""
+    statements = []
+
+    @event.listens_for(app.storage_api.engine, "before_cursor_execute")
+    def record(_conn, _cursor, statement, _parameters, _context, _executemany):
+        if SCORE_TABLES.search(statement):
+            statements.append(statement)
+
+    return statements
+
+
+def _post(client, url):
+    return client.post(f"/api/{TEST_COURSE_NAME}/{url}", headers=HEADERS)
+
+
+def _database(client, **args):
+    response = client.get(f"/api/{TEST_COURSE_NAME}/database", headers=HEADERS, query_string=args)
+    assert response.status_code == HTTPStatus.OK
+    return json.loads(response.data)
+
+
+def test_only_finished_courses_are_archived(app):
+    with Session(app.storage_api.engine) as session:
+        session.execute(update(Course).values(status=CourseStatus.IN_PROGRESS))
+        session.commit()
+
+    with app.test_client() as client:
+        assert _post(client, "archive").status_code == HTTPStatus.CONFLICT
+        assert _post(client, "unarchive").status_code == HTTPStatus.CONFLICT
+
+    assert app.storage_api.get_course(TEST_COURSE_NAME).status == CourseStatus.IN_PROGRESS
+    assert app.storage_api.get_course_snapshot(TEST_COURSE_NAME) is None
+
+
+def test_snapshot_round_trip(app):
+    course = app.storage_api.get_course(TEST_COURSE_NAME)
+    snapshot = archive.build_snapshot(app, course)
+
+    loaded = archive.CourseSnapshot.loads(snapshot.dumps())
+
+    assert loaded == snapshot
+    assert loaded.max_score_started == 100  # noqa: PLR2004
+    assert loaded.student_scores("alice") == ({TASK_A: 10, TASK_B: 30, BONUS: 5}, 5)
+    assert loaded.student_scores("dave") == ({}, 0)
+    assert "comment" not in loaded.table_data()["students"][0]
+    assert loaded.table_data(include_admin_data=True)["students"][0]["comment"] == "alice comment"
+
+
+def test_archived_course_is_served_from_snapshot(app, score_queries):
+    with app.test_client() as client:
+        live = _database(client)
+        live_page = _database(client, page=1, size=2, sort="total_score", dir="desc", search="b")
+        assert _post(client, "archive").status_code == HTTPStatus.OK
+        assert app.storage_api.get_course(TEST_COURSE_NAME).status == CourseStatus.ARCHIVED
+
+        # the first request of the process loads the snapshot
+        _database(client)
+        score_queries.clear()
+
+        assert _database(client) == live
+        assert _database(client, page=1, size=2, sort="total_score", dir="desc", search="b") == live_page
+        page = _database(client, page=2, size=2, sort="total_score", dir="desc")
+        assert [row["username"] for row in page["students"]] == ["carol"]
+        assert (page["last_page"], page["last_row"]) == (2, 3)
+        assert _database(client, format="columnar")["students"]["username"] == ["alice", "bob", "carol"]
+
+    assert score_queries == []
+
+
+def test_archived_course_rejects_changes(app):
+    with app.test_client() as client:
+        assert _post(client, "archive").status_code == HTTPStatus.OK
+        assert _post(client, "archive").status_code == HTTPStatus.CONFLICT
+
+        response = client.post(
+            f"/api/{TEST_COURSE_NAME}/database/update",
+            headers=HEADERS,
+            json={"changes": {"bob": {TASK_B: 40}}},
+        )
+        assert response.status_code == HTTPStatus.CONFLICT
+        response = client.post(
+            f"/api/{TEST_COURSE_NAME}/report", headers=HEADERS, data={"user_id": "1", "task": TASK_B, "score": "40"}
+        )
+        assert response.status_code == HTTPStatus.CONFLICT
+
+    assert app.storage_api.get_scores(TEST_COURSE_NAME, "bob") == {TASK_A: 20}
+
+
+def test_unarchived_course_is_live_again(app):
+    with app.test_client() as client:
+        assert _post(client, "archive").status_code == HTTPStatus.OK
+        assert _database(client)["students"][1]["scores"] == {TASK_A: 20}
+        assert _post(client, "unarchive").status_code == HTTPStatus.OK
+
+        app.storage_api.update_scores(TEST_COURSE_NAME, {"bob": {TASK_B: 40}})
+        assert _database(client)["students"][1]["scores"] == {TASK_A: 20, TASK_B: 40}
+
+    assert app.storage_api.get_course(TEST_COURSE_NAME).status == CourseStatus.FINISHED
+    assert app.storage_api.get_course_snapshot(TEST_COURSE_NAME) is None
+
+
+def test_archived_course_is_reloaded_after_ttl(app):
+    assert archive.archive_course(app, app.storage_api.get_course(TEST_COURSE_NAME))
+    assert archive.get_course(app, TEST_COURSE_NAME).status == CourseStatus.ARCHIVED
+    assert archive.get_archived_course(app, TEST_COURSE_NAME) is not None
+
+    # another process unarchives the course
+    app.storage_api.unarchive_course(TEST_COURSE_NAME)
+    assert archive.get_course(app, TEST_COURSE_NAME).status == CourseStatus.ARCHIVED
+
+    app.extensions["manytask.archived_courses"][TEST_COURSE_NAME].loaded_at = time.monotonic() - 1000
+    assert archive.get_archived_course(app, TEST_COURSE_NAME) is None
+    assert archive.get_course(app, TEST_COURSE_NAME).status == CourseStatus.FINISHED
@@ -1,6 +1,6 @@
 import os
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from http import HTTPStatus
 from unittest.mock import patch
 from zoneinfo import ZoneInfo
@@ -11,6 +11,7 @@ from werkzeug.exceptions import HTTPException
 
 from manytask.abstract import AuthenticatedUser
 from manytask.auth import (
+    check_student_repo,
     requires_auth,
     requires_instance_admin,
     requires_ready,
@@ -20,8 +21,10 @@ from manytask.auth import (
 )
 from manytask.course import CourseStatus
 from manytask.mock_auth import MockAuthApi
+from manytask.mock_rms import MockRmsApi
 from manytask.web import course_bp, root_bp
 from tests.constants import (
+    GITLAB_BASE_URL,
     TEST_CLIENT_PROFILE_SESSION_VERSION,
     TEST_COURSE_NAME,
     TEST_GITLAB_SESSION_VERSION,
@@ -372,3 +375,49 @@ def test_requires_admin_with_no_admin_rules(app, mock_gitlab_oauth):
             test_route(course_name=TEST_COURSE_NAME)
 
         assert e.value.code == HTTPStatus.FORBIDDEN
+
+
+@pytest.fixture
+def rms_api(app, mock_course):
+    app.rms_api = MockRmsApi(GITLAB_BASE_URL)
+    rms_user = app.rms_api.register_new_user(TEST_USERNAME, "Test", "User", "test@example.com", "password")
+    app.rms_api.create_project(
+        rms_user, mock_course.gitlab_course_students_group, mock_course.gitlab_course_public_repo
+    )
+    with patch.object(app.rms_api, "check_project_exists", wraps=app.rms_api.check_project_exists) as check:
+        yield check
+
+
+def test_check_student_repo_trusts_stored_state(app, mock_course, rms_api):
+    assert check_student_repo(app, mock_course, TEST_USERNAME, TEST_USERNAME)
+    assert check_student_repo(app, mock_course, TEST_USERNAME, TEST_USERNAME)
+
+    # the first view verifies and stores the repo, the second one makes no RMS call
+    assert rms_api.call_count == 1
+    stored_repo = app.storage_api.get_student_repo(TEST_COURSE_NAME, TEST_USERNAME)
+    assert stored_repo.url == f"{GITLAB_BASE_URL}/{mock_course.gitlab_course_students_group}/{TEST_USERNAME}"
+
+
+def test_check_student_repo_reverifies_after_interval(app, mock_course, rms_api):
+    app.config["REPO_VERIFY_INTERVAL"] = 60
+    assert check_student_repo(app, mock_course, TEST_USERNAME, TEST_USERNAME)
+    stored_repo = app.storage_api.get_student_repo(TEST_COURSE_NAME, TEST_USERNAME)
+    stored_repo.verified_at -= timedelta(seconds=61)
+
+    # the repo was deleted in the RMS, the stale state is dropped
+    app.rms_api.projects.clear()
+    assert not check_student_repo(app, mock_course, TEST_USERNAME, TEST_USERNAME)
+
+    assert rms_api.call_count == 2  # noqa: PLR2004
+    assert app.storage_api.get_student_repo(TEST_COURSE_NAME, TEST_USERNAME) is None
+
+
+def test_check_student_repo_ignores_state_of_other_repo(app, mock_course, rms_api):
+    app.storage_api.store_student_repo(TEST_COURSE_NAME, TEST_USERNAME, f"{GITLAB_BASE_URL}/old_group/{TEST_USERNAME}")
+
+    assert check_student_repo(app, mock_course, TEST_USERNAME, TEST_USERNAME)
+
+    assert rms_api.call_count == 1
+    assert app.storage_api.get_student_repo(TEST_COURSE_NAME, TEST_USERNAME).url.startswith(
+        f"{GITLAB_BASE_URL}/{mock_course.gitlab_course_students_group}/"
+    )
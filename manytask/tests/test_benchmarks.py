@@ -0,0 +1,108 @@
+"""Benchmarks of the storage methods and /report on a synthetic course
+
+Record a baseline and compare later runs with it, see the benchmark targets of the Makefile.
+Under pytest-xdist every benchmark runs once, as a plain test.
+"""
+
+import os
+import uuid
+from dataclasses import replace
+from http import HTTPStatus
+from unittest.mock import MagicMock
+
+import pytest
+from sqlalchemy import create_engine
+
+from manytask.api import bp
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.mock_auth import MockAuthApi
+from manytask.mock_rms import MockRmsApi
+from manytask.models import Base
+from manytask.utils.database import get_database_table_data
+from manytask.utils.synthetic import SyntheticConfig, generate
+from tests.constants import GITLAB_BASE_URL
+from tests.helpers import make_flask_app, register_rms_user
+
+# a PostgreSQL database to benchmark instead of SQLite, the migrations are applied to it
+BENCHMARK_DATABASE_URL = "BENCHMARK_DATABASE_URL"
+SYNTHETIC_CONFIG = SyntheticConfig(namespaces=1, courses=2, groups=10, tasks=10, students=300, density=0.8)
+
+
+@pytest.fixture(scope="module")
+def synthetic(tmp_path_factory):
+    database_url = os.environ.get(BENCHMARK_DATABASE_URL)
+    apply_migrations = bool(database_url)
+    config = SYNTHETIC_CONFIG
+    if database_url:
+        # the generated names must not clash with the data of earlier runs
+        config = replace(SYNTHETIC_CONFIG, prefix=f"bench_{uuid.uuid4().hex[:8]}")
+    else:
+        database_url = f"sqlite:///{tmp_path_factory.mktemp('benchmarks') / 'synthetic.db'}"
+        engine = create_engine(database_url)
+        Base.metadata.create_all(engine)
+        engine.dispose()
+
+    app = make_flask_app(bp)
+    app.storage_api = DataBaseApi(
+        DatabaseConfig(database_url=database_url, instance_admin_username="admin", apply_migrations=apply_migrations)
+    )
+    app.rms_api = MockRmsApi(GITLAB_BASE_URL)
+    app.auth_api = MockAuthApi()
+    app.oauth = MagicMock()
+    # the other courses make the queries of one course pick its rows out of several
+    return app, generate(app.storage_api, config)[0]
+
+
+def test_store_score(benchmark, synthetic):
+    app, course = synthetic
+
+    score = benchmark(app.storage_api.store_score, course.name, course.students[0], course.tasks[1], lambda _, s: s)
+
+    assert 0 <= score <= 10  # noqa: PLR2004
+
+
+def test_get_all_scores_with_names(benchmark, synthetic):
+    app, course = synthetic
+
+    scores = benchmark(app.storage_api.get_all_scores_with_names, course.name)
+
+    assert len(scores) == len(course.students)
+
+
+def test_get_database_table_data(benchmark, synthetic):
+    app, course = synthetic
+    stored_course = app.storage_api.get_course(course.name)
+
+    table = benchmark(get_database_table_data, app, stored_course, include_admin_data=True)
+
+    assert len(table["students"]) == len(course.students)
+    assert len(table["tasks"]) == len(course.tasks)
+
+
+def test_recalculate_all_grades(benchmark, synthetic):
+    app, course = synthetic
+
+    benchmark(app.storage_api.recalculate_all_grades, course.name)
+
+
+def test_update_course(benchmark, synthetic):
+    """Sending the same config again, as a course repository pipeline does on every push"""
+    app, course = synthetic
+
+    benchmark(app.storage_api.update_course, course.name, course.config)
+
+    assert len(app.storage_api.get_groups(course.name, enabled=True)) == SYNTHETIC_CONFIG.groups
+
+
+def test_report(benchmark, synthetic):
+    app, course = synthetic
+    student = app.storage_api.get_stored_user_by_username(course.students[1])
+    register_rms_user(app, student)
+    headers = {"Authorization": f"Bearer {course.token}"}
+    data = {"user_id": student.rms_id, "task": course.tasks[2], "score": "7", "check_deadline": "False"}
+
+    with app.test_client() as client:
+        response = benchmark(client.post, f"/api/{course.name}/report", headers=headers, data=data)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json["score"] >= 7  # noqa: PLR2004
@@ -102,6 +102,8 @@ def test_create_course_as_instance_admin(client_with_db, session, mock_session_a
     assert "students" in data["gitlab_course_students_group"]
     assert data["status"] == "created"
     assert data["owners"] == []
+    # the RMS groups are created by a background job
+    assert data["job_id"] is not None
 
     # Verify course was created in database
     course = session.query(Course).filter_by(name="Algorithms 2024 Spring").first()
@@ -1,18 +1,42 @@
 import datetime
 from dataclasses import dataclass
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 
 import pytest
 from flask import Flask
 
 from manytask.config import ManytaskFinalGradeConfig
 from manytask.course import CourseStatus
+from manytask.glab import GitLabApi, GitLabConfig
 from manytask.mock_rms import MockRmsApi
-from manytask.utils.database import get_database_table_data
+from manytask.sourcecraft import SourceCraftApi, SourceCraftConfig
+from manytask.utils.database import (
+    get_database_table_data,
+    get_database_table_page,
+    iter_database_table_rows,
+    to_columnar_table,
+)
 from manytask.utils.generic import calculate_percent
 from tests.constants import MAX_SCORE, SCORES, STUDENT_1, STUDENT_2, STUDENT_DATA, TASK_1, TASK_2, TASK_3, TASK_LARGE
 
 
+def _offline_rms_api(rms):
+    """RMS api with every client mocked, to check which calls would have reached the RMS"""
+    if rms == "gitlab":
+        with patch("manytask.glab.gitlab.Gitlab") as gitlab_client:
+            api = GitLabApi(GitLabConfig(base_url="https://gitlab.com", admin_token="token"))
+        return api, gitlab_client.return_value
+    api = SourceCraftApi(
+        SourceCraftConfig(
+            base_url="https://sourcecraft.dev", api_url="https://api.sourcecraft.tech", org_slug="org", oauth_token="t"
+        )
+    )
+    clients = MagicMock()
+    api._client, api._sdk = clients.http, clients.sdk
+    return api, clients
+
+
 @pytest.fixture
 def app():  # noqa: C901
     app = Flask(__name__)
@@ -121,6 +145,15 @@ def app():  # noqa: C901
                 ),
             }
 
+        def iter_scores_with_names(self, course_name):
+            for username, student_data in sorted(self.get_all_scores_with_names(course_name).items()):
+                yield username, *student_data
+
+        def get_scores_with_names_page(self, course_name, offset, limit, **kwargs):
+            self.page_request = {"offset": offset, "limit": limit, **kwargs}
+            students = sorted(self.get_all_scores_with_names(course_name).items())
+            return len(students), dict(students[offset : offset + limit])
+
         @staticmethod
         def get_course(_name):
             @dataclass
@@ -274,3 +307,112 @@ def test_get_database_table_data_uses_displayed_percent_for_grade(app):
 
 def test_calculate_percent_handles_zero_max_score():
     assert calculate_percent(total_score=10, max_score=0) == 0.0
+
+
+@pytest.mark.parametrize("include_admin_data", [False, True])
+def test_iter_database_table_rows_matches_table_data(app, include_admin_data):
+    test_course = app.storage_api.get_course("test_course")
+
+    table_data = get_database_table_data(app, test_course, include_admin_data=include_admin_data)
+    tasks, rows = iter_database_table_rows(app, test_course, include_admin_data=include_admin_data)
+
+    assert tasks == table_data["tasks"]
+    assert list(rows) == sorted(table_data["students"], key=lambda row: row["username"])
+
+
+def test_get_database_table_page(app):
+    test_course = app.storage_api.get_course("test_course")
+    table_data = get_database_table_data(app, test_course, include_admin_data=True)
+
+    page = get_database_table_page(
+        app, test_course, page=2, size=1, sort=("scores." + TASK_1, True), search="st", include_admin_data=True
+    )
+
+    assert page["students"] == [row for row in table_data["students"] if row["username"] == STUDENT_2]
+    assert (page["tasks"], page["max_score"]) == (table_data["tasks"], table_data["max_score"])
+    assert (page["last_page"], page["last_row"]) == (2, 2)
+    assert app.storage_api.page_request == {
+        "offset": 1,
+        "limit": 1,
+        "order_by": "task:" + TASK_1,
+        "descending": True,
+        "search": "st",
+        "search_names": True,
+    }
+
+
+@pytest.mark.parametrize(
+    "field,include_admin_data,order_by",
+    [
+        ("percent", False, "total_score"),
+        ("grade", False, "grade"),
+        ("last_name", True, "last_name"),
+        ("comment", True, "comment"),
+    ],
+)
+def test_get_database_table_page_sort_keys(app, field, include_admin_data, order_by):
+    test_course = app.storage_api.get_course("test_course")
+
+    get_database_table_page(
+        app, test_course, page=1, size=10, sort=(field, False), include_admin_data=include_admin_data
+    )
+
+    assert app.storage_api.page_request["order_by"] == order_by
+    assert app.storage_api.page_request["search_names"] is include_admin_data
+
+
+@pytest.mark.parametrize("field", ["large_count", "first_name", "comment", "unknown"])
+def test_get_database_table_page_rejects_sort(app, field):
+    test_course = app.storage_api.get_course("test_course")
+
+    with pytest.raises(ValueError, match=field):
+        get_database_table_page(app, test_course, page=1, size=10, sort=(field, False))
+
+
+def test_to_columnar_table(app):
+    test_course = app.storage_api.get_course("test_course")
+    table_data = get_database_table_data(app, test_course, include_admin_data=True)
+    task_names = [task["name"] for task in table_data["tasks"]]
+
+    columnar = to_columnar_table(table_data)
+
+    assert columnar["format"] == "columnar"
+    assert (columnar["tasks"], columnar["max_score"]) == (table_data["tasks"], table_data["max_score"])
+    # expanding the columns back gives the rows with the scores of the table tasks
+    rows = [
+        {
+            **{field: values[i] for field, values in columnar["students"].items()},
+            "scores": {name: score for name, score in zip(task_names, scores) if score is not None},
+        }
+        for i, scores in enumerate(columnar["scores"])
+    ]
+    assert rows == [
+        {**row, "scores": {name: score for name, score in row["scores"].items() if name in task_names}}
+        for row in table_data["students"]
+    ]
+
+
+def test_to_columnar_table_no_students():
+    columnar = to_columnar_table({"tasks": [{"name": TASK_1, "score": 0, "group": "group"}], "students": []})
+
+    assert (columnar["students"], columnar["scores"]) == ({}, [])
+
+
+@pytest.mark.parametrize(
+    "rms,repo_url",
+    [
+        ("gitlab", "https://gitlab.com/test_course_students_group/{username}"),
+        ("sourcecraft", "https://sourcecraft.dev/org/test_course_students_group-{username}"),
+    ],
+)
+def test_get_database_table_data_makes_no_rms_calls(app, rms, repo_url):
+    app.rms_api, clients = _offline_rms_api(rms)
+    test_course = app.storage_api.get_course("test_course")
+
+    for _ in range(2):
+        result = get_database_table_data(app, test_course, include_admin_data=True)
+
+    assert clients.mock_calls == []
+    assert {row["username"]: row["repo_url"] for row in result["students"]} == {
+        username: repo_url.format(username=username) for username in (STUDENT_1, STUDENT_2)
+    }
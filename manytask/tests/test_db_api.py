@@ -1,3 +1,4 @@
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timedelta
@@ -10,10 +11,11 @@ import yaml
 from alembic import command
 from alembic.script import ScriptDirectory
 from psycopg2.errors import DuplicateColumn, DuplicateTable, UndefinedTable, UniqueViolation
-from sqlalchemy import event
+from sqlalchemy import event, text
 from sqlalchemy.exc import IntegrityError, NoResultFound, ProgrammingError
 from sqlalchemy.orm import Session
 
+from manytask.abstract import SUBMISSION_SOURCE_QUEUE, ReportedSubmission, TaskSubmissionStats
 from manytask.config import (
     ManytaskConfig,
     ManytaskDeadlinesConfig,
@@ -29,6 +31,7 @@ from manytask.models import (
     Deadline,
     Grade,
     Namespace,
+    Submission,
     Task,
     TaskGroup,
     User,
@@ -807,6 +810,21 @@ def test_store_bonus_score(db_api_with_initialized_first_course, session):
     assert scores == {"bonus_score": 1, "task_0_0": 1}
 
 
+def test_iter_scores_with_names(db_api_with_initialized_first_course):
+    db_api = db_api_with_initialized_first_course
+    create_user(db_api)
+    for task_name, score in [("task_0_0", 1), ("task_0_1", 2), ("task_1_3", 3)]:
+        db_api.upsert_score(FIRST_COURSE_NAME, TEST_USERNAME, task_name, score)
+
+    # one row per fetch, a student spans several batches
+    students = list(db_api.iter_scores_with_names(FIRST_COURSE_NAME, batch_size=1))
+
+    assert students == [
+        (username, *student_data)
+        for username, student_data in sorted(db_api.get_all_scores_with_names(FIRST_COURSE_NAME).items())
+    ]
+
+
 def test_store_score_bonus_task(db_api_with_initialized_first_course, session):
     expected_score = 22
 
@@ -837,6 +855,154 @@ def test_store_score_bonus_task(db_api_with_initialized_first_course, session):
     )
 
 
+def test_upsert_score(db_api_with_initialized_first_course, session):
+    db_api = db_api_with_initialized_first_course
+    create_user(db_api)
+
+    assert db_api.upsert_score(FIRST_COURSE_NAME, TEST_USERNAME, "not_exist_task", 10) == 0
+    assert_counts(session, users=USER_EXPECTED, user_on_course=1, grades=0)
+
+    assert db_api.upsert_score(FIRST_COURSE_NAME, TEST_USERNAME, "task_0_0", 10) == 10  # noqa: PLR2004
+    assert db_api.upsert_score(FIRST_COURSE_NAME, TEST_USERNAME, "task_0_0", 5) == 10  # noqa: PLR2004
+    assert db_api.upsert_score(FIRST_COURSE_NAME, TEST_USERNAME, "task_0_0", -5, allow_reduction=True) == -5  # noqa: PLR2004
+    # the penalty is kept until a reduction is allowed again
+    assert db_api.upsert_score(FIRST_COURSE_NAME, TEST_USERNAME, "task_0_0", 20) == -5  # noqa: PLR2004
+
+    assert_counts(session, users=USER_EXPECTED, user_on_course=1, grades=1)
+    grade = session.query(Grade).one()
+    assert grade.score == -5  # noqa: PLR2004
+    assert grade.is_solved is False
+
+
+def test_upsert_score_concurrent_reports_are_not_lost(
+    db_api_with_initialized_first_course, postgres_container, session
+):
+    create_user(db_api_with_initialized_first_course)
+    # the fixture api shares one session, the threads need their own
+    db_api = DataBaseApi(db_config(postgres_container.get_connection_url()))
+    scores = list(range(1, 201))
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(
+            executor.map(lambda score: db_api.upsert_score(FIRST_COURSE_NAME, TEST_USERNAME, "task_0_0", score), scores)
+        )
+    db_api.engine.dispose()
+
+    session.expire_all()
+    assert_counts(session, users=USER_EXPECTED, user_on_course=1, grades=1)
+    assert session.query(Grade).one().score == max(scores)
+
+
+def test_get_submission_stats(db_api_with_initialized_first_course, session):
+    db_api = db_api_with_initialized_first_course
+    create_user(db_api)
+    submit_time = datetime.now(ZoneInfo("UTC"))
+
+    for score, delay in [(0, 0), (10, 60), (5, 120)]:
+        db_api.upsert_score(
+            FIRST_COURSE_NAME,
+            TEST_USERNAME,
+            "task_0_0",
+            score,
+            submission=ReportedSubmission(score, 1.0, submit_time + timedelta(seconds=delay)),
+        )
+    # admin edits are not submissions
+    db_api.upsert_score(FIRST_COURSE_NAME, TEST_USERNAME, "task_0_1", 10, allow_reduction=True)
+
+    assert session.query(Submission).count() == 3  # noqa: PLR2004
+    assert db_api.get_submission_stats(FIRST_COURSE_NAME) == {
+        "task_0_0": TaskSubmissionStats(
+            submissions=3, students=1, solved_students=1, avg_attempts_to_solve=2.0, avg_seconds_to_solve=60.0
+        )
+    }
+    assert db_api.get_submission_stats(SECOND_COURSE_NAME) == {}
+
+
+def test_apply_queued_reports_coalesces_per_student(db_api_with_initialized_first_course, session):
+    db_api = db_api_with_initialized_first_course
+    create_user(db_api)
+    submit_time = datetime.now(ZoneInfo("UTC"))
+
+    receipts = [
+        db_api.enqueue_report(FIRST_COURSE_NAME, TEST_USERNAME, task_name, score, submit_time)
+        for task_name, score in [("task_0_0", 1), ("task_0_0", 2), ("not_exist_task", 3)]
+    ]
+
+    assert [receipt.status for receipt in receipts] == ["queued"] * 3
+    assert session.query(Grade).count() == 0
+
+    applied = db_api.apply_queued_reports(lambda _receipt: 1.0)
+
+    assert [receipt.receipt_id for receipt in applied] == [receipt.receipt_id for receipt in receipts]
+    assert [receipt.final_score for receipt in applied] == [1, 2, None]
+    assert [receipt.status for receipt in applied] == ["applied", "applied", "failed"]
+    assert session.query(Grade).one().score == 2  # noqa: PLR2004
+    assert [(s.score, s.source) for s in session.query(Submission).order_by(Submission.id)] == [
+        (1, SUBMISSION_SOURCE_QUEUE),
+        (2, SUBMISSION_SOURCE_QUEUE),
+    ]
+
+    stored = db_api.get_report_receipt(FIRST_COURSE_NAME, receipts[1].receipt_id)
+    assert stored.status == "applied"
+    assert stored.final_score == 2  # noqa: PLR2004
+    assert db_api.get_report_receipt(SECOND_COURSE_NAME, receipts[1].receipt_id) is None
+
+    # nothing is left in the queue
+    assert db_api.apply_queued_reports(lambda _receipt: 1.0) == []
+
+
+def test_apply_queued_reports_marks_failed_report(db_api_with_initialized_first_course, session):
+    db_api = db_api_with_initialized_first_course
+    create_user(db_api)
+    submit_time = datetime.now(ZoneInfo("UTC"))
+    broken, applied_ok = (
+        db_api.enqueue_report(FIRST_COURSE_NAME, TEST_USERNAME, task_name, 1, submit_time)
+        for task_name in ("task_0_0", "task_0_1")
+    )
+
+    def deadline_multiplier(receipt):
+        if receipt.receipt_id == broken.receipt_id:
+            raise ValueError("broken deadlines")
+        return 1.0
+
+    applied = db_api.apply_queued_reports(deadline_multiplier)
+
+    assert [(r.receipt_id, r.status, r.error) for r in applied] == [
+        (broken.receipt_id, "failed", "broken deadlines"),
+        (applied_ok.receipt_id, "applied", None),
+    ]
+    assert [grade.task.name for grade in session.query(Grade)] == ["task_0_1"]
+    assert db_api.get_report_receipt(FIRST_COURSE_NAME, broken.receipt_id).status == "failed"
+    assert db_api.get_report_receipt(FIRST_COURSE_NAME, applied_ok.receipt_id).status == "applied"
+
+
+def test_apply_queued_reports_marks_failed_student(db_api_with_initialized_first_course, session):
+    db_api = db_api_with_initialized_first_course
+    receipt = db_api.enqueue_report(FIRST_COURSE_NAME, "nobody", "task_0_0", 1, datetime.now(ZoneInfo("UTC")))
+
+    applied = db_api.apply_queued_reports(lambda _receipt: 1.0)
+
+    assert [(r.receipt_id, r.status) for r in applied] == [(receipt.receipt_id, "failed")]
+    assert session.query(Grade).count() == 0
+    assert db_api.get_report_receipt(FIRST_COURSE_NAME, receipt.receipt_id).status == "failed"
+
+
+def test_apply_queued_reports_skips_student_of_another_applier(db_api_with_initialized_first_course, session, engine):
+    db_api = db_api_with_initialized_first_course
+    create_user(db_api)
+    receipt = db_api.enqueue_report(FIRST_COURSE_NAME, TEST_USERNAME, "task_0_0", 1, datetime.now(ZoneInfo("UTC")))
+    course_id = session.query(Course).filter_by(name=FIRST_COURSE_NAME).one().id
+
+    with engine.connect() as other_applier, other_applier.begin():
+        other_applier.execute(
+            text("SELECT pg_advisory_xact_lock(:course_id, hashtext(:username))"),
+            {"course_id": course_id, "username": TEST_USERNAME},
+        )
+        assert db_api.apply_queued_reports(lambda _receipt: 1.0) == []
+
+    assert [r.receipt_id for r in db_api.apply_queued_reports(lambda _receipt: 1.0)] == [receipt.receipt_id]
+
+
 def test_store_score_with_changed_task_name(
     db_api,
     first_course_config,
@@ -983,6 +1149,65 @@ def test_check_if_course_admin_namespace_program_manager_is_not_admin(db_api_wit
     assert not db_api_with_initialized_first_course.check_if_course_admin(FIRST_COURSE_NAME, TEST_USERNAME)
 
 
+def test_get_auth_context_matches_storage_checks(db_api_with_initialized_first_course, session, engine):
+    db_api = db_api_with_initialized_first_course
+    owner_id = session.query(User).filter_by(username="instance_admin").one().id
+    create_user(db_api)
+    user = session.query(User).filter_by(username=TEST_USERNAME).one()
+
+    auth_context = db_api.get_auth_context(TEST_USERNAME)
+    assert auth_context.stored_user.username == TEST_USERNAME
+    assert not auth_context.instance_admin
+    assert not auth_context.is_enrolled(FIRST_COURSE_NAME)
+    assert not auth_context.is_course_admin(FIRST_COURSE_NAME)
+
+    _create_namespace_with_course(session, created_by_id=owner_id)
+    session.add(
+        UserOnNamespace(
+            user_id=user.id,
+            namespace_id=1,
+            role=UserOnNamespaceRole.NAMESPACE_ADMIN,
+            assigned_by_id=owner_id,
+        )
+    )
+    session.commit()
+    db_api.sync_user_on_course(FIRST_COURSE_NAME, TEST_USERNAME, False)
+
+    with query_counter(engine) as counter:
+        auth_context = db_api.get_auth_context(TEST_USERNAME)
+    assert counter.value == 1
+    assert auth_context.namespace_admin_namespaces == [1]
+    assert auth_context.is_enrolled(FIRST_COURSE_NAME)
+    assert auth_context.is_course_admin(FIRST_COURSE_NAME) == db_api.check_if_course_admin(
+        FIRST_COURSE_NAME, TEST_USERNAME
+    )
+
+    assert db_api.get_auth_context("instance_admin").namespace_roles == {1: "namespace_admin"}
+    assert db_api.get_auth_context("unknown_user").stored_user is None
+
+
+def test_sync_user_on_course_does_not_write_when_unchanged(db_api_with_initialized_first_course, engine):
+    db_api = db_api_with_initialized_first_course
+    create_user(db_api)
+    db_api.sync_user_on_course(FIRST_COURSE_NAME, TEST_USERNAME, True)
+
+    statements = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", _record)
+    try:
+        db_api.sync_user_on_course(FIRST_COURSE_NAME, TEST_USERNAME, True)
+        db_api.sync_user_on_course(FIRST_COURSE_NAME, TEST_USERNAME, False)
+    finally:
+        event.remove(engine, "before_cursor_execute", _record)
+
+    assert statements
+    assert all(statement.lstrip().upper().startswith("SELECT") for statement in statements)
+    assert db_api.check_if_course_admin(FIRST_COURSE_NAME, TEST_USERNAME)
+
+
 def test_check_if_course_admin_no_namespace_uses_course_flag(db_api_with_initialized_first_course, session):
     """When the course has no namespace, only the per-course admin flag matters."""
     create_user(db_api_with_initialized_first_course)
@@ -1776,6 +2001,7 @@ def test_grade_config_estimation_with_removing_grade(
         ("get_groups", {"course_name": FIRST_COURSE_NAME, "enabled": True, "started": True}),
         ("get_user_courses_names_with_statuses", {"username": TEST_USERNAME_1}),
         ("get_courses_where_course_admin", {"username": TEST_USERNAME_1}),
+        ("get_auth_context", {"username": TEST_USERNAME_1}),
     ],
 )
 def test_constant_queries(  # noqa: PLR0913
@@ -0,0 +1,182 @@
+import re
+from datetime import datetime, timezone
+
+import pytest
+from alembic import command
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import Session
+
+from manytask.abstract import ReportedSubmission
+from manytask.course import CourseConfig
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.models import Base, Course, Grade, Task, TaskGroup, User, UserOnCourse
+from tests.constants import TEST_COURSE_NAME
+
+TASK_A = "task_a"
+TASK_B = "task_b"
+OTHER_COURSE_NAME = "other_course"
+GRADES_TABLE = re.compile(r"\bgrades\b")
+# the relationship loads of UserOnCourse.grades compare the bound course id the other way around
+PRUNED = re.compile(r"grades\.course_id = |= grades\.course_id\b|INSERT INTO grades \(course_id")
+
+
+def _add_course(session, name, students):
+    course = Course(
+        name=name,
+        registration_secret=f"{name}-secret",
+        token=f"{name}-token",
+        gitlab_course_group=name,
+        gitlab_course_public_repo=f"{name}/public",
+        gitlab_course_students_group=f"{name}/students",
+        gitlab_default_branch="main",
+        task_url_template="",
+    )
+    group = TaskGroup(name="group", course=course)
+    tasks = {task_name: Task(name=task_name, group=group, score=50) for task_name in (TASK_A, TASK_B)}
+    session.add_all([course, group, *tasks.values()])
+    for user in students:
+        user_on_course = UserOnCourse(user=user, course=course)
+        session.add(user_on_course)
+        session.add(Grade(user_on_course=user_on_course, task=tasks[TASK_A], score=10))
+    return course
+
+
+@pytest.fixture
+def db_api(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'grades.db'}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        users = [
+            User(username=username, first_name=username, last_name="", rms_id=username, auth_id=auth_id)
+            for auth_id, username in enumerate(["alice", "bob"])
+        ]
+        _add_course(session, TEST_COURSE_NAME, users)
+        _add_course(session, OTHER_COURSE_NAME, users)
+        session.commit()
+    engine.dispose()
+    return DataBaseApi(DatabaseConfig(database_url=database_url, instance_admin_username="admin"))
+
+
+def test_grades_store_course_of_student(db_api):
+    with Session(db_api.engine) as session:
+        rows = session.execute(
+            select(Grade.course_id, UserOnCourse.course_id).join(Grade.user_on_course).order_by(Grade.id)
+        ).all()
+
+    assert len(rows) == 4  # noqa: PLR2004
+    assert all(grade_course_id == course_id for grade_course_id, course_id in rows)
+
+
+def test_every_grades_query_filters_by_course(db_api):
+    statements = []
+
+    @event.listens_for(db_api.engine, "before_cursor_execute")
+    def record(_conn, _cursor, statement, _parameters, _context, _executemany):
+        if GRADES_TABLE.search(statement):
+            statements.append(statement)
+
+    now = datetime.now(timezone.utc)
+    db_api.store_score(TEST_COURSE_NAME, "alice", TASK_A, lambda _, score: score + 1)
+    db_api.store_score(TEST_COURSE_NAME, "alice", TASK_B, lambda _, score: score + 1)
+    db_api.upsert_score(TEST_COURSE_NAME, "bob", TASK_B, 20, submission=ReportedSubmission(20, 1.0, now))
+    db_api.update_scores(TEST_COURSE_NAME, {"alice": {TASK_A: 5}, "bob": {TASK_A: 7}})
+    db_api.get_scores(TEST_COURSE_NAME, "alice")
+    db_api.get_bonus_score(TEST_COURSE_NAME, "alice")
+    db_api.get_all_scores_with_names(TEST_COURSE_NAME)
+    list(db_api.iter_scores_with_names(TEST_COURSE_NAME))
+    db_api.get_students_scores_with_names(TEST_COURSE_NAME, ["bob"])
+    for order_by in ("total_score", f"task:{TASK_A}"):
+        db_api.get_scores_with_names_page(TEST_COURSE_NAME, offset=0, limit=10, order_by=order_by)
+    db_api.get_stats(TEST_COURSE_NAME)
+    db_api.recalculate_grades(TEST_COURSE_NAME)
+
+    assert statements
+    assert [statement for statement in statements if not PRUNED.search(statement)] == []
+    assert db_api.get_all_scores_with_names(OTHER_COURSE_NAME)["alice"][0] == {TASK_A: (10, False)}
+
+
+def _partitions(session):
+    return set(
+        session.scalars(text("SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'grades'::regclass"))
+    )
+
+
+def _explain(session, statement):
+    return "\n".join(session.scalars(text(f"EXPLAIN {statement}")))
+
+
+def test_grades_partitioning_migration(engine, alembic_cfg, postgres_container, monkeypatch):
+    """Partition a database with grades, then check the copied data and the plans of the score queries"""
+    with engine.begin() as connection:
+        alembic_cfg.attributes["connection"] = connection
+        command.downgrade(alembic_cfg, "base")
+        command.upgrade(alembic_cfg, "a1d5c9e0f284")
+    with Session(engine) as session:
+        users = [
+            User(username=username, first_name=username, last_name="", rms_id=username, auth_id=auth_id)
+            for auth_id, username in enumerate(["alice", "bob"])
+        ]
+        _add_course(session, TEST_COURSE_NAME, users)
+        _add_course(session, OTHER_COURSE_NAME, users)
+        session.commit()
+        course_id = session.scalar(select(Course.id).where(Course.name == TEST_COURSE_NAME))
+
+    monkeypatch.setenv("GRADES_PARTITIONING", "true")
+    try:
+        with engine.begin() as connection:
+            alembic_cfg.attributes["connection"] = connection
+            command.upgrade(alembic_cfg, "head")
+
+        db_api = DataBaseApi(
+            DatabaseConfig(
+                database_url=postgres_container.get_connection_url(),
+                instance_admin_username="admin",
+                apply_migrations=False,
+            )
+        )
+        db_api.create_course(
+            CourseConfig(
+                course_name="new_course",
+                namespace_id=None,
+                gitlab_course_group="new",
+                gitlab_course_public_repo="new/public",
+                gitlab_course_students_group="new/students",
+                gitlab_default_branch="main",
+                registration_secret="new-secret",
+                token="new-token",
+                show_allscores=False,
+            )
+        )
+        db_api.upsert_score(TEST_COURSE_NAME, "alice", TASK_B, 20)
+
+        with Session(engine) as session:
+            partitions = _partitions(session)
+            new_course_id = session.scalar(select(Course.id).where(Course.name == "new_course"))
+            assert len(partitions) == 4  # noqa: PLR2004
+            assert {"grades_default", f"grades_course_{course_id}", f"grades_course_{new_course_id}"} <= partitions
+            assert session.scalar(text(f"SELECT count(*) FROM grades_course_{course_id}")) == 3  # noqa: PLR2004
+            plan = _explain(
+                session,
+                "SELECT grades.score FROM grades "
+                "JOIN users_on_courses ON users_on_courses.id = grades.user_on_course_id "
+                f"WHERE grades.course_id = {course_id} AND users_on_courses.course_id = {course_id}",
+            )
+            assert f"grades_course_{course_id}" in plan
+            assert all(f"{partition} " not in plan for partition in partitions - {f"grades_course_{course_id}"})
+
+        assert db_api.get_all_scores_with_names(TEST_COURSE_NAME)["alice"][0] == {
+            TASK_A: (10, False),
+            TASK_B: (20, False),
+        }
+
+        with engine.begin() as connection:
+            alembic_cfg.attributes["connection"] = connection
+            command.downgrade(alembic_cfg, "a1d5c9e0f284")
+        with Session(engine) as session:
+            assert _partitions(session) == set()
+            assert session.scalar(text("SELECT count(*) FROM grades")) == 5  # noqa: PLR2004
+    finally:
+        with engine.begin() as connection:
+            alembic_cfg.attributes["connection"] = connection
+            command.downgrade(alembic_cfg, "base")
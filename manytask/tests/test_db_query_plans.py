@@ -0,0 +1,133 @@
+import re
+
+import pytest
+from sqlalchemy import event, text
+
+from manytask.database import DataBaseApi, DatabaseConfig
+
+NAMESPACES = 3
+COURSES = 30
+STUDENTS = 300  # per course
+GROUPS = 5  # per course
+TASKS = 4  # per group
+PROGRAM_MANAGERS = 5  # per namespace
+COURSE_ID = 7
+COURSE_NAME = f"course_{COURSE_ID}"
+NAMESPACE_ID = COURSE_ID % NAMESPACES + 1
+STUDENT = f"student_{(COURSE_ID - 1) * STUDENTS + 1}"
+
+# a course of STUDENTS students, GROUPS * TASKS tasks and two thirds of the grades filled, COURSES times
+SEED = [
+    "INSERT INTO users (username, first_name, last_name, rms_id, auth_id) "
+    "SELECT 'student_' || n, 'First', 'Last', 'rms_' || n, n FROM generate_series(1, :courses * :students) n",
+    "INSERT INTO namespaces (name, slug, gitlab_group_id, created_by_id) "
+    "SELECT 'Namespace ' || n, 'namespace-' || n, n, 1 FROM generate_series(1, :namespaces) n",
+    "INSERT INTO users_on_namespaces (user_id, namespace_id, role, assigned_by_id) "
+    "SELECT u.id, ns.id, 'PROGRAM_MANAGER', 1 FROM namespaces ns "
+    "JOIN users u ON u.id BETWEEN ns.id * 1000 AND ns.id * 1000 + :program_managers - 1",
+    "INSERT INTO courses (namespace_id, name, registration_secret, token, show_allscores, status, "
+    "gitlab_course_group, gitlab_course_public_repo, gitlab_course_students_group, gitlab_default_branch, "
+    "task_url_template) "
+    "SELECT n % :namespaces + 1, 'course_' || n, 'secret_' || n, 'token_' || n, true, 'IN_PROGRESS', "
+    "'course_' || n, 'course_' || n || '/public', 'course_' || n || '/students', 'main', '' "
+    "FROM generate_series(1, :courses) n",
+    'INSERT INTO deadlines (start, "end") '
+    "SELECT now() - interval '30 days', now() + interval '30 days' FROM generate_series(1, :courses * :groups)",
+    "INSERT INTO task_groups (name, course_id, deadline_id, position) "
+    "SELECT 'group_' || g, c.id, (c.id - 1) * :groups + g, g FROM courses c, generate_series(1, :groups) g",
+    "INSERT INTO tasks (name, group_id, score, is_bonus, position) "
+    "SELECT g.name || '_task_' || t, g.id, 10, false, t FROM task_groups g, generate_series(1, :tasks) t",
+    "INSERT INTO users_on_courses (user_id, course_id, is_course_admin) "
+    "SELECT u.id, (u.id - 1) / :students + 1, false FROM users u",
+    "INSERT INTO grades (course_id, user_on_course_id, task_id, score) "
+    "SELECT uoc.course_id, uoc.id, t.id, 10 FROM users_on_courses uoc "
+    "JOIN task_groups g ON g.course_id = uoc.course_id JOIN tasks t ON t.group_id = g.id "
+    "WHERE (uoc.id + t.id) % 3 <> 0",
+]
+
+# access path -> index expected to serve it
+ACCESS_PATHS = {
+    f"SELECT user_id FROM users_on_courses WHERE course_id = {COURSE_ID}": "ix_users_on_courses_course_id_user_id",
+    f"SELECT id FROM task_groups WHERE course_id = {COURSE_ID} ORDER BY position": "ix_task_groups_course_id_position",
+    "SELECT id FROM tasks WHERE group_id = 31 ORDER BY position": "ix_tasks_group_id_position",
+    f"SELECT score FROM grades WHERE course_id = {COURSE_ID} AND task_id = 121": "ix_grades_course_id_task_id",
+    (
+        f"SELECT user_id FROM users_on_namespaces WHERE namespace_id = {NAMESPACE_ID} AND role = 'PROGRAM_MANAGER'"
+    ): "ix_users_on_namespaces_namespace_id_role",
+    f"SELECT id FROM courses WHERE namespace_id IN ({NAMESPACE_ID})": "ix_courses_namespace_id",
+}
+# tables large enough for a sequential scan of a production instance to hurt
+LARGE_TABLE_SCAN = re.compile(r"Seq Scan on (grades|users_on_courses)\b")
+
+
+@pytest.fixture
+def db_api(engine, tables, postgres_container):
+    with engine.begin() as connection:
+        params = {
+            "namespaces": NAMESPACES,
+            "courses": COURSES,
+            "students": STUDENTS,
+            "groups": GROUPS,
+            "tasks": TASKS,
+            "program_managers": PROGRAM_MANAGERS,
+        }
+        for statement in SEED:
+            connection.execute(text(statement), params)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("ANALYZE"))
+
+    return DataBaseApi(
+        DatabaseConfig(
+            database_url=postgres_container.get_connection_url(),
+            instance_admin_username="admin",
+            apply_migrations=False,
+        )
+    )
+
+
+def _explain(connection, statement, parameters=None):
+    return "\n".join(row[0] for row in connection.exec_driver_sql(f"EXPLAIN {statement}", parameters or ()))
+
+
+def test_hot_access_paths_use_indexes(db_api):
+    """Every hot access path has an index of its own"""
+    plans = {}
+    with db_api.engine.begin() as connection:
+        # the small tables of the test database are cheaper to read whole, without sequential scans
+        # the plan shows the index the planner picks for the access path on a large instance
+        connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for statement in ACCESS_PATHS:
+            plans[statement] = _explain(connection, statement)
+
+    assert {statement: plan for statement, plan in plans.items() if ACCESS_PATHS[statement] not in plan} == {}
+
+
+def test_score_queries_do_not_scan_large_tables(db_api):
+    """EXPLAIN the statements of the course page and the score table queries of one course"""
+    statements = []
+
+    @event.listens_for(db_api.engine, "before_cursor_execute")
+    def record(_conn, _cursor, statement, parameters, _context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    db_api.get_all_scores_with_names(COURSE_NAME)
+    db_api.get_scores_with_names_page(COURSE_NAME, offset=100, limit=50, order_by="total_score", descending=True)
+    db_api.get_students_scores_with_names(COURSE_NAME, [STUDENT])
+    db_api.get_scores(COURSE_NAME, STUDENT)
+    db_api.get_bonus_score(COURSE_NAME, STUDENT)
+    db_api.get_stats(COURSE_NAME)
+    db_api.get_groups(COURSE_NAME, enabled=True, started=True)
+    db_api.get_course_users_with_admin_status(COURSE_NAME)
+    db_api.check_if_course_admin(COURSE_NAME, STUDENT)
+    db_api.get_courses_by_namespace_ids([NAMESPACE_ID])
+    event.remove(db_api.engine, "before_cursor_execute", record)
+
+    assert statements
+    with db_api.engine.connect() as connection:
+        scans = {
+            statement: plan
+            for statement, parameters in statements
+            if LARGE_TABLE_SCAN.search(plan := _explain(connection, statement, parameters))
+        }
+    assert scans == {}
@@ -0,0 +1,89 @@
+import logging
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.models import Base, Namespace, User
+
+ADMIN_USERNAME = "admin"
+
+
+def _create_database(url, namespace_name):
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(username="creator", first_name="First", last_name="Last", rms_id="1", auth_id=1)
+        session.add_all([user, Namespace(name=namespace_name, slug=namespace_name, gitlab_group_id=1, created_by=user)])
+        session.commit()
+    engine.dispose()
+
+
+@pytest.fixture
+def primary_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'primary.db'}"
+    _create_database(url, "primary")
+    return url
+
+
+@pytest.fixture
+def replica_url(tmp_path):
+    # a real replica has the same data, a different one shows where the read went
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    _create_database(url, "replica")
+    return url
+
+
+def _namespace_names(db_api):
+    return sorted(namespace.name for namespace in db_api.get_all_namespaces())
+
+
+def test_without_replica_reads_from_primary(primary_url):
+    db_api = DataBaseApi(DatabaseConfig(database_url=primary_url, instance_admin_username=ADMIN_USERNAME))
+
+    assert db_api.replica_engine is None
+    assert _namespace_names(db_api) == ["primary"]
+
+
+def test_read_only_methods_use_replica(primary_url, replica_url):
+    db_api = DataBaseApi(
+        DatabaseConfig(database_url=primary_url, instance_admin_username=ADMIN_USERNAME, replica_url=replica_url)
+    )
+
+    assert _namespace_names(db_api) == ["replica"]
+    # other methods keep using the primary
+    assert db_api.get_stored_user_by_username(ADMIN_USERNAME).username == ADMIN_USERNAME
+
+
+def test_reads_stick_to_primary_after_write_in_request(primary_url, replica_url):
+    db_api = DataBaseApi(
+        DatabaseConfig(database_url=primary_url, instance_admin_username=ADMIN_USERNAME, replica_url=replica_url)
+    )
+    app = Flask(__name__)
+
+    with app.test_request_context():
+        assert _namespace_names(db_api) == ["replica"]
+        db_api.create_namespace("new", "new", None, 2, ADMIN_USERNAME)
+        assert _namespace_names(db_api) == ["new", "primary"]
+
+    with app.test_request_context():
+        assert _namespace_names(db_api) == ["replica"]
+
+
+def test_unavailable_replica_falls_back_to_primary(primary_url, tmp_path, caplog):
+    db_api = DataBaseApi(
+        DatabaseConfig(
+            database_url=primary_url,
+            instance_admin_username=ADMIN_USERNAME,
+            replica_url=f"sqlite:///{tmp_path / 'missing' / 'replica.db'}",
+        )
+    )
+
+    with caplog.at_level(logging.WARNING, logger="manytask.database"):
+        assert _namespace_names(db_api) == ["primary"]
+        assert _namespace_names(db_api) == ["primary"]
+
+    # the replica is not retried until replica_retry_interval passes
+    assert caplog.text.count("Read replica is unavailable") == 1
@@ -0,0 +1,143 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import NoResultFound
+from sqlalchemy.orm import Session
+
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.models import Base, Course, Grade, Task, TaskGroup, User, UserOnCourse
+from tests.constants import TEST_COURSE_NAME
+
+TASK_A = "task_a"
+TASK_B = "task_b"
+# username: (first name, last name, {task: score}, final grade, comment)
+STUDENTS = {
+    "alice": ("Alice", "Smith", {TASK_A: 10, TASK_B: 30}, 4, "late"),
+    "bob": ("Bob", "Jones", {TASK_A: 20}, 3, None),
+    "ivan": ("Иван", "Иванов", {TASK_B: 5}, 2, None),
+    "ilya": ("Илья", "Иванов", {}, None, "absent"),
+}
+
+
+@pytest.fixture
+def db_api(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'page.db'}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        course = Course(
+            name=TEST_COURSE_NAME,
+            registration_secret="secret",
+            token="token",
+            gitlab_course_group="course",
+            gitlab_course_public_repo="course/public",
+            gitlab_course_students_group="course/students",
+            gitlab_default_branch="main",
+            task_url_template="",
+        )
+        group = TaskGroup(name="group", course=course)
+        tasks = {name: Task(name=name, group=group, score=50) for name in (TASK_A, TASK_B)}
+        session.add_all([course, group, *tasks.values()])
+        for auth_id, (username, (first_name, last_name, scores, final_grade, comment)) in enumerate(STUDENTS.items()):
+            user = User(username=username, first_name=first_name, last_name=last_name, rms_id=username, auth_id=auth_id)
+            user_on_course = UserOnCourse(user=user, course=course, final_grade=final_grade, comment=comment)
+            session.add_all([user, user_on_course])
+            for task_name, score in scores.items():
+                session.add(Grade(user_on_course=user_on_course, task=tasks[task_name], score=score))
+        session.commit()
+    engine.dispose()
+    return DataBaseApi(DatabaseConfig(database_url=database_url, instance_admin_username="admin"))
+
+
+@pytest.mark.parametrize(
+    "order_by,descending,expected",
+    [
+        ("username", False, ["alice", "bob", "ilya", "ivan"]),
+        ("total_score", True, ["alice", "bob", "ivan", "ilya"]),
+        ("task:" + TASK_A, True, ["bob", "alice", "ilya", "ivan"]),
+        ("grade", False, ["ilya", "ivan", "bob", "alice"]),
+        ("comment", False, ["bob", "ivan", "ilya", "alice"]),
+    ],
+)
+def test_page_order(db_api, order_by, descending, expected):
+    total, page = db_api.get_scores_with_names_page(
+        TEST_COURSE_NAME, offset=0, limit=10, order_by=order_by, descending=descending
+    )
+
+    assert total == len(STUDENTS)
+    assert list(page) == expected
+
+
+def test_page_contains_only_its_students(db_api):
+    total, page = db_api.get_scores_with_names_page(
+        TEST_COURSE_NAME, offset=1, limit=2, order_by="total_score", descending=True
+    )
+
+    assert total == len(STUDENTS)
+    assert page == {
+        "bob": ({TASK_A: (20, False)}, ("Bob", "Jones"), 3, None, None),
+        "ivan": ({TASK_B: (5, False)}, ("Иван", "Иванов"), 2, None, None),
+    }
+
+
+def test_page_past_the_end(db_api):
+    assert db_api.get_scores_with_names_page(TEST_COURSE_NAME, offset=10, limit=10) == (len(STUDENTS), {})
+
+
+@pytest.mark.parametrize(
+    "search,search_names,expected",
+    [
+        ("I", False, ["alice", "ilya", "ivan"]),
+        # names are matched transliterated, "first last first" allows both orders
+        ("ivanov iv", True, ["ivan"]),
+        ("Иванов", False, []),
+        ("Иванов", True, ["ilya", "ivan"]),
+    ],
+)
+def test_page_search(db_api, search, search_names, expected):
+    total, page = db_api.get_scores_with_names_page(
+        TEST_COURSE_NAME, offset=0, limit=10, search=search, search_names=search_names
+    )
+
+    assert total == len(expected)
+    assert list(page) == expected
+
+
+def test_page_unknown_sort_key(db_api):
+    with pytest.raises(ValueError, match="percent"):
+        db_api.get_scores_with_names_page(TEST_COURSE_NAME, offset=0, limit=10, order_by="percent")
+
+
+def test_update_scores_in_one_transaction(db_api):
+    stored = db_api.update_scores(
+        TEST_COURSE_NAME,
+        {"alice": {TASK_A: 5, TASK_B: 40, "unknown_task": 10}, "ilya": {TASK_A: 50}},
+    )
+
+    # lower scores of an admin edit are kept as given, unknown tasks are skipped
+    assert stored == {"alice": {TASK_A: 5, TASK_B: 40}, "ilya": {TASK_A: 50}}
+    scores = db_api.get_students_scores_with_names(TEST_COURSE_NAME, ["alice", "ilya", "nobody"])
+    assert scores.keys() == {"alice", "ilya"}
+    assert scores["alice"][0] == {TASK_A: (5, True), TASK_B: (40, True)}
+    assert scores["ilya"][0] == {TASK_A: (50, True)}
+
+
+def test_update_scores_unknown_user_changes_nothing(db_api):
+    with pytest.raises(NoResultFound, match="nobody"):
+        db_api.update_scores(TEST_COURSE_NAME, {"alice": {TASK_A: 1}, "nobody": {TASK_A: 1}})
+
+    assert db_api.get_students_scores_with_names(TEST_COURSE_NAME, ["alice"])["alice"][0][TASK_A] == (10, False)
+
+
+def test_recalculate_grades_of_some_students(db_api):
+    db_api.recalculate_grades(TEST_COURSE_NAME, ["bob"])
+
+    with Session(db_api.engine) as session:
+        grades = dict(
+            session.query(User.username, UserOnCourse.final_grade).join(UserOnCourse, UserOnCourse.user_id == User.id)
+        )
+    # the grades of the others are left as they were
+    assert {username: grades[username] for username in ("alice", "ivan", "ilya")} == {
+        "alice": 4,
+        "ivan": 2,
+        "ilya": None,
+    }
@@ -0,0 +1,168 @@
+import json
+import logging
+from http import HTTPStatus
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from manytask.api import bp as api_bp
+from manytask.course import CourseStatus
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.mock_rms import MockRmsApi
+from manytask.models import Course, Grade, Task, TaskGroup, User, UserOnCourse
+from manytask.utils.db_stats import (
+    DB_TIME_HEADER,
+    QUERY_COUNT_HEADER,
+    SESSIONS_OPENED_HEADER,
+    count_sessions,
+    init_app,
+    instrument_engine,
+)
+from tests.constants import GITLAB_BASE_URL, TEST_COURSE_NAME
+from tests.helpers import assert_max_queries, make_flask_app
+
+QUERIES_PER_REQUEST = 3
+COURSE_TOKEN = "course_token"
+# the course, its tasks and the score table, whatever the number of students
+SCORES_PAGE_QUERY_BUDGET = 10
+
+
+@pytest.fixture
+def sqlite_engine():
+    return create_engine("sqlite://")
+
+
+@pytest.fixture
+def app(sqlite_engine):
+    instrument_engine(sqlite_engine)
+    session_create = count_sessions(sessionmaker(bind=sqlite_engine))
+
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    init_app(app)
+
+    @app.route("/queries")
+    def queries():
+        with session_create() as session:
+            for _ in range(QUERIES_PER_REQUEST):
+                session.execute(text("SELECT 1"))
+        return "OK"
+
+    return app
+
+
+def test_headers_in_debug_mode(app):
+    app.debug = True
+    response = app.test_client().get("/queries")
+
+    assert response.headers[QUERY_COUNT_HEADER] == str(QUERIES_PER_REQUEST)
+    assert response.headers[SESSIONS_OPENED_HEADER] == "1"
+    assert float(response.headers[DB_TIME_HEADER]) >= 0
+
+
+def test_no_headers_in_production_mode(app):
+    app.debug = False
+    response = app.test_client().get("/queries")
+
+    assert QUERY_COUNT_HEADER not in response.headers
+    assert DB_TIME_HEADER not in response.headers
+
+
+def test_stats_are_per_request(app):
+    app.debug = True
+    client = app.test_client()
+    client.get("/queries")
+    response = client.get("/queries")
+
+    assert response.headers[QUERY_COUNT_HEADER] == str(QUERIES_PER_REQUEST)
+
+
+def test_assert_max_queries(app):
+    client = app.test_client()
+
+    with assert_max_queries(QUERIES_PER_REQUEST) as stats:
+        client.get("/queries")
+    assert stats.sessions_opened == 1
+
+    with pytest.raises(AssertionError, match="at most"):
+        with assert_max_queries(QUERIES_PER_REQUEST - 1):
+            client.get("/queries")
+
+
+def test_slow_query_log(caplog):
+    engine = create_engine("sqlite://")
+    instrument_engine(engine, slow_query_threshold_ms=0)
+
+    with caplog.at_level(logging.WARNING, logger="manytask.utils.db_stats"):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT   1"))
+
+    slow_records = [record for record in caplog.records if record.getMessage().startswith("Slow query")]
+    assert len(slow_records) == 1
+    payload = json.loads(slow_records[0].getMessage().removeprefix("Slow query: "))
+    assert payload["statement"] == "SELECT 1"
+    assert payload["threshold_ms"] == 0
+    assert payload["endpoint"] is None
+
+
+def test_no_slow_query_log_without_threshold(sqlite_engine, caplog):
+    instrument_engine(sqlite_engine)
+
+    with caplog.at_level(logging.WARNING, logger="manytask.utils.db_stats"):
+        with sqlite_engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+
+    assert not [record for record in caplog.records if record.getMessage().startswith("Slow query")]
+
+
+@pytest.fixture
+def scores_app(engine, session, postgres_container):
+    """API app on the migrated Postgres schema, its queries go through the instrumented test engine"""
+    instrument_engine(engine)
+    app = make_flask_app(api_bp)
+    app.storage_api = DataBaseApi(
+        DatabaseConfig(
+            database_url=postgres_container.get_connection_url(),
+            instance_admin_username="admin",
+            session_factory=lambda: session,
+        )
+    )
+    app.rms_api = MockRmsApi(GITLAB_BASE_URL)
+    return app
+
+
+def _add_scored_students(session, students):
+    course = Course(
+        name=TEST_COURSE_NAME,
+        registration_secret="secret",
+        token=COURSE_TOKEN,
+        gitlab_course_group="course",
+        gitlab_course_public_repo="course/public",
+        gitlab_course_students_group="course/students",
+        gitlab_default_branch="main",
+        task_url_template="",
+        status=CourseStatus.IN_PROGRESS,
+    )
+    group = TaskGroup(name="group", course=course)
+    tasks = [Task(name=f"task_{number}", group=group, score=10) for number in range(3)]
+    session.add_all([course, group, *tasks])
+    for number in range(students):
+        user = User(username=f"student{number}", first_name="", last_name="", rms_id=str(number), auth_id=number)
+        user_on_course = UserOnCourse(user=user, course=course)
+        session.add_all([user, user_on_course])
+        session.add_all(Grade(user_on_course=user_on_course, task=task, score=number) for task in tasks)
+    session.commit()
+
+
+@pytest.mark.parametrize("students", [1, 30])
+def test_scores_page_query_budget(scores_app, session, students):
+    _add_scored_students(session, students)
+    client = scores_app.test_client()
+
+    with assert_max_queries(SCORES_PAGE_QUERY_BUDGET):
+        response = client.get(f"/api/{TEST_COURSE_NAME}/database", headers={"Authorization": f"Bearer {COURSE_TOKEN}"})
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.get_json()["students"]) == students
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.models import Base, Course, User, UserOnCourse
+from tests.constants import TEST_COURSE_NAME
+
+USERNAME = "alice"
+REPO_URL = f"https://gitlab.example.com/course/students/{USERNAME}"
+
+
+@pytest.fixture
+def db_api(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'repo.db'}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        course = Course(
+            name=TEST_COURSE_NAME,
+            registration_secret="secret",
+            token="token",
+            gitlab_course_group="course",
+            gitlab_course_public_repo="course/public",
+            gitlab_course_students_group="course/students",
+            gitlab_default_branch="main",
+            task_url_template="",
+        )
+        user = User(username=USERNAME, first_name="Alice", last_name="Smith", rms_id="1", auth_id=1)
+        session.add_all([course, user, UserOnCourse(user=user, course=course)])
+        session.add(User(username="bob", first_name="Bob", last_name="Jones", rms_id="2", auth_id=2))
+        session.commit()
+    engine.dispose()
+    return DataBaseApi(DatabaseConfig(database_url=database_url, instance_admin_username="admin"))
+
+
+def test_store_student_repo(db_api):
+    assert db_api.get_student_repo(TEST_COURSE_NAME, USERNAME) is None
+    before = datetime.now(timezone.utc)
+
+    db_api.store_student_repo(TEST_COURSE_NAME, USERNAME, REPO_URL, "42")
+
+    stored_repo = db_api.get_student_repo(TEST_COURSE_NAME, USERNAME)
+    assert (stored_repo.url, stored_repo.repo_id) == (REPO_URL, "42")
+    assert before <= stored_repo.created_at == stored_repo.verified_at
+
+
+def test_reverify_keeps_creation_and_id(db_api):
+    db_api.store_student_repo(TEST_COURSE_NAME, USERNAME, REPO_URL, "42")
+    created = db_api.get_student_repo(TEST_COURSE_NAME, USERNAME)
+
+    db_api.store_student_repo(TEST_COURSE_NAME, USERNAME, REPO_URL)
+
+    verified = db_api.get_student_repo(TEST_COURSE_NAME, USERNAME)
+    assert (verified.repo_id, verified.created_at) == ("42", created.created_at)
+    assert verified.verified_at > created.verified_at
+
+
+def test_other_repo_replaces_state(db_api):
+    db_api.store_student_repo(TEST_COURSE_NAME, USERNAME, REPO_URL, "42")
+
+    db_api.store_student_repo(TEST_COURSE_NAME, USERNAME, f"{REPO_URL}-new")
+
+    stored_repo = db_api.get_student_repo(TEST_COURSE_NAME, USERNAME)
+    assert (stored_repo.url, stored_repo.repo_id) == (f"{REPO_URL}-new", None)
+
+
+def test_clear_student_repo(db_api):
+    db_api.store_student_repo(TEST_COURSE_NAME, USERNAME, REPO_URL, "42")
+
+    db_api.clear_student_repo(TEST_COURSE_NAME, USERNAME)
+
+    assert db_api.get_student_repo(TEST_COURSE_NAME, USERNAME) is None
+
+
+def test_not_enrolled_user_is_not_recorded(db_api):
+    db_api.store_student_repo(TEST_COURSE_NAME, "bob", REPO_URL)
+
+    assert db_api.get_student_repo(TEST_COURSE_NAME, "bob") is None
+
+
+def test_request_repo_provisioning(db_api):
+    db_api.store_student_repo(TEST_COURSE_NAME, USERNAME, REPO_URL, "42")
+
+    requested = db_api.request_repo_provisioning(TEST_COURSE_NAME, ["bob", USERNAME, "nobody"])
+
+    # alice already has a repo, unknown users are skipped, bob gets enrolled
+    assert requested == ["bob"]
+    assert db_api.check_user_on_course(TEST_COURSE_NAME, "bob")
+    assert [(state.username, state.status) for state in db_api.get_repo_provisioning(TEST_COURSE_NAME)] == [
+        ("bob", "pending")
+    ]
+
+
+def test_repo_provisioning_failure_and_retry(db_api):
+    db_api.request_repo_provisioning(TEST_COURSE_NAME, ["bob"])
+    db_api.fail_repo_provisioning(TEST_COURSE_NAME, "bob", "Forking failed")
+
+    (failed,) = db_api.get_repo_provisioning(TEST_COURSE_NAME)
+    assert (failed.status, failed.error) == ("failed", "Forking failed")
+
+    # requesting again resumes the failed student
+    assert db_api.request_repo_provisioning(TEST_COURSE_NAME, ["bob"]) == ["bob"]
+    db_api.store_student_repo(TEST_COURSE_NAME, "bob", REPO_URL)
+
+    (done,) = db_api.get_repo_provisioning(TEST_COURSE_NAME)
+    assert (done.status, done.repo_url, done.error) == ("done", REPO_URL, None)
@@ -0,0 +1,139 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from manytask.events import (
+    EVENTS_ENABLED,
+    NOTIFY_CHANNEL,
+    EventBroker,
+    PostgresEventBroker,
+    get_broker,
+    init_app,
+    iter_sse,
+    publish,
+)
+from tests.constants import TEST_COURSE_NAME, TEST_USERNAME
+from tests.helpers import make_flask_app
+
+OTHER_COURSE_NAME = "other_course"
+EVENT = {"type": "row", "username": TEST_USERNAME, "grade": 5}
+
+
+@pytest.fixture
+def app():
+    app = make_flask_app()
+    app.storage_api = MagicMock()
+    return app
+
+
+def _data_lines(stream):
+    return [line for line in stream if line.startswith("data: ")]
+
+
+def test_broker_delivers_events_of_the_course():
+    broker = EventBroker()
+    subscription = broker.subscribe(TEST_COURSE_NAME)
+    other_subscription = broker.subscribe(OTHER_COURSE_NAME)
+
+    broker.publish(TEST_COURSE_NAME, EVENT)
+
+    assert subscription.get(timeout=0) == EVENT
+    assert other_subscription._events.empty()
+
+
+def test_broker_limits_subscribers():
+    broker = EventBroker(max_subscribers=1)
+    subscription = broker.subscribe(TEST_COURSE_NAME)
+
+    assert broker.subscribe(OTHER_COURSE_NAME) is None
+
+    subscription.close()
+    subscription.close()
+    assert broker.subscriber_count == 0
+    assert broker.subscribe(OTHER_COURSE_NAME) is not None
+
+
+def test_lagging_subscriber_is_asked_to_reload():
+    broker = EventBroker(max_pending=1)
+    subscription = broker.subscribe(TEST_COURSE_NAME)
+
+    broker.publish(TEST_COURSE_NAME, EVENT)
+    broker.publish(TEST_COURSE_NAME, EVENT)
+
+    lines = list(iter_sse(subscription, heartbeat_interval=0.01, timeout=1))
+    assert lines[-1] == "event: reload\ndata: {}\n\n"
+    assert broker.subscriber_count == 0
+
+
+def test_iter_sse_sends_events_and_heartbeats():
+    broker = EventBroker()
+    subscription = broker.subscribe(TEST_COURSE_NAME)
+    broker.publish(TEST_COURSE_NAME, EVENT)
+
+    lines = list(iter_sse(subscription, heartbeat_interval=0.01, timeout=0.05))
+
+    assert lines[0] == "retry: 5000\n\n"
+    assert _data_lines(lines) == [f"data: {json.dumps(EVENT, separators=(',', ':'))}\n\n"]
+    assert ": heartbeat\n\n" in lines
+    # the stream ended by timeout released the slot
+    assert broker.subscriber_count == 0
+
+
+def test_postgres_broker_notifies_and_delivers():
+    engine = MagicMock()
+    broker = PostgresEventBroker(engine)
+    subscription = broker.subscribe(TEST_COURSE_NAME)
+
+    broker.publish(TEST_COURSE_NAME, EVENT)
+
+    # nothing is delivered before the notification comes back from the database
+    assert subscription._events.empty()
+    statement, params = engine.begin.return_value.__enter__.return_value.execute.call_args.args
+    assert "pg_notify" in str(statement)
+    assert params["channel"] == NOTIFY_CHANNEL
+
+    broker.deliver(params["payload"])
+    broker.deliver("not json")
+
+    assert subscription.get(timeout=0) == EVENT
+    assert subscription._events.empty()
+
+
+def test_publish_errors_are_ignored(app):
+    app.config[EVENTS_ENABLED] = True
+    init_app(app)
+    get_broker(app).publish = MagicMock(side_effect=RuntimeError("connection lost"))
+
+    publish(app, TEST_COURSE_NAME, EVENT)
+
+
+def test_init_app_disabled_by_default(app, monkeypatch):
+    monkeypatch.delenv(EVENTS_ENABLED, raising=False)
+
+    init_app(app)
+
+    assert app.config[EVENTS_ENABLED] is False
+    assert get_broker(app) is None
+    publish(app, TEST_COURSE_NAME, EVENT)
+
+
+def test_init_app_picks_the_broker(app, monkeypatch):
+    monkeypatch.setenv(EVENTS_ENABLED, "true")
+    app.storage_api.engine.dialect.name = "postgresql"
+
+    init_app(app)
+
+    broker = get_broker(app)
+    assert isinstance(broker, PostgresEventBroker)
+    # the listener is not started in tests
+    assert broker._listener is None
+
+
+def test_init_app_sqlite_uses_in_process_broker(app, monkeypatch):
+    monkeypatch.setenv(EVENTS_ENABLED, "true")
+    app.storage_api.engine.dialect.name = "sqlite"
+
+    init_app(app)
+
+    assert type(get_broker(app)) is EventBroker
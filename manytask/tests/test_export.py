@@ -0,0 +1,66 @@
+import csv
+import json
+
+from manytask.utils.export import iter_csv, iter_jsonl
+
+TASKS = [{"name": "task_1", "score": 0, "group": "group"}, {"name": "task_2", "score": 0, "group": "group"}]
+ROWS = [
+    {
+        "username": "student",
+        "scores": {"task_1": 10},
+        "total_score": 10,
+        "percent": 50.0,
+        "large_count": 0,
+        "first_name": "First",
+        "last_name": "Last, Jr.",
+        "repo_url": "https://gitlab.com/students/student",
+        "comment": 'multi\nline "comment"',
+        "grade": 3,
+        "grade_is_override": True,
+    }
+]
+
+
+def test_iter_csv():
+    lines = list(iter_csv(TASKS, ROWS))
+
+    # the header and one line per student
+    assert len(lines) == len(ROWS) + 1
+    assert list(csv.reader(lines)) == [
+        ["username", "task_1", "task_2", "total_score", "percent", "large_count", "grade", "grade_is_override"],
+        ["student", "10", "0", "10", "50.0", "0", "3", "True"],
+    ]
+
+
+def test_iter_csv_with_admin_data():
+    (header, row) = csv.reader("".join(iter_csv(TASKS, ROWS, include_admin_data=True)).splitlines(keepends=True))
+
+    assert dict(zip(header, row)) == {
+        "username": "student",
+        "first_name": "First",
+        "last_name": "Last, Jr.",
+        "task_1": "10",
+        "task_2": "0",
+        "total_score": "10",
+        "percent": "50.0",
+        "large_count": "0",
+        "grade": "3",
+        "grade_is_override": "True",
+        "comment": 'multi\nline "comment"',
+        "repo_url": "https://gitlab.com/students/student",
+    }
+
+
+def test_iter_csv_is_lazy():
+    def rows():
+        yield ROWS[0]
+        raise AssertionError("rows are consumed one at a time")
+
+    lines = iter_csv(TASKS, rows())
+
+    next(lines)
+    assert next(lines).startswith("student,")
+
+
+def test_iter_jsonl():
+    assert [json.loads(line) for line in iter_jsonl(ROWS + ROWS)] == ROWS + ROWS
@@ -3,8 +3,16 @@ from unittest.mock import MagicMock
 import pytest
 from flask import Flask
 
+from manytask.abstract import AuthContext
 from manytask.course import CourseStatus
-from manytask.utils.flask import can_edit_course, get_courses, get_user_roles
+from manytask.utils.flask import (
+    can_access_course,
+    can_edit_course,
+    check_if_current_user_is_namespace_admin,
+    get_courses,
+    get_user_roles,
+    has_role,
+)
 from tests.constants import TEST_COURSE_NAME, TEST_USERNAME
 
 
@@ -23,6 +31,11 @@ def app():
     course = MagicMock()
     course.namespace_id = None
     storage_api.get_course.return_value = course
+    storage_api.get_auth_context.side_effect = lambda username: AuthContext(
+        username=username,
+        instance_admin=storage_api.check_if_instance_admin(username),
+        namespace_roles={ns: "namespace_admin" for ns in storage_api.get_namespace_admin_namespaces(username)},
+    )
     app.storage_api = storage_api
 
     return app
@@ -173,3 +186,61 @@ def test_get_courses_instance_admin_can_edit_all(app, monkeypatch):
     assert len(result) == 1
     # Instance admin edits even a course without a namespace.
     assert result[0]["can_edit"] is True
+
+
+def test_auth_context_is_loaded_once_per_request(app):
+    app.storage_api.get_auth_context.side_effect = None
+    app.storage_api.get_auth_context.return_value = AuthContext(
+        username=TEST_USERNAME,
+        namespace_roles={ADMIN_NAMESPACE_ID: "namespace_admin"},
+        course_roles={TEST_COURSE_NAME: False},
+        course_namespaces={TEST_COURSE_NAME: ADMIN_NAMESPACE_ID},
+    )
+
+    with app.test_request_context():
+        from flask import session
+
+        session["manytask"] = {"username": TEST_USERNAME}
+        assert can_access_course(app, TEST_USERNAME, TEST_COURSE_NAME)
+        assert check_if_current_user_is_namespace_admin(app, TEST_COURSE_NAME)
+        assert has_role(TEST_USERNAME, "namespace_admin", app, TEST_COURSE_NAME)
+        assert get_user_roles(app, TEST_USERNAME, TEST_COURSE_NAME) == ["namespace_admin", "student"]
+
+    app.storage_api.get_auth_context.assert_called_once_with(TEST_USERNAME)
+    app.storage_api.check_if_instance_admin.assert_not_called()
+    app.storage_api.check_if_course_admin.assert_not_called()
+    app.storage_api.check_user_on_course.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "auth_context,expected_course_admin,expected_enrolled",
+    [
+        (AuthContext(username=TEST_USERNAME), False, False),
+        (AuthContext(username=TEST_USERNAME, instance_admin=True), True, False),
+        (AuthContext(username=TEST_USERNAME, course_roles={TEST_COURSE_NAME: False}), False, True),
+        (AuthContext(username=TEST_USERNAME, course_roles={TEST_COURSE_NAME: True}), True, True),
+        (
+            AuthContext(
+                username=TEST_USERNAME,
+                namespace_roles={ADMIN_NAMESPACE_ID: "namespace_admin"},
+                course_namespaces={TEST_COURSE_NAME: ADMIN_NAMESPACE_ID},
+            ),
+            True,
+            False,
+        ),
+        (
+            AuthContext(
+                username=TEST_USERNAME,
+                namespace_roles={ADMIN_NAMESPACE_ID: "program_manager"},
+                course_roles={TEST_COURSE_NAME: False},
+                course_namespaces={TEST_COURSE_NAME: ADMIN_NAMESPACE_ID},
+            ),
+            False,
+            True,
+        ),
+    ],
+    ids=["anonymous", "instance_admin", "student", "course_admin", "namespace_admin", "program_manager"],
+)
+def test_auth_context_course_roles(auth_context, expected_course_admin, expected_enrolled):
+    assert auth_context.is_course_admin(TEST_COURSE_NAME) is expected_course_admin
+    assert auth_context.is_enrolled(TEST_COURSE_NAME) is expected_enrolled
@@ -0,0 +1,176 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from manytask.abstract import ReportedSubmission, TaskSubmissionStats
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.models import Base, Course, Grade, Submission, Task, TaskGroup, User, UserOnCourse
+from tests.constants import TEST_COURSE_NAME, TEST_FIRST_NAME, TEST_LAST_NAME, TEST_TASK_NAME, TEST_USERNAME
+
+TASK_SCORE = 100
+TASK_MIN_SCORE = 50
+THREADS = 8
+REPORTS_PER_THREAD = 25
+SECOND_USERNAME = "second_user"
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    """SQLite file with one course, task and user, the upsert uses the sqlite ON CONFLICT dialect"""
+    # sqlite has a single writer, the threads of the concurrency test queue for it
+    database_url = f"sqlite:///{tmp_path / 'grades.db'}?timeout=60"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        course = Course(
+            name=TEST_COURSE_NAME,
+            registration_secret="secret",
+            token="token",
+            gitlab_course_group="course",
+            gitlab_course_public_repo="course/public",
+            gitlab_course_students_group="course/students",
+            gitlab_default_branch="main",
+            task_url_template="",
+        )
+        group = TaskGroup(name="group", course=course)
+        task = Task(name=TEST_TASK_NAME, group=group, score=TASK_SCORE, min_score=TASK_MIN_SCORE)
+        user = User(username=TEST_USERNAME, first_name=TEST_FIRST_NAME, last_name=TEST_LAST_NAME, rms_id="1", auth_id=1)
+        second_user = User(
+            username=SECOND_USERNAME, first_name=TEST_FIRST_NAME, last_name=TEST_LAST_NAME, rms_id="2", auth_id=2
+        )
+        session.add_all([course, group, task, user, second_user])
+        session.commit()
+    engine.dispose()
+    return database_url
+
+
+@pytest.fixture
+def db_api(database_url):
+    return DataBaseApi(
+        DatabaseConfig(database_url=database_url, instance_admin_username="admin", pool_size=THREADS, max_overflow=0)
+    )
+
+
+def _stored_grade(db_api):
+    with Session(db_api.engine) as session:
+        return session.query(Grade).one()
+
+
+@pytest.mark.parametrize(
+    "stored_score,reported_score,allow_reduction,expected_score",
+    [
+        (None, 70, False, 70),
+        (None, -10, False, 0),
+        (None, -10, True, -10),
+        (60, 40, False, 60),
+        (60, 80, False, 80),
+        (60, 40, True, 40),
+        # a penalty is kept unless the reduction is allowed explicitly
+        (-10, 80, False, -10),
+        (-10, 80, True, 80),
+    ],
+)
+def test_upsert_score_rules(db_api, stored_score, reported_score, allow_reduction, expected_score):
+    if stored_score is not None:
+        db_api.upsert_score(TEST_COURSE_NAME, TEST_USERNAME, TEST_TASK_NAME, stored_score, allow_reduction=True)
+
+    score = db_api.upsert_score(
+        TEST_COURSE_NAME, TEST_USERNAME, TEST_TASK_NAME, reported_score, allow_reduction=allow_reduction
+    )
+
+    assert score == expected_score
+    grade = _stored_grade(db_api)
+    assert grade.score == expected_score
+    assert grade.is_solved is (expected_score >= TASK_MIN_SCORE)
+
+
+def test_upsert_score_unknown_task(db_api):
+    assert db_api.upsert_score(TEST_COURSE_NAME, TEST_USERNAME, "unknown_task", 10) == 0
+
+    with Session(db_api.engine) as session:
+        assert session.query(UserOnCourse).count() == 1
+        assert session.query(Grade).count() == 0
+
+
+def test_upsert_score_concurrent_reports_are_not_lost(db_api):
+    scores = list(range(1, THREADS * REPORTS_PER_THREAD + 1))
+
+    def report(score):
+        return db_api.upsert_score(TEST_COURSE_NAME, TEST_USERNAME, TEST_TASK_NAME, score)
+
+    with ThreadPoolExecutor(max_workers=THREADS) as executor:
+        stored_scores = list(executor.map(report, scores))
+
+    # every report saw a score at least as large as its own, the largest one wins
+    assert all(stored >= score for stored, score in zip(stored_scores, scores))
+    assert _stored_grade(db_api).score == max(scores)
+    with Session(db_api.engine) as session:
+        assert session.query(UserOnCourse).count() == 1
+
+
+def test_submissions_are_logged_with_the_grade(db_api):
+    submit_time = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    db_api.upsert_score(
+        TEST_COURSE_NAME, TEST_USERNAME, TEST_TASK_NAME, 40, submission=ReportedSubmission(80, 0.5, submit_time)
+    )
+    # the grade keeps the max, the log keeps every accepted report
+    db_api.upsert_score(
+        TEST_COURSE_NAME, TEST_USERNAME, TEST_TASK_NAME, 30, submission=ReportedSubmission(30, 1, submit_time)
+    )
+    db_api.upsert_score(TEST_COURSE_NAME, TEST_USERNAME, TEST_TASK_NAME, 90, allow_reduction=True)
+
+    with Session(db_api.engine) as session:
+        logged = session.query(Submission).order_by(Submission.id).all()
+        assert [(s.reported_score, s.multiplier, s.score, s.source) for s in logged] == [
+            (80, 0.5, 40, "report"),
+            (30, 1.0, 30, "report"),
+        ]
+    assert _stored_grade(db_api).score == 90  # noqa: PLR2004
+
+
+def test_get_submission_stats(db_api):
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    reports = [
+        # solved with the third attempt after two minutes
+        (TEST_USERNAME, 10, 0),
+        (TEST_USERNAME, 40, 60),
+        (TEST_USERNAME, 60, 120),
+        (TEST_USERNAME, 100, 180),
+        # solved with the first attempt
+        (SECOND_USERNAME, 50, 30),
+    ]
+    for username, score, delay in reports:
+        db_api.upsert_score(
+            TEST_COURSE_NAME,
+            username,
+            TEST_TASK_NAME,
+            score,
+            submission=ReportedSubmission(score, 1.0, start + timedelta(seconds=delay)),
+        )
+
+    stats = db_api.get_submission_stats(TEST_COURSE_NAME)
+
+    assert stats.keys() == {TEST_TASK_NAME}
+    task_stats = stats[TEST_TASK_NAME]
+    assert task_stats.submissions == len(reports)
+    assert (task_stats.students, task_stats.solved_students) == (2, 2)
+    assert task_stats.avg_attempts_to_solve == pytest.approx(2.0)
+    assert task_stats.avg_seconds_to_solve == pytest.approx(60.0)
+
+
+def test_get_submission_stats_unsolved(db_api):
+    db_api.upsert_score(
+        TEST_COURSE_NAME,
+        TEST_USERNAME,
+        TEST_TASK_NAME,
+        10,
+        submission=ReportedSubmission(10, 1.0, datetime(2026, 1, 1, tzinfo=timezone.utc)),
+    )
+
+    assert db_api.get_submission_stats(TEST_COURSE_NAME) == {
+        TEST_TASK_NAME: TaskSubmissionStats(submissions=1, students=1, solved_students=0)
+    }
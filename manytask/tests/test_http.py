@@ -0,0 +1,262 @@
+import datetime
+import ipaddress
+import json
+import ssl
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+import requests
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from manytask.glab import GitLabApi, GitLabConfig
+from manytask.utils.http import HttpConfig, make_httpx_client, make_session
+
+BENCHMARK_REQUESTS = 200
+
+
+class FakeGitLab(ThreadingHTTPServer):
+    """Local GitLab answering /api/v4/user, counting connections and concurrent requests"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeGitLabHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests: list[tuple[str, str]] = []
+        self.active = 0
+        self.max_active = 0
+        # statuses answered before the normal answers
+        self.failures: list[int] = []
+        self.delay = 0.0
+
+    @property
+    def url(self):
+        scheme = "https" if isinstance(self.socket, ssl.SSLSocket) else "http"
+        return f"{scheme}://127.0.0.1:{self.server_address[1]}"
+
+    def handle_error(self, request, client_address):
+        # clients that timed out have closed the connection
+        pass
+
+    def process_request(self, request, client_address):
+        with self.lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class FakeGitLabHandler(BaseHTTPRequestHandler):
+    server: FakeGitLab
+    # keep the connection open between requests
+    protocol_version = "HTTP/1.1"
+    # the headers and the body are written separately, do not wait for the delayed ACK in between
+    disable_nagle_algorithm = True
+
+    def log_message(self, *_args):
+        pass
+
+    def _handle(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path))
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+            status = self.server.failures.pop(0) if self.server.failures else HTTPStatus.OK
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.active -= 1
+
+        body = json.dumps({"id": 1, "username": "user"}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = _handle  # noqa: N815
+    do_POST = _handle  # noqa: N815
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def server():
+    server = _serve(FakeGitLab())
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def tls_server(tmp_path):
+    """FakeGitLab over TLS with a self-signed certificate of 127.0.0.1"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = tmp_path / "cert.pem", tmp_path / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(
+        key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption())
+    )
+
+    server = FakeGitLab()
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    _serve(server)
+    yield server, str(cert_path)
+    server.shutdown()
+    server.server_close()
+
+
+def _config(**kwargs):
+    return HttpConfig(**{"retry_backoff": 0.01, **kwargs})
+
+
+def test_session_reuses_connections(server):
+    session = make_session(_config())
+
+    for _ in range(10):
+        assert session.get(f"{server.url}/api/v4/user").json()["username"] == "user"
+
+    assert server.connections == 1
+
+
+def test_session_retries_idempotent_requests(server):
+    session = make_session(_config(retries=2))
+
+    server.failures = [HTTPStatus.SERVICE_UNAVAILABLE, HTTPStatus.BAD_GATEWAY]
+    assert session.get(f"{server.url}/api/v4/user").status_code == HTTPStatus.OK
+    assert len(server.requests) == 3  # noqa: PLR2004
+
+    server.failures = [HTTPStatus.SERVICE_UNAVAILABLE]
+    assert session.post(f"{server.url}/api/v4/projects").status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert len(server.requests) == 4  # noqa: PLR2004
+
+
+def test_session_gives_up_after_retries(server):
+    session = make_session(_config(retries=1))
+    server.failures = [HTTPStatus.SERVICE_UNAVAILABLE] * 3
+
+    # the last answer is returned for the caller to handle
+    assert session.get(f"{server.url}/api/v4/user").status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert len(server.requests) == 2  # noqa: PLR2004
+
+
+def test_session_read_timeout(server):
+    session = make_session(_config(read_timeout=0.05, retries=0))
+    server.delay = 0.5
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        session.get(f"{server.url}/api/v4/user")
+
+
+def test_httpx_client_retries_idempotent_requests(server):
+    client = make_httpx_client(_config(retries=2), base_url=server.url)
+
+    server.failures = [HTTPStatus.TOO_MANY_REQUESTS, HTTPStatus.GATEWAY_TIMEOUT]
+    assert client.get("/api/v4/user").status_code == HTTPStatus.OK
+    server.failures = [HTTPStatus.SERVICE_UNAVAILABLE]
+    assert client.post("/api/v4/projects", json={}).status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+    assert len(server.requests) == 4  # noqa: PLR2004
+    assert server.connections == 1
+
+
+def test_httpx_client_read_timeout(server):
+    client = make_httpx_client(_config(read_timeout=0.05, retries=0), base_url=server.url)
+    server.delay = 0.5
+
+    with pytest.raises(httpx.ReadTimeout):
+        client.get("/api/v4/user")
+
+
+def test_httpx_client_retries_refused_connections():
+    client = make_httpx_client(_config(retries=2, connect_timeout=0.5), base_url="http://127.0.0.1:1")
+
+    started = time.monotonic()
+    with pytest.raises(httpx.ConnectError):
+        client.post("/api/v4/projects", json={})
+    # two jittered delays of 0.01-0.02 and 0.02-0.03 seconds
+    assert time.monotonic() - started >= 0.03  # noqa: PLR2004
+
+
+@pytest.mark.parametrize("make_client", ["session", "httpx"])
+def test_concurrent_requests_per_host_are_capped(server, make_client):
+    config = _config(pool_size=2)
+    server.delay = 0.05
+    if make_client == "session":
+        session = make_session(config)
+
+        def get():
+            return session.get(f"{server.url}/api/v4/user").status_code
+    else:
+        client = make_httpx_client(config, base_url=server.url)
+
+        def get():
+            return client.get("/api/v4/user").status_code
+
+    with ThreadPoolExecutor(8) as executor:
+        statuses = list(executor.map(lambda _: get(), range(8)))
+
+    assert statuses == [HTTPStatus.OK] * 8
+    assert server.max_active == 2  # noqa: PLR2004
+    assert server.connections == 2  # noqa: PLR2004
+
+
+def _best_cpu_time(func, repeat=3):
+    # the client and the server run in this process, its CPU time does not depend on other processes
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.process_time()
+        func()
+        best = min(best, time.process_time() - started)
+    return best
+
+
+def test_auth_checks_keep_alive_benchmark(tls_server):
+    """200 token checks against a TLS GitLab: one handshake with the shared session instead of one per check"""
+    server, cert_path = tls_server
+    gitlab_api = GitLabApi(GitLabConfig(base_url=server.url, admin_token="token", verify_ssl=cert_path))  # type: ignore[arg-type]
+
+    def pooled():
+        for _ in range(BENCHMARK_REQUESTS):
+            assert gitlab_api._make_auth_request("token").ok
+
+    def fresh():
+        for _ in range(BENCHMARK_REQUESTS):
+            headers = {"Authorization": "Bearer token"}
+            assert requests.get(f"{server.url}/api/v4/user", headers=headers, verify=cert_path).ok
+
+    pooled_time = _best_cpu_time(pooled)
+    pooled_connections, server.connections = server.connections, 0
+    fresh_time = _best_cpu_time(fresh)
+
+    assert pooled_connections == 1
+    assert server.connections == 3 * BENCHMARK_REQUESTS
+    # about 3x alone, about 2x when the tests run in parallel on one core
+    assert pooled_time * 1.5 < fresh_time
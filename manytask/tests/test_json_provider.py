@@ -0,0 +1,111 @@
+import json
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+
+import pytest
+from flask import jsonify
+
+from manytask.main import CustomFlask
+from manytask.utils.database import to_columnar_table
+from manytask.utils.json_provider import FastJSONProvider
+
+BENCHMARK_STUDENTS = 2000
+BENCHMARK_TASKS = 200
+
+
+@pytest.fixture
+def app():
+    app = CustomFlask(__name__)
+    app.config["TESTING"] = True
+    return app
+
+
+def _score_table(students, tasks):
+    task_names = [f"task_{task:03d}" for task in range(tasks)]
+    return {
+        "tasks": [{"name": name, "score": 0, "group": "group"} for name in task_names],
+        "students": [
+            {
+                "username": f"student_{student:04d}",
+                "scores": {
+                    name: (student * task) % 101 for task, name in enumerate(task_names) if (student + task) % 7
+                },
+                "total_score": student,
+                "percent": student / 20,
+                "large_count": 0,
+                "first_name": "Иван",
+                "last_name": "Иванов",
+                "repo_url": f"https://gitlab.example.com/students/student_{student:04d}",
+                "comment": None,
+                "grade": 4,
+                "grade_is_override": False,
+            }
+            for student in range(students)
+        ],
+        "max_score": 100 * tasks,
+    }
+
+
+def _best_time(encode, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        payload = encode()
+        best = min(best, time.perf_counter() - start)
+    return best, payload
+
+
+def test_app_uses_fast_provider(app):
+    assert isinstance(app.json, FastJSONProvider)
+
+
+def test_response_matches_json_module(app):
+    data = {"b": [1, 2.5, None, True], "a": {"name": "Иван"}, "amount": Decimal("1.5")}
+
+    with app.app_context():
+        response = jsonify(data)
+
+    assert response.mimetype == "application/json"
+    assert response.data.endswith(b"\n")
+    # keys stay in insertion order, unknown types are handled like DefaultJSONProvider does
+    assert list(json.loads(response.data)) == ["b", "a", "amount"]
+    assert json.loads(response.data) == {**data, "amount": "1.5"}
+
+
+def test_dates_and_unknown_types(app):
+    assert app.json.dumps({"at": datetime(2026, 1, 1, tzinfo=timezone.utc)}) == '{"at":"2026-01-01T00:00:00Z"}'
+    with pytest.raises(TypeError):
+        app.json.dumps({"object": object()})
+
+
+def test_loads_and_json_module_arguments(app):
+    assert app.json.loads(b'{"scores": {"task": 10}}') == {"scores": {"task": 10}}
+    with pytest.raises(ValueError):
+        app.json.loads("not json")
+    assert app.json.dumps({"b": 1, "a": 2}, sort_keys=True) == '{"a": 2, "b": 1}'
+
+
+def test_request_json_is_decoded(app):
+    @app.post("/echo")
+    def echo():
+        return jsonify(app.json.loads(app.json.dumps({"received": app.json.response(ok=True).json})))
+
+    response = app.test_client().post("/echo", json={"ok": True})
+
+    assert response.json == {"received": {"ok": True}}
+
+
+def test_columnar_fast_payload_benchmark(app):
+    """2,000 students x 200 tasks: the columnar format and the fast provider against rows and the json module"""
+    table_data = _score_table(BENCHMARK_STUDENTS, BENCHMARK_TASKS)
+
+    rows_time, rows_payload = _best_time(lambda: json.dumps(table_data, sort_keys=True).encode())
+    convert_time, columnar = _best_time(lambda: to_columnar_table(table_data))
+    encode_time, columnar_payload = _best_time(lambda: app.json.dumps(columnar).encode())
+
+    # task names are no longer repeated in every row
+    assert len(columnar_payload) * 3 < len(rows_payload)
+    assert encode_time * 3 < rows_time
+    assert convert_time + encode_time < rows_time
+    assert json.loads(columnar_payload) == columnar
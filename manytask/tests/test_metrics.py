@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+import pytest
+from prometheus_client import REGISTRY
+
+from manytask.metrics import init_app, track_rms_api
+from manytask.web import root_bp
+from tests.helpers import make_flask_app
+
+
+@pytest.fixture
+def app():
+    app = make_flask_app(root_bp)
+    init_app(app)
+    return app
+
+
+def _sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_metrics_endpoint_exposes_request_latency(app):
+    client = app.test_client()
+    before = _sample("manytask_request_duration_seconds_count", method="GET", endpoint="root.healthcheck", status="200")
+
+    assert client.get("/healthcheck").status_code == HTTPStatus.OK
+    response = client.get("/metrics")
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.content_type.startswith("text/plain")
+    body = response.get_data(as_text=True)
+    assert "manytask_request_duration_seconds_bucket" in body
+    assert "manytask_requests_in_progress" in body
+    assert (
+        _sample("manytask_request_duration_seconds_count", method="GET", endpoint="root.healthcheck", status="200")
+        == before + 1
+    )
+
+
+def test_requests_in_progress_returns_to_zero(app):
+    app.test_client().get("/healthcheck")
+
+    assert _sample("manytask_requests_in_progress", method="GET", endpoint="root.healthcheck") == 0
+
+
+def test_track_rms_api_counts_latency_and_errors():
+    @track_rms_api("test_rms")
+    class RmsApi:
+        def check_project_exists(self, project_name, project_group):
+            return True
+
+        def create_project(self, rms_user, course_students_group, course_public_repo):
+            raise RuntimeError("RMS is down")
+
+        def get_url_for_repo(self, username, course_students_group):
+            return "url"
+
+    rms_api = RmsApi()
+    assert rms_api.check_project_exists("project", "group")
+    with pytest.raises(RuntimeError):
+        rms_api.create_project(None, "group", "repo")
+    rms_api.get_url_for_repo("user", "group")
+
+    assert _sample("manytask_rms_request_duration_seconds_count", rms="test_rms", method="check_project_exists") == 1
+    assert _sample("manytask_rms_request_errors_total", rms="test_rms", method="check_project_exists") == 0
+    assert _sample("manytask_rms_request_errors_total", rms="test_rms", method="create_project") == 1
+    assert _sample("manytask_rms_request_duration_seconds_count", rms="test_rms", method="get_url_for_repo") == 0
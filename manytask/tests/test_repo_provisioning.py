@@ -0,0 +1,119 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.mock_rms import MockRmsApi
+from manytask.models import Base, Course, User
+from manytask.repo_provisioning import (
+    REPO_PROVISIONING_RATE,
+    REPO_PROVISIONING_WORKERS,
+    RateLimiter,
+    init_app,
+    start_provisioning,
+)
+from tests.constants import GITLAB_BASE_URL, TEST_COURSE_NAME
+from tests.helpers import make_flask_app
+
+STUDENTS = [f"student{number}" for number in range(6)]
+STUDENTS_GROUP = "course/students"
+WAIT_TIMEOUT = 5
+
+
+class FailingRmsApi(MockRmsApi):
+    def create_project(self, rms_user, course_students_group, course_public_repo):
+        if rms_user.username == STUDENTS[0]:
+            raise RuntimeError("Forking failed")
+        return super().create_project(rms_user, course_students_group, course_public_repo)
+
+
+@pytest.fixture
+def app(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'provisioning.db'}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(
+            Course(
+                name=TEST_COURSE_NAME,
+                registration_secret="secret",
+                token="token",
+                gitlab_course_group="course",
+                gitlab_course_public_repo="course/public",
+                gitlab_course_students_group=STUDENTS_GROUP,
+                gitlab_default_branch="main",
+                task_url_template="",
+            )
+        )
+        for number, username in enumerate(STUDENTS):
+            session.add(User(username=username, first_name="", last_name="", rms_id=str(number), auth_id=number))
+        session.commit()
+    engine.dispose()
+
+    app = make_flask_app()
+    app.config[REPO_PROVISIONING_WORKERS] = 4
+    app.config[REPO_PROVISIONING_RATE] = 0
+    app.storage_api = DataBaseApi(DatabaseConfig(database_url=database_url, instance_admin_username="admin"))
+    app.rms_api = FailingRmsApi(GITLAB_BASE_URL)
+    return app
+
+
+def test_provisioning_creates_repos_and_records_failures(app):
+    course = app.storage_api.get_course(TEST_COURSE_NAME)
+
+    job = start_provisioning(app, course, [*STUDENTS, "nobody"])
+    job.join(WAIT_TIMEOUT)
+
+    assert job.usernames == STUDENTS
+    assert job.failed == {STUDENTS[0]: "Forking failed"}
+    states = {state.username: state for state in app.storage_api.get_repo_provisioning(TEST_COURSE_NAME)}
+    assert {username: state.status for username, state in states.items()} == {
+        STUDENTS[0]: "failed",
+        **{username: "done" for username in STUDENTS[1:]},
+    }
+    assert states[STUDENTS[1]].repo_url == f"{GITLAB_BASE_URL}/{STUDENTS_GROUP}/{STUDENTS[1]}"
+    assert f"{STUDENTS_GROUP}/{STUDENTS[1]}" in app.rms_api.projects
+
+
+def test_provisioning_resumes_only_unfinished_students(app):
+    course = app.storage_api.get_course(TEST_COURSE_NAME)
+    start_provisioning(app, course, STUDENTS).join(WAIT_TIMEOUT)
+
+    job = start_provisioning(app, course, STUDENTS)
+    job.join(WAIT_TIMEOUT)
+
+    assert job.usernames == [STUDENTS[0]]
+
+
+def test_one_job_per_course(app):
+    course = app.storage_api.get_course(TEST_COURSE_NAME)
+    app.config[REPO_PROVISIONING_RATE] = 20
+
+    job = start_provisioning(app, course, STUDENTS)
+    try:
+        assert start_provisioning(app, course, STUDENTS) is None
+    finally:
+        job.join(WAIT_TIMEOUT)
+
+
+def test_rate_limiter_spaces_acquisitions():
+    rate_limiter = RateLimiter(50)
+
+    start = time.monotonic()
+    for _ in range(6):
+        rate_limiter.acquire()
+
+    # the first one is immediate, the next five wait 20ms each
+    assert time.monotonic() - start >= 0.1  # noqa: PLR2004
+
+
+def test_init_app_reads_env(monkeypatch):
+    monkeypatch.setenv(REPO_PROVISIONING_WORKERS, "16")
+    app = make_flask_app()
+
+    init_app(app)
+
+    assert app.config[REPO_PROVISIONING_WORKERS] == 16  # noqa: PLR2004
+    assert app.config[REPO_PROVISIONING_RATE] == 2  # noqa: PLR2004
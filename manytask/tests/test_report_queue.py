@@ -0,0 +1,131 @@
+import threading
+from datetime import datetime
+from unittest.mock import MagicMock
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from manytask.abstract import ReportReceipt
+from manytask.report_queue import REPORT_QUEUE_ENABLED, ReportApplier, apply_queued_reports, init_app, wake_applier
+from tests.constants import TEST_COURSE_NAME, TEST_TASK_NAME
+from tests.helpers import make_flask_app
+
+STUDENT_1 = "student1"
+STUDENT_2 = "student2"
+STUDENT_3 = "student3"
+WAIT_TIMEOUT = 5
+
+
+def _receipt(receipt_id, username, score):
+    return ReportReceipt(
+        receipt_id=receipt_id,
+        course_name=TEST_COURSE_NAME,
+        username=username,
+        task_name=TEST_TASK_NAME,
+        reported_score=score,
+        submit_time=datetime.now(ZoneInfo("UTC")),
+        check_deadline=False,
+    )
+
+
+@pytest.fixture
+def app():
+    app = make_flask_app()
+    app.storage_api = MagicMock()
+    app.storage_api.find_task.return_value = (MagicMock(), MagicMock(), MagicMock())
+    app.storage_api.get_scores.return_value = {}
+    app.storage_api.get_bonus_score.return_value = 0
+    app.storage_api.max_score_started.return_value = 0
+    app.storage_api.get_groups.return_value = []
+    return app
+
+
+def test_apply_queued_reports_recalculates_each_student_once(app):
+    queue = [_receipt(1, STUDENT_1, 10), _receipt(2, STUDENT_2, 20), _receipt(3, STUDENT_1, 30)]
+    failed = _receipt(4, STUDENT_3, 40)
+
+    def apply(deadline_multiplier, _max_students):
+        for receipt in queue:
+            receipt.final_score = int(receipt.reported_score * deadline_multiplier(receipt))
+            receipt.applied_at = datetime.now(ZoneInfo("UTC"))
+        failed.applied_at = datetime.now(ZoneInfo("UTC"))
+        failed.error = "Task not found"
+        return [*queue, failed]
+
+    app.storage_api.apply_queued_reports.side_effect = apply
+
+    receipts = apply_queued_reports(app)
+
+    assert [receipt.final_score for receipt in receipts] == [10, 20, 30, None]
+    # one grade recalculation per student with applied reports
+    assert sorted(call.args[1] for call in app.storage_api.calculate_and_save_grade.call_args_list) == [
+        STUDENT_1,
+        STUDENT_2,
+    ]
+
+
+def test_apply_queued_reports_applies_deadline_once_per_task(app):
+    course, group = MagicMock(), MagicMock()
+    group.get_current_percent_multiplier.return_value = 0.5
+    app.storage_api.find_task.return_value = (course, group, MagicMock())
+    queue = [_receipt(1, STUDENT_1, 10), _receipt(2, STUDENT_2, 20)]
+    for receipt in queue:
+        receipt.check_deadline = True
+
+    app.storage_api.apply_queued_reports.side_effect = lambda deadline_multiplier, _: [
+        ReportReceipt(**{**vars(receipt), "final_score": int(receipt.reported_score * deadline_multiplier(receipt))})
+        for receipt in queue
+    ]
+
+    receipts = apply_queued_reports(app)
+
+    assert [receipt.final_score for receipt in receipts] == [5, 10]
+    app.storage_api.find_task.assert_called_once_with(TEST_COURSE_NAME, TEST_TASK_NAME)
+
+
+def test_apply_queued_reports_empty_queue(app):
+    app.storage_api.apply_queued_reports.return_value = []
+
+    assert apply_queued_reports(app) == []
+    app.storage_api.calculate_and_save_grade.assert_not_called()
+
+
+def test_applier_wakes_up_before_poll_interval(app):
+    applied = threading.Event()
+
+    def apply(_deadline_multiplier, _max_students):
+        applied.set()
+        return []
+
+    app.storage_api.apply_queued_reports.side_effect = apply
+    applier = ReportApplier(app, poll_interval=60)
+    applier.start()
+    try:
+        assert applied.wait(WAIT_TIMEOUT)
+        applied.clear()
+        applier.wake()
+        assert applied.wait(WAIT_TIMEOUT)
+    finally:
+        applier.stop()
+        applier.join(WAIT_TIMEOUT)
+    assert not applier.is_alive()
+
+
+def test_init_app_disabled_by_default(app, monkeypatch):
+    monkeypatch.delenv(REPORT_QUEUE_ENABLED, raising=False)
+
+    init_app(app)
+
+    assert app.config[REPORT_QUEUE_ENABLED] is False
+    assert not app.extensions
+    wake_applier(app)
+
+
+def test_init_app_does_not_start_applier_in_tests(app, monkeypatch):
+    monkeypatch.setenv(REPORT_QUEUE_ENABLED, "true")
+
+    init_app(app)
+
+    (applier,) = app.extensions.values()
+    assert isinstance(applier, ReportApplier)
+    assert not applier.is_alive()
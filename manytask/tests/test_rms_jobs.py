@@ -0,0 +1,212 @@
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+from unittest.mock import MagicMock, patch
+
+import pytest
+from flask import json
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import Session
+
+from manytask.api import namespace_bp
+from manytask.course import CourseConfig
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.mock_auth import MockAuthApi
+from manytask.mock_rms import MockRmsApi
+from manytask.models import Base, QueuedRmsJob, User
+from manytask.rms_jobs import (
+    RMS_JOBS_LEASE,
+    RMS_JOBS_MAX_ATTEMPTS,
+    RMS_JOBS_RETRY_DELAY,
+    RmsJobRunner,
+    enqueue_course_creation,
+    init_app,
+    run_rms_jobs,
+)
+from tests.constants import GITLAB_BASE_URL, TEST_COURSE_NAME
+from tests.helpers import build_mock_session, make_flask_app, set_session
+
+COURSE_GROUP = "course"
+PUBLIC_REPO = f"{COURSE_GROUP}/public-2026-fall"
+STUDENTS_GROUP = f"{COURSE_GROUP}/students-2026-fall"
+WAIT_TIMEOUT = 5
+
+
+@pytest.fixture
+def app(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'jobs.db'}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(User(username="admin", first_name="", last_name="", rms_id="1", auth_id=1, is_instance_admin=True))
+        session.add(User(username="teacher", first_name="", last_name="", rms_id="2", auth_id=2))
+        session.add(User(username="other", first_name="", last_name="", rms_id="3", auth_id=3))
+        session.commit()
+    engine.dispose()
+
+    app = make_flask_app(namespace_bp)
+    app.storage_api = DataBaseApi(DatabaseConfig(database_url=database_url, instance_admin_username="admin"))
+    app.rms_api = MockRmsApi(GITLAB_BASE_URL)
+    app.auth_api = MockAuthApi()
+    app.oauth = MagicMock()
+    init_app(app)
+    app.config[RMS_JOBS_MAX_ATTEMPTS] = 2
+    return app
+
+
+def _enqueue(app, created_by="teacher"):
+    course_config = CourseConfig(
+        course_name=TEST_COURSE_NAME,
+        namespace_id=None,
+        gitlab_course_group=COURSE_GROUP,
+        gitlab_course_public_repo=PUBLIC_REPO,
+        gitlab_course_students_group=STUDENTS_GROUP,
+        gitlab_default_branch="main",
+        registration_secret="secret",
+        token="token",
+        show_allscores=True,
+    )
+    return enqueue_course_creation(app, course_config, COURSE_GROUP, None, created_by=created_by)
+
+
+def _login(client, username, user_id):
+    set_session(client, build_mock_session(username, user_auth_id=user_id, rms_id=str(user_id), user_id=user_id))
+
+
+def test_course_creation_job(app):
+    job = _enqueue(app)
+    assert (job.status, job.state) == ("queued", {})
+
+    assert [run.job_id for run in run_rms_jobs(app)] == [job.job_id]
+
+    done = app.storage_api.get_rms_job(job.job_id)
+    assert (done.status, done.attempts, done.error) == ("done", 1, None)
+    assert done.state == {"course_group_id": 1, "public_repo": True, "students_group": True}
+    assert PUBLIC_REPO in app.rms_api.groups[COURSE_GROUP].projects
+    assert STUDENTS_GROUP in app.rms_api.groups
+    assert run_rms_jobs(app) == []
+
+
+def test_failed_job_resumes_after_finished_steps(app):
+    job = _enqueue(app)
+    app.config[RMS_JOBS_RETRY_DELAY] = 0
+
+    with (
+        patch.object(app.rms_api, "create_public_repo", side_effect=RuntimeError("GitLab is down")),
+        patch.object(app.rms_api, "create_course_group", wraps=app.rms_api.create_course_group) as create_group,
+    ):
+        run_rms_jobs(app, max_jobs=1)
+        queued = app.storage_api.get_rms_job(job.job_id)
+        assert (queued.status, queued.error, queued.state) == ("queued", "GitLab is down", {"course_group_id": 1})
+
+        create_group.reset_mock()
+    with patch.object(app.rms_api, "create_course_group") as create_group:
+        run_rms_jobs(app)
+        # the course group is not created again
+        create_group.assert_not_called()
+
+    done = app.storage_api.get_rms_job(job.job_id)
+    assert (done.status, done.attempts, done.error) == ("done", 2, None)
+
+
+def test_job_fails_after_max_attempts_and_is_retried(app):
+    job = _enqueue(app)
+    app.config[RMS_JOBS_RETRY_DELAY] = 0
+
+    with patch.object(app.rms_api, "create_course_group", side_effect=RuntimeError("GitLab is down")):
+        run_rms_jobs(app)
+    failed = app.storage_api.get_rms_job(job.job_id)
+    assert (failed.status, failed.attempts) == ("failed", 2)
+
+    assert app.storage_api.retry_rms_job(job.job_id).status == "queued"
+    run_rms_jobs(app)
+    assert app.storage_api.get_rms_job(job.job_id).status == "done"
+    assert app.storage_api.retry_rms_job(job.job_id) is None
+
+
+def test_retry_waits_for_delay(app):
+    job = _enqueue(app)
+    app.config[RMS_JOBS_RETRY_DELAY] = 60
+
+    with patch.object(app.rms_api, "create_course_group", side_effect=RuntimeError("GitLab is down")):
+        run_rms_jobs(app)
+
+    assert app.storage_api.claim_rms_job(lease=60) is None
+    assert app.storage_api.get_rms_job(job.job_id).status == "queued"
+
+
+def test_job_of_dead_runner_is_resumed_after_lease(app):
+    job = _enqueue(app)
+    claimed = app.storage_api.claim_rms_job(lease=60)
+    assert claimed.job_id == job.job_id
+    # another runner waits for the lease
+    assert app.storage_api.claim_rms_job(lease=60) is None
+
+    with Session(app.storage_api.engine) as session:
+        session.execute(
+            update(QueuedRmsJob)
+            .values(run_after=datetime(2000, 1, 1, tzinfo=timezone.utc))
+            .where(QueuedRmsJob.id == job.job_id)
+        )
+        session.commit()
+
+    resumed = app.storage_api.claim_rms_job(lease=60)
+    assert (resumed.job_id, resumed.attempts) == (job.job_id, 2)
+
+
+def test_runner_thread(app):
+    app.config[RMS_JOBS_LEASE] = 60
+    runner = RmsJobRunner(app, poll_interval=3600)
+    runner.start()
+    app.extensions["manytask.rms_job_runner"] = runner
+    try:
+        # enqueueing wakes the runner up
+        job = _enqueue(app)
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while app.storage_api.get_rms_job(job.job_id).status != "done" and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        runner.stop()
+        runner.join(WAIT_TIMEOUT)
+
+    assert app.storage_api.get_rms_job(job.job_id).status == "done"
+    assert not runner.is_alive()
+
+
+@pytest.mark.parametrize("username,user_id", [("teacher", 2), ("admin", 1)])
+def test_get_job(app, username, user_id):
+    job = _enqueue(app)
+    client = app.test_client()
+    _login(client, username, user_id)
+
+    response = client.get(f"/api/admin/jobs/{job.job_id}")
+
+    assert response.status_code == HTTPStatus.OK
+    data = json.loads(response.data)
+    assert (data["status"], data["kind"], data["finished_steps"]) == ("queued", "create_course", [])
+
+
+def test_get_job_of_other_user(app):
+    job = _enqueue(app)
+    client = app.test_client()
+    _login(client, "other", 3)
+
+    assert client.get(f"/api/admin/jobs/{job.job_id}").status_code == HTTPStatus.FORBIDDEN
+    assert client.get("/api/admin/jobs/1000").status_code == HTTPStatus.NOT_FOUND
+
+
+def test_retry_job(app):
+    job = _enqueue(app)
+    client = app.test_client()
+    _login(client, "teacher", 2)
+
+    assert client.post(f"/api/admin/jobs/{job.job_id}/retry").status_code == HTTPStatus.CONFLICT
+
+    app.config[RMS_JOBS_MAX_ATTEMPTS] = 1
+    with patch.object(app.rms_api, "create_public_repo", side_effect=RuntimeError("GitLab is down")):
+        run_rms_jobs(app)
+    response = client.post(f"/api/admin/jobs/{job.job_id}/retry")
+
+    assert response.status_code == HTTPStatus.ACCEPTED
+    data = json.loads(response.data)
+    assert (data["status"], data["finished_steps"]) == ("queued", ["course_group_id"])
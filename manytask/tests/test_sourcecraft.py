@@ -0,0 +1,214 @@
+import json
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from manytask.abstract import RmsUser, RmsUserNotFoundException
+from manytask.sourcecraft import IamTokenRefresher, SourceCraftApi, SourceCraftConfig
+
+ORG_SLUG = "org"
+STUDENTS_GROUP = "course-students"
+PUBLIC_REPO = "course-public"
+STUDENT_REPO = f"{STUDENTS_GROUP}-test-user"
+RMS_USER_ID = "user-id"
+USERNAME = "Test_User"
+WAIT_TIMEOUT = 5
+
+
+class FakeSourceCraft(ThreadingHTTPServer):
+    """Local SourceCraft API serving repo roles and recording the requests"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeSourceCraftHandler)
+        self.requests: list[tuple[str, str, str]] = []
+        self.roles: dict[str, list[dict]] = {}
+        self.users: dict[str, dict] = {}
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/"
+
+    def count(self, method, path):
+        return sum(1 for request in self.requests if request[:2] == (method, path))
+
+
+class FakeSourceCraftHandler(BaseHTTPRequestHandler):
+    server: FakeSourceCraft
+
+    def log_message(self, *_args):
+        pass
+
+    def _reply(self, status, data):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # noqa: N802
+        self.server.requests.append(("GET", self.path, self.headers["Authorization"]))
+        repo_slug = self.path.removeprefix(f"/repos/{ORG_SLUG}/").removesuffix("/roles")
+        if self.path.startswith("/users/"):
+            user = self.server.users.get(self.path.removeprefix("/users/"))
+            self._reply(HTTPStatus.OK if user else HTTPStatus.NOT_FOUND, user or {"message": "not found"})
+        elif self.path.endswith("/roles"):
+            self._reply(HTTPStatus.OK, {"subject_roles": self.server.roles.get(repo_slug, [])})
+        else:
+            self._reply(HTTPStatus.OK, {"id": 1, "slug": repo_slug})
+
+    def do_POST(self):  # noqa: N802
+        self.server.requests.append(("POST", self.path, self.headers["Authorization"]))
+        data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path.endswith("/roles"):
+            repo_slug = self.path.removeprefix(f"/repos/{ORG_SLUG}/").removesuffix("/roles")
+            self.server.roles.setdefault(repo_slug, []).extend(data["subject_roles"])
+            self._reply(HTTPStatus.OK, {})
+        else:
+            self._reply(HTTPStatus.CREATED, {"id": 2})
+
+
+@pytest.fixture
+def server():
+    server = FakeSourceCraft()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _make_api(server, **config):
+    api = SourceCraftApi(
+        SourceCraftConfig(
+            base_url="https://sourcecraft.dev", api_url=server.url, org_slug=ORG_SLUG, oauth_token="token", **config
+        )
+    )
+    minted = []
+
+    def get_iam_token():
+        minted.append(f"iam-token-{len(minted) + 1}")
+        api.minting_threads.add(threading.current_thread().name)
+        return minted[-1]
+
+    api.minting_threads = set()
+
+    api._get_iam_token = get_iam_token
+    return api, minted
+
+
+def _has_access(api):
+    return api.check_user_has_repo_access(RMS_USER_ID, USERNAME, STUDENTS_GROUP)
+
+
+def test_repo_access_is_cached(server):
+    api, _ = _make_api(server)
+    roles_path = f"/repos/{ORG_SLUG}/{STUDENT_REPO}/roles"
+
+    assert not _has_access(api)
+    server.roles[STUDENT_REPO] = [{"role": "developer", "subject": {"type": "user", "id": RMS_USER_ID}}]
+    # the student accepted the invite, the cached answer is used until it expires
+    assert not _has_access(api)
+
+    assert server.count("GET", roles_path) == 1
+
+
+def test_repo_access_cache_expires(server):
+    api, _ = _make_api(server, repo_access_cache_ttl=0.05)
+    server.roles[STUDENT_REPO] = [{"role": "developer", "subject": {"type": "user", "id": RMS_USER_ID}}]
+
+    assert _has_access(api)
+    time.sleep(0.1)
+    assert _has_access(api)
+
+    assert server.count("GET", f"/repos/{ORG_SLUG}/{STUDENT_REPO}/roles") == 2  # noqa: PLR2004
+
+
+def test_create_project_invalidates_repo_access(server):
+    api, _ = _make_api(server)
+    assert not _has_access(api)
+
+    api.create_project(RmsUser(id=RMS_USER_ID, username=USERNAME, name=""), STUDENTS_GROUP, PUBLIC_REPO)
+
+    assert _has_access(api)
+    assert server.count("GET", f"/repos/{ORG_SLUG}/{STUDENT_REPO}/roles") == 2  # noqa: PLR2004
+
+
+def test_iam_token_is_minted_inline_without_refresher(server):
+    api, minted = _make_api(server, iam_token_refresh_interval=0.5)
+
+    _has_access(api)
+    api.check_user_has_repo_access(RMS_USER_ID, "other", STUDENTS_GROUP)
+    time.sleep(0.6)
+    api.check_user_has_repo_access(RMS_USER_ID, "third", STUDENTS_GROUP)
+
+    assert minted == ["iam-token-1", "iam-token-2"]
+    assert [request[2] for request in server.requests] == [
+        "Bearer iam-token-1",
+        "Bearer iam-token-1",
+        "Bearer iam-token-2",
+    ]
+
+
+def test_iam_token_refresher_keeps_requests_off_token_minting(server):
+    api, minted = _make_api(server, iam_token_refresh_interval=0.05)
+
+    refresher = api.start_iam_token_refresher()
+    try:
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while len(minted) < 2 and time.monotonic() < deadline:  # noqa: PLR2004
+            time.sleep(0.01)
+        for _ in range(5):
+            _has_access(api)
+            api._forget_repo_access(RMS_USER_ID, STUDENT_REPO)
+    finally:
+        api.stop_iam_token_refresher()
+        refresher.join(WAIT_TIMEOUT)
+
+    assert not refresher.is_alive()
+    assert len(minted) >= 2  # noqa: PLR2004
+    # requests only read the token of the refresher
+    assert api.minting_threads == {refresher.name}
+    assert all(request[2] in {f"Bearer {token}" for token in minted} for request in server.requests)
+
+
+def test_iam_token_refresher_survives_errors(server):
+    api, _ = _make_api(server)
+    calls = []
+
+    def get_iam_token():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("IAM is unavailable")
+        return "iam-token"
+
+    api._get_iam_token = get_iam_token
+    refresher = IamTokenRefresher(api, refresh_interval=3600, retry_interval=0.01)
+    refresher.start()
+    try:
+        deadline = time.monotonic() + WAIT_TIMEOUT
+        while api._iam_token is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        refresher.stop()
+        refresher.join(WAIT_TIMEOUT)
+
+    assert api._iam_token == "iam-token"
+    assert len(calls) == 2  # noqa: PLR2004
+
+
+def test_rms_users_are_cached(server):
+    api, _ = _make_api(server)
+    api._get_cloud_id_by_yandex_login = lambda login: f"cloud-{login}"
+    server.users[f"cloud-id:cloud-{USERNAME}"] = {"id": RMS_USER_ID, "username": USERNAME, "display_name": "Test"}
+
+    for _ in range(3):
+        assert api.get_rms_user_by_username(USERNAME) == RmsUser(id=RMS_USER_ID, username=USERNAME, name="Test")
+        with pytest.raises(RmsUserNotFoundException):
+            api.get_rms_user_by_username("unknown")
+
+    assert server.count("GET", f"/users/cloud-id:cloud-{USERNAME}") == 1
+    assert server.count("GET", "/users/cloud-id:cloud-unknown") == 1
@@ -0,0 +1,62 @@
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from manytask.database import DataBaseApi, DatabaseConfig
+from manytask.models import Base, Course, Grade, UserOnCourse
+from manytask.utils.synthetic import SyntheticConfig, generate, main
+
+
+def _database_url(tmp_path, name="synthetic.db"):
+    database_url = f"sqlite:///{tmp_path / name}"
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    return database_url
+
+
+def _db_api(tmp_path, name="synthetic.db"):
+    return DataBaseApi(DatabaseConfig(database_url=_database_url(tmp_path, name), instance_admin_username="admin"))
+
+
+def test_generate_dense_courses(tmp_path):
+    db_api = _db_api(tmp_path)
+
+    courses = generate(db_api, SyntheticConfig(namespaces=2, courses=3, groups=2, tasks=3, students=5))
+
+    assert [course.name for course in courses] == ["synthetic_course_0", "synthetic_course_1", "synthetic_course_2"]
+    with Session(db_api.engine) as session:
+        assert list(session.scalars(select(Course.namespace_id).order_by(Course.id))) == [1, 2, 1]
+        assert session.scalar(select(func.count(Grade.id))) == 3 * 5 * 2 * 3
+        assert session.scalar(select(func.count()).where(UserOnCourse.final_grade.is_(None))) == 0
+    for course in courses:
+        assert len(course.tasks) == 6  # noqa: PLR2004
+        scores = db_api.get_all_scores_with_names(course.name)
+        assert sorted(scores) == sorted(course.students)
+        assert all(len(task_scores) == len(course.tasks) for task_scores, *_ in scores.values())
+
+
+@pytest.mark.parametrize("density", [0.0, 0.3])
+def test_generate_sparse_course_with_seed(tmp_path, density):
+    config = SyntheticConfig(namespaces=0, groups=3, tasks=4, students=20, density=density, seed=7)
+    first, second = _db_api(tmp_path, "first.db"), _db_api(tmp_path, "second.db")
+
+    (course,) = generate(first, config)
+    generate(second, config)
+
+    scores = first.get_all_scores_with_names(course.name)
+    graded = sum(len(task_scores) for task_scores, *_ in scores.values())
+    assert graded <= density * len(course.students) * len(course.tasks) * 1.5
+    assert first.get_course(course.name).namespace_id is None
+    assert second.get_all_scores_with_names(course.name) == scores
+
+
+def test_cli(tmp_path, capsys):
+    database_url = _database_url(tmp_path)
+
+    main(["--database-url", database_url, "--no-migrations", "--courses", "2", "--students", "3", "--prefix", "load"])
+
+    assert capsys.readouterr().out.splitlines() == [
+        "load_course_0: 3 students, 100 tasks, token load_course_0-token",
+        "load_course_1: 3 students, 100 tasks, token load_course_1-token",
+    ]
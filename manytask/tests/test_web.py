@@ -216,6 +216,55 @@ def test_course_page_only_with_valid_session(app, mock_gitlab_oauth):
             assert response.location == f"/{TEST_COURSE_NAME}/create_project"
 
 
+def test_create_project_stores_student_repo(app, mock_gitlab_oauth, mock_course):
+    app.config["WTF_CSRF_ENABLED"] = False
+    CSRFProtect(app)
+    mock_course.token = TEST_TOKEN
+    app.oauth = mock_gitlab_oauth
+    with (
+        app.test_request_context(),
+        app.test_client() as client,
+        patch("manytask.web.validate_csrf"),
+        patch.object(app.rms_api, "check_project_exists") as mock_check_project_exists,
+    ):
+        set_session(client, build_test_session(include_manytask=True))
+
+        response = client.post(f"/{TEST_COURSE_NAME}/create_project", data={"secret": TEST_SECRET})
+        assert response.status_code == HTTPStatus.FOUND
+        assert response.location == f"/{TEST_COURSE_NAME}/"
+
+        # the course page trusts the repo recorded on creation
+        response = client.get(f"/{TEST_COURSE_NAME}/")
+        assert response.status_code == HTTPStatus.OK
+        mock_check_project_exists.assert_not_called()
+
+    stored_repo = app.storage_api.get_student_repo(TEST_COURSE_NAME, TEST_USERNAME)
+    assert stored_repo.url == f"{GITLAB_BASE_URL}/{TEST_STUDENTS_GROUP}/{TEST_USERNAME}"
+
+
+def test_create_project_skips_provisioned_repo(app, mock_gitlab_oauth, mock_course):
+    app.config["WTF_CSRF_ENABLED"] = False
+    CSRFProtect(app)
+    mock_course.token = TEST_TOKEN
+    app.oauth = mock_gitlab_oauth
+    repo_url = f"{GITLAB_BASE_URL}/{TEST_STUDENTS_GROUP}/{TEST_USERNAME}"
+    app.storage_api.store_student_repo(TEST_COURSE_NAME, TEST_USERNAME, repo_url, "42")
+    with (
+        app.test_request_context(),
+        app.test_client() as client,
+        patch("manytask.web.validate_csrf"),
+        patch.object(app.rms_api, "create_project") as mock_create_project,
+    ):
+        set_session(client, build_test_session(include_manytask=True))
+
+        response = client.post(f"/{TEST_COURSE_NAME}/create_project", data={"secret": TEST_SECRET})
+        assert response.status_code == HTTPStatus.FOUND
+        assert response.location == f"/{TEST_COURSE_NAME}/"
+
+    mock_create_project.assert_not_called()
+    assert app.storage_api.get_student_repo(TEST_COURSE_NAME, TEST_USERNAME).repo_id == "42"
+
+
 def test_signup_get(app):
     CSRFProtect(app)
     with app.test_request_context():